@@ -1,55 +1,72 @@
+import os
+import sys
+
+# --- SECOND-LAUNCH FAST PATH ---
+# Hand the launch to an already running instance before the GUI stack is imported,
+# so a second launch (e.g. --show, --add "title" --at ...) exits within milliseconds.
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support() # Projection worker processes re-run a frozen executable
+    if sys.argv[1:2] and sys.argv[1] in ("add", "list", "agenda", "slots", "snooze", "dismiss", "metrics"):
+        import reminder_cli # Scriptable client; talks to the running instance or the store, never Tk
+        sys.exit(reminder_cli.main(sys.argv[1:]))
+    if sys.argv[1:2] == ["daemon"]:
+        import reminder_daemon # Headless multi-profile scheduler for shared machines
+        sys.exit(reminder_daemon.main(sys.argv[2:]))
+    import reminder_ipc
+    forwarded_exit_code = reminder_ipc.forward_to_running_instance(
+        os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__)),
+        sys.argv[1:])
+    if forwarded_exit_code is not None:
+        sys.exit(forwarded_exit_code)
+
 import json
 from datetime import date, datetime, time, timedelta # Ensure time is imported from datetime
-from dateutil.relativedelta import relativedelta
 import uuid
-import os
-import tkinter as tk
-from tkinter import ttk # Import Themed Tkinter
-from tkinter import font as tkFont
-from tkinter import messagebox
-from tkcalendar import Calendar
-from PIL import Image, ImageTk
-import schedule
 import time as py_time # Renamed to avoid conflict with datetime.time
 import threading
-import sys
-import pystray
-from pystray import MenuItem as item, Menu
+# Spawned projection workers re-run this script as __mp_main__ before they unpickle their
+# reminder_projection.expand_chunk job; they never touch the GUI, so they skip its imports.
+if __name__ != "__mp_main__":
+    import tkinter as tk
+    from tkinter import ttk # Import Themed Tkinter
+    from tkinter import font as tkFont
+    from tkinter import messagebox
+    from tkcalendar import Calendar
+    from PIL import Image, ImageTk
+    import pystray
+    from pystray import MenuItem as item, Menu
 import atexit
+import contextlib
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import queue
+import bisect
+import itertools
+from collections import OrderedDict, deque
+import cProfile
+import pstats
+import tracemalloc
 import traceback
-
-# --- PATH HELPER FUNCTIONS (FOR PYINSTALLER COMPATIBILITY) ---
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        # For development, or if not bundled by PyInstaller
-        # Use the directory of the script file
-        base_path = os.path.abspath(os.path.dirname(__file__))
-    return os.path.join(base_path, relative_path)
-
-def data_file_path(filename):
-    """ Get path for data files, typically next to EXE or script """
-    if getattr(sys, 'frozen', False):
-        # Running as a bundled executable (PyInstaller)
-        exe_dir = os.path.dirname(sys.executable)
-        # If running from 'dist', look in the parent directory
-        if os.path.basename(exe_dir).lower() == 'dist':
-            application_path = os.path.dirname(exe_dir)
-        else:
-            # Otherwise, look next to the executable
-            application_path = exe_dir
-    else:
-        # Running as a script
-        application_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(application_path, filename)
+import reminder_ipc
+import reminder_api
+import reminder_projection
+import reminder_watch
+import reminder_snapshot
+import reminder_state
+import reminder_shared_agenda
+from reminder_engine import CoreEngine
+from reminder_core import (
+    resource_path, data_file_path, APP_NAME, RECURRENCE_TYPES, END_CONDITION_TYPES, MAX_OCCURRENCES,
+    SNOOZE_OPTIONS, read_reminders_file, write_reminders_file, StoreLock, new_reminder_record, parse_when,
+    format_time_to_ampm, format_countdown, FILTER_VIEWS, SORT_FIELDS, filter_reminders, sort_reminders, NextDueIndex,
+    recurrence_type_from_name, list_query, agenda_query, resolve_reminder_id, DEFAULT_SNOOZE_MINUTES, DEFAULT_AGENDA_DAYS,
+    DEFAULT_BUSIEST_SLOTS, HotWindowCache, reminder_summary, parse_wall_time, reminder_due_epoch, stamp_due_times, system_clock,
+    DuplicateIndex, DUPLICATE_POLICIES, DEFAULT_DUPLICATE_POLICY, add_deduplicated
+)
 
 # --- CONSTANTS ---
-APP_NAME = "Personal Reminder"
+# Path helpers, APP_NAME and the recurrence/snooze constants live in reminder_core
 # Use path helpers for file locations
 LOGO_FILE = resource_path("logo.png")
 DATA_FILE = data_file_path("reminders.json")
@@ -59,48 +76,33 @@ LOCK_FILE = data_file_path('app.lock') # Lock file also next to exe/script
 INDIVIDUAL_NOTIFICATION_CHECK_INTERVAL_SECONDS = 60 # Check every minute instead of every second
 NOTIFICATION_WINDOW_MINUTES = 0 # As per your setting (affects check_and_notify_due_reminders old logic, new logic is different)
 
-# Recurring reminder constants
-RECURRENCE_TYPES = {
-    "None": None,
-    "Daily": "daily",
-    "Weekdays": "weekdays",
-    "Weekly": "weekly",
-    "Biweekly": "biweekly",
-    "Monthly": "monthly",
-    "Yearly": "yearly"
-}
-
-# End condition types
-END_CONDITION_TYPES = {
-    "Never": "never",
-    "After": "occurrences",
-    "On Date": "date"
-}
-
-# Maximum number of occurrences for "After" end condition
-MAX_OCCURRENCES = 999
-
-SNOOZE_OPTIONS = {
-    "5 minutes": 5,
-    "10 minutes": 10,
-    "15 minutes": 15,
-    "30 minutes": 30,
-    "1 hour": 60
-}
-
 # --- LOGGING SETUP ---
-def setup_logging():
-    """Set up logging configuration for the application."""
-    log_file = data_file_path("app.log")
+DEFAULT_LOG_LEVEL = "INFO" # Override with --log-level or "log_level" in app_config.json
+LOG_MAX_BYTES = 1024*1024 # 1MB per file
+LOG_BACKUP_COUNT = 5
+log_queue_listener = None # Background thread that performs the actual log I/O
+
+def setup_logging(level_name=DEFAULT_LOG_LEVEL, log_file=None):
+    """Set up logging configuration for the application.
+
+    Callers only enqueue records through a QueueHandler; a QueueListener thread
+    formats them and writes to the rotating file (app.log next to the store
+    unless `log_file` is given) and the console, so disk I/O never happens on
+    the Tk or scheduler threads. Called once from the main block, so importing
+    this module (tests, projection workers) creates no app.log.
+    """
+    global log_queue_listener
+    log_file = log_file or data_file_path("app.log")
     log_format = '%(asctime)s - %(levelname)s - %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S'
     
     # Create logger
     logger = logging.getLogger(APP_NAME)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(resolve_log_level(level_name))
+    logger.propagate = False
     
     # Create handlers
-    file_handler = RotatingFileHandler(log_file, maxBytes=1024*1024, backupCount=5)  # 1MB per file, 5 backups
+    file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
     console_handler = logging.StreamHandler()
     
     # Create formatters and add them to handlers
@@ -108,167 +110,501 @@ def setup_logging():
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Route records through a queue to the real handlers
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    log_queue_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_queue_listener.start()
+    atexit.register(stop_logging)
     
     return logger
 
+def resolve_log_level(level_name):
+    """Map a level name such as 'debug' to its logging constant, falling back to the default."""
+    level = logging.getLevelName(str(level_name).upper())
+    return level if isinstance(level, int) else logging.getLevelName(DEFAULT_LOG_LEVEL)
+
+def set_log_level(level_name):
+    logger.setLevel(resolve_log_level(level_name))
+    logger.info("Log level set to %s", logging.getLevelName(logger.level))
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global log_queue_listener
+    if log_queue_listener:
+        log_queue_listener.stop()
+        for handler in log_queue_listener.handlers:
+            handler.close()
+        log_queue_listener = None
+
 # Initialize logger
-logger = setup_logging()
+logger = logging.getLogger(APP_NAME) # Handlers are attached by setup_logging()
 
 # --- ERROR HANDLING ---
-def log_error(error_msg, exc_info=None):
+# The helpers take %-style arguments so messages are only formatted when the level is enabled.
+def log_error(error_msg, *args, exc_info=None):
     """Log an error message with optional exception info."""
-    if exc_info:
-        logger.error(f"{error_msg}\n{traceback.format_exc()}")
-    else:
-        logger.error(error_msg)
+    logger.error(error_msg, *args, exc_info=bool(exc_info))
+
+def log_warning(warning_msg, *args):
+    """Log a warning message."""
+    logger.warning(warning_msg, *args)
 
-def log_info(info_msg):
+def log_info(info_msg, *args):
     """Log an info message."""
-    logger.info(info_msg)
+    logger.info(info_msg, *args)
 
-def log_debug(debug_msg):
+def log_debug(debug_msg, *args):
     """Log a debug message."""
-    logger.debug(debug_msg)
+    logger.debug(debug_msg, *args)
+
+# --- METRICS ---
+# Bucket upper bounds for the built-in histograms. The last bucket is open-ended.
+LATENESS_BUCKETS_SECONDS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+TICK_DURATION_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+REMINDERS_SCANNED_BUCKETS = (10, 100, 1000, 10000, 100000)
+TK_LAG_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+TK_BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+METRICS_EXPORT_INTERVAL_SECONDS = 300 # How often --metrics-file is refreshed by the scheduler
+
+class Histogram:
+    """Fixed-bucket histogram. Recording is a bisect plus a few additions under a lock."""
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min: self.min = value
+            if self.max is None or value > self.max: self.max = value
+
+    def percentile(self, pct):
+        """Approximate percentile: the upper bound of the bucket holding the pct-th value."""
+        if not self.count: return None
+        rank = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[idx] if idx < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        with self._lock:
+            buckets = {f"le_{bound}": c for bound, c in zip(self.bounds, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "sum": self.total,
+                "min": self.min,
+                "max": self.max,
+                "mean": (self.total / self.count) if self.count else None,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "buckets": buckets
+            }
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms, exportable as a JSON snapshot."""
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {
+            "fire_lateness_seconds": Histogram(LATENESS_BUCKETS_SECONDS),
+            "tick_duration_ms": Histogram(TICK_DURATION_BUCKETS_MS),
+            "reminders_scanned_per_tick": Histogram(REMINDERS_SCANNED_BUCKETS),
+            "tk_heartbeat_lag_ms": Histogram(TK_LAG_BUCKETS_MS),
+            "tk_batch_size": Histogram(TK_BATCH_SIZE_BUCKETS)
+        }
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _set_gauge_locked(self, name, value):
+        self.gauges[name] = value
+        peak_name = f"{name}_max" # Track the high-water mark alongside every gauge
+        if peak_name not in self.gauges or value > self.gauges[peak_name]:
+            self.gauges[peak_name] = value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._set_gauge_locked(name, value)
+
+    def adjust_gauge(self, name, delta):
+        with self._lock:
+            self._set_gauge_locked(name, self.gauges.get(name, 0) + delta)
+
+    def observe(self, name, value):
+        self.histograms[name].record(value)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {
+            "app": APP_NAME,
+            "pid": os.getpid(),
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "taken_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {name: h.snapshot() for name, h in self.histograms.items()}
+        }
+
+    def export_json(self, file_path):
+        """Write the current snapshot to file_path. Returns the path on success, None on failure."""
+        try:
+            with open(file_path, 'w') as f:
+                json.dump(self.snapshot(), f, indent=4)
+            log_info("Metrics snapshot written to %s", file_path)
+            return file_path
+        except Exception as e:
+            log_error("Error writing metrics snapshot to %s: %s", file_path, e)
+            return None
+
+metrics = MetricsRegistry()
+metrics_export_file = None # Set from --metrics-file; refreshed by the scheduler and on exit
+
+def export_metrics_snapshot(file_path=None):
+    """Export metrics to file_path, or to a timestamped file next to app.log."""
+    if not file_path:
+        file_path = data_file_path(f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    metrics.set_gauge("store_pages_read", resident_store.pages_read)
+    return metrics.export_json(file_path)
+
+# --- PROFILING ---
+PROFILE_TOP_STATS = 40 # Rows written to the human-readable cProfile report
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP_ALLOCATIONS = 30
+
+class ProfilingSession:
+    """On-demand cProfile + tracemalloc capture for the Tk and scheduler threads.
+
+    cProfile only sees the thread that enabled it, so each participating thread
+    calls sync_thread() from its own loop; it attaches a profiler while the
+    session is active and dumps that thread's report once it is stopped.
+    """
+    def __init__(self):
+        self.active = False
+        self.session_stamp = None
+        self._profilers = {}
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()
+
+    def report_path(self, suffix):
+        return data_file_path(f"profile_{self.session_stamp}_{suffix}")
+
+    def start(self):
+        with self._lock:
+            if self.active: return False
+            self.active = True
+            self.session_stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+        log_info("Profiling started (session %s).", self.session_stamp)
+        return True
+
+    def stop(self):
+        """End the session and write the tracemalloc report. Thread reports follow as each thread detaches."""
+        with self._lock:
+            if not self.active: return False
+            self.active = False
+        self.write_tracemalloc_report()
+        log_info("Profiling stopped (session %s).", self.session_stamp)
+        return True
+
+    def sync_thread(self, thread_label):
+        """Attach or detach the calling thread's profiler to match the session state."""
+        if self.active and thread_label not in self._profilers:
+            profiler = cProfile.Profile()
+            self._profilers[thread_label] = profiler
+            profiler.enable()
+        elif not self.active and thread_label in self._profilers:
+            self.detach_current_thread(thread_label)
+
+    def detach_current_thread(self, thread_label):
+        profiler = self._profilers.pop(thread_label, None)
+        if not profiler: return None
+        profiler.disable()
+        stats_path = self.report_path(f"{thread_label}.prof")
+        try:
+            profiler.dump_stats(stats_path)
+            with open(self.report_path(f"{thread_label}.txt"), 'w') as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(PROFILE_TOP_STATS)
+            log_info("Profile for %s thread written to %s", thread_label, stats_path)
+        except Exception as e:
+            log_error("Error writing profile for %s thread: %s", thread_label, e)
+            return None
+        return stats_path
+
+    def write_tracemalloc_report(self):
+        if not tracemalloc.is_tracing(): return None
+        report_path = self.report_path("tracemalloc.txt")
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            with open(report_path, 'w') as f:
+                f.write(f"Traced memory: current={current_bytes} bytes, peak={peak_bytes} bytes\n")
+                f.write(f"Top {TRACEMALLOC_TOP_ALLOCATIONS} allocations by line:\n")
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            log_info("Allocation report written to %s", report_path)
+        except Exception as e:
+            log_error("Error writing allocation report: %s", e)
+            report_path = None
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        return report_path
+
+profiling_session = ProfilingSession()
+
+def sync_tk_profiler():
+    profiling_session.sync_thread("tk")
+
+# --- RESPONSIVENESS WATCHDOG ---
+WATCHDOG_HEARTBEAT_MS = 250 # How often the Tk thread checks in
+WATCHDOG_STALL_THRESHOLD_SECONDS = 0.5 # Heartbeat lag beyond this counts as a stall
+WATCHDOG_STACK_FRAMES = 12 # Frames kept per captured stack
+STALL_REPORT_SIZE = 20 # Most recent stalls kept for the tray report
+STALL_MENU_SIZE = 5 # Stalls listed in the tray "UI stalls" submenu
+APP_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class TkWatchdog:
+    """Reports which handler froze the Tk main loop.
+
+    The Tk thread reschedules a heartbeat with root.after every
+    WATCHDOG_HEARTBEAT_MS. A helper thread watches the time of the last beat;
+    once it is overdue by more than the threshold, it captures the Tk thread's
+    stack with sys._current_frames(). The next heartbeat, when the loop gets
+    going again, logs the stall with its duration and the app frame that was
+    running, and adds it to a rolling report.
+    """
+    def __init__(self, heartbeat_ms=WATCHDOG_HEARTBEAT_MS, threshold_seconds=WATCHDOG_STALL_THRESHOLD_SECONDS,
+                 report_size=STALL_REPORT_SIZE):
+        self.heartbeat_ms = heartbeat_ms
+        self.threshold_seconds = threshold_seconds
+        self.stalls = deque(maxlen=report_size)
+        self._root = None
+        self._tk_thread_id = None
+        self._last_beat = None
+        self._captured = None # Stack of the stall in progress, set by the helper thread
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, root):
+        """Begin watching. Must be called on the Tk thread."""
+        self._root = root
+        self._tk_thread_id = threading.get_ident()
+        self._last_beat = py_time.perf_counter()
+        self._stop_event.clear()
+        root.after(self.heartbeat_ms, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="TkWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _beat(self):
+        now = py_time.perf_counter()
+        with self._lock:
+            lag = max(0.0, now - self._last_beat - self.heartbeat_ms / 1000.0)
+            self._last_beat = now
+            captured, self._captured = self._captured, None
+        metrics.observe("tk_heartbeat_lag_ms", lag * 1000.0)
+        if captured is not None:
+            self._record_stall(lag, captured)
+        if not self._stop_event.is_set():
+            try:
+                self._root.after(self.heartbeat_ms, self._beat)
+            except Exception as e: # The root was destroyed
+                log_debug("Watchdog heartbeat stopped: %s", e)
+
+    def _watch(self):
+        while not self._stop_event.wait(self.threshold_seconds / 2):
+            self.check()
+
+    def check(self):
+        """Capture the Tk thread's stack if its heartbeat is overdue. Called from the helper thread."""
+        with self._lock:
+            overdue = py_time.perf_counter() - self._last_beat - self.heartbeat_ms / 1000.0
+            if overdue < self.threshold_seconds or self._captured is not None:
+                return False
+        frame = sys._current_frames().get(self._tk_thread_id)
+        if frame is None:
+            return False
+        stack = traceback.extract_stack(frame, limit=WATCHDOG_STACK_FRAMES)
+        del frame
+        with self._lock:
+            if self._captured is None:
+                self._captured = stack
+        return True
+
+    def _record_stall(self, duration, stack):
+        frame = offending_frame(stack)
+        stall = {
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "seconds": round(duration, 3),
+            "function": frame.name,
+            "location": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            "stack": traceback.format_list(stack)
+        }
+        self.stalls.append(stall)
+        metrics.incr("ui_stalls")
+        log_warning("UI stalled for %.2f s in %s (%s).", duration, stall["function"], stall["location"])
+        log_debug("Stalled Tk thread stack:\n%s", "".join(stall["stack"]))
+
+    def report_text(self):
+        """The rolling stall report, most recent first."""
+        stalls = list(self.stalls)
+        if not stalls:
+            return "No UI stalls recorded.\n"
+        lines = [f"{len(stalls)} most recent UI stalls (threshold {self.threshold_seconds:.2f} s), most recent first:", ""]
+        for stall in reversed(stalls):
+            lines.append(f"{stall['at']}  {stall['seconds']:.2f} s in {stall['function']} ({stall['location']})")
+            lines.extend("    " + line.rstrip("\n").replace("\n", "\n    ") for line in stall["stack"])
+            lines.append("")
+        return "\n".join(lines)
+
+    def write_report(self, file_path=None):
+        """Write report_text() to file_path, or a timestamped file next to app.log. Returns the path or None."""
+        file_path = file_path or data_file_path(f"stalls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        try:
+            with open(file_path, 'w') as f:
+                f.write(self.report_text())
+            log_info("Stall report written to %s", file_path)
+            return file_path
+        except Exception as e:
+            log_error("Error writing stall report to %s: %s", file_path, e)
+            return None
+
+def offending_frame(stack):
+    """The innermost frame in the app's own code; library frames only say how it was blocked."""
+    for frame in reversed(stack):
+        if os.path.dirname(os.path.abspath(frame.filename)) == APP_SOURCE_DIR:
+            return frame
+    return stack[-1]
+
+tk_watchdog = TkWatchdog()
 
 # --- SINGLE INSTANCE LOCK ---
+instance_lock = None
+command_server = None
+
 def check_single_instance():
     # This check should ideally only prevent multiple *full app instances*.
-    # The `startup_check` might be okay to run even if the main app is running,
-    # or we ensure it's very quick and cleans up its own (if it used a lock).
-    # For now, this global lock will prevent any second launch if lock exists.
+    # The `startup_check` mode runs on its own and never takes the lock.
+    # Later launches normally never get here: the fast path at the top of this file
+    # forwards them over the command channel. We only end up with a held lock here
+    # if the running instance is not answering on that channel.
+    global instance_lock, command_server
 
-    # Determine the correct lock file path based on how the app is run
+    # Lock file is always next to the running executable (or script), even when running from dist
     current_app_path = sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__)
     current_dir = os.path.dirname(current_app_path)
-    
-    # If running from dist, the lock file is in dist. Otherwise, it's in the base dir.
-    # Note: The data_file_path logic for the executable looks *up* if in dist, 
-    # but the lock file logic here needs to check relative to the executable itself.
-    # Let's use a more direct check based on the running executable's location.
-    is_running_from_dist_dir = os.path.basename(current_dir).lower() == 'dist'
-    actual_lock_file_path = os.path.join(current_dir, 'app.lock') # Lock file is always next to the running executable
+    actual_lock_file_path = os.path.join(current_dir, reminder_ipc.LOCK_FILE_NAME)
 
-    log_debug(f"Checking for lock file: {actual_lock_file_path}")
-
-    if os.path.exists(actual_lock_file_path):
-        log_info(f"Lock file '{actual_lock_file_path}' exists.")
-        try:
-            with open(actual_lock_file_path, 'r') as f:
-                pid_str = f.read().strip()
-                pid = int(pid_str) if pid_str.isdigit() else -1
-            log_debug(f"Found PID {pid} in lock file.")
-
-            # Attempt to check if the process is actually running
-            # This is a basic attempt and might not work in all environments or permissions.
-            is_process_running = False
-            if pid > 0:
-                try:
-                    # On Windows, signal 0 checks existence without sending a signal
-                    os.kill(pid, 0) 
-                    is_process_running = True
-                    log_debug(f"Process with PID {pid} appears to be running.")
-                except OSError as e:
-                    # Process does not exist or permission error
-                    log_debug(f"Process with PID {pid} check failed: {e}")
-                    is_process_running = False # Process is not running or we can't verify
-                except Exception as e:
-                     log_error(f"Unexpected error checking PID {pid}: {e}", exc_info=True)
-                     is_process_running = False # Assume not running on error
-
-            if is_process_running:
-                 log_info("Another instance is confirmed to be running.")
-                 messagebox.showwarning(APP_NAME, "Another instance of the application is already running.")
-                 sys.exit(0) # Exit if another instance is running
-            else:
-                 # Lock file exists but process is not running. Clean it up.
-                 log_info(f"Lock file '{actual_lock_file_path}' found but process {pid} is not running. Attempting to clean up.")
-                 try:
-                     os.remove(actual_lock_file_path)
-                     log_info("Stale lock file cleaned up successfully.")
-                 except Exception as e:
-                     log_error(f"Error cleaning up stale lock file '{actual_lock_file_path}': {e}", exc_info=True)
-                     # Even if cleanup fails, we assume the process is not running and continue
-
-        except FileNotFoundError: # Should be caught by os.path.exists, but for safety
-             log_debug("Lock file disappeared during check.")
-             pass # File was deleted between check and open
-        except Exception as e: # Catch errors reading the PID from the file
-            log_error(f"Error reading or processing PID from lock file '{actual_lock_file_path}': {e}", exc_info=True)
-            log_info(f"Assuming lock file '{actual_lock_file_path}' is stale due to read error. Attempting to clean up.")
-            try:
-                 os.remove(actual_lock_file_path)
-                 log_info("Stale lock file cleaned up successfully after read error.")
-            except Exception as e_del:
-                 log_error(f"Error cleaning up lock file '{actual_lock_file_path}' after read error: {e_del}", exc_info=True)
-            # Continue execution as we assume the previous instance is not running
-
-    # If no lock file exists, or if a stale one was cleaned up, create a new one.
-    # Only create the lock file if not running a utility command (like startup_check)
+    # Only take the lock if not running a utility command (like startup_check)
     is_utility_run = len(sys.argv) > 1 and sys.argv[1] in ['startup_check', 'start_minimized']
-    if not is_utility_run:
-        try:
-            with open(actual_lock_file_path, 'w') as f:
-                f.write(str(os.getpid()))
-            log_debug(f"Created new lock file with PID {os.getpid()} at '{actual_lock_file_path}'.")
-            # Register cleanup *only* if we successfully created the lock file
-            atexit.register(lambda file_path=actual_lock_file_path: cleanup_lock_file(file_path))
-        except Exception as e:
-            log_error(f"Error creating lock file '{actual_lock_file_path}': {e}", exc_info=True)
-            # Application might continue, but without lock protection
+    if is_utility_run:
+        return
 
-def cleanup_lock_file(file_path):
-    """Cleans up the specified lock file on exit."""
-    log_debug(f"Attempting to clean up lock file: {file_path}")
-    if os.path.exists(file_path):
-        try:
-            os.remove(file_path)
-            log_debug(f"Lock file '{file_path}' cleaned up successfully.")
-        except Exception as e:
-            log_error(f"Error cleaning up lock file '{file_path}': {e}", exc_info=True)
+    log_debug("Acquiring instance lock: %s", actual_lock_file_path)
+    try:
+        instance_lock = reminder_ipc.InstanceLock(actual_lock_file_path)
+        lock_acquired = instance_lock.acquire()
+    except Exception as e:
+        log_error("Error creating lock file '%s': %s", actual_lock_file_path, e, exc_info=True)
+        return # Application might continue, but without lock protection
+
+    if not lock_acquired:
+        log_info("Another instance is confirmed to be running.")
+        messagebox.showwarning(APP_NAME, "Another instance of the application is already running.")
+        sys.exit(0) # Exit if another instance is running
+    atexit.register(release_single_instance)
+
+    try:
+        command_server = reminder_ipc.CommandServer(reminder_ipc.channel_address(current_dir))
+        register_command_handlers(command_server)
+        command_server.start()
+    except Exception as e:
+        log_error("Error starting command channel: %s", e, exc_info=True)
+        command_server = None # Later launches will fall back to the "already running" warning
+
+def release_single_instance():
+    """Stops the command channel and releases the instance lock on exit."""
+    if command_server:
+        command_server.stop()
+    if instance_lock:
+        instance_lock.release()
 
 # --- GLOBAL VARIABLES ---
 tk_root_window = None
-scheduler_stop_event = threading.Event()
+scheduler_clock = system_clock # Tests and simulations swap in a reminder_core.SimulatedClock
 app_instance_ref = None
 tray_icon_object = None
 main_gui_visible = True
 app_to_run_path = None # Global variable for autostart path
 
 # --- DATA HANDLING FUNCTIONS --- (Your existing ones)
+# Serializes load-modify-save cycles between the Tk, scheduler, command channel and API threads
+store_write_lock = threading.RLock()
+
+@contextlib.contextmanager
+def store_transaction():
+    """store_write_lock plus the store's cross-process StoreLock, so a load-modify-save cycle doesn't
+    lose (or get lost by) a concurrent write from the CLI, the HTTP API or reminder_dedup.py."""
+    with store_write_lock, StoreLock(DATA_FILE):
+        yield
+
 def load_reminders():
-    if not os.path.exists(DATA_FILE):
-        log_debug(f"Data file {DATA_FILE} does not exist. Returning empty list.")
-        return []
     try:
-        with open(DATA_FILE, 'r') as f:
-            content = f.read()
-            if not content.strip():
-                log_debug("Data file is empty. Returning empty list.")
-                return []
-            reminders = json.loads(content)
-            if not isinstance(reminders, list):
-                log_error("Data file does not contain a list. Returning empty list.")
-                return []
-            reminders.sort(key=lambda r: (str(r.get("date", "")), str(r.get("time", ""))))
-            log_debug(f"Successfully loaded {len(reminders)} reminders.")
-            return reminders
+        reminders, bytes_read = read_reminders_file(DATA_FILE)
+        metrics.incr("store_bytes_read", bytes_read)
+        metrics.incr("store_loads")
+        log_debug("Successfully loaded %d reminders.", len(reminders))
+        return reminders
     except Exception as e:
-        log_error(f"Error loading reminders from {DATA_FILE}", exc_info=True)
+        log_error("Error loading reminders from %s", DATA_FILE, exc_info=True)
         messagebox.showerror("Load Error", f"Could not load reminders from {DATA_FILE}.\nError: {e}")
         return []
 
 def save_reminders(reminders):
-    try:
-        reminders.sort(key=lambda r: (str(r.get("date", "")), str(r.get("time", ""))))
-        with open(DATA_FILE, 'w') as f:
-            json.dump(reminders, f, indent=4)
-        log_debug(f"Successfully saved {len(reminders)} reminders.")
-    except Exception as e:
-        log_error(f"Error saving reminders to {DATA_FILE}", exc_info=True)
-        messagebox.showerror("Save Error", f"Could not save reminders to {DATA_FILE}.\nError: {e}")
+    with store_transaction():
+        written_externally = store_watcher.changed_on_disk() # Not yet picked up by the file watcher
+        try:
+            bytes_written = write_reminders_file(DATA_FILE, reminders)
+            metrics.incr("store_bytes_written", bytes_written)
+            metrics.incr("store_saves")
+            log_debug("Successfully saved %d reminders.", len(reminders))
+        except Exception as e:
+            log_error("Error saving reminders to %s", DATA_FILE, exc_info=True)
+            # Saves also run on the scheduler, command and API threads; only the Tk thread may show a dialog
+            post_to_tk(messagebox.showerror, "Save Error", f"Could not save reminders to {DATA_FILE}.\nError: {e}")
+            return
+        changes = store_watcher.adopt(reminders)
+        duplicate_index.apply_diff(changes)
+        if written_externally and changes:
+            # Our own changes are applied by the caller; re-applying them along with the external ones is harmless
+            apply_store_changes(changes)
 
 def load_app_config():
     if not os.path.exists(CONFIG_FILE): return {}
@@ -278,7 +614,7 @@ def load_app_config():
             if not content.strip(): return {}
             return json.loads(content)
     except Exception as e:
-        log_error(f"Error loading app config: {e}")
+        log_error("Error loading app config: %s", e)
         return {}
 
 def save_app_config(config_data):
@@ -286,277 +622,765 @@ def save_app_config(config_data):
         with open(CONFIG_FILE, 'w') as f:
             json.dump(config_data, f, indent=4)
     except Exception as e:
-        log_error(f"Error saving app config: {e}")
-
-# --- TIME FORMATTING --- (Your existing one)
-def format_time_to_ampm(time_str_24h):
-    if not time_str_24h: return "N/A"
+        log_error("Error saving app config: %s", e)
+
+# --- RUNTIME STATE ---
+# Fired, dismissed and snoozed occurrences are logged next to the store (reminders.state.jsonl, see
+# reminder_state), so a firing or a snooze appends one short line instead of rewriting reminders.json
+runtime_state = None
+
+def store_state():
+    """The runtime state of the store at DATA_FILE."""
+    global runtime_state
+    state_path = reminder_state.state_file_path(DATA_FILE)
+    if runtime_state is None or runtime_state.path != state_path:
+        runtime_state = reminder_state.RuntimeState(state_path)
+    return runtime_state
+
+def load_effective_reminders(with_history=False):
+    """The stored reminders merged with their runtime state: current occurrence, notified, snoozed."""
+    return store_state().apply(load_reminders(), with_history)
+
+def find_reminder(reminder_id):
+    """The stored reminder with this id, or None."""
+    return next((r for r in load_reminders() if r.get("id") == reminder_id), None)
+
+# --- REMINDER CREATION ---
+def add_reminders(new_reminders, policy=None):
+    """Append reminders to the store with a single load and save.
+
+    New reminders that duplicate a stored one are added anyway, left out or merged into it according to
+    `policy` (default: duplicate_policy). Returns each new reminder as it is now stored.
+    """
+    policy = policy or duplicate_policy
+    with store_transaction():
+        reminders = load_reminders()
+        stored, changed, duplicates = add_deduplicated(reminders, new_reminders, duplicate_index, policy)
+        if changed:
+            save_reminders(reminders)
+    for reminder in duplicates:
+        metrics.incr("duplicates_found")
+        log_warning("Reminder '%s' on %s %s duplicates a stored one (%s).", reminder.get("title"),
+                    reminder.get("date"), reminder.get("time"), "added anyway" if policy == "warn" else policy)
+    for reminder in changed:
+        index_reminder(reminder)
+    note_reminders_changed(changed)
+    return stored
+
+def delete_reminders(reminder_ids):
+    """Remove reminders from the store with a single load and save. Returns how many were removed."""
+    wanted_ids = set(reminder_ids)
+    with store_transaction():
+        reminders = load_reminders()
+        kept = [r for r in reminders if r.get('id') not in wanted_ids]
+        if len(kept) != len(reminders):
+            save_reminders(kept)
+    for reminder_id in wanted_ids:
+        unindex_reminder(reminder_id)
+    note_reminders_changed([r for r in reminders if r.get('id') in wanted_ids])
+    return len(reminders) - len(kept)
+
+# --- CALENDAR COUNTS ---
+# Per-day counts for the month calendar and the date pickers; mutations above and
+# below invalidate just the months they touch
+month_counts = reminder_projection.MonthCountCache(lambda: load_effective_reminders(with_history=True))
+
+def note_reminders_changed(records):
+    """Every mutation reports the records it touched (before and after) here."""
+    month_counts.invalidate_for(records)
+    agenda_publisher.mark_dirty()
+
+# --- DUPLICATE DETECTION ---
+# Content hashes of every stored reminder (title, date, time, repeat), so adding one checks for a
+# duplicate in O(1). Built from the store on the first check and then kept current by the store diffs.
+duplicate_index = DuplicateIndex(lambda: load_reminders())
+duplicate_policy = DEFAULT_DUPLICATE_POLICY # "warn", "merge" or "skip"; see reminder_core
+
+def is_duplicate(reminder):
+    """Whether a reminder about to be added duplicates a stored one."""
+    with store_write_lock:
+        return duplicate_index.find(reminder, new=True) is not None
+
+# --- RESIDENT STORE ---
+# Only the hot window of the store (yesterday through +30 days, plus active series heads) stays in
+# memory for the HTTP API and the Today view; other views page their records in from disk per query.
+# Set "memory_budget_mb" in app_config.json (or --memory-budget-mb) to cap the resident bytes.
+def record_resident_store_size(resident_records, resident_bytes):
+    metrics.set_gauge("store_resident_records", resident_records)
+    metrics.set_gauge("store_resident_bytes", resident_bytes)
+    log_debug("Resident store: %d reminder(s), about %d bytes.", resident_records, resident_bytes)
+
+resident_store = HotWindowCache(DATA_FILE, on_refresh=record_resident_store_size)
+
+# --- NEXT-DUE INDEX ---
+NEXT_UP_MENU_SIZE = 5 # Reminders listed in the tray "Next up" submenu
+TRAY_REFRESH_INTERVAL_SECONDS = 30 # How often the tray tooltip countdown is refreshed
+
+next_due_index = NextDueIndex()
+
+# --- TIME SLOTS ---
+# Pending occurrences by the minute they fire (recurring series over the next 30 days), so the
+# Add/Edit windows can flag a time that is already taken as it is picked
+SLOT_CONFLICT_TITLES = 3 # Titles named in the Add/Edit windows' conflict note
+slot_index = reminder_projection.SlotIndex(lambda: load_effective_reminders())
+
+def index_reminder(reminder):
+    """Bring the due-time indexes in line with one reminder as it is now (drops it when nothing is pending)."""
+    next_due_index.upsert(reminder)
+    slot_index.upsert(reminder)
+
+def unindex_reminder(reminder_id):
+    next_due_index.discard(reminder_id)
+    slot_index.discard(reminder_id)
+
+# --- STORE WATCH ---
+# Edits made by other processes (the CLI's local fallback, a sync client, a text editor) are
+# picked up per record instead of reloading everything, and never overwrite an open Edit window
+store_watcher = reminder_watch.StoreWatcher(DATA_FILE)
+file_watcher = None # reminder_watch.FileWatcher, started with the scheduler
+
+def apply_store_changes(changes):
+    """Bring the next-due index, month counts, tray and window in line with changed records."""
+    with store_write_lock:
+        duplicate_index.apply_diff(changes)
+        for reminder in changes.removed:
+            unindex_reminder(reminder.get("id"))
+        current = store_state().apply(changes.added + [new for _, new in changes.changed])
+        for reminder in current:
+            if reminder.get("notified_individually", False):
+                unindex_reminder(reminder.get("id"))
+            else:
+                index_reminder(reminder)
+        note_reminders_changed(changes.removed + current + [old for old, _ in changes.changed])
+    log_info("Store changed on disk: %d added, %d changed, %d removed.",
+             len(changes.added), len(changes.changed), len(changes.removed))
+    refresh_tray_status()
+    post_to_tk(apply_store_changes_to_gui, changes)
+
+def check_store_for_external_changes():
+    """FileWatcher callback: diff the store against what this process last saved or loaded."""
     try:
-        t_obj = datetime.strptime(time_str_24h, "%H:%M").time()
-        return t_obj.strftime("%I:%M %p")
-    except ValueError:
-        return time_str_24h
+        with store_write_lock:
+            changes = store_watcher.check()
+            if changes:
+                apply_store_changes(changes)
+    except (OSError, ValueError) as e:
+        # Most likely caught mid-write by a non-atomic writer; the write's last event brings us back
+        log_warning("Could not read %s after an external change: %s", DATA_FILE, e)
+
+def start_file_watcher():
+    global file_watcher
+    file_watcher = reminder_watch.FileWatcher(DATA_FILE, check_store_for_external_changes)
+    file_watcher.start()
+
+def stop_file_watcher():
+    global file_watcher
+    if file_watcher:
+        file_watcher.stop()
+        file_watcher = None
+
+# --- WARM START ---
+# A binary snapshot of the parsed store and its indexes (reminders.json.snapshot) lets a launch
+# restore the next-due index, the hot window and today's reminders without parsing the store
+SNAPSHOT_REFRESH_INTERVAL_SECONDS = 600 # How often the scheduler rebuilds a stale snapshot (in the background)
+snapshot_keeper = reminder_snapshot.SnapshotKeeper(DATA_FILE)
+
+def restore_from_warm_start(warm):
+    """Startup state from a current snapshot. The watcher's hashes are decoded only when first needed."""
+    snapshot_keeper.note_current(warm)
+    store_watcher.restore(lambda: warm.section("known"), warm.source_stat_key)
+    next_due_index.restore(warm.section("due"))
+    resident_store.seed(warm.hot, warm.source_stat_key)
+    log_info("Warm start: restored %d pending reminder(s) of %d from the snapshot.",
+             len(next_due_index), warm.meta["records"])
+
+# --- SHARED AGENDA ---
+# The next week of reminders, published to reminders.json.agenda in a fixed binary layout so
+# the daily summary and the command-line client can read today's agenda without parsing the store
+AGENDA_WINDOW_DAYS = DEFAULT_AGENDA_DAYS
+
+class AgendaPublisher:
+    """Republishes the shared agenda on the core engine's worker after changes, once per burst."""
+    def __init__(self):
+        self.writer = None
+        self._pending = False
+        self._lock = threading.Lock()
+
+    def start(self, data_path):
+        self.writer = reminder_shared_agenda.AgendaWriter(data_path)
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        if self.writer is None: return
+        with self._lock:
+            if self._pending: return
+            self._pending = True
+        if core_engine.running:
+            core_engine.submit(self.publish)
+        else:
+            self.publish()
+
+    def publish(self):
+        with self._lock:
+            self._pending = False
+            writer = self.writer
+        if writer is None: return
+        try:
+            # Keys first: a write while the window is read leaves the agenda stale rather than wrong
+            source_keys = (reminder_watch.stat_key(writer.data_path),
+                           reminder_watch.stat_key(reminder_state.state_file_path(writer.data_path)))
+            count = writer.publish(store_state().apply(resident_store.snapshot()[0]), days=AGENDA_WINDOW_DAYS,
+                                   source_keys=source_keys)
+            metrics.incr("agenda_publishes")
+            log_debug("Published %d reminder(s) to the shared agenda.", count)
+        except (OSError, ValueError) as e:
+            log_warning("Could not publish the shared agenda: %s", e)
+
+    def stop(self):
+        with self._lock:
+            writer, self.writer = self.writer, None
+        if writer: writer.close()
+
+agenda_publisher = AgendaPublisher()
+
+def todays_reminders_for_summary(warm_start=None):
+    """Today's reminders for the daily summary: from the shared agenda if it is current, else from the
+    warm-start snapshot or the store."""
+    today = date.today()
+    shared = reminder_shared_agenda.read_agenda(DATA_FILE)
+    if shared and shared.usable_for(today):
+        return shared.day(today)
+    return get_all_todays_reminders(store_state().apply(warm_start.hot) if warm_start else None)
 
 # --- NOTIFICATION & SCHEDULER --- (Your existing, with your check_and_notify_due_reminders logic)
-def show_individual_reminder_popup_thread_safe(title, reminder_time_24h, reminder_id=None):
-    if tk_root_window:
-        tk_root_window.after(0, lambda t=title, rt=reminder_time_24h, rid=reminder_id: 
-                           actual_show_individual_popup(t, rt, rid))
+TK_CHANNEL_CAPACITY = 1000 # Events queued for the Tk thread before producers have to wait
+TK_CHANNEL_PUT_TIMEOUT_SECONDS = 2.0 # How long a producer waits for room before its event is dropped
+TK_CHANNEL_POLL_MS = 100 # Pump interval when Tcl can't take calls from other threads
+
+class TkEventChannel:
+    """Carries events from the scheduler, tray, watcher and servers to the Tk thread.
+
+    Producers append to a queue; one pump on the Tk thread runs every event
+    queued by then in a single pass, so a burst costs one UI pass. An event
+    posted with a coalesce key replaces a queued event with the same key
+    instead of queueing again ("refresh the list" ten times is one refresh).
+    When the queue holds `capacity` events, producers wait for the pump, and
+    drop the event after `put_timeout`; the Tk thread itself never waits.
+
+    Other threads never call into Tk directly. If Tcl was built with threads
+    (tkinter then forwards calls to the Tk thread), the first post into an
+    empty queue wakes the pump with one after(0). Otherwise the pump polls
+    every TK_CHANNEL_POLL_MS from the Tk thread.
+    """
+    def __init__(self, capacity=TK_CHANNEL_CAPACITY, put_timeout=TK_CHANNEL_PUT_TIMEOUT_SECONDS):
+        self.capacity = capacity
+        self.put_timeout = put_timeout
+        self._events = deque() # [callback, args, coalesce key]
+        self._keyed = {} # coalesce key -> its queued event
+        self._room = threading.Condition()
+        self._root = None
+        self._tk_thread_id = None
+        self._poll_ms = None
+        self._wake_pending = False
+
+    @property
+    def attached(self):
+        return self._root is not None
+
+    def attach(self, root, poll_ms=None):
+        """Start delivering into `root`. Call on the Tk thread.
+
+        poll_ms overrides the mode chosen from the Tcl build: a positive interval polls, 0 wakes on post.
+        """
+        self._root = root
+        self._tk_thread_id = threading.get_ident()
+        if poll_ms is None and not tcl_is_threaded(root):
+            poll_ms = TK_CHANNEL_POLL_MS
+        self._poll_ms = poll_ms
+        if poll_ms:
+            root.after(poll_ms, self._poll)
+        log_debug("Tk event channel attached (%s).", f"polling every {poll_ms} ms" if poll_ms else "woken on post")
+
+    def detach(self):
+        """Stop delivering; queued events are discarded and waiting producers released."""
+        with self._room:
+            self._root = None
+            self._events.clear()
+            self._keyed.clear()
+            self._wake_pending = False
+            self._room.notify_all()
+
+    def post(self, callback, *args, coalesce=None):
+        """Queue callback(*args) for the Tk thread. Returns False if it was dropped."""
+        with self._room:
+            if self._root is None:
+                return False
+            if coalesce is not None and coalesce in self._keyed:
+                self._keyed[coalesce][1] = args # Still queued: run it once, with the latest arguments
+                metrics.incr("tk_events_coalesced")
+                return True
+            if len(self._events) >= self.capacity and threading.get_ident() != self._tk_thread_id:
+                metrics.incr("tk_channel_waits")
+                if not self._room.wait_for(lambda: len(self._events) < self.capacity or self._root is None,
+                                           self.put_timeout) or self._root is None:
+                    metrics.incr("tk_events_dropped")
+                    log_warning("Tk event channel full; dropped %s.", getattr(callback, "__name__", callback))
+                    return False
+            event = [callback, args, coalesce]
+            self._events.append(event)
+            if coalesce is not None:
+                self._keyed[coalesce] = event
+            metrics.set_gauge("tk_queue_depth", len(self._events))
+            wake = not self._poll_ms and not self._wake_pending
+            self._wake_pending = self._wake_pending or wake
+            root = self._root
+        if wake:
+            try:
+                root.after(0, self.pump)
+            except Exception as e: # The root is being destroyed
+                log_debug("Could not wake the Tk event pump: %s", e)
+                with self._room:
+                    self._wake_pending = False
+        return True
+
+    def pump(self):
+        """Run every queued event. Runs on the Tk thread; events posted meanwhile wait for the next pass."""
+        with self._room:
+            batch = list(self._events)
+            self._events.clear()
+            self._keyed.clear()
+            self._wake_pending = False
+            self._room.notify_all()
+        if not batch:
+            return 0
+        metrics.set_gauge("tk_queue_depth", 0)
+        metrics.observe("tk_batch_size", len(batch))
+        for callback, args, _ in batch:
+            try:
+                callback(*args)
+            except Exception as e:
+                log_error("Error in Tk event %s: %s", getattr(callback, "__name__", callback), e, exc_info=True)
+        return len(batch)
+
+    def _poll(self):
+        root = self._root
+        if root is None: return
+        self.pump()
+        try:
+            root.after(self._poll_ms, self._poll)
+        except Exception as e:
+            log_debug("Tk event pump stopped: %s", e)
 
-def actual_show_individual_popup(reminder_title, reminder_time_24h, reminder_id=None):
+def tcl_is_threaded(root):
     try:
-        popup = tk.Toplevel(tk_root_window)
-        popup.title("Reminder Due!")
-        popup.attributes('-topmost', True)
+        return bool(int(root.tk.call("info", "exists", "tcl_platform(threaded)")))
+    except Exception:
+        return False
+
+tk_events = TkEventChannel()
+
+def post_to_tk(callback, *args, coalesce=None):
+    """Run callback on the Tk thread through the event channel; see TkEventChannel for coalesce."""
+    return tk_events.post(callback, *args, coalesce=coalesce)
+
+def refresh_reminder_list():
+    """Ask the open window to re-query its list, once however many changes asked for it."""
+    if app_instance_ref: post_to_tk(app_instance_ref.apply_filters, coalesce="refresh")
+
+pending_alerts = deque() # Alerts from the scheduler waiting for the Tk thread
+
+def show_individual_reminder_popup_thread_safe(title, reminder_time_24h, reminder_id=None, due_at=None, occurrence=None):
+    pending_alerts.append((title, reminder_time_24h, reminder_id, due_at, occurrence))
+    if not post_to_tk(show_pending_alerts, coalesce="alerts"):
+        # The firing is already recorded, so keep the alert: the next post (they coalesce) or attaching
+        # the window shows everything still pending
+        log_warning("Could not reach the notification window; %d alert(s) waiting.", len(pending_alerts))
+
+def show_pending_alerts():
+    """Show every alert that arrived since the last pass, rendering the notification window once."""
+    batch = []
+    while pending_alerts:
+        batch.append(pending_alerts.popleft())
+    if batch:
+        actual_show_individual_popups(batch)
+
+MAX_VISIBLE_ALERT_ROWS = 8 # Rows built once in the notification center and reused for every alert
+DEFAULT_SNOOZE_OPTION = "5 minutes"
+
+class AlertQueue:
+    """Ordered set of due alerts keyed by reminder id, so duplicates collapse and removal is O(1)."""
+    def __init__(self):
+        self._alerts = OrderedDict()
+
+    def add(self, title, time_24h, reminder_id=None, occurrence=None):
+        key = reminder_id or f"alert-{uuid.uuid4()}"
+        if key in self._alerts:
+            return False
+        self._alerts[key] = {"key": key, "title": title, "time": time_24h, "reminder_id": reminder_id,
+                             "occurrence": occurrence}
+        return True
+
+    def remove(self, key):
+        return self._alerts.pop(key, None)
+
+    def clear(self):
+        alerts = list(self._alerts.values())
+        self._alerts.clear()
+        return alerts
+
+    def head(self, count):
+        """The oldest `count` alerts, without copying the whole queue."""
+        return list(itertools.islice(self._alerts.values(), count))
+
+    def snoozable_ids(self):
+        return [a["reminder_id"] for a in self._alerts.values() if a["reminder_id"]]
+
+    def occurrences(self):
+        """reminder id -> the occurrence each alert was shown for, so a snooze re-arms that one."""
+        return {a["reminder_id"]: a["occurrence"] for a in self._alerts.values() if a["reminder_id"] and a["occurrence"]}
+
+    def __len__(self):
+        return len(self._alerts)
+
+class NotificationCenter:
+    """Single reusable window listing due reminders, replacing one Toplevel per reminder.
+
+    A fixed pool of rows is built once; queued alerts are rendered into it by
+    reconfiguring the existing widgets, so a burst of alerts costs a constant
+    number of widgets. Closing the window dismisses everything in it.
+    """
+    def __init__(self, parent):
+        self.alerts = AlertQueue()
+        self.window = tk.Toplevel(parent)
+        self.window.title("Reminders Due!")
+        self.window.attributes('-topmost', True)
+        self.window.protocol("WM_DELETE_WINDOW", self.dismiss_all)
         app_icon_photo = getattr(app_instance_ref, 'app_icon_photo', None)
         if app_icon_photo:
-             popup.iconphoto(True, app_icon_photo)
-        
-        formatted_time_ampm = format_time_to_ampm(reminder_time_24h)
-        label_text = f"Reminder: {reminder_title}\nTime: {formatted_time_ampm}"
-        
-        label = ttk.Label(popup, text=label_text, padding="20", wraplength=300, justify=tk.CENTER)
-        label.pack(pady=10, padx=10)
-
-        # Add buttons frame
-        button_frame = ttk.Frame(popup)
-        button_frame.pack(pady=10)
-
-        # Snooze button with dropdown
-        if reminder_id:
-            snooze_var = tk.StringVar(value="5 minutes")
-            snooze_menu = ttk.OptionMenu(button_frame, snooze_var, "5 minutes", *SNOOZE_OPTIONS.keys())
-            snooze_menu.pack(side=tk.LEFT, padx=5)
-            
-            def do_snooze():
-                minutes = SNOOZE_OPTIONS[snooze_var.get()]
-                if snooze_reminder(reminder_id, minutes):
-                    popup.destroy()
-            
-            ttk.Button(button_frame, text="Snooze", command=do_snooze).pack(side=tk.LEFT, padx=5)
-
-        ttk.Button(button_frame, text="OK", command=popup.destroy).pack(side=tk.LEFT, padx=5)
-        popup.lift()
-        popup.focus_force()
+             self.window.iconphoto(True, app_icon_photo)
+
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill="both", expand=True)
+
+        self.header_label = ttk.Label(frame, text="", font=("Helvetica", 12, "bold"))
+        self.header_label.grid(row=0, column=0, columnspan=3, sticky="w", pady=(0, 8))
+
+        self.rows = []
+        for idx in range(MAX_VISIBLE_ALERT_ROWS):
+            label = ttk.Label(frame, text="", wraplength=300, justify=tk.LEFT)
+            snooze_button = ttk.Button(frame, text="Snooze", command=lambda i=idx: self.snooze_row(i))
+            ok_button = ttk.Button(frame, text="OK", command=lambda i=idx: self.dismiss_row(i))
+            self.rows.append({"label": label, "snooze": snooze_button, "ok": ok_button, "key": None})
+            label.grid(row=idx + 1, column=0, sticky="w", padx=5, pady=3)
+            snooze_button.grid(row=idx + 1, column=1, padx=5, pady=3)
+            ok_button.grid(row=idx + 1, column=2, padx=5, pady=3)
+
+        self.more_label = ttk.Label(frame, text="", font=("Helvetica", 9, "italic"))
+        self.more_label.grid(row=MAX_VISIBLE_ALERT_ROWS + 1, column=0, columnspan=3, sticky="w", pady=(5, 0))
+
+        bulk_frame = ttk.Frame(frame)
+        bulk_frame.grid(row=MAX_VISIBLE_ALERT_ROWS + 2, column=0, columnspan=3, pady=(10, 0))
+        ttk.Label(bulk_frame, text="Snooze for:").pack(side=tk.LEFT, padx=5)
+        self.snooze_var = tk.StringVar(value=DEFAULT_SNOOZE_OPTION)
+        ttk.Combobox(bulk_frame, textvariable=self.snooze_var, values=list(SNOOZE_OPTIONS.keys()),
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bulk_frame, text="Snooze All", command=self.snooze_all).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bulk_frame, text="Dismiss All", command=self.dismiss_all).pack(side=tk.LEFT, padx=5)
+        self.window.withdraw()
+
+    def enqueue(self, alerts):
+        """Add (title, time, reminder id, occurrence) alerts and show the window, rendering once."""
+        added = [self.alerts.add(*alert) for alert in alerts]
+        if not any(added):
+            return
+        metrics.set_gauge("notification_queue_depth", len(self.alerts))
+        self.render()
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus_force()
+
+    def render(self):
+        """Fill the row pool from the head of the queue and hide the window once it is empty."""
+        visible_alerts = self.alerts.head(MAX_VISIBLE_ALERT_ROWS)
+        for row, alert in itertools.zip_longest(self.rows, visible_alerts):
+            if alert is None:
+                row["key"] = None
+                for widget_name in ("label", "snooze", "ok"): row[widget_name].grid_remove()
+                continue
+            row["key"] = alert["key"]
+            row["label"].config(text=f"{format_time_to_ampm(alert['time'])} - {alert['title']}")
+            row["label"].grid()
+            if alert["reminder_id"]: row["snooze"].grid()
+            else: row["snooze"].grid_remove()
+            row["ok"].grid()
+
+        total_alerts = len(self.alerts)
+        self.header_label.config(text=f"{total_alerts} reminder{'s' if total_alerts != 1 else ''} due")
+        hidden_alerts = total_alerts - len(visible_alerts)
+        self.more_label.config(text=f"+{hidden_alerts} more waiting" if hidden_alerts > 0 else "")
+        metrics.set_gauge("notification_queue_depth", total_alerts)
+        if not total_alerts:
+            self.window.withdraw()
+
+    def snooze_minutes(self):
+        return SNOOZE_OPTIONS.get(self.snooze_var.get(), SNOOZE_OPTIONS[DEFAULT_SNOOZE_OPTION])
+
+    def dismiss_row(self, row_idx):
+        key = self.rows[row_idx]["key"]
+        if key:
+            self.alerts.remove(key)
+            self.render()
+
+    def snooze_row(self, row_idx):
+        key = self.rows[row_idx]["key"]
+        if key and snooze_reminders([key], self.snooze_minutes(), self.alerts.occurrences()):
+            self.alerts.remove(key)
+            self.render()
+
+    def dismiss_all(self):
+        self.alerts.clear()
+        self.render()
+
+    def snooze_all(self):
+        snooze_reminders(self.alerts.snoozable_ids(), self.snooze_minutes(), self.alerts.occurrences())
+        self.alerts.clear()
+        self.render()
+
+notification_center = None # Created on the Tk thread with the first due reminder
+
+def actual_show_individual_popups(batch):
+    """Show (title, time, reminder id, due at, occurrence) alerts in the notification window."""
+    global notification_center
+    now = scheduler_clock.now()
+    for _, _, _, due_at, _ in batch:
+        if due_at:
+            metrics.observe("fire_lateness_seconds", max(0.0, (now - due_at).total_seconds()))
+            metrics.incr("reminders_fired")
+    try:
+        if notification_center is None or not notification_center.window.winfo_exists():
+            notification_center = NotificationCenter(tk_root_window)
+        notification_center.enqueue([(title, time_24h, reminder_id, occurrence)
+                                     for title, time_24h, reminder_id, _, occurrence in batch])
     except Exception as e:
-        log_error(f"Error in actual_show_individual_popup: {e}")
+        log_error("Error in actual_show_individual_popups: %s", e)
+
+def advance_reminder(reminder_id, op):
+    """Record a reminder's pending occurrence as fired or dismissed; a series moves on to its next occurrence.
+
+    Returns the reminder as it is now, or None if there is no such reminder.
+    """
+    with store_write_lock:
+        reminder = find_reminder(reminder_id)
+        if reminder is None: return None
+        occurrence, current = store_state().advance(reminder, op, scheduler_clock.today())
+    index_reminder(current) # Drops it when nothing is pending any more
+    note_reminders_changed([occurrence, current])
+    return current
 
 def mark_reminder_as_notified(reminder_id):
-    reminders = load_reminders()
-    for r in reminders:
-        if r.get("id") == reminder_id: r["notified_individually"] = True; break
-    save_reminders(reminders)
+    advance_reminder(reminder_id, "fired")
 
-def calculate_next_recurrence(reminder):
-    """Calculate the next occurrence date for a recurring reminder."""
-    if not reminder.get("recurrence_type"):
-        return None
-    
-    current_date = datetime.strptime(reminder["date"], "%Y-%m-%d").date()
-    today = date.today()
-    
-    if current_date < today:
-        current_date = today
-    
-    recurrence_type = reminder["recurrence_type"]
-    
-    if recurrence_type == "daily":
-        return (current_date + timedelta(days=1)).strftime("%Y-%m-%d")
-    elif recurrence_type == "weekdays":
-        next_date = current_date + timedelta(days=1)
-        # Skip weekends
-        while next_date.weekday() >= 5:  # 5 is Saturday, 6 is Sunday
-            next_date += timedelta(days=1)
-        return next_date.strftime("%Y-%m-%d")
-    elif recurrence_type == "weekly":
-        return (current_date + timedelta(days=7)).strftime("%Y-%m-%d")
-    elif recurrence_type == "biweekly":
-        return (current_date + timedelta(days=14)).strftime("%Y-%m-%d")
-    elif recurrence_type == "monthly":
-        # Use relativedelta for robust month calculations
-        next_month_date = current_date + relativedelta(months=1)
-        return next_month_date.strftime("%Y-%m-%d")
-    elif recurrence_type == "yearly":
-        # Use relativedelta for consistent year calculations
-        next_year_date = current_date + relativedelta(years=1)
-        return next_year_date.strftime("%Y-%m-%d")
-    return None
+def dismiss_reminder(reminder_id):
+    """Skip a pending reminder without notifying. Recurring series move on to their next occurrence."""
+    return advance_reminder(reminder_id, "dismissed") is not None
 
 def snooze_reminder(reminder_id, minutes):
     """Snooze a reminder for the specified number of minutes."""
-    reminders = load_reminders()
-    for reminder in reminders:
-        if reminder.get("id") == reminder_id:
-            reminder["notified_individually"] = False
-            # Update the time to current time + snooze minutes
-            current_time = datetime.now()
-            snooze_time = current_time + timedelta(minutes=minutes)
-            reminder["time"] = snooze_time.strftime("%H:%M")
-            reminder["date"] = snooze_time.strftime("%Y-%m-%d")
-            save_reminders(reminders)
-            return True
-    return False
-
-def check_and_notify_due_reminders():
-    """Check for due reminders and notify if needed."""
-    log_debug("Checking for due reminders...")
+    return snooze_reminders([reminder_id], minutes) > 0
+
+def snooze_reminders(reminder_ids, minutes, occurrences=None):
+    """Snooze several reminders with a single load. Returns how many were found."""
+    return len(snooze_reminder_records(reminder_ids, minutes, occurrences))
+
+def snooze_reminder_records(reminder_ids, minutes, occurrences=None):
+    """Like snooze_reminders, but returns the snoozed reminders themselves.
+
+    `occurrences` maps reminder ids to the occurrence to re-arm (the one an alert
+    was shown for); by default the occurrence currently pending is snoozed.
+    The store itself is not written: each snooze is one line in the state log.
+    """
+    if not reminder_ids: return []
+    until_epoch = int(scheduler_clock.time()) + minutes * 60
+    wanted_ids = set(reminder_ids)
+    occurrences = occurrences or {}
+    originals, snoozed = [], []
+    with store_write_lock:
+        state = store_state()
+        for reminder in load_reminders():
+            if reminder.get("id") in wanted_ids:
+                originals.append(state.effective(reminder))
+                snoozed.append(state.snooze(reminder, until_epoch, occurrences.get(reminder["id"])))
+    for reminder in snoozed:
+        index_reminder(reminder)
+    note_reminders_changed(originals + snoozed)
+    return snoozed
+
+invalid_reminder_ids = set() # Reminders already reported as unparseable by check_and_notify_due_reminders
+
+def check_and_notify_due_reminders(clock=None, notify=None):
+    """Check for due reminders and notify if needed.
+
+    `clock` defaults to scheduler_clock, `notify` (called like
+    show_individual_reminder_popup_thread_safe) to the notification center.
+    Alerts are sent after store_write_lock is released: posting to a full Tk
+    channel waits for the Tk thread, whose handlers may need the lock.
+    """
+    clock = clock or scheduler_clock
+    notify = notify or show_individual_reminder_popup_thread_safe
+    tick_started = py_time.perf_counter()
+    # Per-tick tallies; logged once as a summary instead of once per reminder
+    tick_stats = {"scanned": 0, "already_notified": 0, "fired": 0, "invalid": 0,
+                  "occurrences_created": 0, "series_ended": 0}
+    alerts = [] # (reminder, due datetime), sent once the lock is released
     try:
-        reminders = load_reminders()
-        current_time = datetime.now()
-        log_debug(f"Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        updated_reminders = []
-        data_changed = False
+        with store_write_lock:
+            definitions = load_reminders()
+            state = store_state()
+            tick_stats["scanned"] = len(definitions)
+            metrics.observe("reminders_scanned_per_tick", len(definitions))
+            now_epoch = int(clock.time())
+            fired_reminders = []
+            due_definitions = []
+            invalid_ids = set()
+
+            for definition, reminder in zip(definitions, state.apply(definitions)):
+                # Skip if already notified
+                if reminder.get("notified_individually", False):
+                    tick_stats["already_notified"] += 1
+                    continue
+
+                reminder_id = reminder.get("id", "N/A")
+                reminder_date = reminder.get("date", "N/A")
+                reminder_time_str = reminder.get("time", "N/A")
+
+                # Due time as UTC epoch seconds (stamped on write)
+                due_epoch = reminder_due_epoch(reminder)
+                if due_epoch is None:
+                    tick_stats["invalid"] += 1
+                    invalid_ids.add(reminder_id)
+                    if reminder_id not in invalid_reminder_ids: # Once per reminder, not once per tick
+                        log_warning("Invalid date or time format for reminder ID %s: %s %s", reminder_id, reminder_date, reminder_time_str)
+                    continue # Skip this reminder due to invalid format
+
+                # Check if reminder is due
+                if due_epoch <= now_epoch:
+                    tick_stats["fired"] += 1
+                    alerts.append((reminder, datetime.fromtimestamp(due_epoch)))
+                    due_definitions.append(definition)
+
+            # One append to the state log for the whole batch; recurring series move on to their next occurrence
+            for occurrence, current in state.advance_many(due_definitions, today=clock.today()):
+                index_reminder(current)
+                fired_reminders += [occurrence, current]
 
-        for reminder in reminders:
-            reminder_id = reminder.get("id", "N/A")
-            reminder_title = reminder.get("title", "N/A")
-            reminder_date = reminder.get("date", "N/A")
-            reminder_time_str = reminder.get("time", "N/A")
-            notified_status = reminder.get("notified_individually", False)
+                # Handle recurring reminders
+                if occurrence.get("recurrence_type") is not None:
+                    if not current.get("notified_individually", False):
+                        tick_stats["occurrences_created"] += 1
+                        log_debug("Next occurrence of %s is on %s.", current.get("id"), current["date"])
+                    else:
+                        tick_stats["series_ended"] += 1
+
+            if fired_reminders:
+                note_reminders_changed(fired_reminders)
+            invalid_reminder_ids.clear() # Only the ones still invalid; a fixed and re-broken reminder is reported again
+            invalid_reminder_ids.update(invalid_ids)
+            metrics.set_gauge("invalid_reminders", len(invalid_ids))
+
+        for reminder, reminder_datetime in alerts:
+            # Show notification for current instance using the correct function
+            notify(
+                reminder.get("title"),
+                reminder.get("time"),
+                reminder.get("id"),
+                reminder_datetime,
+                reminder.get("occurrence")
+            )
+            if api_server: api_server.publish_firing(reminder, reminder_datetime)
 
-            log_debug(f"Checking reminder {reminder_id} ('{reminder_title}') on {reminder_date} at {reminder_time_str}. Notified: {notified_status}")
+    except Exception as e:
+        log_error("Error checking due reminders: %s", e, exc_info=True)
+
+    tick_ms = (py_time.perf_counter() - tick_started) * 1000.0
+    metrics.observe("tick_duration_ms", tick_ms)
+    metrics.incr("scheduler_ticks")
+    if tick_stats["fired"]:
+        log_info("Reminder check: scanned=%d fired=%d already_notified=%d invalid=%d occurrences_created=%d series_ended=%d (%.1f ms)",
+                 tick_stats["scanned"], tick_stats["fired"], tick_stats["already_notified"], tick_stats["invalid"],
+                 tick_stats["occurrences_created"], tick_stats["series_ended"], tick_ms)
+    else:
+        log_debug("Reminder check: scanned=%d, nothing due, invalid=%d (%.1f ms)", tick_stats["scanned"], tick_stats["invalid"], tick_ms)
+    return tick_stats
 
-            # Skip if already notified
-            if notified_status:
-                log_debug(f"Skipping reminder {reminder_id} - already notified.")
-                updated_reminders.append(reminder)
-                continue
+def delete_past_reminders(clock=None):
+    """Delete reminders whose current occurrence is on a past date, and compact the state log."""
+    with store_transaction():
+        reminders = load_reminders()
+        state = store_state()
+        today = (clock or scheduler_clock).today()
+        updated_reminders = []
+        deleted_reminders = []
 
-            # Try to parse reminder time
+        for reminder, current in zip(reminders, state.apply(reminders)):
             try:
-                reminder_datetime = datetime.strptime(f"{reminder_date} {reminder_time_str}", "%Y-%m-%d %H:%M")
-                log_debug(f"Parsed reminder datetime: {reminder_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
-            except ValueError:
-                log_error(f"Invalid date or time format for reminder ID {reminder_id}: {reminder_date} {reminder_time_str}")
-                updated_reminders.append(reminder)
-                continue # Skip this reminder due to invalid format
-
-            # Check if reminder is due
-            if reminder_datetime <= current_time:
-                log_debug(f"Reminder {reminder_id} is due. Triggering notification.")
-                # Show notification for current instance using the correct function
-                show_individual_reminder_popup_thread_safe(
-                    reminder.get("title"),
-                    reminder.get("time"),
-                    reminder.get("id")
-                )
-                reminder["notified_individually"] = True
-                data_changed = True
-                log_debug(f"Marked reminder {reminder_id} as notified_individually=True.")
-
-                # Handle recurring reminders
-                if reminder.get("recurrence_type") is not None:
-                    log_debug(f"Handling recurrence for reminder {reminder_id}.")
-                    # Check end conditions
-                    end_type = reminder.get("recurrence_end_type", "never")
-                    series_ended = False
-
-                    if end_type == "occurrences":
-                        current_count = reminder.get("recurrence_current_count", 0)
-                        max_occurrences = reminder.get("recurrence_end_value")
-                        log_debug(f"Occurrences end condition: current={current_count}, max={max_occurrences}.")
-                        if current_count >= max_occurrences:
-                            series_ended = True
-                            log_debug(f"Series ended for {reminder_id} - max occurrences reached.")
-                        else:
-                            reminder["recurrence_current_count"] = current_count + 1
-                            log_debug(f"Incremented occurrence count for {reminder_id} to {reminder["recurrence_current_count"]}.")
-
-                    # Calculate next date before checking date-based end condition
-                    next_date_str = calculate_next_recurrence(reminder)
-                    log_debug(f"Calculated next recurrence date for {reminder_id}: {next_date_str}")
-                    
-                    # Check date-based end condition using the next calculated date
-                    if not series_ended and end_type == "date":
-                        recurrence_end_date_str = reminder.get("recurrence_end_value")
-                        if recurrence_end_date_str:
-                            try:
-                                recurrence_end_date_obj = datetime.strptime(recurrence_end_date_str, "%Y-%m-%d").date()
-                                # Ensure next_date_str is not None before parsing
-                                if next_date_str:
-                                    next_calculated_date_obj = datetime.strptime(next_date_str, "%Y-%m-%d").date()
-                                    
-                                    if next_calculated_date_obj > recurrence_end_date_obj:
-                                        log_debug(f"Next calculated date {next_date_str} is past end date {recurrence_end_date_str}. Series ends for {reminder_id}.")
-                                        series_ended = True
-                                else:
-                                     log_debug(f"Next date calculation returned None for {reminder_id}, cannot check end date condition.")
-                                     series_ended = True # Or handle as an error
-
-                            except (ValueError, TypeError) as e_date_conv:
-                                log_error(f"Invalid end date format '{recurrence_end_date_str}' or issue with next date '{next_date_str}' for reminder ID {reminder_id}: {e_date_conv}", exc_info=True)
-                                series_ended = True # Assume series ends on error
-
-                    # Create next occurrence if series hasn't ended and a next date was calculated
-                    if not series_ended and next_date_str:
-                        new_reminder = reminder.copy()
-                        new_reminder["id"] = str(uuid.uuid4()) # Assign new ID
-                        new_reminder["date"] = next_date_str
-                        new_reminder["time"] = reminder_time_str # Keep the same time as the original
-                        new_reminder["notified_individually"] = False
-                        # Preserve current count for occurrences type (already incremented on original)
-                        # For recurring reminders, the count is stored on the NEXT instance.
-                        if end_type == "occurrences":
-                             # The count was incremented on the *current* reminder before this check.
-                             # The *new* reminder should inherit this incremented count.
-                             new_reminder["recurrence_current_count"] = reminder["recurrence_current_count"]
-                        else:
-                             new_reminder["recurrence_current_count"] = None # Ensure it's None for non-occurrences
-
-                        updated_reminders.append(new_reminder)
-                        data_changed = True
-                        log_debug(f"Created next occurrence for {reminder_id} with new ID {new_reminder['id']} on {next_date_str}.")
-
-                # Add the original (now notified) reminder
+                reminder_date = datetime.strptime(current.get("date", ""), "%Y-%m-%d").date()
+                if reminder_date < today:
+                    deleted_reminders.append(current)
+                    unindex_reminder(reminder.get("id"))
+                    continue
                 updated_reminders.append(reminder)
-            else:
-                # Not due yet, keep as is
-                log_debug(f"Reminder {reminder_id} is not yet due.")
+            except ValueError:
+                log_error("Invalid date format in reminder: %s", reminder)
                 updated_reminders.append(reminder)
 
-        # Save changes if any were made
-        if data_changed:
-            log_debug("Changes detected, saving reminders.")
+        if deleted_reminders:
             save_reminders(updated_reminders)
-        else:
-            log_debug("No changes to reminders, skipping save.")
-
-    except Exception as e:
-        log_error(f"Error checking due reminders: {e}", exc_info=True)
-
-    log_debug("Finished checking due reminders.")
-
-def delete_past_reminders():
-    """Delete reminders from past dates."""
-    reminders = load_reminders()
-    today = date.today()
-    updated_reminders = []
-    deleted_count = 0
-    
-    for reminder in reminders:
-        try:
-            reminder_date = datetime.strptime(reminder.get("date", ""), "%Y-%m-%d").date()
-            if reminder_date < today:
-                deleted_count += 1
-                log_debug(f"Deleting past reminder: {reminder.get('title')} ({reminder.get('date')})")
-                continue
-            updated_reminders.append(reminder)
-        except ValueError:
-            log_error(f"Invalid date format in reminder: {reminder}", exc_info=True)
-            updated_reminders.append(reminder)
-    
-    if deleted_count > 0:
-        save_reminders(updated_reminders)
-        log_info(f"Deleted {deleted_count} past reminders.")
-
-def run_scheduler():
-    log_info("Scheduler thread started.")
-    schedule.every(INDIVIDUAL_NOTIFICATION_CHECK_INTERVAL_SECONDS).seconds.do(check_and_notify_due_reminders)
-    schedule.every().day.at("00:00").do(delete_past_reminders)
-    while not scheduler_stop_event.is_set():
-        schedule.run_pending()
-        py_time.sleep(1)
-    log_info("Scheduler thread stopped.")
+            note_reminders_changed(deleted_reminders)
+            log_info("Deleted %d past reminders.", len(deleted_reminders))
+        state.compact(updated_reminders, today)
+
+def run_if_next_due(clock=None, notify=None):
+    """Fire on the second a reminder is due instead of waiting for the next periodic check."""
+    clock = clock or scheduler_clock
+    head = next_due_index.peek(1)
+    if not head or head[0]["due_epoch"] > clock.time(): return
+    check_and_notify_due_reminders(clock, notify)
+    still_head = next_due_index.peek(1)
+    if still_head and still_head[0]["id"] == head[0]["id"]:
+        # Not in the store any more (or unparseable there); drop it rather than re-checking every second
+        log_debug("Dropping stale next-due entry %s.", head[0]["id"])
+        next_due_index.discard(head[0]["id"])
+
+def next_due_epoch():
+    head = next_due_index.peek(1)
+    return head[0]["due_epoch"] if head else None
+
+# Timers live on the core engine's event loop; their jobs run one at a time on its worker thread
+core_engine = CoreEngine(before_job=lambda: profiling_session.sync_thread("scheduler"),
+                         on_stop=lambda: profiling_session.detach_current_thread("scheduler"))
+
+def start_scheduler():
+    """Arm the scheduler's timers on the core engine and start it."""
+    core_engine.clock = scheduler_clock
+    core_engine.deadline(next_due_epoch, run_if_next_due) # Sleeps until the next reminder is due, no polling
+    core_engine.every(INDIVIDUAL_NOTIFICATION_CHECK_INTERVAL_SECONDS, check_and_notify_due_reminders)
+    core_engine.daily_at(time(0, 0), delete_past_reminders)
+    core_engine.daily_at(time(0, 0), agenda_publisher.publish) # The window moves on a day
+    core_engine.every(TRAY_REFRESH_INTERVAL_SECONDS, refresh_tray_status)
+    core_engine.every(SNAPSHOT_REFRESH_INTERVAL_SECONDS, snapshot_keeper.refresh_in_background)
+    if metrics_export_file:
+        core_engine.every(METRICS_EXPORT_INTERVAL_SECONDS, export_metrics_snapshot, metrics_export_file)
+    next_due_index.on_head_change = core_engine.rearm
+    core_engine.start()
+    log_info("Scheduler started.")
+
+def stop_scheduler():
+    if not core_engine.running: return
+    log_info("Stopping scheduler...")
+    next_due_index.on_head_change = None
+    if not core_engine.stop():
+        log_warning("Scheduler did not stop in time.")
+    log_info("Scheduler stopped.")
 
 # --- GUI HELPER & LOGIC FUNCTIONS --- (Your existing display_reminders_popup)
 def display_reminders_popup(reminders_list, title="Today's Upcoming Reminders", parent_window=None):
@@ -595,17 +1419,18 @@ def display_reminders_popup(reminders_list, title="Today's Upcoming Reminders",
 
 
 # --- REMINDER FETCHING LOGIC --- (Your versions)
-def get_all_todays_reminders(): # Used by startup_check logic in __main__ for true "today"
-    reminders = load_reminders()
+def get_all_todays_reminders(reminders=None): # Used by startup_check logic in __main__ for true "today"
+    if reminders is None: reminders = load_effective_reminders() # The warm-start snapshot passes its hot window
     today_actual_str = date.today().strftime("%Y-%m-%d")
     return [r for r in reminders if r.get("date") == today_actual_str]
 
-def get_upcoming_todays_reminders(): # Used by ReminderApp for its initial popup
-    reminders = load_reminders()
-    today = date.today()
+def get_upcoming_todays_reminders(clock=None): # Used by ReminderApp for its initial popup
+    reminders = load_effective_reminders()
+    now = (clock or scheduler_clock).now()
+    today = now.date()
     
     # Your logic to show tomorrow's if it's evening
-    current_hour = datetime.now().hour
+    current_hour = now.hour
     if current_hour >= 18: # 6 PM or later
         target_date = today + timedelta(days=1) # Use timedelta for robust date increment
         title_prefix = "Tomorrow's"
@@ -614,14 +1439,14 @@ def get_upcoming_todays_reminders(): # Used by ReminderApp for its initial popup
         title_prefix = "Today's"
         
     target_date_str = target_date.strftime("%Y-%m-%d")
-    now_t_for_upcoming = datetime.now().time() # Only for "upcoming" part
+    now_t_for_upcoming = now.time() # Only for "upcoming" part
     
     upcoming_for_target_day = []
     for r in reminders:
         if r.get("date") == target_date_str:
             if r.get("time"):
                 try:
-                    reminder_time_obj = datetime.strptime(r["time"], "%H:%M").time()
+                    reminder_time_obj = parse_wall_time(r["time"])
                     # If target is today, check if reminder time is >= now.
                     # If target is tomorrow, all reminders for that day are "upcoming" from today's perspective.
                     if target_date == today:
@@ -643,23 +1468,221 @@ def actual_show_main_window():
     if tk_root_window and hasattr(tk_root_window, 'deiconify'):
         tk_root_window.deiconify(); tk_root_window.lift(); tk_root_window.focus_force()
         main_gui_visible = True
+        if app_instance_ref and not app_instance_ref.list_populated:
+            app_instance_ref.populate_reminders_list()
 def show_main_window_action(icon=None, menu_item=None):
-    if tk_root_window: tk_root_window.after(0, actual_show_main_window)
+    post_to_tk(actual_show_main_window, coalesce="show")
 def add_reminder_action_from_tray(icon=None, menu_item=None):
-    if tk_root_window and app_instance_ref: tk_root_window.after(0, app_instance_ref.open_add_reminder_window)
+    if app_instance_ref: post_to_tk(app_instance_ref.open_add_reminder_window, coalesce="add")
+def export_metrics_action(icon=None, menu_item=None):
+    exported_path = export_metrics_snapshot(metrics_export_file)
+    if exported_path and tray_icon_object:
+        try:
+            tray_icon_object.notify(f"Metrics exported to {exported_path}", APP_NAME)
+        except Exception as e:
+            log_debug("Tray notification not supported: %s", e)
+def toggle_profiling_action(icon=None, menu_item=None):
+    if profiling_session.active:
+        profiling_session.stop()
+    else:
+        profiling_session.start()
+    post_to_tk(sync_tk_profiler, coalesce="profiler") # The Tk profiler must be toggled from the Tk thread itself
+def profiling_menu_text(menu_item):
+    return "Stop Profiling" if profiling_session.active else "Start Profiling"
+def save_stall_report_action(icon=None, menu_item=None):
+    report_path = tk_watchdog.write_report()
+    if report_path and tray_icon_object:
+        try:
+            tray_icon_object.notify(f"Stall report written to {report_path}", APP_NAME)
+        except Exception as e:
+            log_debug("Tray notification not supported: %s", e)
 def quit_application_action(icon=None, menu_item=None):
-    global tk_root_window, scheduler_stop_event, tray_icon_object
+    global tk_root_window, tray_icon_object
     log_info("Quit action initiated.")
-    scheduler_stop_event.set()
+    stop_scheduler()
     if tray_icon_object: tray_icon_object.stop()
-    if tk_root_window: tk_root_window.after(0, tk_root_window.quit)
+    if tk_root_window: post_to_tk(tk_root_window.quit, coalesce="quit")
 
 def on_main_window_close_button():
     global tk_root_window, main_gui_visible
     if tk_root_window: tk_root_window.withdraw(); main_gui_visible = False
     log_info("App hidden to system tray.")
 
+# --- COMMAND CHANNEL HANDLERS ---
+# Requests forwarded by later launches (see reminder_ipc). These run on the command server thread.
+def register_command_handlers(server):
+    server.register("ping", lambda request: "pong")
+    server.register("show", handle_show_command)
+    server.register("add", handle_add_command)
+    server.register("list", handle_list_command)
+    server.register("agenda", handle_agenda_command)
+    server.register("slots", handle_slots_command)
+    server.register("snooze", handle_snooze_command)
+    server.register("dismiss", handle_dismiss_command)
+    server.register("metrics", handle_metrics_command)
+
+def handle_show_command(request):
+    post_to_tk(actual_show_main_window, coalesce="show")
+    return "Showing the main window."
+
+def handle_add_command(request):
+    title = (request.get("title") or "").strip()
+    if not title:
+        raise ValueError("Title cannot be empty.")
+    date_str, time_str = parse_when(request.get("at"))
+    new_reminder = new_reminder_record(title, date_str, time_str, recurrence_type_from_name(request.get("repeat")))
+    stored = add_reminders([new_reminder], request.get("duplicates"))[0]
+    refresh_after_command()
+    if stored is not new_reminder:
+        return f"Reminder '{title}' is already set for {date_str} {format_time_to_ampm(time_str)}."
+    log_info("Reminder '%s' added for %s %s via command channel.", title, date_str, time_str)
+    return f"Reminder '{title}' added for {date_str} {format_time_to_ampm(time_str)}."
+
+def handle_list_command(request):
+    return list_query(load_effective_reminders(), request.get("view", "All"), request.get("sort", "Date"))
+
+def handle_agenda_command(request):
+    days = int(request.get("days", DEFAULT_AGENDA_DAYS))
+    if request.get("expand"):
+        return reminder_projection.projected_agenda_query(load_effective_reminders(), days)
+    return agenda_query(load_effective_reminders(), days)
+
+def handle_slots_command(request):
+    return slot_index.busiest(int(request.get("top", DEFAULT_BUSIEST_SLOTS)))
+
+def handle_snooze_command(request):
+    reminder = resolve_reminder_id(load_reminders(), request.get("id"))
+    minutes = int(request.get("minutes", DEFAULT_SNOOZE_MINUTES))
+    snooze_reminders([reminder["id"]], minutes)
+    refresh_after_command()
+    log_info("Reminder '%s' snoozed for %d minutes via command channel.", reminder.get("title"), minutes)
+    return f"Reminder '{reminder.get('title')}' snoozed for {minutes} minutes."
+
+def handle_dismiss_command(request):
+    reminder = resolve_reminder_id(load_reminders(), request.get("id"))
+    dismiss_reminder(reminder["id"])
+    refresh_after_command()
+    log_info("Reminder '%s' dismissed via command channel.", reminder.get("title"))
+    return f"Reminder '{reminder.get('title')}' dismissed."
+
+def handle_metrics_command(request):
+    metrics.set_gauge("store_pages_read", resident_store.pages_read)
+    return metrics.snapshot()
+
+def refresh_after_command():
+    """Bring the tray and the open window up to date after a command changed the store."""
+    refresh_tray_status()
+    refresh_reminder_list()
+
+# --- LOCAL HTTP API ---
+api_server = None # reminder_api.ReminderApiServer when enabled with --api-port or "api_port"
+
+class AppReminderStore(reminder_api.ReminderStore):
+    """Lets the HTTP API share the app's store, next-due index, tray and window."""
+    def __init__(self, reader=None):
+        # Queries skip re-parsing until the store changes, and only the hot window stays resident
+        self._reader = reader or HotWindowCache(DATA_FILE)
+
+    def create(self, records):
+        stored = add_reminders(records) # One load and one save for the whole batch
+        refresh_after_command()
+        log_info("%d reminder(s) added via the HTTP API.", len(records))
+        return stored
+
+    def query(self, start_date=None, end_date=None):
+        return reminder_state.effective_in_range(self._reader, store_state(), start_date, end_date)
+
+    def snooze(self, reminder_id, minutes):
+        snoozed = snooze_reminder_records([reminder_id], minutes)
+        if not snoozed: return None
+        refresh_after_command()
+        return snoozed[0]
+
+    def delete(self, reminder_id):
+        if not delete_reminders([reminder_id]): return False
+        refresh_after_command()
+        return True
+
+def start_api_server(port):
+    global api_server
+    try:
+        api_server = reminder_api.ReminderApiServer(AppReminderStore(resident_store), port)
+        api_server.start()
+    except OSError as e:
+        api_server = None
+        log_error("Could not start the HTTP API on port %s: %s", port, e)
+
+def stop_api_server():
+    global api_server
+    if api_server:
+        api_server.stop()
+        api_server = None
+
 # --- GUI APPLICATION CLASSES ---
+CALENDAR_COUNT_TAG = "reminder_count"
+
+def show_month_counts(cal):
+    """Mark the days with reminders in the month a tkcalendar Calendar is showing (count in the tooltip)."""
+    month, year = cal.get_displayed_month()
+    cal.calevent_remove('all')
+    for date_str, count in month_counts.counts_for_month(year, month).items():
+        cal.calevent_create(datetime.strptime(date_str, "%Y-%m-%d").date(),
+                            f"{count} reminder{'s' if count != 1 else ''}", CALENDAR_COUNT_TAG)
+
+def attach_month_counts(cal):
+    """Keep a Calendar's highlighted days current as the user pages through months."""
+    cal.tag_config(CALENDAR_COUNT_TAG, background="#cfe2ff", foreground="black")
+    cal.bind("<<CalendarMonthChanged>>", lambda e: show_month_counts(cal), add="+")
+    show_month_counts(cal)
+
+def form_due_slot(form):
+    """(date, "HH:MM") picked in an Add/Edit form, or None while the time is incomplete."""
+    try:
+        wall = datetime.strptime(f"{int(form.hour_spinbox.get()):02}:{int(form.minute_spinbox.get()):02} {form.ampm_var.get()}",
+                                 "%I:%M %p")
+    except ValueError:
+        return None
+    return form.cal.get_date(), wall.strftime("%H:%M")
+
+def show_slot_conflicts(form):
+    """Note under an Add/Edit form's time which other reminders fire at the picked minute."""
+    slot = form_due_slot(form)
+    clashes = slot_index.at(*slot, exclude_id=form.slot_exclude_id) if slot else []
+    if not clashes:
+        form.slot_info.config(text="")
+        return
+    titles = ", ".join(title for _, _, _, title in clashes[:SLOT_CONFLICT_TITLES])
+    more = f" and {len(clashes) - SLOT_CONFLICT_TITLES} more" if len(clashes) > SLOT_CONFLICT_TITLES else ""
+    form.slot_info.config(text=f"Also at this time: {titles}{more}")
+
+def attach_slot_conflicts(form, exclude_id=None):
+    """Re-check the picked slot whenever the form's date, hour, minute or AM/PM changes.
+    exclude_id is the reminder being edited, which doesn't conflict with itself."""
+    form.slot_exclude_id = exclude_id
+    update = lambda event=None: show_slot_conflicts(form)
+    form.hour_spinbox.bind("<KeyRelease>", update, add="+")
+    form.minute_spinbox.bind("<KeyRelease>", update, add="+")
+    form.ampm_combobox.bind("<<ComboboxSelected>>", update, add="+")
+    form.cal.bind("<<CalendarSelected>>", update, add="+")
+    update()
+
+open_edit_windows = {} # reminder id -> EditReminderWindow with possibly unsaved changes
+
+def apply_store_changes_to_gui(changes):
+    for edit_window in list(open_edit_windows.values()):
+        edit_window.note_external_change(changes)
+    if app_instance_ref: app_instance_ref.apply_record_changes(changes)
+
+def reminder_row_values(position, reminder):
+    recurrence_type = reminder.get('recurrence_type', 'None')
+    return (
+        position,
+        reminder.get('title', 'N/A'),
+        reminder.get('date', 'N/A'),
+        format_time_to_ampm(reminder.get('time', 'N/A')),
+        recurrence_type.capitalize() if recurrence_type else "None"
+    )
+
 class ReminderApp:
     def __init__(self, root):
         global app_instance_ref; app_instance_ref = self
@@ -668,13 +1691,10 @@ class ReminderApp:
         self.root.protocol("WM_DELETE_WINDOW", on_main_window_close_button)
         self.app_icon_photo = None
 
-        try:
-            img = Image.open(LOGO_FILE) # Load the image file
+        img = load_logo_image() # Shared with the tray icon
+        if img is not None:
             self.app_icon_photo = ImageTk.PhotoImage(img) # Convert for Tkinter
             self.root.iconphoto(True, self.app_icon_photo) # Set as window icon
-        except Exception as e:
-            log_error(f"Warn: App logo '{LOGO_FILE}' not found/loadable: {e}")
-            self.app_icon_photo = None
         
         style = ttk.Style()
         style.configure("Treeview.Heading", font=('Helvetica', 10, 'bold'))
@@ -689,7 +1709,8 @@ class ReminderApp:
         ttk.Button(button_frame, text="Add", command=self.open_add_reminder_window).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Update", command=self.open_update_reminder_window).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Delete", command=self.delete_selected_reminder).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Refresh", command=self.populate_reminders_list).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Refresh", command=self.refresh_from_disk).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Calendar", command=self.open_month_calendar_window).pack(side=tk.LEFT, padx=5)
         
         # Filter frame
         filter_frame = ttk.Frame(main_frame)
@@ -698,7 +1719,7 @@ class ReminderApp:
         ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
         self.filter_var = tk.StringVar(value="All")
         filter_combo = ttk.Combobox(filter_frame, textvariable=self.filter_var,
-                                   values=["All", "Today", "Upcoming", "Past", "Recurring"],
+                                   values=list(FILTER_VIEWS),
                                    state="readonly", width=10)
         filter_combo.pack(side=tk.LEFT, padx=5)
         filter_combo.bind('<<ComboboxSelected>>', lambda e: self.apply_filters())
@@ -706,7 +1727,7 @@ class ReminderApp:
         ttk.Label(filter_frame, text="Sort by:").pack(side=tk.LEFT, padx=5)
         self.sort_var = tk.StringVar(value="Date")
         sort_combo = ttk.Combobox(filter_frame, textvariable=self.sort_var,
-                                 values=["Date", "Time", "Title"],
+                                 values=list(SORT_FIELDS),
                                  state="readonly", width=10)
         sort_combo.pack(side=tk.LEFT, padx=5)
         sort_combo.bind('<<ComboboxSelected>>', lambda e: self.apply_filters())
@@ -746,62 +1767,68 @@ class ReminderApp:
         main_frame.columnconfigure(1, weight=0)
         main_frame.rowconfigure(3, weight=1)
 
-        self.populate_reminders_list()
-
-        # Now that the default filter is set, populate the list
-        self.populate_reminders_list()
+        # Starting hidden (autostart, minimized), the list is filled when the window is first shown
+        self.list_populated = False
+        if main_gui_visible:
+            self.populate_reminders_list()
 
     def apply_filters(self):
         """Apply current filter and sort settings to the reminders list."""
-        reminders = load_reminders()
-        today = date.today()
-        today_str = today.strftime("%Y-%m-%d")
-        
-        # Apply filter
+        # Today is served from the resident hot window; other views page their records in for this call.
+        # Rows show each reminder's current occurrence, which for a series can be far from its stored date.
         filter_type = self.filter_var.get()
         if filter_type == "Today":
-            reminders = [r for r in reminders if r.get("date") == today_str]
-            self.title_label.config(text="Today's Reminders")
-        elif filter_type == "Upcoming":
-            reminders = [r for r in reminders if r.get("date") > today_str]
-            self.title_label.config(text="Upcoming Reminders")
-        elif filter_type == "Past":
-            reminders = [r for r in reminders if r.get("date") < today_str]
-            self.title_label.config(text="Past Reminders")
-        elif filter_type == "Recurring":
-            reminders = [r for r in reminders if r.get("recurrence_type")]
-            self.title_label.config(text="Recurring Reminders")
-        else: # "All"
-            self.title_label.config(text="All Reminders")
+            reminders = resident_store.snapshot()[0]
+        else:
+            reminders = resident_store.page()
+
+        # Apply filter
+        reminders = filter_reminders(store_state().apply(reminders), filter_type)
+        self.title_label.config(text={
+            "Today": "Today's Reminders",
+            "Upcoming": "Upcoming Reminders",
+            "Past": "Past Reminders",
+            "Recurring": "Recurring Reminders"
+        }.get(filter_type, "All Reminders"))
 
         # Apply sort
-        sort_by = self.sort_var.get()
-        if sort_by == "Date":
-            reminders.sort(key=lambda r: (r.get("date", ""), r.get("time", "")))
-        elif sort_by == "Time":
-            reminders.sort(key=lambda r: (r.get("time", ""), r.get("date", "")))
-        elif sort_by == "Title":
-            reminders.sort(key=lambda r: r.get("title", ""))
+        sort_reminders(reminders, self.sort_var.get())
 
         # Update the tree
         for i in self.tree.get_children():
             self.tree.delete(i)
 
+        self.shown_reminders = {}
+        self.list_populated = True
         for idx, reminder in enumerate(reminders):
-            formatted_time_ampm = format_time_to_ampm(reminder.get('time', 'N/A'))
-            recurrence_type = reminder.get('recurrence_type', 'None')
-            if recurrence_type:
-                recurrence_display = recurrence_type.capitalize()
+            self.shown_reminders[reminder.get('id')] = reminder_summary(reminder) # Just what re-sorting needs
+            self.tree.insert("", tk.END, iid=reminder.get('id'), values=reminder_row_values(idx + 1, reminder))
+
+    def apply_record_changes(self, changes):
+        """Update only the rows of records changed on disk, keeping the current filter and sort."""
+        if not self.list_populated: return
+        for reminder in changes.removed:
+            self.shown_reminders.pop(reminder.get('id'), None)
+            if self.tree.exists(reminder.get('id')): self.tree.delete(reminder.get('id'))
+        for reminder in store_state().apply(changes.added + [new for _, new in changes.changed]):
+            reminder_id = reminder.get('id')
+            if filter_reminders([reminder], self.filter_var.get()):
+                self.shown_reminders[reminder_id] = reminder_summary(reminder)
+                if self.tree.exists(reminder_id):
+                    self.tree.item(reminder_id, values=reminder_row_values(self.tree.set(reminder_id, "#"), reminder))
+                else:
+                    self.tree.insert("", tk.END, iid=reminder_id, values=reminder_row_values(0, reminder))
             else:
-                recurrence_display = "None"
-            
-            self.tree.insert("", tk.END, iid=reminder.get('id'), values=(
-                idx + 1,
-                reminder.get('title', 'N/A'),
-                reminder.get('date', 'N/A'),
-                formatted_time_ampm,
-                recurrence_display
-            ))
+                self.shown_reminders.pop(reminder_id, None)
+                if self.tree.exists(reminder_id): self.tree.delete(reminder_id)
+        # Re-sort the shown records in memory; only rows whose position changed are moved or renumbered
+        ordered = [r.get('id') for r in sort_reminders(list(self.shown_reminders.values()), self.sort_var.get())]
+        if list(self.tree.get_children()) != ordered:
+            for idx, reminder_id in enumerate(ordered):
+                self.tree.move(reminder_id, "", idx)
+        for idx, reminder_id in enumerate(ordered):
+            if str(self.tree.set(reminder_id, "#")) != str(idx + 1):
+                self.tree.set(reminder_id, "#", idx + 1)
 
     def populate_reminders_list(self):
         """Populate the reminders list with current filter and sort settings."""
@@ -809,8 +1836,22 @@ class ReminderApp:
         delete_past_reminders()
         self.apply_filters()
 
+    def refresh_from_disk(self):
+        """Refresh button: also resync the next-due index in case the file changed externally."""
+        with store_write_lock:
+            reminders = load_reminders()
+            duplicate_index.apply_diff(store_watcher.adopt(reminders))
+            next_due_index.rebuild(store_state().apply(reminders))
+        month_counts.clear()
+        slot_index.clear()
+        refresh_tray_status()
+        self.populate_reminders_list()
+
     def open_add_reminder_window(self):
         AddReminderWindow(self.root, self)
+
+    def open_month_calendar_window(self):
+        MonthCalendarWindow(self.root, self)
         
     def open_update_reminder_window(self):
         selected_item_iids = self.tree.selection()
@@ -821,7 +1862,7 @@ class ReminderApp:
             messagebox.showwarning("Multiple Selections", "Please select only one reminder.", parent=self.root)
             return
         selected_reminder_id = selected_item_iids[0]
-        all_reminders = load_reminders()
+        all_reminders = load_effective_reminders() # The form shows the current occurrence
         reminder_data_to_edit = next((r for r in all_reminders if r.get("id") == selected_reminder_id), None)
         if reminder_data_to_edit is None:
             messagebox.showerror("Error", "Could not find selected reminder. Please refresh.", parent=self.root)
@@ -842,8 +1883,8 @@ class ReminderApp:
                 break
         confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{reminder_title_to_delete}'?", parent=self.root)
         if confirm:
-            updated_reminders = [r for r in all_reminders if r.get('id') != selected_iid]
-            save_reminders(updated_reminders)
+            delete_reminders([selected_iid])
+            refresh_tray_status()
             self.populate_reminders_list()
             messagebox.showinfo("Deleted", "Reminder deleted successfully.", parent=self.root)
 
@@ -894,6 +1935,7 @@ class AddReminderWindow:
         self.cal = Calendar(form_frame, selectmode='day', date_pattern='yyyy-mm-dd', font="Arial 9")
         self.cal.grid(row=1, column=1, columnspan=2, sticky="ew", padx=5, pady=5)
         self.cal.selection_set(date.today())
+        attach_month_counts(self.cal)
 
         # Time with enhanced input
         ttk.Label(form_frame, text="Time:").grid(row=2, column=0, sticky="w", padx=5, pady=(10,5))
@@ -929,6 +1971,11 @@ class AddReminderWindow:
             ttk.Button(quick_time_frame, text=time_label, width=8,
                       command=lambda t=time_label: self.set_quick_time(t)).pack(side=tk.LEFT, padx=2)
 
+        # Other reminders already set for the picked minute
+        self.slot_info = ttk.Label(time_input_frame, text="", foreground="#b06000", font=("Helvetica", 8), wraplength=320)
+        self.slot_info.pack(side=tk.TOP, anchor="w")
+        attach_slot_conflicts(self)
+
         # Enhanced Recurrence Frame
         ttk.Label(form_frame, text="Repeat:").grid(row=3, column=0, sticky="w", padx=5, pady=(10,5))
         recurrence_frame = ttk.Frame(form_frame)
@@ -1009,6 +2056,7 @@ class AddReminderWindow:
             self.hour_spinbox.set(f"{int(current_dt.strftime('%I')):02}")
             self.minute_spinbox.set(current_dt.strftime("%M"))
             self.ampm_var.set(current_dt.strftime("%p"))
+        show_slot_conflicts(self)
 
     def set_quick_time(self, time_label):
         """Set time based on quick time selection."""
@@ -1029,6 +2077,7 @@ class AddReminderWindow:
             self.hour_spinbox.set("06")
             self.minute_spinbox.set("00")
             self.ampm_var.set("PM")
+        show_slot_conflicts(self)
 
     def update_recurrence_info(self, event=None):
         """Update the recurrence info label based on selection."""
@@ -1092,7 +2141,7 @@ class AddReminderWindow:
             time_obj_24h = datetime.strptime(f"{hour_12_int:02}:{minute_int:02} {ampm_val}", "%I:%M %p")
             time_str_24h_to_save = time_obj_24h.strftime("%H:%M")
         except ValueError as e:
-            log_error(f"Time conversion error: {e}", exc_info=True)
+            log_error("Time conversion error: %s", e, exc_info=True)
             messagebox.showerror("Input Error", "Invalid time format.", parent=self.add_window)
             return
 
@@ -1116,27 +2165,25 @@ class AddReminderWindow:
                                    parent=self.add_window)
                 return
 
-        new_reminder = {
-            "id": str(uuid.uuid4()),
-            "title": title,
-            "date": selected_date_str,
-            "time": time_str_24h_to_save,
-            "notified_individually": False,
-            "recurrence_type": recurrence_type,
-            "recurrence_end_type": end_condition_type,
-            "recurrence_end_value": (
-                int(self.occurrences_var.get()) if end_condition_type == "occurrences"
-                else self.end_date_cal.get_date() if end_condition_type == "date"
-                else None
-            ),
-            "recurrence_current_count": 0 if end_condition_type == "occurrences" else None,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        new_reminder = new_reminder_record(
+            title, selected_date_str, time_str_24h_to_save, recurrence_type, end_condition_type,
+            int(self.occurrences_var.get()) if end_condition_type == "occurrences"
+            else self.end_date_cal.get_date() if end_condition_type == "date"
+            else None
+        )
 
-        reminders = load_reminders()
-        reminders.append(new_reminder)
-        save_reminders(reminders)
-        messagebox.showinfo("Success", "Reminder added!", parent=self.add_window)
+        if duplicate_policy == "warn" and is_duplicate(new_reminder) and not messagebox.askyesno(
+                "Possible Duplicate", f"'{title}' is already set for {selected_date_str} {format_time_to_ampm(time_str_24h_to_save)}.\n"
+                "Add it again?", parent=self.add_window):
+            return
+        stored = add_reminders([new_reminder])[0]
+        refresh_tray_status()
+        if stored is new_reminder:
+            messagebox.showinfo("Success", "Reminder added!", parent=self.add_window)
+        else:
+            messagebox.showinfo("Already Set", "This reminder already exists; it was not added again."
+                                if duplicate_policy == "skip" else "This reminder already exists; it was updated instead.",
+                                parent=self.add_window)
         self.main_app.populate_reminders_list()
         self.add_window.destroy()
 
@@ -1156,6 +2203,12 @@ class EditReminderWindow:
         app_icon_photo = getattr(self.main_app, 'app_icon_photo', None)
         if app_icon_photo: self.edit_window.iconphoto(True, app_icon_photo)
 
+        # Changes made on disk while this window is open are noted here instead of replacing the form
+        self.disk_conflict = None # None, "changed" or "removed"
+        self.conflict_label = ttk.Label(self.edit_window, foreground="#b00020", wraplength=420, padding=(10, 5))
+        open_edit_windows[reminder["id"]] = self
+        self.edit_window.bind("<Destroy>", self.on_destroy, add="+")
+
         # --- SCROLLABLE FORM SETUP ---
         self.canvas = tk.Canvas(self.edit_window, borderwidth=0, background="#f8f8f8") # Make canvas an instance variable
         form_frame = ttk.Frame(self.canvas, padding="15")
@@ -1192,6 +2245,7 @@ class EditReminderWindow:
         self.cal = Calendar(form_frame, selectmode='day', date_pattern='yyyy-mm-dd', font="Arial 9")
         self.cal.grid(row=1, column=1, columnspan=2, sticky="ew", padx=5, pady=5)
         self.cal.selection_set(reminder["date"])
+        attach_month_counts(self.cal)
 
         # Time with enhanced input
         ttk.Label(form_frame, text="Time:").grid(row=2, column=0, sticky="w", padx=5, pady=(10,5))
@@ -1199,7 +2253,7 @@ class EditReminderWindow:
         time_input_frame.grid(row=2, column=1, columnspan=2, sticky="w", padx=5, pady=5)
         
         # Parse existing time
-        time_obj = datetime.strptime(reminder["time"], "%H:%M")
+        time_obj = parse_wall_time(reminder["time"])
         hour_12 = int(time_obj.strftime("%I"))
         minute = int(time_obj.strftime("%M"))
         ampm = time_obj.strftime("%p")
@@ -1232,6 +2286,11 @@ class EditReminderWindow:
             ttk.Button(quick_time_frame, text=time_label, width=8,
                       command=lambda t=time_label: self.set_quick_time(t)).pack(side=tk.LEFT, padx=2)
 
+        # Other reminders already set for the picked minute
+        self.slot_info = ttk.Label(time_input_frame, text="", foreground="#b06000", font=("Helvetica", 8), wraplength=320)
+        self.slot_info.pack(side=tk.TOP, anchor="w")
+        attach_slot_conflicts(self, reminder["id"])
+
         # Enhanced Recurrence Frame
         ttk.Label(form_frame, text="Repeat:").grid(row=3, column=0, sticky="w", padx=5, pady=(10,5))
         recurrence_frame = ttk.Frame(form_frame)
@@ -1326,6 +2385,7 @@ class EditReminderWindow:
             self.hour_spinbox.set(f"{int(current_dt.strftime('%I')):02}")
             self.minute_spinbox.set(current_dt.strftime("%M"))
             self.ampm_var.set(current_dt.strftime("%p"))
+        show_slot_conflicts(self)
 
     def set_quick_time(self, time_label):
         """Set time based on quick time selection."""
@@ -1346,6 +2406,7 @@ class EditReminderWindow:
             self.hour_spinbox.set("06")
             self.minute_spinbox.set("00")
             self.ampm_var.set("PM")
+        show_slot_conflicts(self)
 
     def update_recurrence_info(self, event=None):
         """Update the recurrence info label based on selection."""
@@ -1408,8 +2469,10 @@ class EditReminderWindow:
         try:
             time_obj_24h = datetime.strptime(f"{hour_12_int:02}:{minute_int:02} {ampm_val}", "%I:%M %p")
             time_str_24h_to_save = time_obj_24h.strftime("%H:%M")
+            if self.reminder["time"].startswith(time_str_24h_to_save):
+                time_str_24h_to_save = self.reminder["time"] # Keep seconds the spinboxes can't show
         except ValueError as e:
-            log_error(f"Time conversion error: {e}", exc_info=True)
+            log_error("Time conversion error: %s", e, exc_info=True)
             messagebox.showerror("Input Error", "Invalid time format.", parent=self.edit_window)
             return
 
@@ -1455,6 +2518,7 @@ class EditReminderWindow:
                 # Reset count for new occurrences type or fundamental changes
                 current_count_to_save = 0
 
+        original_reminder = dict(self.reminder) # Its old month's counts change too
         # Update reminder data
         self.reminder.update({
             "title": title,
@@ -1473,41 +2537,204 @@ class EditReminderWindow:
         # Reset notification status if date or time changed
         if did_start_date_change or did_time_change:
             self.reminder["notified_individually"] = False
-            log_debug(f"Resetting notification status for reminder {self.reminder.get('id')} due to date/time change.")
+            log_debug("Resetting notification status for reminder %s due to date/time change.", self.reminder.get('id'))
 
-        # Save changes
-        reminders = load_reminders()
-        for i, r in enumerate(reminders):
-            if r["id"] == self.reminder["id"]:
-                reminders[i] = self.reminder
-                break
-        save_reminders(reminders)
+        if self.disk_conflict == "changed" and not messagebox.askyesno(
+                "Changed Elsewhere", "This reminder was changed by another program while you were editing it.\n"
+                "Overwrite those changes with yours?", parent=self.edit_window):
+            return
+        if self.disk_conflict == "removed" and not messagebox.askyesno(
+                "Deleted Elsewhere", "This reminder was deleted by another program while you were editing it.\n"
+                "Save it again with your changes?", parent=self.edit_window):
+            return
+
+        # Save changes. The form's occurrence becomes the stored reminder, so its runtime state starts afresh
+        self.reminder = reminder_state.definition_of(self.reminder)
+        with store_transaction():
+            reminders = load_reminders()
+            for i, r in enumerate(reminders):
+                if r["id"] == self.reminder["id"]:
+                    reminders[i] = self.reminder
+                    break
+            else:
+                reminders.append(self.reminder) # Deleted elsewhere and confirmed above
+            save_reminders(reminders)
+            store_state().clear([self.reminder["id"]])
+        index_reminder(self.reminder)
+        note_reminders_changed([original_reminder, self.reminder])
+        refresh_tray_status()
         messagebox.showinfo("Success", "Reminder updated!", parent=self.edit_window)
         self.main_app.populate_reminders_list()
         self.edit_window.destroy()
 
+    def note_external_change(self, changes):
+        reminder_id = self.reminder["id"]
+        if any(r.get("id") == reminder_id for r in changes.removed):
+            self.disk_conflict = "removed"
+            self.conflict_label.config(text="This reminder was deleted by another program. Saving will re-create it.")
+        elif any(new.get("id") == reminder_id for _, new in changes.changed):
+            self.disk_conflict = "changed"
+            self.conflict_label.config(text="This reminder was changed by another program. Saving will overwrite those changes.")
+        else:
+            return
+        log_warning("Reminder %s changed on disk while its Edit window is open; keeping the unsaved form.", reminder_id)
+        if not self.conflict_label.winfo_ismapped():
+            self.conflict_label.pack(side="top", fill="x", before=self.edit_window.pack_slaves()[0])
+
+    def on_destroy(self, event):
+        if event.widget is self.edit_window and open_edit_windows.get(self.reminder["id"]) is self:
+            del open_edit_windows[self.reminder["id"]]
+
+
+class MonthCalendarWindow:
+    """Month view with the number of reminders per day, projected recurrences included."""
+    def __init__(self, parent_root, main_app_ref):
+        self.main_app = main_app_ref
+        self.window = tk.Toplevel(parent_root)
+        self.window.title("Reminder Calendar")
+        self.window.geometry("420x520")
+        app_icon_photo = getattr(self.main_app, 'app_icon_photo', None)
+        if app_icon_photo:
+            self.window.iconphoto(False, app_icon_photo)
+
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill="both", expand=True)
+        self.cal = Calendar(frame, selectmode='day', date_pattern='yyyy-mm-dd', font="Arial 11")
+        self.cal.pack(fill="x")
+        self.cal.selection_set(date.today())
+        attach_month_counts(self.cal)
+
+        self.month_label = ttk.Label(frame, font=("Helvetica", 10, "bold"))
+        self.month_label.pack(anchor="w", pady=(8, 2))
+        self.day_label = ttk.Label(frame)
+        self.day_label.pack(anchor="w")
+        self.day_list = tk.Listbox(frame, height=10)
+        self.day_list.pack(fill="both", expand=True, pady=5)
+
+        self.cal.bind("<<CalendarMonthChanged>>", lambda e: self.update_month_summary(), add="+")
+        self.cal.bind("<<CalendarSelected>>", lambda e: self.show_day(), add="+")
+        self.update_month_summary()
+        self.show_day()
+
+    def update_month_summary(self):
+        month, year = self.cal.get_displayed_month()
+        counts = month_counts.counts_for_month(year, month)
+        total = sum(counts.values())
+        self.month_label.config(text=f"{date(year, month, 1).strftime('%B %Y')}: {total} reminder{'s' if total != 1 else ''} on {len(counts)} day{'s' if len(counts) != 1 else ''}")
+
+    def show_day(self):
+        selected = datetime.strptime(self.cal.get_date(), "%Y-%m-%d").date()
+        selected_str = selected.strftime("%Y-%m-%d")
+        reminders = load_effective_reminders(with_history=True)
+        entries = [(r.get("time", ""), r.get("title", "N/A"), " (done)") for r in reminders
+                   if r.get("date") == selected_str and r.get("notified_individually", False)]
+        entries += [(time_str, title, "") for _, time_str, _, title
+                    in reminder_projection.project_agenda(reminders, selected, selected, workers=1)]
+        entries.sort()
+        self.day_label.config(text=f"{selected.strftime('%A, %d %B %Y')}: {len(entries)} reminder{'s' if len(entries) != 1 else ''}")
+        self.day_list.delete(0, tk.END)
+        for time_str, title, status in entries:
+            self.day_list.insert(tk.END, f"{format_time_to_ampm(time_str)}  {title}{status}")
+
 
 # --- SYSTEM TRAY ICON SETUP ---
+logo_image = None
+logo_image_lock = threading.Lock()
+
+def load_logo_image():
+    """Load the logo once; the main window and the tray icon share the same PIL image."""
+    global logo_image
+    with logo_image_lock:
+        if logo_image is None:
+            try:
+                logo_image = Image.open(LOGO_FILE)
+                logo_image.load()
+            except Exception as e:
+                log_error("Warn: App logo '%s' not found/loadable: %s", LOGO_FILE, e)
+                return None
+        return logo_image
+
+def tray_tooltip_text(now=None):
+    upcoming = next_due_index.peek(1)
+    if not upcoming:
+        return f"{APP_NAME} - no upcoming reminders"
+    now = now or datetime.now()
+    countdown = format_countdown((upcoming[0]["due"] - now).total_seconds())
+    return f"{APP_NAME} - next: {upcoming[0]['title']} {countdown}"
+
+def next_up_menu_items():
+    """Build the "Next up" submenu from the index each time the tray menu is shown."""
+    upcoming = next_due_index.peek(NEXT_UP_MENU_SIZE)
+    if not upcoming:
+        return [item('No upcoming reminders', None, enabled=False)]
+    now = datetime.now()
+    menu_items = []
+    for entry in upcoming:
+        label = f"{entry['due'].strftime('%a %d %b')} {format_time_to_ampm(entry['time'])} - {entry['title']} ({format_countdown((entry['due'] - now).total_seconds())})"
+        # pystray rejects callbacks with more than two parameters, so bind the arguments in closures
+        actions = [item(f"Snooze {option}", tray_snooze_handler(entry['id'], minutes))
+                   for option, minutes in SNOOZE_OPTIONS.items()]
+        actions.append(item('Dismiss', tray_dismiss_handler(entry['id'])))
+        menu_items.append(item(label, Menu(*actions)))
+    return menu_items
+
+def stall_menu_items():
+    """Build the "UI stalls" submenu from the watchdog's rolling report each time the tray menu is shown."""
+    recent = list(tk_watchdog.stalls)[-STALL_MENU_SIZE:]
+    menu_items = [item(f"{stall['at'][11:]}  {stall['seconds']:.1f} s in {stall['function']} ({stall['location']})", None, enabled=False)
+                  for stall in reversed(recent)] or [item('No UI stalls recorded', None, enabled=False)]
+    return menu_items + [Menu.SEPARATOR, item('Save Stall Report', save_stall_report_action)]
+
+def tray_snooze_handler(reminder_id, minutes):
+    def snooze_from_tray():
+        snooze_reminder(reminder_id, minutes)
+        refresh_tray_status()
+        refresh_reminder_list()
+    return snooze_from_tray
+
+def tray_dismiss_handler(reminder_id):
+    def dismiss_from_tray():
+        dismiss_reminder(reminder_id)
+        refresh_tray_status()
+        refresh_reminder_list()
+    return dismiss_from_tray
+
+def refresh_tray_status():
+    """Update the tray tooltip countdown and rebuild the dynamic menu."""
+    if not tray_icon_object: return
+    try:
+        tray_icon_object.title = tray_tooltip_text()
+        tray_icon_object.update_menu()
+    except Exception as e:
+        log_debug("Could not refresh tray status: %s", e)
+
 def setup_system_tray(): # Your version from the provided code
     global tray_icon_object
     try:
-        pil_image = Image.open(LOGO_FILE)
+        pil_image = load_logo_image()
+        if pil_image is None:
+            log_error("Error: Tray icon image '%s' not found. Tray icon disabled.", LOGO_FILE)
+            return
         menu_items = (item('Show App', show_main_window_action, default=True),
                       item('Add Reminder', add_reminder_action_from_tray),
+                      item('Next up', Menu(next_up_menu_items)),
+                      Menu.SEPARATOR,
+                      item('Export Metrics', export_metrics_action),
+                      item(profiling_menu_text, toggle_profiling_action),
+                      item('UI stalls', Menu(stall_menu_items)),
                       Menu.SEPARATOR,
                       item('Quit', quit_application_action))
-        tray_icon_object = pystray.Icon(APP_NAME, pil_image, APP_NAME, menu_items)
+        tray_icon_object = pystray.Icon(APP_NAME, pil_image, tray_tooltip_text(), menu_items)
         log_info("Starting tray icon thread...")
         tray_icon_object.run() # This blocks until tray_icon_object.stop() is called
         log_info("Tray icon thread finished.")
-    except FileNotFoundError:
-        log_error(f"Error: Tray icon image '{LOGO_FILE}' not found. Tray icon disabled.")
     except Exception as e:
-        log_error(f"Error setting up system tray: {e}")
+        log_error("Error setting up system tray: %s", e)
 
 # --- MODIFIED MAIN EXECUTION ---
 if __name__ == "__main__":
     import argparse
+    logger = setup_logging()
     parser = argparse.ArgumentParser(description=APP_NAME)
     parser.add_argument(
         '--startup-mode',
@@ -1515,9 +2742,76 @@ if __name__ == "__main__":
         default='normal',
         help="Defines how the application starts."
     )
+    parser.add_argument(
+        '--show',
+        action='store_true',
+        help="Bring the running instance's main window to the front (default for a second launch)."
+    )
+    parser.add_argument(
+        '--add',
+        metavar='TITLE',
+        default=None,
+        help="Add a reminder, handing it to the running instance if there is one."
+    )
+    parser.add_argument(
+        '--at',
+        metavar='WHEN',
+        default=None,
+        help="Due time for --add: 'YYYY-MM-DD HH:MM', 'YYYY-MM-DD', 'HH:MM' or a relative '+30m'/'+2h'/'+1d'."
+    )
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help="Write a JSON metrics snapshot to this path periodically and on exit."
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="Capture cProfile and tracemalloc reports next to app.log until exit or until stopped from the tray."
+    )
+    parser.add_argument(
+        '--api-port',
+        type=int,
+        default=None,
+        help="Serve the local HTTP/JSON API on 127.0.0.1 at this port. Defaults to 'api_port' in app_config.json (off when unset)."
+    )
+    parser.add_argument(
+        '--memory-budget-mb',
+        type=float,
+        default=None,
+        help="Narrow the resident hot window of reminders to stay within this many MB. Defaults to 'memory_budget_mb' in app_config.json (unbounded when unset)."
+    )
+    parser.add_argument(
+        '--duplicates',
+        choices=DUPLICATE_POLICIES,
+        default=None,
+        help="What adding a reminder that already exists does: warn (ask or log, then add), merge or skip. Defaults to 'duplicate_policy' in app_config.json, or warn."
+    )
+    parser.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        type=str.upper,
+        default=None,
+        help="Logging verbosity. Defaults to 'log_level' in app_config.json, or INFO."
+    )
     
     args, unknown_args = parser.parse_known_args()
     effective_startup_mode = args.startup_mode
+    metrics_export_file = args.metrics_file
+    configured_log_level = args.log_level or load_app_config().get("log_level")
+    if configured_log_level:
+        set_log_level(configured_log_level)
+    memory_budget_mb = args.memory_budget_mb or load_app_config().get("memory_budget_mb")
+    duplicate_policy = args.duplicates or load_app_config().get("duplicate_policy", DEFAULT_DUPLICATE_POLICY)
+    if duplicate_policy not in DUPLICATE_POLICIES:
+        log_warning("Unknown duplicate_policy '%s' in app_config.json; using '%s'.", duplicate_policy, DEFAULT_DUPLICATE_POLICY)
+        duplicate_policy = DEFAULT_DUPLICATE_POLICY
+    if memory_budget_mb:
+        resident_store.budget_bytes = int(float(memory_budget_mb) * 1024 * 1024)
+    if args.profile:
+        profiling_session.start()
+        sync_tk_profiler() # The main thread becomes the Tk thread
 
     if len(sys.argv) > 1 and sys.argv[1] == 'startup_check' and effective_startup_mode != 'startup_check_only':
         log_info("Legacy 'startup_check' positional argument detected. Overriding to 'startup_check_only' mode.")
@@ -1527,6 +2821,15 @@ if __name__ == "__main__":
     if is_full_app_run:
         check_single_instance()
 
+    if args.add:
+        # No running instance took the request, so add it here before starting up
+        try:
+            print(handle_add_command({"title": args.add, "at": args.at}))
+        except ValueError as e:
+            log_error("Could not add reminder from the command line: %s", e)
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(2)
+
     try:
         if effective_startup_mode == 'startup_check_only':
             log_info("Running in 'startup_check_only' mode (utility popup and exit)...")
@@ -1538,26 +2841,53 @@ if __name__ == "__main__":
             today_str_util = date.today().strftime("%Y-%m-%d")
 
             if last_check_util != today_str_util:
-                log_info(f"'startup_check_only' mode: Performing daily reminder summary for {today_str_util}.")
-                todays_reminders_list_util = get_all_todays_reminders()
+                log_info("'startup_check_only' mode: Performing daily reminder summary for %s.", today_str_util)
+                warm_start = reminder_snapshot.load_warm_start(DATA_FILE)
+                todays_reminders_list_util = todays_reminders_for_summary(warm_start)
+                if not warm_start:
+                    snapshot_keeper.refresh_in_background(daemon=False) # Ready for the next launch; finishes before exit
                 if todays_reminders_list_util:
                     display_reminders_popup(todays_reminders_list_util, f"Reminders for Today ({today_str_util})", temp_utility_root)
                 app_config_util["last_daily_popup_date"] = today_str_util
                 save_app_config(app_config_util)
                 log_info("'startup_check_only' mode: Check complete.")
             else:
-                log_info(f"'startup_check_only' mode: Daily summary already shown for {today_str_util} or no reminders for today.")
+                log_info("'startup_check_only' mode: Daily summary already shown for %s or no reminders for today.", today_str_util)
             
             temp_utility_root.destroy()
             sys.exit(0)
 
-        log_info(f"{APP_NAME} starting in full application mode: {effective_startup_mode}")
+        log_info("%s starting in full application mode: %s", APP_NAME, effective_startup_mode)
 
-        scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        scheduler_thread.start()
+        warm_start = reminder_snapshot.load_warm_start(DATA_FILE)
+        if warm_start and not warm_start.meta["unstamped"]:
+            restore_from_warm_start(warm_start)
+        else:
+            warm_start = None
+            with store_transaction():
+                startup_reminders = load_reminders()
+                migrated_count = stamp_due_times(startup_reminders)
+                if migrated_count:
+                    # Stores written before due stamps existed (or hand-edited since) get them once, here
+                    log_info("Stamped %d reminder(s) with epoch due times.", migrated_count)
+                    save_reminders(startup_reminders)
+            store_watcher.adopt(startup_reminders)
+            store_state().compact(startup_reminders)
+            next_due_index.rebuild(store_state().apply(startup_reminders))
+            snapshot_keeper.refresh_in_background()
+        start_scheduler()
+        agenda_publisher.start(DATA_FILE)
+        start_file_watcher()
+        api_port = args.api_port or load_app_config().get("api_port")
+        if api_port:
+            start_api_server(int(api_port))
 
         main_window_root = tk.Tk()
         tk_root_window = main_window_root
+        tk_events.attach(main_window_root)
+        if pending_alerts: # Fired before there was a window to show them in
+            post_to_tk(show_pending_alerts, coalesce="alerts")
+        tk_watchdog.start(main_window_root)
 
         show_main_window_initially = True
         
@@ -1566,15 +2896,15 @@ if __name__ == "__main__":
             last_daily_popup_date = app_config.get("last_daily_popup_date")
             today_str = date.today().strftime("%Y-%m-%d")
             if last_daily_popup_date != today_str:
-                log_info(f"Mode 'autostart_with_daily_check': Performing daily startup reminder summary for {today_str}.")
-                todays_reminders_list = get_all_todays_reminders()
+                log_info("Mode 'autostart_with_daily_check': Performing daily startup reminder summary for %s.", today_str)
+                todays_reminders_list = todays_reminders_for_summary(warm_start)
                 if todays_reminders_list:
                     display_reminders_popup(todays_reminders_list, f"Reminders for Today ({today_str})", parent_window=tk_root_window)
                 app_config["last_daily_popup_date"] = today_str
                 save_app_config(app_config)
                 log_info("Daily startup reminder summary complete.")
             else:
-                log_info(f"Mode 'autostart_with_daily_check': Daily summary already shown for {today_str} or no reminders for today.")
+                log_info("Mode 'autostart_with_daily_check': Daily summary already shown for %s or no reminders for today.", today_str)
             show_main_window_initially = False
 
         elif effective_startup_mode == 'minimized_only':
@@ -1585,11 +2915,14 @@ if __name__ == "__main__":
         app = ReminderApp(main_window_root)
 
         if not show_main_window_initially:
+            # The list (and the past-reminder cleanup it runs) waits until the window is shown
+            if not (warm_start and (warm_start.meta["oldest_date"] or "9999") >= date.today().strftime("%Y-%m-%d")):
+                threading.Thread(target=delete_past_reminders, name="StartupCleanup", daemon=True).start()
             main_window_root.withdraw()
             main_gui_visible = False
-            log_info(f"{APP_NAME} UI started and minimized to tray.")
+            log_info("%s UI started and minimized to tray.", APP_NAME)
         else:
-            log_info(f"{APP_NAME} UI started with main window visible.")
+            log_info("%s UI started with main window visible.", APP_NAME)
 
         tray_thread = threading.Thread(target=setup_system_tray, daemon=True)
         tray_thread.start()
@@ -1601,7 +2934,7 @@ if __name__ == "__main__":
         log_info("Application exited via sys.exit().")
         pass
     except Exception as e:
-        log_error(f"An unhandled error occurred in main: {e}", exc_info=True)
+        log_error("An unhandled error occurred in main: %s", e, exc_info=True)
         try:
             error_parent = tk_root_window if 'tk_root_window' in globals() and tk_root_window and tk_root_window.winfo_exists() else None
             if not error_parent:
@@ -1614,13 +2947,19 @@ if __name__ == "__main__":
             if not ('tk_root_window' in globals() and tk_root_window and tk_root_window.winfo_exists()):
                 temp_error_root.destroy()
         except Exception as e_msgbox:
-            log_error(f"Could not display error in messagebox: {e_msgbox}")
+            log_error("Could not display error in messagebox: %s", e_msgbox)
     finally:
         log_info("Application is exiting. Cleaning up...")
-        if 'scheduler_thread' in locals() and scheduler_thread.is_alive() and not scheduler_stop_event.is_set():
-            log_info("Stopping scheduler thread...")
-            scheduler_stop_event.set()
-            scheduler_thread.join(timeout=3)
-            if scheduler_thread.is_alive():
-                log_warning("Scheduler thread did not stop in time.")
-        log_info(f"{APP_NAME} finished.")
\ No newline at end of file
+        tk_events.detach()
+        tk_watchdog.stop()
+        stop_file_watcher()
+        if is_full_app_run and effective_startup_mode != 'startup_check_only':
+            snapshot_keeper.refresh_if_stale() # So the next launch (e.g. autostart at login) starts warm
+        stop_api_server()
+        if metrics_export_file:
+            export_metrics_snapshot(metrics_export_file)
+        stop_scheduler()
+        agenda_publisher.stop()
+        profiling_session.stop()
+        profiling_session.detach_current_thread("tk")
+        log_info("%s finished.", APP_NAME)
\ No newline at end of file
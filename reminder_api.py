@@ -0,0 +1,357 @@
+"""Optional localhost HTTP/JSON API for Personal Reminder.
+
+    POST   /reminders              {"title": ..., "at": "2024-03-20 15:00", "repeat": "weekly"}
+    POST   /reminders/batch        {"reminders": [{...}, ...]}    (committed as one write)
+    GET    /reminders?from=YYYY-MM-DD&to=YYYY-MM-DD                (both bounds inclusive, both optional)
+    POST   /reminders/<id>/snooze  {"minutes": 10}
+    DELETE /reminders/<id>
+    GET    /events                 server-sent events, one "firing" event per notification
+
+Instead of "at", a reminder may give "date" and "time" ("YYYY-MM-DD", "HH:MM").
+The server only binds to the loopback interface and only uses the standard
+library. Binding alone doesn't keep web pages out, so requests must name this
+server in Host (127.0.0.1:<port> or localhost:<port>, which defeats DNS
+rebinding), an Origin header, if sent, must be the same, and POSTs must be
+Content-Type: application/json, which a cross-site form cannot send. It runs on its own thread; the actual reads and writes go through a
+ReminderStore, which the GUI app implements on top of its own store, index
+and scheduler.
+"""
+import json
+import logging
+from abc import ABC, abstractmethod
+import queue
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from reminder_core import (
+    APP_NAME, read_reminders_file, write_reminders_file, StoreLock, StoreReadCache, new_reminder_record, parse_when,
+    recurrence_type_from_name, DEFAULT_SNOOZE_MINUTES, DEFAULT_DUPLICATE_POLICY, DuplicateIndex, add_deduplicated
+)
+from reminder_state import RuntimeState, effective_in_range, state_file_path
+
+API_HOST = "127.0.0.1" # Never exposed beyond this machine
+DEFAULT_API_PORT = 8765
+MAX_REQUEST_BYTES = 5 * 1024 * 1024
+MAX_BATCH_SIZE = 10000
+EVENT_QUEUE_SIZE = 256 # Firings buffered per SSE client before it is considered stuck
+EVENT_KEEPALIVE_SECONDS = 15
+
+logger = logging.getLogger(APP_NAME)
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- STORE INTERFACE ---
+class ReminderStore(ABC):
+    """What the API needs from the app. Every method may be called from several threads at once."""
+    @abstractmethod
+    def create(self, records):
+        """Persist new reminder records with a single write and return them as stored (a duplicate of a
+        stored reminder may come back as that reminder)."""
+
+    @abstractmethod
+    def query(self, start_date=None, end_date=None):
+        """Reminders whose current occurrence is within [start_date, end_date] ("YYYY-MM-DD" strings, None = unbounded)."""
+
+    @abstractmethod
+    def snooze(self, reminder_id, minutes):
+        """Snooze one reminder. Returns the updated reminder, or None if the id is unknown."""
+
+    @abstractmethod
+    def delete(self, reminder_id):
+        """Delete one reminder. Returns True if it existed."""
+
+class FileReminderStore(ReminderStore):
+    """ReminderStore directly on a reminders.json file, for use without the GUI."""
+    def __init__(self, data_path, duplicate_policy=DEFAULT_DUPLICATE_POLICY):
+        self.data_path = data_path
+        self.duplicate_policy = duplicate_policy
+        self._lock = threading.Lock() # StoreLock serializes processes; this serializes our threads
+        self._reader = StoreReadCache(data_path)
+        self._state = RuntimeState(state_file_path(data_path))
+
+    def _mutate(self, change):
+        with self._lock, StoreLock(self.data_path):
+            reminders, _ = read_reminders_file(self.data_path)
+            result, changed = change(reminders)
+            if changed:
+                write_reminders_file(self.data_path, reminders)
+            return result
+
+    def create(self, records):
+        def change(reminders):
+            index = DuplicateIndex()
+            index.rebuild(reminders)
+            stored, changed, _ = add_deduplicated(reminders, records, index, self.duplicate_policy)
+            return stored, bool(changed)
+        return self._mutate(change)
+
+    def query(self, start_date=None, end_date=None):
+        return effective_in_range(self._reader, self._state, start_date, end_date)
+
+    def snooze(self, reminder_id, minutes):
+        # Recorded in the state log; the stored reminder keeps its own date and time
+        reminder = next((r for r in self._reader.in_range() if r.get("id") == reminder_id), None)
+        if reminder is None:
+            return None
+        return self._state.snooze(reminder, int(time.time()) + minutes * 60)
+
+    def delete(self, reminder_id):
+        def change(reminders):
+            kept = [r for r in reminders if r.get("id") != reminder_id]
+            found = len(kept) != len(reminders)
+            reminders[:] = kept
+            return found, found
+        found = self._mutate(change)
+        if found:
+            self._state.clear([reminder_id])
+        return found
+
+def reminder_from_payload(payload):
+    """Validate one JSON reminder and build the stored record. Raises ValueError when invalid."""
+    if not isinstance(payload, dict):
+        raise ValueError("Each reminder must be a JSON object.")
+    title = (payload.get("title") or "").strip() if isinstance(payload.get("title"), str) else ""
+    if not title:
+        raise ValueError("Title cannot be empty.")
+    if payload.get("at"):
+        date_str, time_str = parse_when(str(payload["at"]))
+    else:
+        date_str, time_str = parse_when(f"{payload.get('date', '')} {payload.get('time', '')}".strip())
+    repeat = payload.get("repeat")
+    return new_reminder_record(title, date_str, time_str, recurrence_type_from_name(repeat) if repeat else None)
+
+def valid_date_param(value, name):
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date in YYYY-MM-DD format.")
+
+# --- SERVER-SENT EVENTS ---
+class EventBroadcaster:
+    """Fans firing events out to every connected /events client through bounded queues."""
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event_name, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event_name, data))
+            except queue.Full:
+                logger.warning("Dropping '%s' event for a slow API event stream client.", event_name)
+
+    def close(self):
+        """Wake every stream so its handler thread can finish."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
+
+# --- HTTP SERVER ---
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, so a client can send many requests on one connection
+    server_version = "PersonalReminderAPI/1.0"
+    disable_nagle_algorithm = True # Small responses go out at once instead of waiting on delayed ACKs
+
+    def log_message(self, format, *args):
+        logger.debug("API %s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            self._check_caller(method)
+            if method == "GET" and parts == ["events"]:
+                return self._stream_events()
+            status, body = self._route(method, parts, parse_qs(url.query))
+        except ApiError as e:
+            status, body = e.status, {"error": str(e)}
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        except Exception as e:
+            logger.error("Error handling API request %s %s: %s", method, self.path, e, exc_info=True)
+            status, body = 500, {"error": "Internal server error."}
+        self._send_json(status, body)
+
+    def _check_caller(self, method):
+        """Reject requests a web page could make: another Host (DNS rebinding), another Origin
+        (cross-site requests) and POSTs that are not JSON (forms need no CORS preflight)."""
+        port = self.server.server_address[1]
+        allowed_hosts = (f"127.0.0.1:{port}", f"localhost:{port}")
+        host = (self.headers.get("Host") or "").lower()
+        origin = self.headers.get("Origin")
+        problem = None
+        if host not in allowed_hosts:
+            problem = ApiError(403, f"Host '{host}' is not allowed.")
+        elif origin is not None and origin.lower() not in tuple(f"http://{h}" for h in allowed_hosts):
+            problem = ApiError(403, f"Origin '{origin}' is not allowed.")
+        elif method == "POST" and (self.headers.get("Content-Type") or "").split(";")[0].strip().lower() != "application/json":
+            problem = ApiError(415, "POST requests must be Content-Type: application/json.")
+        if problem is not None:
+            self.close_connection = True # The body, if any, is left unread
+            logger.warning("Rejected API request %s %s: %s", method, self.path, problem)
+            raise problem
+
+    def _route(self, method, parts, params):
+        store = self.server.store
+        if parts[:1] != ["reminders"] or len(parts) > 3:
+            raise ApiError(404, f"No such endpoint: {self.path}")
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, store.query(valid_date_param(params.get("from", [None])[0], "from"),
+                                        valid_date_param(params.get("to", [None])[0], "to"))
+            if method == "POST":
+                return 201, store.create([reminder_from_payload(self._read_json())])[0]
+        elif parts[1] == "batch" and len(parts) == 2:
+            if method == "POST":
+                return 201, self._create_batch(store)
+        elif len(parts) == 2 and method == "DELETE":
+            if not store.delete(parts[1]):
+                raise ApiError(404, f"No reminder with id '{parts[1]}'.")
+            return 200, {"deleted": parts[1]}
+        elif len(parts) == 3 and parts[2] == "snooze" and method == "POST":
+            payload = self._read_json(optional=True) or {}
+            minutes = payload.get("minutes", DEFAULT_SNOOZE_MINUTES)
+            if not isinstance(minutes, int) or minutes <= 0:
+                raise ApiError(400, "'minutes' must be a positive integer.")
+            reminder = store.snooze(parts[1], minutes)
+            if reminder is None:
+                raise ApiError(404, f"No reminder with id '{parts[1]}'.")
+            return 200, reminder
+        raise ApiError(405, f"{method} is not supported on {self.path}")
+
+    def _create_batch(self, store):
+        payload = self._read_json()
+        items = payload.get("reminders") if isinstance(payload, dict) else payload
+        if not isinstance(items, list) or not items:
+            raise ApiError(400, "Expected a non-empty list under 'reminders'.")
+        if len(items) > MAX_BATCH_SIZE:
+            raise ApiError(413, f"A batch may hold at most {MAX_BATCH_SIZE} reminders.")
+        records = []
+        for position, item in enumerate(items):
+            try:
+                records.append(reminder_from_payload(item))
+            except ValueError as e:
+                # All or nothing: one bad entry rejects the whole batch before anything is written
+                raise ApiError(400, f"Reminder {position}: {e}")
+        return store.create(records)
+
+    def _read_json(self, optional=False):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            raise ApiError(413, "Request body too large.")
+        raw_body = self.rfile.read(length) if length else b""
+        if not raw_body:
+            if optional: return None
+            raise ApiError(400, "Expected a JSON request body.")
+        try:
+            return json.loads(raw_body.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError(400, "Request body is not valid JSON.")
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_events(self):
+        broadcaster = self.server.events
+        subscriber = broadcaster.subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(b": connected\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n") # Also how we notice a client that went away
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    break
+                event_name, data = event
+                self.wfile.write(f"event: {event_name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except OSError:
+            pass # Client disconnected
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+class ReminderApiServer:
+    """Runs the HTTP API on a background thread. Port 0 picks a free port (see .port)."""
+    def __init__(self, store, port=DEFAULT_API_PORT, host=API_HOST):
+        self.events = EventBroadcaster()
+        self._httpd = ThreadingHTTPServer((host, port), ApiRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.store = store
+        self._httpd.events = self.events
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="ReminderAPI", daemon=True)
+        self._thread.start()
+        logger.info("Reminder API listening on http://%s:%d", API_HOST, self.port)
+
+    def stop(self):
+        self.events.close()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def publish_firing(self, reminder, due_at=None):
+        """Send a 'firing' event for a reminder that was just notified."""
+        self.events.publish("firing", {
+            "id": reminder.get("id"), "title": reminder.get("title"),
+            "date": reminder.get("date"), "time": reminder.get("time"),
+            "due_at": due_at.isoformat() if due_at else None,
+            "fired_at": datetime.now().isoformat(timespec="seconds"),
+        })
@@ -0,0 +1,208 @@
+"""Scriptable command-line client for Personal Reminder.
+
+    remainder.py add "Call Bob" --at "2024-03-20 15:00" [--repeat weekly]
+    remainder.py list [--today | --view Upcoming] [--sort Time] [--json]
+    remainder.py agenda [--days 7] [--expand] [--json]
+    remainder.py slots [--top 10] [--json]
+    remainder.py snooze <id> [--minutes 10]
+    remainder.py dismiss <id>
+    remainder.py metrics
+
+Requests go to the running instance over the local command channel (see
+reminder_ipc) so its scheduler, tray and window stay in sync. When nothing is
+running, the client reads and updates reminders.json (and, for snooze and
+dismiss, its runtime state log; see reminder_state) directly. Neither path
+imports tkinter or any other part of the GUI stack. "metrics" prints the
+running instance's metrics snapshot, so it needs the app to be running.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+import reminder_ipc
+from reminder_shared_agenda import read_agenda
+from reminder_state import RuntimeState, state_file_path
+from reminder_core import (
+    APP_NAME, DEFAULT_SNOOZE_MINUTES, DEFAULT_AGENDA_DAYS, DEFAULT_BUSIEST_SLOTS, FILTER_VIEWS, SORT_FIELDS, RECURRENCE_TYPES, data_file_path, read_reminders_file,
+    write_reminders_file, StoreLock, new_reminder_record, parse_when, recurrence_type_from_name,
+    format_time_to_ampm, list_query, agenda_query, resolve_reminder_id, DuplicateIndex, DUPLICATE_POLICIES,
+    DEFAULT_DUPLICATE_POLICY, add_deduplicated
+)
+
+CLI_COMMANDS = ("add", "list", "agenda", "slots", "snooze", "dismiss", "metrics")
+SHORT_ID_LENGTH = 8 # Ids are shown shortened; any unique prefix is accepted back
+
+def app_dir():
+    """Directory of the running executable or script; the command channel is keyed on it."""
+    return os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="remainder.py", description=f"{APP_NAME} command-line client")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Add a reminder")
+    add_parser.add_argument("title")
+    add_parser.add_argument("--at", required=True, metavar="WHEN",
+                            help="'YYYY-MM-DD HH:MM', 'YYYY-MM-DD', 'HH:MM' or a relative '+30m'/'+2h'/'+1d'")
+    add_parser.add_argument("--repeat", default=None, metavar="TYPE",
+                            help=f"One of: {', '.join(RECURRENCE_TYPES)}")
+    add_parser.add_argument("--duplicates", choices=DUPLICATE_POLICIES, default=None,
+                            help="If the same reminder already exists: warn (add it anyway), merge or skip. "
+                                 "Defaults to the app's setting, or warn.")
+
+    list_parser = subparsers.add_parser("list", help="List reminders")
+    list_parser.add_argument("--view", choices=FILTER_VIEWS, default="All")
+    list_parser.add_argument("--today", dest="view", action="store_const", const="Today",
+                             help="Shortcut for --view Today")
+    list_parser.add_argument("--sort", choices=SORT_FIELDS, default="Date")
+
+    agenda_parser = subparsers.add_parser("agenda", help="Pending reminders for the next few days, by day")
+    agenda_parser.add_argument("--days", type=int, default=DEFAULT_AGENDA_DAYS)
+    agenda_parser.add_argument("--expand", action="store_true",
+                               help="Include every future occurrence of recurring reminders, not just the next one")
+
+    slots_parser = subparsers.add_parser("slots", help="The busiest minutes: when most reminders fire at once")
+    slots_parser.add_argument("--top", type=int, default=DEFAULT_BUSIEST_SLOTS)
+
+    snooze_parser = subparsers.add_parser("snooze", help="Snooze a reminder")
+    snooze_parser.add_argument("id", help="Reminder id or a unique prefix of it")
+    snooze_parser.add_argument("--minutes", type=int, default=DEFAULT_SNOOZE_MINUTES)
+
+    dismiss_parser = subparsers.add_parser("dismiss", help="Skip a reminder (recurring ones move to the next occurrence)")
+    dismiss_parser.add_argument("id", help="Reminder id or a unique prefix of it")
+
+    for sub in (add_parser, list_parser, agenda_parser, slots_parser, snooze_parser, dismiss_parser):
+        sub.add_argument("--json", action="store_true", help="Print the raw JSON result")
+    subparsers.add_parser("metrics", help="Print the running app's metrics snapshot as JSON")
+    return parser
+
+def request_from_args(args):
+    """The command-channel request for parsed arguments (same shape the running instance accepts)."""
+    if args.command == "add":
+        return {"command": "add", "title": args.title, "at": args.at, "repeat": args.repeat, "duplicates": args.duplicates}
+    if args.command == "list":
+        return {"command": "list", "view": args.view, "sort": args.sort}
+    if args.command == "agenda":
+        return {"command": "agenda", "days": args.days, "expand": args.expand}
+    if args.command == "slots":
+        return {"command": "slots", "top": args.top}
+    if args.command == "snooze":
+        return {"command": "snooze", "id": args.id, "minutes": args.minutes}
+    if args.command == "metrics":
+        return {"command": "metrics"}
+    return {"command": "dismiss", "id": args.id}
+
+# --- DIRECT STORE FALLBACK ---
+def run_locally(request, data_path):
+    """Apply a request straight to the reminders file when no instance is running."""
+    try:
+        return {"ok": True, "result": execute_on_store(request, data_path)}
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+
+def execute_on_store(request, data_path):
+    command = request["command"]
+    if command == "metrics":
+        raise ValueError(f"{APP_NAME} is not running; metrics are kept by the running app.")
+    state = RuntimeState(state_file_path(data_path))
+    if command == "agenda" and not request.get("expand"):
+        days = int(request.get("days", DEFAULT_AGENDA_DAYS))
+        shared = read_agenda(data_path) # Published by the app; current unless the store changed since
+        if shared is not None and shared.usable_for(date.today(), days):
+            return shared.agenda(date.today(), days)
+    if command in ("list", "agenda", "slots"):
+        reminders = state.apply(read_reminders_file(data_path)[0])
+        if command == "slots":
+            import reminder_projection
+            index = reminder_projection.SlotIndex()
+            index.rebuild(reminders)
+            return index.busiest(int(request.get("top", DEFAULT_BUSIEST_SLOTS)))
+        if command == "list":
+            return list_query(reminders, request.get("view", "All"), request.get("sort", "Date"))
+        if request.get("expand"):
+            import reminder_projection
+            return reminder_projection.projected_agenda_query(reminders, int(request.get("days", DEFAULT_AGENDA_DAYS)))
+        return agenda_query(reminders, int(request.get("days", DEFAULT_AGENDA_DAYS)))
+
+    if command == "add":
+        title = (request.get("title") or "").strip()
+        if not title:
+            raise ValueError("Title cannot be empty.")
+        date_str, time_str = parse_when(request.get("at"))
+        new_reminder = new_reminder_record(title, date_str, time_str, recurrence_type_from_name(request.get("repeat")))
+
+    # Mutations hold the store lock so concurrent scripts don't lose each other's writes
+    with StoreLock(data_path):
+        reminders, _ = read_reminders_file(data_path)
+        if command == "add":
+            index = DuplicateIndex()
+            index.rebuild(reminders)
+            stored, changed, _ = add_deduplicated(reminders, [new_reminder], index,
+                                                  request.get("duplicates") or DEFAULT_DUPLICATE_POLICY)
+            if changed:
+                write_reminders_file(data_path, reminders)
+            if stored[0] is not new_reminder:
+                return f"Reminder '{title}' is already set for {date_str} {format_time_to_ampm(time_str)}."
+            return f"Reminder '{title}' added for {date_str} {format_time_to_ampm(time_str)}."
+        reminder = resolve_reminder_id(reminders, request.get("id"))
+        # Snooze and dismiss only append to the state log; the reminder itself is unchanged
+        if command == "snooze":
+            minutes = int(request.get("minutes", DEFAULT_SNOOZE_MINUTES))
+            snoozed = state.snooze(reminder, int(time.time()) + minutes * 60)
+            return f"Reminder '{reminder.get('title')}' snoozed until {snoozed['date']} {format_time_to_ampm(snoozed['time'])}."
+        if command == "dismiss":
+            _, current = state.advance(reminder, "dismissed")
+            if reminder.get("recurrence_type") and not current.get("notified_individually", False):
+                return f"Reminder '{reminder.get('title')}' dismissed; next on {current['date']}."
+            return f"Reminder '{reminder.get('title')}' dismissed."
+    raise ValueError(f"Unknown command: {command}")
+
+# --- OUTPUT ---
+def format_reminder_line(reminder):
+    repeat = (reminder.get("recurrence_type") or "").capitalize()
+    status = " (done)" if reminder.get("notified_individually") else ""
+    return (f"{str(reminder.get('id', ''))[:SHORT_ID_LENGTH]}  {reminder.get('date', 'N/A')} "
+            f"{format_time_to_ampm(reminder.get('time'))}  {reminder.get('title', 'N/A')}"
+            f"{'  [' + repeat + ']' if repeat else ''}{status}")
+
+def print_result(command, result, as_json):
+    if as_json or command == "metrics":
+        print(json.dumps(result, indent=2))
+    elif command == "list":
+        for reminder in result:
+            print(format_reminder_line(reminder))
+        if not result:
+            print("No reminders.")
+    elif command == "agenda":
+        for day in result:
+            print(day["date"])
+            for reminder in day["reminders"]:
+                print(f"  {format_reminder_line(reminder)}")
+        if not result:
+            print("Nothing scheduled.")
+    elif command == "slots":
+        for slot in result:
+            titles = ", ".join(reminder["title"] for reminder in slot["reminders"])
+            print(f"{slot['date']} {format_time_to_ampm(slot['time'])}  {slot['count']} reminders: {titles}")
+        if not result:
+            print("No two reminders fire at the same minute.")
+    else:
+        print(result)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    request = request_from_args(args)
+    response = reminder_ipc.send_command(reminder_ipc.channel_address(app_dir()), request)
+    if response is None:
+        response = run_locally(request, data_file_path("reminders.json"))
+    if not response.get("ok"):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+        return 1
+    print_result(args.command, response.get("result"), getattr(args, "json", False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1136 @@
+"""Reminder data model, store file I/O and recurrence rules for Personal Reminder.
+
+Everything here is free of tkinter, Pillow and pystray so that the command-line
+client (reminder_cli) and helper processes can read and update reminders
+without importing the GUI stack. remainder.py re-exports these names.
+"""
+import json
+import os
+import hashlib
+import sys
+import time
+import uuid
+import bisect
+import contextlib
+import logging
+import tempfile
+import threading
+import functools
+from datetime import date, datetime, timedelta, time as datetime_time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from dateutil.relativedelta import relativedelta
+
+# --- PATH HELPER FUNCTIONS (FOR PYINSTALLER COMPATIBILITY) ---
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        # For development, or if not bundled by PyInstaller
+        # Use the directory of the script file
+        base_path = os.path.abspath(os.path.dirname(__file__))
+    return os.path.join(base_path, relative_path)
+
+def data_file_path(filename):
+    """ Get path for data files, typically next to EXE or script """
+    if getattr(sys, 'frozen', False):
+        # Running as a bundled executable (PyInstaller)
+        exe_dir = os.path.dirname(sys.executable)
+        # If running from 'dist', look in the parent directory
+        if os.path.basename(exe_dir).lower() == 'dist':
+            application_path = os.path.dirname(exe_dir)
+        else:
+            # Otherwise, look next to the executable
+            application_path = exe_dir
+    else:
+        # Running as a script
+        application_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(application_path, filename)
+
+# --- CONSTANTS ---
+APP_NAME = "Personal Reminder"
+
+# Recurring reminder constants
+RECURRENCE_TYPES = {
+    "None": None,
+    "Daily": "daily",
+    "Weekdays": "weekdays",
+    "Weekly": "weekly",
+    "Biweekly": "biweekly",
+    "Monthly": "monthly",
+    "Yearly": "yearly"
+}
+
+# End condition types
+END_CONDITION_TYPES = {
+    "Never": "never",
+    "After": "occurrences",
+    "On Date": "date"
+}
+
+# Maximum number of occurrences for "After" end condition
+MAX_OCCURRENCES = 999
+
+SNOOZE_OPTIONS = {
+    "5 minutes": 5,
+    "10 minutes": 10,
+    "15 minutes": 15,
+    "30 minutes": 30,
+    "1 hour": 60
+}
+
+DEFAULT_SNOOZE_MINUTES = 10 # Command-line snooze when --minutes is not given
+DEFAULT_AGENDA_DAYS = 7
+DEFAULT_BUSIEST_SLOTS = 10 # Minutes listed by the busiest slots report
+DEFAULT_TIME_FOR_DATE_ONLY = "09:00" # Used when --at gives a date without a time
+
+logger = logging.getLogger(APP_NAME)
+
+# --- STORE FILE I/O ---
+def reminder_sort_key(reminder):
+    """Due order: by UTC epoch, so wall times stamped in different zones sort by when they fire.
+    Records whose date or time can't be read go last, by their strings."""
+    due_epoch = reminder_due_epoch(reminder)
+    return (due_epoch is None, due_epoch or 0, str(reminder.get("date", "")), str(reminder.get("time", "")))
+
+def read_reminders_file(file_path):
+    """Read and sort the reminders in file_path.
+
+    Returns (reminders, bytes_read). A missing or empty file is an empty list;
+    unreadable JSON or a file that doesn't hold a list raises ValueError.
+    """
+    if not os.path.exists(file_path):
+        return [], 0
+    with open(file_path, 'r') as f:
+        content = f.read()
+        bytes_read = os.fstat(f.fileno()).st_size
+    if not content.strip():
+        return [], bytes_read
+    reminders = json.loads(content)
+    if not isinstance(reminders, list):
+        raise ValueError(f"{file_path} does not contain a list of reminders.")
+    reminders.sort(key=reminder_sort_key)
+    return reminders, bytes_read
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def iter_reminders_file(file_path, chunk_size=STREAM_CHUNK_BYTES):
+    """Yield the reminders in file_path one at a time, in file order, reading chunk_size characters at a time.
+
+    For passes over the whole store that shouldn't hold it in memory. Same errors as read_reminders_file.
+    """
+    if not os.path.exists(file_path):
+        return
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as f:
+        buffer, eof = "", False
+        def skip_space(position):
+            nonlocal buffer, eof
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer) or eof:
+                    return position
+                buffer, position = f.read(chunk_size), 0
+                eof = not buffer
+        position = skip_space(0)
+        if position == len(buffer):
+            return # Empty file
+        if buffer[position] != "[":
+            raise ValueError(f"{file_path} does not contain a list of reminders.")
+        position = skip_space(position + 1)
+        if buffer[position:position + 1] == "]":
+            return
+        while True:
+            try:
+                reminder, end = decoder.raw_decode(buffer, position)
+                complete = end < len(buffer) or eof # A number could go on in the next chunk
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield reminder
+            buffer, position = buffer[end:], 0
+            position = skip_space(position)
+            separator = buffer[position:position + 1]
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"{file_path}: expected ',' or ']' between reminders.")
+            position = skip_space(position + 1)
+
+def write_reminders_file(file_path, reminders):
+    """Sort and write reminders to file_path. Returns the number of bytes written.
+
+    The data is written to a temporary file that then replaces the original,
+    so a crash or a concurrent reader never sees a half-written store.
+    Records whose date or time changed get fresh due stamps on the way out.
+    """
+    stamp_due_times(reminders)
+    reminders.sort(key=reminder_sort_key)
+    serialized = json.dumps(reminders, indent=4) # ensure_ascii output, so len() is the byte count
+    with replacing_file(file_path) as f:
+        f.write(serialized)
+    return len(serialized)
+
+@contextlib.contextmanager
+def replacing_file(file_path, mode='w'):
+    """Open a new temporary file next to file_path; when the block exits cleanly it is synced to disk
+    and moved over file_path.
+
+    Every writer gets its own temporary file, so concurrent writers never move away each other's.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o777) # mkstemp files are private to the owner
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+class StoreReadCache:
+    """Keeps the parsed store in memory and re-reads the file only when it was replaced or changed.
+
+    Readers must treat the returned reminders as read-only; writers load their
+    own copy with read_reminders_file.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._reminders = []
+        self._dates = [] # reminders' dates, in the same (sorted) order, for bisect range lookups
+
+    def snapshot(self):
+        try:
+            st = os.stat(self.file_path)
+            stat_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stat_key = None
+        with self._lock:
+            if self._is_stale(stat_key):
+                self._adopt(read_reminders_file(self.file_path)[0] if stat_key else [])
+                self._stat_key = stat_key
+            return self._reminders, self._dates
+
+    def _is_stale(self, stat_key):
+        return stat_key != self._stat_key or stat_key is None
+
+    def _adopt(self, reminders):
+        # The store is in due order; a reminder stamped in another zone can sit out of date order, so
+        # order by date for bisect (stable, so due order holds within a day; one pass if nothing moves)
+        self._reminders = sorted(reminders, key=lambda r: str(r.get("date", "")))
+        self._dates = [str(r.get("date", "")) for r in self._reminders]
+
+    def in_range(self, start_date=None, end_date=None):
+        """Like reminders_in_range, in O(log n) plus the size of the result."""
+        reminders, dates = self.snapshot()
+        lo = bisect.bisect_left(dates, start_date) if start_date is not None else 0
+        hi = bisect.bisect_right(dates, end_date) if end_date is not None else len(dates)
+        return reminders[lo:hi]
+
+HOT_WINDOW_PAST_DAYS = 1
+HOT_WINDOW_FUTURE_DAYS = 30
+
+def estimate_record_bytes(reminder):
+    """Approximate memory held by one parsed reminder: the dict and its values.
+
+    Keys aren't counted: json.loads shares one string per distinct key across the whole file.
+    """
+    return sys.getsizeof(reminder) + sum(sys.getsizeof(value) for value in reminder.values())
+
+class HotWindowCache(StoreReadCache):
+    """A StoreReadCache that keeps only the hot window of the store resident.
+
+    Resident are the reminders dated from `past_days` before today through
+    `future_days` after it, plus the pending heads of recurring series (whose
+    occurrences reach into the window whatever their own date). Range queries
+    reaching outside the window, and page(), read the file for that one query
+    and keep nothing. With `budget_bytes`, the future side of the window is
+    narrowed until the resident records fit.
+    """
+    def __init__(self, file_path, past_days=HOT_WINDOW_PAST_DAYS, future_days=HOT_WINDOW_FUTURE_DAYS,
+                 budget_bytes=None, on_refresh=None):
+        super().__init__(file_path)
+        self.past_days = past_days
+        self.future_days = future_days
+        self.budget_bytes = budget_bytes
+        self.on_refresh = on_refresh # Called with (resident records, resident bytes) after each rebuild
+        self.resident_bytes = 0
+        self.pages_read = 0
+        self.window = (None, None) # First and last "YYYY-MM-DD" held resident
+        self._window_day = None # The window moves with the date
+
+    def _is_stale(self, stat_key):
+        return super()._is_stale(stat_key) or self._window_day != date.today()
+
+    def _adopt(self, reminders):
+        today = date.today()
+        first_str = (today - timedelta(days=self.past_days)).strftime("%Y-%m-%d")
+        sized = [(r, estimate_record_bytes(r)) for r in reminders
+                 if str(r.get("date", "")) >= first_str or is_active_series_head(r)]
+        future_days = self.future_days
+        while True:
+            last_str = (today + timedelta(days=future_days)).strftime("%Y-%m-%d")
+            hot = [(r, size) for r, size in sized if str(r.get("date", "")) <= last_str or is_active_series_head(r)]
+            hot_bytes = sum(size for _, size in hot)
+            if self.budget_bytes is None or hot_bytes <= self.budget_bytes or future_days == 0:
+                break
+            future_days //= 2
+        if future_days < self.future_days:
+            logger.warning("Hot window narrowed to %d day(s) ahead to keep %d resident bytes within the %d-byte budget.",
+                           future_days, hot_bytes, self.budget_bytes)
+        super()._adopt([r for r, _ in hot])
+        self.resident_bytes = hot_bytes
+        self.window = (first_str, last_str)
+        self._window_day = today
+        if self.on_refresh:
+            self.on_refresh(len(hot), hot_bytes)
+
+    def seed(self, reminders, stat_key):
+        """Adopt already parsed reminders (a superset of the hot window) for the file state `stat_key`."""
+        with self._lock:
+            self._adopt(reminders)
+            self._stat_key = stat_key
+
+    def in_range(self, start_date=None, end_date=None):
+        self.snapshot() # Moves the window on a new day
+        first_str, last_str = self.window
+        if start_date is not None and end_date is not None and start_date >= first_str and end_date <= last_str:
+            return super().in_range(start_date, end_date)
+        return self.page(start_date, end_date)
+
+    def page(self, start_date=None, end_date=None):
+        """Reminders dated within [start_date, end_date] read from disk for this call only."""
+        with self._lock:
+            self.pages_read += 1
+        reminders, _ = read_reminders_file(self.file_path)
+        return reminders_in_range(reminders, start_date, end_date)
+
+    def resident_count(self):
+        return len(self.snapshot()[0])
+
+def is_active_series_head(reminder):
+    return bool(reminder.get("recurrence_type")) and not reminder.get("notified_individually", False)
+
+class StoreLock:
+    """Blocking advisory lock serializing read-modify-write cycles on the store between processes.
+
+    Reentrant within a process: a thread already holding the lock for a file (say, a load-modify-save
+    that calls a save helper which locks too) enters again, and other threads of the process wait.
+    """
+    _held = {} # lock path -> [thread lock, depth, open lock file]
+    _held_guard = threading.Lock()
+
+    def __init__(self, file_path):
+        self.lock_path = f"{file_path}.lock"
+
+    def __enter__(self):
+        with StoreLock._held_guard:
+            held = StoreLock._held.setdefault(self.lock_path, [threading.RLock(), 0, None])
+        held[0].acquire()
+        if held[1] == 0:
+            try:
+                held[2] = self._lock_file()
+            except BaseException:
+                held[0].release()
+                raise
+        held[1] += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        held = StoreLock._held[self.lock_path]
+        held[1] -= 1
+        try:
+            if held[1] == 0:
+                handle, held[2] = held[2], None
+                self._unlock_file(handle)
+        finally:
+            held[0].release()
+        return False
+
+    def _lock_file(self):
+        handle = open(self.lock_path, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    @staticmethod
+    def _unlock_file(handle):
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+# --- REMINDER CREATION ---
+def recurrence_type_from_name(name):
+    """Map a --repeat value ("daily", "Weekly", "none", ...) to a stored recurrence_type."""
+    if not name or name.lower() == "none":
+        return None
+    for label, value in RECURRENCE_TYPES.items():
+        if value and name.lower() in (label.lower(), value):
+            return value
+    raise ValueError(f"Unknown repeat '{name}'. Choose from: {', '.join(RECURRENCE_TYPES)}.")
+
+def new_reminder_record(title, date_str, time_str, recurrence_type=None, end_condition_type="never",
+                        end_value=None):
+    """Build a reminder dict with the same fields AddReminderWindow saves."""
+    return stamp_due({
+        "id": str(uuid.uuid4()),
+        "title": title,
+        "date": date_str,
+        "time": time_str,
+        "notified_individually": False,
+        "recurrence_type": recurrence_type,
+        "recurrence_end_type": end_condition_type,
+        "recurrence_end_value": end_value if end_condition_type in ("occurrences", "date") else None,
+        "recurrence_current_count": 0 if end_condition_type == "occurrences" else None,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+def parse_when(when_str, now=None):
+    """Parse a command-line due time into ("YYYY-MM-DD", "HH:MM") or ("YYYY-MM-DD", "HH:MM:SS").
+
+    Accepts "YYYY-MM-DD HH:MM[:SS]" (or with a "T"), "YYYY-MM-DD" (at 09:00),
+    "HH:MM[:SS]" (today, or tomorrow if already past) and relative offsets such
+    as "+90s", "+30m", "+2h" or "+1d". Raises ValueError for anything else.
+    """
+    now = now or datetime.now()
+    when_str = (when_str or "").strip()
+    if not when_str:
+        raise ValueError("A due time is required, e.g. --at \"2024-03-20 09:30\" or --at +30m")
+    if when_str.startswith("+"):
+        units = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+        amount, unit = when_str[1:-1], when_str[-1:].lower()
+        if unit not in units or not amount.isdigit():
+            raise ValueError(f"Invalid relative time '{when_str}'. Use +<n>s, +<n>m, +<n>h or +<n>d.")
+        due = now + timedelta(**{units[unit]: int(amount)})
+        return due.strftime("%Y-%m-%d"), due.strftime("%H:%M:%S" if unit == "s" else "%H:%M")
+    for pattern in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            due = datetime.strptime(when_str, pattern)
+            return due.strftime("%Y-%m-%d"), due.strftime("%H:%M:%S" if pattern.endswith("%S") else "%H:%M")
+        except ValueError:
+            pass
+    try:
+        return datetime.strptime(when_str, "%Y-%m-%d").strftime("%Y-%m-%d"), DEFAULT_TIME_FOR_DATE_ONLY
+    except ValueError:
+        pass
+    try:
+        time_only = parse_wall_time(when_str)
+    except ValueError:
+        raise ValueError(f"Invalid time '{when_str}'. Use 'YYYY-MM-DD HH:MM', 'YYYY-MM-DD', 'HH:MM' or +30m.")
+    due = datetime.combine(now.date(), time_only)
+    # A time without seconds is still "now" for the rest of the current minute
+    if due < (now.replace(microsecond=0) if time_only.second else now.replace(second=0, microsecond=0)):
+        due += timedelta(days=1)
+    return due.strftime("%Y-%m-%d"), due.strftime("%H:%M:%S" if time_only.second else "%H:%M")
+
+# --- TIME FORMATTING ---
+def format_time_to_ampm(time_str_24h):
+    if not time_str_24h: return "N/A"
+    try:
+        t_obj = parse_wall_time(time_str_24h)
+        return t_obj.strftime("%I:%M:%S %p" if t_obj.second else "%I:%M %p")
+    except ValueError:
+        return time_str_24h
+
+def format_countdown(seconds):
+    """Render a number of seconds as a short countdown, e.g. 'in 2h 05m'."""
+    if seconds <= 0: return "now"
+    minutes_total = int(seconds // 60)
+    days, minutes_left = divmod(minutes_total, 24 * 60)
+    hours, minutes = divmod(minutes_left, 60)
+    if days: return f"in {days}d {hours}h"
+    if hours: return f"in {hours}h {minutes:02}m"
+    if minutes: return f"in {minutes}m"
+    return "in <1m"
+
+def reminder_due_datetime(reminder):
+    """The reminder's due time as a naive local datetime, or None if its date/time can't be parsed."""
+    due_epoch = reminder_due_epoch(reminder)
+    return datetime.fromtimestamp(due_epoch) if due_epoch is not None else None
+
+# --- DUE TIMESTAMPS ---
+# "date" and "time" hold the wall time the user entered, in the zone named by "due_tz".
+# "due_epoch" is that moment as integer UTC seconds and "due_wall" the "date time" it was
+# computed from, so due checks and ordering compare integers and a stamp whose wall time was
+# edited since is detected (and recomputed) with a single string comparison.
+def parse_wall_time(time_str):
+    """Parse "HH:MM" or "HH:MM:SS" into a time. Raises ValueError (or TypeError for None)."""
+    # Due checks parse every occurrence; the zero-padded forms the app writes skip strptime
+    if isinstance(time_str, str) and time_str.isascii():
+        if len(time_str) == 5 and time_str[2] == ":" and time_str[:2].isdigit() and time_str[3:].isdigit():
+            return datetime_time(int(time_str[:2]), int(time_str[3:]))
+        if (len(time_str) == 8 and time_str[2] == time_str[5] == ":" and time_str[:2].isdigit()
+                and time_str[3:5].isdigit() and time_str[6:].isdigit()):
+            return datetime_time(int(time_str[:2]), int(time_str[3:5]), int(time_str[6:]))
+    try:
+        return datetime.strptime(time_str, "%H:%M").time()
+    except ValueError:
+        return datetime.strptime(time_str, "%H:%M:%S").time()
+
+def parse_date(date_str):
+    """Parse "YYYY-MM-DD" into a date, like datetime.strptime(date_str, "%Y-%m-%d").date()."""
+    if (isinstance(date_str, str) and len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-"
+            and date_str.isascii() and date_str[:4].isdigit() and date_str[5:7].isdigit() and date_str[8:].isdigit()):
+        return date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:]))
+    return datetime.strptime(date_str, "%Y-%m-%d").date()
+
+# Windows time zone key -> IANA zone (the CLDR windowsZones mapping for territory "001")
+WINDOWS_ZONE_NAMES = {
+    "Dateline Standard Time": "Etc/GMT+12", "UTC-11": "Etc/GMT+11", "Aleutian Standard Time": "America/Adak",
+    "Hawaiian Standard Time": "Pacific/Honolulu", "Marquesas Standard Time": "Pacific/Marquesas",
+    "Alaskan Standard Time": "America/Anchorage", "UTC-09": "Etc/GMT+9",
+    "Pacific Standard Time (Mexico)": "America/Tijuana", "UTC-08": "Etc/GMT+8",
+    "Pacific Standard Time": "America/Los_Angeles", "US Mountain Standard Time": "America/Phoenix",
+    "Mountain Standard Time (Mexico)": "America/Mazatlan", "Mountain Standard Time": "America/Denver",
+    "Yukon Standard Time": "America/Whitehorse", "Central America Standard Time": "America/Guatemala",
+    "Central Standard Time": "America/Chicago", "Easter Island Standard Time": "Pacific/Easter",
+    "Central Standard Time (Mexico)": "America/Mexico_City", "Canada Central Standard Time": "America/Regina",
+    "SA Pacific Standard Time": "America/Bogota", "Eastern Standard Time (Mexico)": "America/Cancun",
+    "Eastern Standard Time": "America/New_York", "Haiti Standard Time": "America/Port-au-Prince",
+    "Cuba Standard Time": "America/Havana", "US Eastern Standard Time": "America/Indiana/Indianapolis",
+    "Turks And Caicos Standard Time": "America/Grand_Turk", "Paraguay Standard Time": "America/Asuncion",
+    "Atlantic Standard Time": "America/Halifax", "Venezuela Standard Time": "America/Caracas",
+    "Central Brazilian Standard Time": "America/Cuiaba", "SA Western Standard Time": "America/La_Paz",
+    "Pacific SA Standard Time": "America/Santiago", "Newfoundland Standard Time": "America/St_Johns",
+    "Tocantins Standard Time": "America/Araguaina", "E. South America Standard Time": "America/Sao_Paulo",
+    "SA Eastern Standard Time": "America/Cayenne", "Argentina Standard Time": "America/Argentina/Buenos_Aires",
+    "Greenland Standard Time": "America/Nuuk", "Montevideo Standard Time": "America/Montevideo",
+    "Magallanes Standard Time": "America/Punta_Arenas", "Saint Pierre Standard Time": "America/Miquelon",
+    "Bahia Standard Time": "America/Bahia", "UTC-02": "Etc/GMT+2", "Azores Standard Time": "Atlantic/Azores",
+    "Cape Verde Standard Time": "Atlantic/Cape_Verde", "UTC": "Etc/UTC", "GMT Standard Time": "Europe/London",
+    "Greenwich Standard Time": "Atlantic/Reykjavik", "Sao Tome Standard Time": "Africa/Sao_Tome",
+    "Morocco Standard Time": "Africa/Casablanca", "W. Europe Standard Time": "Europe/Berlin",
+    "Central Europe Standard Time": "Europe/Budapest", "Romance Standard Time": "Europe/Paris",
+    "Central European Standard Time": "Europe/Warsaw", "W. Central Africa Standard Time": "Africa/Lagos",
+    "Jordan Standard Time": "Asia/Amman", "GTB Standard Time": "Europe/Bucharest",
+    "Middle East Standard Time": "Asia/Beirut", "Egypt Standard Time": "Africa/Cairo",
+    "E. Europe Standard Time": "Europe/Chisinau", "Syria Standard Time": "Asia/Damascus",
+    "West Bank Standard Time": "Asia/Hebron", "South Africa Standard Time": "Africa/Johannesburg",
+    "FLE Standard Time": "Europe/Kiev", "Israel Standard Time": "Asia/Jerusalem",
+    "South Sudan Standard Time": "Africa/Juba", "Kaliningrad Standard Time": "Europe/Kaliningrad",
+    "Sudan Standard Time": "Africa/Khartoum", "Libya Standard Time": "Africa/Tripoli",
+    "Namibia Standard Time": "Africa/Windhoek", "Arabic Standard Time": "Asia/Baghdad",
+    "Turkey Standard Time": "Europe/Istanbul", "Arab Standard Time": "Asia/Riyadh",
+    "Belarus Standard Time": "Europe/Minsk", "Russian Standard Time": "Europe/Moscow",
+    "E. Africa Standard Time": "Africa/Nairobi", "Volgograd Standard Time": "Europe/Volgograd",
+    "Iran Standard Time": "Asia/Tehran", "Arabian Standard Time": "Asia/Dubai",
+    "Astrakhan Standard Time": "Europe/Astrakhan", "Azerbaijan Standard Time": "Asia/Baku",
+    "Russia Time Zone 3": "Europe/Samara", "Mauritius Standard Time": "Indian/Mauritius",
+    "Saratov Standard Time": "Europe/Saratov", "Georgian Standard Time": "Asia/Tbilisi",
+    "Caucasus Standard Time": "Asia/Yerevan", "Afghanistan Standard Time": "Asia/Kabul",
+    "West Asia Standard Time": "Asia/Tashkent", "Ekaterinburg Standard Time": "Asia/Yekaterinburg",
+    "Pakistan Standard Time": "Asia/Karachi", "Qyzylorda Standard Time": "Asia/Qyzylorda",
+    "India Standard Time": "Asia/Kolkata", "Sri Lanka Standard Time": "Asia/Colombo",
+    "Nepal Standard Time": "Asia/Kathmandu", "Central Asia Standard Time": "Asia/Almaty",
+    "Bangladesh Standard Time": "Asia/Dhaka", "Omsk Standard Time": "Asia/Omsk",
+    "Myanmar Standard Time": "Asia/Yangon", "SE Asia Standard Time": "Asia/Bangkok",
+    "Altai Standard Time": "Asia/Barnaul", "W. Mongolia Standard Time": "Asia/Hovd",
+    "North Asia Standard Time": "Asia/Krasnoyarsk", "N. Central Asia Standard Time": "Asia/Novosibirsk",
+    "Tomsk Standard Time": "Asia/Tomsk", "China Standard Time": "Asia/Shanghai",
+    "North Asia East Standard Time": "Asia/Irkutsk", "Singapore Standard Time": "Asia/Singapore",
+    "W. Australia Standard Time": "Australia/Perth", "Taipei Standard Time": "Asia/Taipei",
+    "Ulaanbaatar Standard Time": "Asia/Ulaanbaatar", "Aus Central W. Standard Time": "Australia/Eucla",
+    "Transbaikal Standard Time": "Asia/Chita", "Tokyo Standard Time": "Asia/Tokyo",
+    "North Korea Standard Time": "Asia/Pyongyang", "Korea Standard Time": "Asia/Seoul",
+    "Yakutsk Standard Time": "Asia/Yakutsk", "Cen. Australia Standard Time": "Australia/Adelaide",
+    "AUS Central Standard Time": "Australia/Darwin", "E. Australia Standard Time": "Australia/Brisbane",
+    "AUS Eastern Standard Time": "Australia/Sydney", "West Pacific Standard Time": "Pacific/Port_Moresby",
+    "Tasmania Standard Time": "Australia/Hobart", "Vladivostok Standard Time": "Asia/Vladivostok",
+    "Lord Howe Standard Time": "Australia/Lord_Howe", "Bougainville Standard Time": "Pacific/Bougainville",
+    "Russia Time Zone 10": "Asia/Srednekolymsk", "Magadan Standard Time": "Asia/Magadan",
+    "Norfolk Standard Time": "Pacific/Norfolk", "Sakhalin Standard Time": "Asia/Sakhalin",
+    "Central Pacific Standard Time": "Pacific/Guadalcanal", "Russia Time Zone 11": "Asia/Kamchatka",
+    "New Zealand Standard Time": "Pacific/Auckland", "UTC+12": "Etc/GMT-12", "Fiji Standard Time": "Pacific/Fiji",
+    "Chatham Islands Standard Time": "Pacific/Chatham", "UTC+13": "Etc/GMT-13",
+    "Tonga Standard Time": "Pacific/Tongatapu", "Samoa Standard Time": "Pacific/Apia",
+    "Line Islands Standard Time": "Pacific/Kiritimati",
+}
+
+def windows_zone_key():
+    """The Windows time zone key (e.g. "W. Europe Standard Time") from the registry, or None."""
+    try:
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Control\TimeZoneInformation") as key:
+            return str(winreg.QueryValueEx(key, "TimeZoneKeyName")[0]).rstrip("\0") or None
+    except (ImportError, OSError):
+        return None
+
+@functools.lru_cache(maxsize=None)
+def local_zone_name():
+    """The IANA name of the system time zone (e.g. "Europe/Berlin"), or None if it can't be named."""
+    candidates = [os.environ.get("TZ", "").lstrip(":")]
+    if sys.platform == "win32":
+        # Windows has its own zone names; time.tzname is the (English) standard name when the registry can't be read
+        candidates.append(WINDOWS_ZONE_NAMES.get(windows_zone_key() or time.tzname[0]))
+    else:
+        try:
+            with open("/etc/timezone") as f:
+                candidates.append(f.read().strip())
+        except OSError:
+            pass
+        localtime = os.path.realpath("/etc/localtime")
+        if "zoneinfo" + os.sep in localtime:
+            candidates.append(localtime.split("zoneinfo" + os.sep, 1)[1])
+    for name in candidates:
+        if name and zone_for(name) is not None:
+            return name
+    return None
+
+@functools.lru_cache(maxsize=None)
+def zone_for(zone_name):
+    try:
+        return ZoneInfo(zone_name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError, OSError):
+        return None # E.g. Windows without the tzdata package: fall back to the system's local time
+
+def wall_to_epoch(date_str, time_str, zone_name=None):
+    """UTC epoch seconds of a wall time in zone_name (None: the system's local time).
+
+    Wall times skipped by a DST change count from the offset before the change
+    (02:30 on a spring-forward night is 03:30 daylight time); repeated wall
+    times mean their first occurrence.
+    """
+    wall = datetime.combine(parse_date(date_str), parse_wall_time(time_str))
+    zone = zone_for(zone_name) if zone_name else None
+    return int(wall.replace(tzinfo=zone).timestamp() if zone else wall.timestamp())
+
+def to_epoch(moment):
+    """Integer epoch seconds of a datetime (naive means local time) or of an epoch number."""
+    return int(moment.timestamp()) if isinstance(moment, datetime) else int(moment)
+
+def reminder_due_epoch(reminder):
+    """The reminder's due time as UTC epoch seconds, or None if its date/time can't be parsed.
+
+    Uses the stored stamp when it matches the current date and time, so a record
+    edited since it was last written is never compared with a stale stamp.
+    """
+    due_epoch = reminder.get("due_epoch")
+    if due_epoch is not None and reminder.get("due_wall") == f"{reminder.get('date')} {reminder.get('time')}":
+        return due_epoch
+    try:
+        return wall_to_epoch(reminder.get("date"), reminder.get("time"), reminder.get("due_tz") or local_zone_name())
+    except (ValueError, TypeError):
+        return None
+
+def stamp_due(reminder):
+    """(Re)compute the reminder's due_epoch/due_tz/due_wall if its wall time changed. Returns it."""
+    wall = f"{reminder.get('date')} {reminder.get('time')}"
+    if reminder.get("due_wall") == wall and reminder.get("due_epoch") is not None:
+        return reminder
+    zone_name = reminder.get("due_tz") or local_zone_name()
+    try:
+        due_epoch = wall_to_epoch(reminder.get("date"), reminder.get("time"), zone_name)
+    except (ValueError, TypeError):
+        return reminder # Unparseable; the scheduler reports it as invalid
+    reminder.update({"due_epoch": due_epoch, "due_tz": zone_name, "due_wall": wall})
+    return reminder
+
+def stamp_due_times(reminders):
+    """Stamp every reminder that has no stamp or was edited since. Returns how many were (re)stamped."""
+    stamped = 0
+    for reminder in reminders:
+        previous = reminder.get("due_epoch"), reminder.get("due_wall")
+        stamp_due(reminder)
+        stamped += previous != (reminder.get("due_epoch"), reminder.get("due_wall"))
+    return stamped
+
+# --- CLOCKS ---
+# The scheduler asks a clock for the time instead of calling datetime.now()
+# directly, so tests and fast-forward simulations can run it on virtual time.
+class SystemClock:
+    """The real time of day."""
+    def time(self):
+        return time.time()
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+    def today(self):
+        return self.now().date()
+
+    def wait(self, seconds, stop_event=None):
+        """Sleep for `seconds`, or until stop_event is set. Returns True if it was set."""
+        if stop_event is not None:
+            return stop_event.wait(seconds)
+        time.sleep(seconds)
+        return False
+
+class SimulatedClock(SystemClock):
+    """Virtual time that only moves when set, advanced or waited on; waiting takes no real time."""
+    def __init__(self, start):
+        self._epoch = float(to_epoch(start)) # A datetime (naive means local time) or epoch seconds
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._epoch
+
+    def set(self, moment):
+        with self._lock:
+            self._epoch = float(to_epoch(moment))
+
+    def advance(self, seconds):
+        with self._lock:
+            self._epoch += seconds
+
+    def wait(self, seconds, stop_event=None):
+        self.advance(seconds)
+        return stop_event is not None and stop_event.is_set()
+
+system_clock = SystemClock()
+
+# --- RECURRENCE ---
+def calculate_next_recurrence(reminder, today=None):
+    """Calculate the next occurrence date for a recurring reminder."""
+    if not reminder.get("recurrence_type"):
+        return None
+
+    current_date = parse_date(reminder["date"])
+    today = today or date.today()
+
+    if current_date < today:
+        current_date = today
+
+    next_date = step_recurrence_date(current_date, reminder["recurrence_type"])
+    return next_date.strftime("%Y-%m-%d") if next_date else None
+
+def step_recurrence_date(current_date, recurrence_type):
+    """The occurrence after current_date (a date) for recurrence_type, or None for an unknown type."""
+    if recurrence_type == "daily":
+        return current_date + timedelta(days=1)
+    elif recurrence_type == "weekdays":
+        next_date = current_date + timedelta(days=1)
+        # Skip weekends
+        while next_date.weekday() >= 5:  # 5 is Saturday, 6 is Sunday
+            next_date += timedelta(days=1)
+        return next_date
+    elif recurrence_type == "weekly":
+        return current_date + timedelta(days=7)
+    elif recurrence_type == "biweekly":
+        return current_date + timedelta(days=14)
+    elif recurrence_type == "monthly":
+        # Use relativedelta for robust month calculations
+        return current_date + relativedelta(months=1)
+    elif recurrence_type == "yearly":
+        # Use relativedelta for consistent year calculations
+        return current_date + relativedelta(years=1)
+    return None
+
+def build_next_occurrence(reminder, today=None):
+    """Advance a fired recurring reminder's series.
+
+    Updates the occurrence count on `reminder` and returns the next occurrence
+    as a new reminder dict, or None when the series has ended. A series that
+    fell behind resumes after `today` (default: the current date).
+    """
+    reminder_id = reminder.get("id", "N/A")
+    reminder_time_str = reminder.get("time", "N/A")
+    # Check end conditions
+    end_type = reminder.get("recurrence_end_type", "never")
+    series_ended = False
+
+    if end_type == "occurrences":
+        current_count = reminder.get("recurrence_current_count", 0)
+        max_occurrences = reminder.get("recurrence_end_value")
+        if current_count >= max_occurrences:
+            series_ended = True
+        else:
+            reminder["recurrence_current_count"] = current_count + 1
+
+    # Calculate next date before checking date-based end condition
+    next_date_str = calculate_next_recurrence(reminder, today)
+
+    # Check date-based end condition using the next calculated date
+    if not series_ended and end_type == "date":
+        recurrence_end_date_str = reminder.get("recurrence_end_value")
+        if recurrence_end_date_str:
+            try:
+                recurrence_end_date_obj = datetime.strptime(recurrence_end_date_str, "%Y-%m-%d").date()
+                # Ensure next_date_str is not None before parsing
+                if next_date_str:
+                    next_calculated_date_obj = datetime.strptime(next_date_str, "%Y-%m-%d").date()
+
+                    if next_calculated_date_obj > recurrence_end_date_obj:
+                        series_ended = True
+                else:
+                     series_ended = True # Or handle as an error
+
+            except (ValueError, TypeError) as e_date_conv:
+                logger.error("Invalid end date format '%s' or issue with next date '%s' for reminder ID %s: %s",
+                             recurrence_end_date_str, next_date_str, reminder_id, e_date_conv, exc_info=True)
+                series_ended = True # Assume series ends on error
+
+    # Create next occurrence if series hasn't ended and a next date was calculated
+    if series_ended or not next_date_str:
+        return None
+    new_reminder = reminder.copy()
+    new_reminder["id"] = str(uuid.uuid4()) # Assign new ID
+    new_reminder["date"] = next_date_str
+    new_reminder["time"] = reminder_time_str # Keep the same time as the original
+    new_reminder["notified_individually"] = False
+    stamp_due(new_reminder) # Same wall time and zone on the new date, whatever DST does in between
+    # Preserve current count for occurrences type (already incremented on original)
+    # For recurring reminders, the count is stored on the NEXT instance.
+    if end_type == "occurrences":
+         # The count was incremented on the *current* reminder before this check.
+         # The *new* reminder should inherit this incremented count.
+         new_reminder["recurrence_current_count"] = reminder["recurrence_current_count"]
+    else:
+         new_reminder["recurrence_current_count"] = None # Ensure it's None for non-occurrences
+    return new_reminder
+
+# --- QUERIES AND UPDATES ---
+# These work on an already loaded list so the GUI, the command channel and the
+# CLI's direct-store fallback all apply exactly the same rules.
+FILTER_VIEWS = ("All", "Today", "Upcoming", "Past", "Recurring")
+SORT_FIELDS = ("Date", "Time", "Title")
+
+def filter_reminders(reminders, view, today=None):
+    """Reminders shown in one of the FILTER_VIEWS ("All" returns every reminder)."""
+    today_str = (today or date.today()).strftime("%Y-%m-%d")
+    if view == "Today":
+        return [r for r in reminders if r.get("date") == today_str]
+    elif view == "Upcoming":
+        return [r for r in reminders if r.get("date") > today_str]
+    elif view == "Past":
+        return [r for r in reminders if r.get("date") < today_str]
+    elif view == "Recurring":
+        return [r for r in reminders if r.get("recurrence_type")]
+    return list(reminders)
+
+def sort_reminders(reminders, sort_by):
+    if sort_by == "Date":
+        reminders.sort(key=lambda r: (r.get("date", ""), r.get("time", "")))
+    elif sort_by == "Time":
+        reminders.sort(key=lambda r: (r.get("time", ""), r.get("date", "")))
+    elif sort_by == "Title":
+        reminders.sort(key=lambda r: r.get("title", ""))
+    return reminders
+
+def agenda(reminders, start_date, days):
+    """Pending reminders due in [start_date, start_date + days), grouped as [(date_str, [reminders])]."""
+    first_str = start_date.strftime("%Y-%m-%d")
+    end_str = (start_date + timedelta(days=days)).strftime("%Y-%m-%d")
+    by_day = {}
+    for reminder in sorted(reminders, key=reminder_sort_key):
+        reminder_date = reminder.get("date", "")
+        if first_str <= reminder_date < end_str and not reminder.get("notified_individually", False):
+            by_day.setdefault(reminder_date, []).append(reminder)
+    return list(by_day.items())
+
+def reminders_in_range(reminders, start_date=None, end_date=None):
+    """Reminders dated within [start_date, end_date] ("YYYY-MM-DD"; None leaves that side open), in due order."""
+    return [r for r in sorted(reminders, key=reminder_sort_key)
+            if (start_date is None or r.get("date", "") >= start_date)
+            and (end_date is None or r.get("date", "") <= end_date)]
+
+def reminder_summary(reminder):
+    """The JSON-friendly subset of a reminder returned to command-line clients."""
+    return {key: reminder.get(key) for key in
+            ("id", "title", "date", "time", "recurrence_type", "notified_individually")}
+
+def list_query(reminders, view="All", sort_by="Date", today=None):
+    if view not in FILTER_VIEWS:
+        raise ValueError(f"Unknown view '{view}'. Choose from: {', '.join(FILTER_VIEWS)}.")
+    return [reminder_summary(r) for r in sort_reminders(filter_reminders(reminders, view, today), sort_by)]
+
+def agenda_query(reminders, days, start_date=None):
+    return [{"date": day, "reminders": [reminder_summary(r) for r in day_reminders]}
+            for day, day_reminders in agenda(reminders, start_date or date.today(), days)]
+
+def resolve_reminder_id(reminders, id_or_prefix):
+    """Find a reminder by full id or by a unique id prefix. Raises ValueError otherwise."""
+    matches = [r for r in reminders if str(r.get("id", "")).startswith(id_or_prefix or "\0")]
+    exact = [r for r in matches if r.get("id") == id_or_prefix]
+    if exact:
+        return exact[0]
+    if not matches:
+        raise ValueError(f"No reminder with id '{id_or_prefix}'.")
+    if len(matches) > 1:
+        raise ValueError(f"Id prefix '{id_or_prefix}' matches {len(matches)} reminders; use more characters.")
+    return matches[0]
+
+# --- NEXT-DUE INDEX ---
+class NextDueIndex:
+    """Pending (not yet notified) reminders kept sorted by due time.
+
+    Mutations update the index in place (bisect insert/remove), so reading the
+    next N reminders never touches the store. Thread-safe: it is read by the
+    tray thread and written by the Tk and scheduler threads. on_head_change,
+    if set, is called (outside the lock) whenever the earliest entry may have
+    changed, so a timer sleeping until it can re-arm.
+    """
+    def __init__(self):
+        self._order = [] # Sorted (due epoch seconds, reminder_id) keys
+        self._entries = {} # reminder_id -> (sort key, title, time)
+        self._lock = threading.Lock()
+        self.on_head_change = None
+
+    def rebuild(self, reminders):
+        with self._lock:
+            self._order = []
+            self._entries = {}
+            for reminder in reminders:
+                entry = self._entry_for(reminder)
+                if entry:
+                    self._entries[reminder["id"]] = entry
+                    self._order.append(entry[0])
+            self._order.sort()
+        self._head_changed()
+
+    def entries(self):
+        """[(due epoch, reminder id, title, time)] in due order, for restore()."""
+        with self._lock:
+            return [(due_epoch, reminder_id) + self._entries[reminder_id][1:] for due_epoch, reminder_id in self._order]
+
+    def restore(self, entries):
+        """Rebuild from entries() saved earlier, without parsing any due times."""
+        with self._lock:
+            self._order = [(due_epoch, reminder_id) for due_epoch, reminder_id, _, _ in entries]
+            self._entries = {reminder_id: ((due_epoch, reminder_id), title, time_str)
+                             for due_epoch, reminder_id, title, time_str in entries}
+            self._order.sort()
+        self._head_changed()
+
+    def upsert(self, reminder):
+        with self._lock:
+            head = self._order[:1]
+            self._remove_locked(reminder.get("id"))
+            entry = self._entry_for(reminder)
+            if entry:
+                self._entries[reminder["id"]] = entry
+                bisect.insort(self._order, entry[0])
+            moved = self._order[:1] != head
+        if moved:
+            self._head_changed()
+
+    def discard(self, reminder_id):
+        with self._lock:
+            head = self._order[:1]
+            self._remove_locked(reminder_id)
+            moved = self._order[:1] != head
+        if moved:
+            self._head_changed()
+
+    def _head_changed(self):
+        if self.on_head_change:
+            self.on_head_change()
+
+    def peek(self, count=1):
+        """The next `count` pending reminders as dicts with id, title, time, due (local datetime) and due_epoch."""
+        with self._lock:
+            return [{"id": reminder_id, "title": self._entries[reminder_id][1],
+                     "time": self._entries[reminder_id][2], "due": datetime.fromtimestamp(due_epoch),
+                     "due_epoch": due_epoch}
+                    for due_epoch, reminder_id in self._order[:count]]
+
+    def pop_due(self, now):
+        """Remove and return (due epoch, reminder_id) for every entry due at or before `now`
+        (a datetime or epoch seconds), oldest first."""
+        now_epoch = to_epoch(now)
+        with self._lock:
+            cut = 0
+            while cut < len(self._order) and self._order[cut][0] <= now_epoch:
+                cut += 1
+            due_keys = self._order[:cut]
+            del self._order[:cut]
+            for _, reminder_id in due_keys:
+                self._entries.pop(reminder_id, None)
+            return due_keys
+
+    def __len__(self):
+        return len(self._order)
+
+    @staticmethod
+    def _entry_for(reminder):
+        reminder_id = reminder.get("id")
+        if not reminder_id or reminder.get("notified_individually", False):
+            return None
+        due_epoch = reminder_due_epoch(reminder)
+        if due_epoch is None:
+            return None
+        return ((due_epoch, reminder_id), reminder.get("title", "N/A"), reminder.get("time"))
+
+    def _remove_locked(self, reminder_id):
+        entry = self._entries.pop(reminder_id, None)
+        if entry:
+            position = bisect.bisect_left(self._order, entry[0])
+            if position < len(self._order) and self._order[position] == entry[0]:
+                del self._order[position]
+
+# --- DUPLICATE DETECTION ---
+# A reminder duplicates another when the normalized title, date, time and recurrence match.
+# Policies for adding one: "warn" adds it anyway (and says so), "skip" keeps only the stored
+# reminder, "merge" keeps the stored reminder updated with the new one's settings.
+DUPLICATE_POLICIES = ("warn", "merge", "skip")
+DEFAULT_DUPLICATE_POLICY = "warn"
+MERGE_KEPT_FIELDS = ("id", "created_at", "notified_individually", "recurrence_current_count") # Identity and progress
+
+def duplicate_key(reminder):
+    """Content hash of the fields that make two reminders the same one."""
+    title = " ".join(str(reminder.get("title") or "").split()).casefold()
+    time_str = str(reminder.get("time") or "")
+    try:
+        time_str = parse_wall_time(time_str).strftime("%H:%M:%S" if len(time_str) == 8 else "%H:%M") # "9:05" is "09:05"
+    except (ValueError, TypeError):
+        pass
+    fields = (title, str(reminder.get("date") or ""), time_str, reminder.get("recurrence_type") or "")
+    return hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).digest()
+
+def merge_duplicate(existing, incoming):
+    """Fold a duplicate's settings (end condition and any extra fields) into the stored reminder. Returns it."""
+    kept = {field: existing[field] for field in MERGE_KEPT_FIELDS if existing.get(field) is not None}
+    existing.update(incoming)
+    existing.update(kept)
+    return existing
+
+class DuplicateIndex:
+    """duplicate_key -> ids of the stored reminders with that content, for O(1) duplicate checks.
+
+    Mutations update it per record; `load`, if given, is called for the initial
+    contents on the first lookup, so building it never delays startup.
+    Every stored record is an entry, so copies that share an id count as
+    duplicates; records without an id are entered as "" and only leave on rebuild().
+    Thread-safe.
+    """
+    def __init__(self, load=None):
+        self.load = load
+        self._ids = {} # duplicate key -> [reminder id, or "" for a record without one], one per stored record
+        self._keys = {} # reminder id -> [duplicate key], one per stored record with that id
+        self._loaded = load is None
+        self._lock = threading.RLock()
+
+    def rebuild(self, reminders):
+        with self._lock:
+            self._ids, self._keys = {}, {}
+            for reminder in reminders:
+                self._add_locked(reminder)
+            self._loaded = True
+
+    def upsert(self, reminder):
+        with self._lock:
+            if not self._loaded: return # The first lookup loads the current store
+            self._remove_locked(reminder.get("id"))
+            self._add_locked(reminder)
+
+    def discard(self, reminder_id):
+        with self._lock:
+            self._remove_locked(reminder_id)
+
+    def apply_diff(self, diff):
+        """Apply a reminder_watch.StoreDiff (added, changed and removed records)."""
+        for summary in diff.removed:
+            self.discard(summary.get("id"))
+        for reminder in diff.added + [new for _, new in diff.changed]:
+            self.upsert(reminder)
+
+    def find(self, reminder, new=False):
+        """The id of another stored reminder this one duplicates ("" if that one has no id), or None.
+
+        A stored reminder doesn't duplicate itself. With new=True, `reminder` is not in the
+        store yet, so a stored copy with the same id (a re-import) counts too.
+        """
+        key = duplicate_key(reminder)
+        with self._lock:
+            if not self._loaded:
+                self.rebuild(self.load())
+            ids = list(self._ids.get(key, ()))
+            if not new and (reminder.get("id") or "") in ids:
+                ids.remove(reminder.get("id") or "") # Itself, once
+            return ids[0] if ids else None
+
+    def duplicate_groups(self):
+        """[[reminder id, ...]] for every content stored more than once."""
+        with self._lock:
+            return [list(ids) for ids in self._ids.values() if len(ids) > 1]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(ids) for ids in self._ids.values())
+
+    def _add_locked(self, reminder):
+        reminder_id = reminder.get("id") or ""
+        key = duplicate_key(reminder)
+        if reminder_id:
+            self._keys.setdefault(reminder_id, []).append(key)
+        self._ids.setdefault(key, []).append(reminder_id)
+
+    def _remove_locked(self, reminder_id):
+        """Drop every stored record with this id."""
+        for key in self._keys.pop(reminder_id, ()) if reminder_id else ():
+            ids = self._ids[key]
+            ids.remove(reminder_id)
+            if not ids:
+                del self._ids[key]
+
+def add_deduplicated(reminders, new_reminders, index, policy=DEFAULT_DUPLICATE_POLICY):
+    """Append new_reminders to `reminders` in place, handling duplicates of stored ones (looked up in
+    `index`) and of earlier ones in the batch by `policy`.
+
+    Returns (stored, changed, duplicates): each new reminder as it ended up in the store (itself, or
+    the reminder it duplicates), the reminders appended or merged into, and the new reminders that
+    were duplicates.
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{policy}'. Choose from: {', '.join(DUPLICATE_POLICIES)}.")
+    by_id = None
+    batch = {} # duplicate key -> reminder appended earlier in this call
+    stored, changed, duplicates = [], [], []
+    for reminder in new_reminders:
+        key = duplicate_key(reminder)
+        existing = batch.get(key)
+        if existing is None:
+            existing_id = index.find(reminder, new=True)
+            if existing_id:
+                if by_id is None:
+                    by_id = {r.get("id"): r for r in reminders}
+                existing = by_id.get(existing_id)
+            elif existing_id is not None: # Stored without an id
+                existing = next((r for r in reminders if not r.get("id") and duplicate_key(r) == key), None)
+        if existing is not None:
+            duplicates.append(reminder)
+        if existing is None or policy == "warn":
+            reminders.append(reminder)
+            batch.setdefault(key, reminder)
+            stored.append(reminder)
+            changed.append(reminder)
+            continue
+        if policy == "merge":
+            merge_duplicate(existing, reminder)
+            if not any(r is existing for r in changed):
+                changed.append(existing)
+        stored.append(existing)
+    return stored, changed, duplicates
@@ -0,0 +1,224 @@
+"""Headless scheduler serving many reminder profiles from one process.
+
+    remainder.py daemon PROFILE_DIR [PROFILE_DIR ...] [--profiles-root DIR] [--workers 8]
+
+Each profile is a directory holding its own reminders.json (the same format
+the GUI app writes next to its executable). The daemon keeps one global
+next-due index across all profiles and holds only the pending entries in
+memory, not the reminders themselves. Due reminders are handed to a thread
+pool grouped by profile, so each profile's file is read once per firing batch
+while different profiles are handled in parallel. A firing is recorded as one
+line in the profile's runtime state log (see reminder_state); reminders.json
+itself is never rewritten. Firings go to a per-profile notification sink; by default a line is appended to the
+profile's notifications.jsonl for that user's own session to pick up.
+
+Like the CLI, this module never imports tkinter or pystray.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from reminder_core import APP_NAME, read_reminders_file, reminder_due_epoch, to_epoch, NextDueIndex
+from reminder_state import RuntimeState, state_file_path
+
+PROFILE_DATA_FILE = "reminders.json"
+PROFILE_NOTIFICATIONS_FILE = "notifications.jsonl"
+DEFAULT_PERSIST_WORKERS = 8
+DEFAULT_RESCAN_SECONDS = 30 # How often profile files are checked for edits made by the app or the CLI
+MAX_SLEEP_SECONDS = 60
+
+logger = logging.getLogger(APP_NAME)
+
+# --- NOTIFICATION SINKS ---
+class JsonlNotificationSink:
+    """Appends one JSON line per firing to a file in the profile directory."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, profile_name, reminder, due_at):
+        line = json.dumps({"profile": profile_name, "id": reminder.get("id"), "title": reminder.get("title"),
+                           "due_at": due_at.isoformat(), "fired_at": datetime.now().isoformat(timespec="seconds")})
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + "\n")
+
+def default_sink_factory(profile):
+    return JsonlNotificationSink(os.path.join(profile.directory, PROFILE_NOTIFICATIONS_FILE))
+
+# --- PROFILES ---
+class Profile:
+    """One user's reminders directory. Only the ids currently in the global index are kept in memory."""
+    def __init__(self, directory, name=None):
+        self.directory = os.path.abspath(directory)
+        self.name = name or os.path.basename(self.directory.rstrip(os.sep)) or self.directory
+        self.data_path = os.path.join(self.directory, PROFILE_DATA_FILE)
+        self.state = RuntimeState(state_file_path(self.data_path))
+        self.sink = None
+        self.indexed_ids = set()
+        self.stat_key = False # (inode, mtime, size) of the files the index was built from; False = never indexed
+        self.lock = threading.Lock() # Serializes this profile's load/fire cycles across pool workers
+
+    def current_stat_key(self):
+        """(inode, mtime, size) of reminders.json and of its state log, None for a missing file."""
+        keys = []
+        for path in (self.data_path, self.state.path):
+            try:
+                st = os.stat(path)
+                keys.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                keys.append(None)
+        return tuple(keys)
+
+def discover_profiles(profile_dirs=(), profiles_root=None):
+    """Profiles from explicit directories plus every subdirectory of profiles_root, without duplicates."""
+    directories = list(profile_dirs)
+    if profiles_root:
+        directories += sorted(entry.path for entry in os.scandir(profiles_root) if entry.is_dir())
+    profiles, seen = [], set()
+    for directory in directories:
+        profile = Profile(directory)
+        if profile.directory in seen:
+            continue
+        seen.add(profile.directory)
+        if profile.name in {p.name for p in profiles}:
+            profile.name = profile.directory # Two profiles share a basename; fall back to the full path
+        profiles.append(profile)
+    return profiles
+
+# --- DAEMON ---
+class ReminderDaemon:
+    def __init__(self, profiles, sink_factory=default_sink_factory, workers=DEFAULT_PERSIST_WORKERS,
+                 rescan_seconds=DEFAULT_RESCAN_SECONDS):
+        self.profiles = {profile.name: profile for profile in profiles}
+        for profile in profiles:
+            profile.sink = sink_factory(profile)
+        # Keys are (profile name, reminder id), so one sorted index orders every profile's reminders
+        self.index = NextDueIndex()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ProfileStore")
+        self.rescan_seconds = rescan_seconds
+        self.fired_count = 0
+
+    def rescan(self):
+        """(Re)index every profile whose file changed since it was last indexed, in parallel."""
+        changed = [p for p in self.profiles.values() if p.current_stat_key() != p.stat_key]
+        results = wait([self.pool.submit(self._index_profile, profile) for profile in changed]).done
+        return sum(future.result() for future in results)
+
+    def _index_profile(self, profile):
+        with profile.lock:
+            stat_key = profile.current_stat_key()
+            try:
+                reminders, _ = read_reminders_file(profile.data_path)
+            except (OSError, ValueError) as e:
+                logger.error("Could not load profile '%s' from %s: %s", profile.name, profile.data_path, e)
+                return 0
+            for reminder_id in profile.indexed_ids:
+                self.index.discard((profile.name, reminder_id))
+            profile.indexed_ids = set()
+            for reminder in profile.state.apply(reminders):
+                self._index_reminder(profile, reminder)
+            profile.stat_key = stat_key
+            return len(profile.indexed_ids)
+
+    def _index_reminder(self, profile, reminder):
+        if not reminder.get("id") or reminder.get("notified_individually", False):
+            return
+        self.index.upsert(dict(reminder, id=(profile.name, reminder["id"])))
+        profile.indexed_ids.add(reminder["id"])
+
+    def tick(self, now=None):
+        """Fire everything due at `now` across all profiles. Returns how many reminders fired."""
+        now = now or datetime.now()
+        due_by_profile = {}
+        for _, (profile_name, reminder_id) in self.index.pop_due(now):
+            due_by_profile.setdefault(profile_name, []).append(reminder_id)
+        futures = [self.pool.submit(self._fire_profile, self.profiles[name], reminder_ids, now)
+                   for name, reminder_ids in due_by_profile.items()]
+        fired = sum(future.result() for future in wait(futures).done)
+        self.fired_count += fired
+        if fired:
+            logger.info("Daemon tick: fired %d reminder(s) across %d profile(s).", fired, len(due_by_profile))
+        return fired
+
+    def _fire_profile(self, profile, reminder_ids, now):
+        fired = []
+        with profile.lock:
+            for reminder_id in reminder_ids:
+                profile.indexed_ids.discard(reminder_id)
+            try:
+                reminders, _ = read_reminders_file(profile.data_path)
+            except (OSError, ValueError) as e:
+                logger.error("Could not load profile '%s' to fire reminders: %s", profile.name, e)
+                return 0
+            by_id = {r.get("id"): r for r in reminders}
+            for reminder_id in reminder_ids:
+                reminder = by_id.get(reminder_id)
+                if reminder is None:
+                    continue # Deleted since it was indexed
+                current = profile.state.apply([reminder])[0]
+                if current.get("notified_individually", False):
+                    continue # Handled elsewhere since it was indexed
+                due_epoch = reminder_due_epoch(current)
+                if due_epoch is None or due_epoch > to_epoch(now):
+                    self._index_reminder(profile, current) # Rescheduled since it was indexed
+                    continue
+                occurrence, current = profile.state.advance(reminder)
+                fired.append((occurrence, datetime.fromtimestamp(due_epoch)))
+                self._index_reminder(profile, current) # A series' next occurrence, if any
+            if fired:
+                profile.stat_key = profile.current_stat_key() # Our own state lines need no rescan
+        for reminder, due in fired:
+            try:
+                profile.sink(profile.name, reminder, due)
+            except Exception as e:
+                logger.error("Notification sink for profile '%s' failed: %s", profile.name, e, exc_info=True)
+        return len(fired)
+
+    def seconds_until_next_due(self, now=None):
+        head = self.index.peek(1)
+        if not head:
+            return None
+        return max(0.0, (head[0]["due"] - (now or datetime.now())).total_seconds())
+
+    def run(self, stop_event):
+        """Serve until stop_event is set: sleep until the next due reminder or the next rescan."""
+        self.rescan()
+        logger.info("Daemon serving %d profile(s), %d pending reminder(s).", len(self.profiles), len(self.index))
+        last_rescan = datetime.now()
+        while not stop_event.is_set():
+            self.tick()
+            if (datetime.now() - last_rescan).total_seconds() >= self.rescan_seconds:
+                self.rescan()
+                last_rescan = datetime.now()
+            until_due = self.seconds_until_next_due()
+            sleep_for = min(MAX_SLEEP_SECONDS, self.rescan_seconds, until_due if until_due is not None else MAX_SLEEP_SECONDS)
+            stop_event.wait(max(sleep_for, 0.05))
+        self.pool.shutdown(wait=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="remainder.py daemon", description=f"{APP_NAME} multi-profile scheduler")
+    parser.add_argument("profile_dirs", nargs="*", metavar="PROFILE_DIR", help="Directories holding a reminders.json")
+    parser.add_argument("--profiles-root", default=None, help="Serve every subdirectory of this directory as a profile")
+    parser.add_argument("--workers", type=int, default=DEFAULT_PERSIST_WORKERS, help="Threads persisting profile files")
+    parser.add_argument("--rescan-seconds", type=int, default=DEFAULT_RESCAN_SECONDS)
+    parser.add_argument("--log-level", choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], type=str.upper, default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+    profiles = discover_profiles(args.profile_dirs, args.profiles_root)
+    if not profiles:
+        parser.error("No profiles given. Pass profile directories or --profiles-root.")
+    stop_event = threading.Event()
+    try:
+        ReminderDaemon(profiles, workers=args.workers, rescan_seconds=args.rescan_seconds).run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""One-shot duplicate removal for an existing reminders.json.
+
+    python reminder_dedup.py [--policy warn|skip|merge] [--file reminders.json]
+
+Reminders duplicate each other when their normalized title, date, time and
+recurrence match (reminder_core.duplicate_key). With "warn", the default, the
+duplicates are only listed. With "skip" every duplicate after the first one
+in the store (the one added first) is removed; with "merge" they are removed too, after their
+settings are folded into the first one (reminder_core.merge_duplicate).
+
+The store is streamed twice rather than loaded: the first pass keeps one
+16-byte key per reminder (plus the duplicates themselves, for "merge"), the
+second writes the kept reminders to a temporary file that then replaces the
+original, under the store lock. The copy kept is picked by its position in the
+store, not by id, so copies that share an id or have none are removed too.
+Standard library only, like reminder_watch.
+"""
+import argparse
+import json
+import logging
+import sys
+from collections import Counter
+
+from reminder_core import (
+    APP_NAME, DUPLICATE_POLICIES, DEFAULT_DUPLICATE_POLICY, StoreLock, data_file_path, duplicate_key,
+    format_time_to_ampm, iter_reminders_file, merge_duplicate, replacing_file
+)
+
+logger = logging.getLogger(APP_NAME)
+
+class DedupReport:
+    def __init__(self, policy, scanned, groups):
+        self.policy = policy
+        self.scanned = scanned
+        self.groups = groups # [(title, date, time, copies)]
+
+    @property
+    def duplicates(self):
+        return sum(copies - 1 for _, _, _, copies in self.groups)
+
+    @property
+    def removed(self):
+        return 0 if self.policy == "warn" else self.duplicates
+
+    def __str__(self):
+        lines = [f"  {copies}x  {day} {format_time_to_ampm(time_str)}  {title}" for title, day, time_str, copies in self.groups]
+        if self.policy == "warn":
+            lines.append(f"{self.duplicates} duplicate(s) in {self.scanned} reminders; none removed (use --policy skip or merge).")
+        else:
+            lines.append(f"Removed {self.removed} duplicate(s) of {self.scanned} reminders ({self.policy}).")
+        return "\n".join(lines)
+
+def write_stream(file_path, reminders):
+    """Write reminders (any iterable) to file_path in write_reminders_file's layout, via a temporary file.
+    Returns the number of bytes written."""
+    written = 0
+    with replacing_file(file_path) as f:
+        for reminder in reminders:
+            chunk = ("[\n    " if not written else ",\n    ") + json.dumps(reminder, indent=4).replace("\n", "\n    ")
+            written += f.write(chunk)
+        written += f.write("\n]" if written else "[]")
+    return written
+
+def deduplicate_store(data_path, policy=DEFAULT_DUPLICATE_POLICY):
+    """Find (and with "skip" or "merge", remove) duplicate reminders in the store. Returns a DedupReport."""
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{policy}'. Choose from: {', '.join(DUPLICATE_POLICIES)}.")
+    with StoreLock(data_path):
+        first_positions = {} # duplicate key -> position in the store of the first reminder with it
+        later = {} # duplicate key -> [later duplicates: title, date and time, or the whole record for "merge"]
+        scanned = 0
+        for position, reminder in enumerate(iter_reminders_file(data_path)):
+            scanned += 1
+            key = duplicate_key(reminder)
+            if key not in first_positions:
+                first_positions[key] = position
+            else:
+                later.setdefault(key, []).append(reminder if policy == "merge" else
+                                                 {field: reminder.get(field) for field in ("title", "date", "time")})
+        groups = []
+        if later and policy != "warn":
+            labels = {} # duplicate key -> first record with it, for the report
+            dropped = Counter() # duplicate key -> copies left out of the rewritten store
+            def kept():
+                for position, reminder in enumerate(iter_reminders_file(data_path)):
+                    key = duplicate_key(reminder)
+                    labels.setdefault(key, reminder)
+                    if first_positions.get(key) != position:
+                        dropped[key] += 1
+                        continue
+                    if policy == "merge" and key in later:
+                        for duplicate in later[key]:
+                            merge_duplicate(reminder, duplicate)
+                    yield reminder
+            write_stream(data_path, kept())
+            # From what was actually left out, not from the first pass
+            groups = [(labels[key].get("title"), labels[key].get("date"), labels[key].get("time"), copies + 1)
+                      for key, copies in dropped.items()]
+        else:
+            groups = [(d[0].get("title"), d[0].get("date"), d[0].get("time"), len(d) + 1) for d in later.values()]
+    if groups:
+        logger.info("Duplicate pass (%s) over %s: %d duplicate(s) in %d group(s).", policy, data_path,
+                    sum(copies - 1 for *_, copies in groups), len(groups))
+    return DedupReport(policy, scanned, groups)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="reminder_dedup.py", description=f"{APP_NAME} duplicate reminder check")
+    parser.add_argument("--policy", choices=DUPLICATE_POLICIES, default=DEFAULT_DUPLICATE_POLICY,
+                        help="warn: list duplicates only; skip: remove them; merge: fold them into the first, then remove them")
+    parser.add_argument("--file", default=data_file_path("reminders.json"), help="Store to check (default: reminders.json)")
+    args = parser.parse_args(argv)
+    try:
+        print(deduplicate_store(args.file, args.policy))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
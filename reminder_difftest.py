@@ -0,0 +1,498 @@
+"""Differential checks of scheduling engines against the legacy scheduler.
+
+A faster or restructured engine must fire the same occurrences at the same
+moments as the code it replaces. This module replays randomized reminder sets
+and clock sequences through two engines side by side and reports the first
+step where they disagree:
+
+    python reminder_difftest.py --runs 500 --seed 1
+
+ReferenceEngine is the scheduler as it was before the runtime state log,
+vendored below from remainder.py rather than built on reminder_core, so a bug
+in a shared helper still shows up as a divergence: every firing, snooze and
+dismissal rewrites records in the list, and a recurring series continues in a
+new copied record. StateLogEngine is the current one, reminder definitions
+plus reminder_state.RuntimeState. Any class with the same methods can be
+checked as the candidate.
+
+Engines are compared on what has fired by each clock instant, not on which
+pass fired it, and on the pending occurrences (title, date, time, occurrence
+count) after every step. Generated reminders cover every RECURRENCE_TYPES and
+END_CONDITION_TYPES option, month-end dates and 29 February; clocks advance by
+seconds, minutes, days, whole months and to exactly one second either side of
+the next due time.
+
+Snoozes are where the state log differs from the legacy scheduler by design.
+For a recurring reminder, the legacy one continues the series from the snoozed
+time, and starts a second copy of it when a snoozed occurrence that already
+fired fires again. And the legacy snooze adds minutes to the wall clock, so
+one across a daylight-saving change is an hour off from the elapsed time the
+state log waits. A difference confined to series snoozed like that earlier in
+the run is allowed: it is reported and that series is left out of the rest of
+the comparison. Any other difference is a divergence.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from dateutil.relativedelta import relativedelta
+
+from reminder_core import (
+    APP_NAME, RECURRENCE_TYPES, END_CONDITION_TYPES, new_reminder_record, reminder_due_epoch, wall_to_epoch
+)
+from reminder_state import RuntimeState, state_file_path
+
+FIRST_START = date(2027, 11, 1) # Scenarios start between these, so 2028-02-29 is always in reach
+LAST_START = date(2028, 12, 31)
+MAX_DRAIN_PASSES = 8 # Ticks at one instant until nothing more fires; an engine still firing after this diverges
+
+# --- LEGACY SCHEDULER ---
+# calculate_next_recurrence, snooze_reminder, check_and_notify_due_reminders and delete_past_reminders as
+# remainder.py had them before the scheduling rewrite, so that no helper is shared with the engines being
+# checked. Adapted only to run on a given list and clock instead of reminders.json and the system time, and
+# to read and write second-resolution times ("HH:MM:SS"), which the store has accepted since due stamps.
+# Logging is left out.
+LEGACY_WALL_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S")
+
+def legacy_wall(date_str, time_str):
+    """datetime.strptime of a stored date and time, as the legacy check compared them."""
+    for wall_format in LEGACY_WALL_FORMATS:
+        try:
+            return datetime.strptime(f"{date_str} {time_str}", wall_format)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date or time: {date_str} {time_str}")
+
+def legacy_calculate_next_recurrence(reminder, today):
+    """Calculate the next occurrence date for a recurring reminder."""
+    if not reminder.get("recurrence_type"):
+        return None
+
+    current_date = datetime.strptime(reminder["date"], "%Y-%m-%d").date()
+
+    if current_date < today:
+        current_date = today
+
+    recurrence_type = reminder["recurrence_type"]
+
+    if recurrence_type == "daily":
+        return (current_date + timedelta(days=1)).strftime("%Y-%m-%d")
+    elif recurrence_type == "weekdays":
+        next_date = current_date + timedelta(days=1)
+        # Skip weekends
+        while next_date.weekday() >= 5:  # 5 is Saturday, 6 is Sunday
+            next_date += timedelta(days=1)
+        return next_date.strftime("%Y-%m-%d")
+    elif recurrence_type == "weekly":
+        return (current_date + timedelta(days=7)).strftime("%Y-%m-%d")
+    elif recurrence_type == "biweekly":
+        return (current_date + timedelta(days=14)).strftime("%Y-%m-%d")
+    elif recurrence_type == "monthly":
+        # Use relativedelta for robust month calculations
+        next_month_date = current_date + relativedelta(months=1)
+        return next_month_date.strftime("%Y-%m-%d")
+    elif recurrence_type == "yearly":
+        # Use relativedelta for consistent year calculations
+        next_year_date = current_date + relativedelta(years=1)
+        return next_year_date.strftime("%Y-%m-%d")
+    return None
+
+def legacy_snooze_reminder(reminders, reminder_id, minutes, current_time):
+    """Snooze a reminder for the specified number of minutes."""
+    for reminder in reminders:
+        if reminder.get("id") == reminder_id:
+            reminder["notified_individually"] = False
+            # Update the time to current time + snooze minutes
+            snooze_time = current_time.replace(microsecond=0) + timedelta(minutes=minutes)
+            reminder["time"] = snooze_time.strftime("%H:%M:%S" if snooze_time.second else "%H:%M")
+            reminder["date"] = snooze_time.strftime("%Y-%m-%d")
+            return True
+    return False
+
+def legacy_fire(reminder, today):
+    """The legacy check's handling of one due reminder, after its alert: mark it notified and, for a
+    series that goes on, return its next occurrence as a new record."""
+    reminder_time_str = reminder.get("time", "N/A")
+    reminder["notified_individually"] = True
+
+    # Handle recurring reminders
+    if reminder.get("recurrence_type") is None:
+        return None
+    # Check end conditions
+    end_type = reminder.get("recurrence_end_type", "never")
+    series_ended = False
+
+    if end_type == "occurrences":
+        current_count = reminder.get("recurrence_current_count", 0)
+        max_occurrences = reminder.get("recurrence_end_value")
+        if current_count >= max_occurrences:
+            series_ended = True
+        else:
+            reminder["recurrence_current_count"] = current_count + 1
+
+    # Calculate next date before checking date-based end condition
+    next_date_str = legacy_calculate_next_recurrence(reminder, today)
+
+    # Check date-based end condition using the next calculated date
+    if not series_ended and end_type == "date":
+        recurrence_end_date_str = reminder.get("recurrence_end_value")
+        if recurrence_end_date_str:
+            try:
+                recurrence_end_date_obj = datetime.strptime(recurrence_end_date_str, "%Y-%m-%d").date()
+                if next_date_str:
+                    next_calculated_date_obj = datetime.strptime(next_date_str, "%Y-%m-%d").date()
+                    if next_calculated_date_obj > recurrence_end_date_obj:
+                        series_ended = True
+                else:
+                    series_ended = True
+            except (ValueError, TypeError):
+                series_ended = True # Assume series ends on error
+
+    # Create next occurrence if series hasn't ended and a next date was calculated
+    if series_ended or not next_date_str:
+        return None
+    new_reminder = reminder.copy()
+    new_reminder["id"] = str(uuid.uuid4()) # Assign new ID
+    new_reminder["date"] = next_date_str
+    new_reminder["time"] = reminder_time_str # Keep the same time as the original
+    new_reminder["notified_individually"] = False
+    # For recurring reminders, the count is stored on the NEXT instance.
+    if end_type == "occurrences":
+        new_reminder["recurrence_current_count"] = reminder["recurrence_current_count"]
+    else:
+        new_reminder["recurrence_current_count"] = None
+    return new_reminder
+
+def legacy_check_and_notify_due_reminders(reminders, current_time, today, notify):
+    """One legacy check: notify(reminder) for each due reminder. Returns the updated list."""
+    updated_reminders = []
+    for reminder in reminders:
+        # Skip if already notified
+        if reminder.get("notified_individually", False):
+            updated_reminders.append(reminder)
+            continue
+
+        # Try to parse reminder time
+        try:
+            reminder_datetime = legacy_wall(reminder.get("date", "N/A"), reminder.get("time", "N/A"))
+        except ValueError:
+            updated_reminders.append(reminder)
+            continue # Skip this reminder due to invalid format
+
+        # Check if reminder is due
+        if reminder_datetime <= current_time:
+            notify(reminder)
+            new_reminder = legacy_fire(reminder, today)
+            if new_reminder is not None:
+                updated_reminders.append(new_reminder)
+            # Add the original (now notified) reminder
+            updated_reminders.append(reminder)
+        else:
+            updated_reminders.append(reminder)
+    return updated_reminders
+
+def legacy_delete_past_reminders(reminders, today):
+    """Delete reminders from past dates. Returns the kept ones."""
+    updated_reminders = []
+    for reminder in reminders:
+        try:
+            reminder_date = datetime.strptime(reminder.get("date", ""), "%Y-%m-%d").date()
+            if reminder_date < today:
+                continue
+            updated_reminders.append(reminder)
+        except ValueError:
+            updated_reminders.append(reminder)
+    return updated_reminders
+
+# --- ENGINES ---
+class ReferenceEngine:
+    """The legacy scheduler above: fired records stay in the list and a series continues in a copy."""
+    name = "legacy"
+
+    def __init__(self, reminders, work_dir):
+        self.records = [dict(r) for r in reminders]
+        self.last_fired = {} # series -> id of the record whose alert was shown last
+
+    def tick(self, now_epoch, today):
+        """One legacy check at now_epoch. Returns copies of the fired records, as they were shown."""
+        fired = []
+        def notify(reminder):
+            fired.append(dict(reminder))
+            self.last_fired[reminder["series"]] = reminder["id"]
+        self.records = legacy_check_and_notify_due_reminders(self.records, datetime.fromtimestamp(now_epoch), today, notify)
+        return fired
+
+    def _pending(self, series):
+        """The series' earliest pending record."""
+        candidates = [r for r in self.records if r["series"] == series and not r.get("notified_individually", False)]
+        return min(candidates, key=lambda r: legacy_wall(r["date"], r["time"])) if candidates else None
+
+    def snooze(self, series, minutes, now_epoch, fired=False):
+        """Snooze the series' pending occurrence, or (fired=True) the one whose alert was shown last."""
+        if fired:
+            # Snoozing from an alert closes it; that occurrence can be snoozed this way again once it fires again
+            target_id = self.last_fired.pop(series, None)
+            target = next((r for r in self.records if r["id"] == target_id), None)
+        else:
+            target = self._pending(series)
+        if target is not None:
+            legacy_snooze_reminder(self.records, target["id"], minutes, datetime.fromtimestamp(now_epoch))
+
+    def dismiss(self, series, today):
+        """Skip the pending occurrence. The legacy app had no dismiss; this is its firing without the alert."""
+        target = self._pending(series)
+        if target is not None:
+            new_reminder = legacy_fire(target, today)
+            if new_reminder is not None:
+                self.records.append(new_reminder)
+
+    def purge(self, today):
+        self.records = legacy_delete_past_reminders(self.records, today)
+
+    def pending(self):
+        return [r for r in self.records if not r.get("notified_individually", False)]
+
+class StateLogEngine:
+    """Definitions that only change on edits, with occurrence state in a RuntimeState log."""
+    name = "state-log"
+
+    def __init__(self, reminders, work_dir):
+        self.definitions = [dict(r) for r in reminders]
+        self.state = RuntimeState(state_file_path(os.path.join(work_dir, "reminders.json")))
+        self.last_fired = {} # series -> scheduled wall time of its latest fired occurrence
+
+    def _definition(self, series):
+        return next((r for r in self.definitions if r["series"] == series), None)
+
+    def tick(self, now_epoch, today):
+        fired = []
+        for definition, reminder in zip(self.definitions, self.state.apply(self.definitions)):
+            if reminder.get("notified_individually", False):
+                continue
+            due_epoch = reminder_due_epoch(reminder)
+            if due_epoch is not None and due_epoch <= now_epoch:
+                occurrence, _ = self.state.advance(definition, today=today)
+                fired.append(occurrence)
+                self.last_fired[definition["series"]] = occurrence["occurrence"]
+        return fired
+
+    def snooze(self, series, minutes, now_epoch, fired=False):
+        definition = self._definition(series)
+        occurrence = self.last_fired.pop(series, None) if fired else None
+        if definition is None or (fired and occurrence is None):
+            return # No alert was shown to snooze from
+        if not fired and self.state.effective(definition).get("notified_individually", False):
+            return # Nothing pending to snooze
+        self.state.snooze(definition, now_epoch + minutes * 60, occurrence)
+
+    def dismiss(self, series, today):
+        definition = self._definition(series)
+        if definition is not None:
+            self.state.advance(definition, "dismissed", today)
+
+    def purge(self, today):
+        """remainder.delete_past_reminders: drop definitions whose current occurrence is past, then compact."""
+        today_str = today.strftime("%Y-%m-%d")
+        self.definitions = [d for d, r in zip(self.definitions, self.state.apply(self.definitions))
+                            if r.get("date", "") >= today_str]
+        self.state.compact(self.definitions, today)
+
+    def pending(self):
+        return [r for r in self.state.apply(self.definitions) if not r.get("notified_individually", False)]
+
+# --- SCENARIOS ---
+def observed(reminders):
+    """What two engines must agree on, in a stable order."""
+    return sorted((r["series"], r.get("title"), r.get("date"), r.get("time"), r.get("recurrence_current_count"))
+                  for r in reminders)
+
+def month_end(day):
+    return day.replace(day=monthrange(day.year, day.month)[1])
+
+def random_reminders(rng, count, start):
+    """`count` reminders around `start`, weighted towards dates where recurrence arithmetic is tricky."""
+    special_days = [month_end(start), month_end(start + timedelta(days=31)), date(2028, 2, 29),
+                    date(2028, 1, 31), date(2027, 12, 31), date(2028, 12, 31)]
+    reminders = []
+    for number in range(count):
+        if rng.random() < 0.35:
+            day = rng.choice(special_days)
+        else:
+            day = start + timedelta(days=rng.randint(-2, 45))
+        time_str = rng.choice(["00:00", "23:59", "09:00", f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+                               f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(1, 59):02d}"])
+        recurrence_type = rng.choice(list(RECURRENCE_TYPES.values()))
+        end_type = rng.choice(list(END_CONDITION_TYPES.values())) if recurrence_type else "never"
+        end_value = None
+        if end_type == "occurrences":
+            end_value = rng.randint(1, 6)
+        elif end_type == "date":
+            end_value = (day + timedelta(days=rng.choice([0, 1, 7, 28, 29, 31, rng.randint(0, 400)]))).strftime("%Y-%m-%d")
+        reminder = new_reminder_record(f"R{number}", day.strftime("%Y-%m-%d"), time_str, recurrence_type, end_type, end_value)
+        reminder["series"] = reminder["id"]
+        reminders.append(reminder)
+    return reminders
+
+def random_steps(rng, reminders, count):
+    """A random sequence of clock moves and user actions.
+
+    Steps: ("advance", seconds), ("advance_to_due", offset), ("snooze", series,
+    minutes, fired), ("dismiss", series) and ("purge",).
+    """
+    everyone = [r["series"] for r in reminders]
+    steps = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.30:
+            steps.append(("advance_to_due", rng.choice([-1, 0, 0, 1])))
+        elif roll < 0.55:
+            steps.append(("advance", rng.choice([rng.randint(1, 59), rng.randint(60, 7200),
+                                                 rng.randint(1, 3) * 86400, rng.randint(28, 62) * 86400])))
+        elif roll < 0.80:
+            steps.append(("snooze", rng.choice(everyone), rng.choice([5, 10, 60, 24 * 60]), rng.random() < 0.5))
+        elif roll < 0.92:
+            steps.append(("dismiss", rng.choice(everyone)))
+        else:
+            steps.append(("purge",))
+    return steps
+
+class Divergence:
+    """A step at which two engines disagreed: the first one, or one allowed as a snooze difference."""
+    def __init__(self, step_index, step, aspect, expected, actual, now_epoch, seed=None):
+        self.step_index = step_index
+        self.step = step
+        self.aspect = aspect # "fired" or "pending"
+        self.expected = expected
+        self.actual = actual
+        self.now_epoch = now_epoch
+        self.seed = seed
+
+    def __str__(self):
+        only_expected = [o for o in self.expected if o not in self.actual]
+        only_actual = [o for o in self.actual if o not in self.expected]
+        seed = f" (seed {self.seed})" if self.seed is not None else ""
+        return (f"Divergence{seed} at step {self.step_index} {self.step!r}, clock "
+                f"{datetime.fromtimestamp(self.now_epoch):%Y-%m-%d %H:%M:%S}: {self.aspect} differs\n"
+                f"  only in legacy:    {only_expected}\n  only in candidate: {only_actual}")
+
+def drain(engine, now_epoch, today):
+    """Everything the engine fires at this instant, however many ticks it takes."""
+    fired = []
+    for _ in range(MAX_DRAIN_PASSES):
+        batch = engine.tick(now_epoch, today)
+        if not batch:
+            break
+        fired += batch
+    return fired
+
+def differing_series(expected, actual):
+    """Series of the observations only one engine has."""
+    return {o[0] for o in expected if o not in actual} | {o[0] for o in actual if o not in expected}
+
+def crosses_offset_change(epoch, seconds):
+    """Whether local time changes its UTC offset within `seconds` after `epoch`."""
+    return time.localtime(epoch).tm_gmtoff != time.localtime(epoch + seconds).tm_gmtoff
+
+def run_scenario(reminders, steps, start_epoch, candidate=StateLogEngine, seed=None, allowed=None):
+    """Replay steps through ReferenceEngine and `candidate`. Returns the first Divergence, or None.
+
+    Differences only in series snoozed earlier are appended to `allowed` (when given) instead.
+    """
+    recurring = {r["series"] for r in reminders if r.get("recurrence_type")}
+    snoozed_series, excused = set(), set() # Series whose snooze may differ by design; those that did
+
+    def compare(index, step, aspect, expected, actual, now_epoch):
+        expected = [o for o in expected if o[0] not in excused]
+        actual = [o for o in actual if o[0] not in excused]
+        if expected == actual:
+            return None
+        divergence = Divergence(index, step, aspect, expected, actual, now_epoch, seed)
+        series = differing_series(expected, actual)
+        if not series <= snoozed_series:
+            return divergence
+        excused.update(series)
+        if allowed is not None:
+            allowed.append(divergence)
+        return None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        reference_dir, candidate_dir = os.path.join(work_dir, "legacy"), os.path.join(work_dir, "candidate")
+        os.makedirs(reference_dir)
+        os.makedirs(candidate_dir)
+        engines = (ReferenceEngine(reminders, reference_dir), candidate(reminders, candidate_dir))
+        now_epoch = start_epoch
+        for index, step in enumerate(steps):
+            kind = step[0]
+            if kind == "advance":
+                now_epoch += step[1]
+            elif kind == "advance_to_due":
+                due = [legacy_wall(r["date"], r["time"]).timestamp() for r in engines[0].pending()]
+                if due:
+                    now_epoch = max(now_epoch, int(min(due)) + step[1])
+            today = datetime.fromtimestamp(now_epoch).date()
+            results = []
+            for engine in engines:
+                if kind in ("advance", "advance_to_due"):
+                    results.append(observed(drain(engine, now_epoch, today)))
+                elif kind == "snooze":
+                    engine.snooze(step[1], step[2], now_epoch, step[3])
+                    if step[1] in recurring or crosses_offset_change(now_epoch, step[2] * 60):
+                        snoozed_series.add(step[1])
+                elif kind == "dismiss":
+                    engine.dismiss(step[1], today)
+                elif kind == "purge":
+                    engine.purge(today)
+            divergence = None
+            if results:
+                divergence = compare(index, step, "fired", results[0], results[1], now_epoch)
+            if divergence is None:
+                divergence = compare(index, step, "pending", observed(engines[0].pending()),
+                                     observed(engines[1].pending()), now_epoch)
+            if divergence is not None:
+                return divergence
+    return None
+
+def random_scenario(seed, reminder_count=12, step_count=60):
+    """(reminders, steps, start epoch) generated from `seed`; the same seed always gives the same scenario."""
+    rng = random.Random(seed)
+    start = FIRST_START + timedelta(days=rng.randint(0, (LAST_START - FIRST_START).days))
+    reminders = random_reminders(rng, reminder_count, start)
+    steps = random_steps(rng, reminders, step_count)
+    return reminders, steps, wall_to_epoch(start.strftime("%Y-%m-%d"), "00:00")
+
+def find_divergence(runs, first_seed=0, candidate=StateLogEngine, reminder_count=12, step_count=60, allowed=None):
+    """Run `runs` random scenarios (seeds first_seed, first_seed + 1, ...). Returns the first Divergence, or None."""
+    for seed in range(first_seed, first_seed + runs):
+        reminders, steps, start_epoch = random_scenario(seed, reminder_count, step_count)
+        divergence = run_scenario(reminders, steps, start_epoch, candidate, seed, allowed)
+        if divergence is not None:
+            return divergence
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="reminder_difftest.py", description=f"{APP_NAME} engine differential check")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first run; each run uses the next one")
+    parser.add_argument("--reminders", type=int, default=12, help="Reminders per run")
+    parser.add_argument("--steps", type=int, default=60, help="Clock moves and actions per run")
+    parser.add_argument("--show-allowed", action="store_true", help="Print each allowed snooze difference")
+    args = parser.parse_args(argv)
+    allowed = []
+    divergence = find_divergence(args.runs, args.seed, StateLogEngine, args.reminders, args.steps, allowed)
+    if args.show_allowed:
+        for difference in allowed:
+            print(f"Allowed: {difference}")
+    if divergence is not None:
+        print(divergence)
+        return 1
+    print(f"No divergence in {args.runs} runs (seeds {args.seed}-{args.seed + args.runs - 1}); "
+          f"{len(allowed)} allowed snooze differences.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""One asyncio event loop on one background thread for the app's timers and jobs.
+
+    engine = CoreEngine()
+    engine.every(30, refresh_tray_status)
+    engine.daily_at(time(0, 0), delete_past_reminders)
+    engine.deadline(next_due_epoch, fire_due_reminders) # Wakes exactly when the next reminder is due
+    engine.start()
+    ...
+    engine.rearm()  # From any thread, after the next due time changed
+    engine.stop()
+
+Timers are coroutines on the loop and cost nothing between firings: there is
+no per-second poll. The jobs they trigger (store reads and writes, snapshot
+refreshes) run one at a time on a single worker thread, so the loop stays free
+and jobs never overlap. Other threads hand work to the loop with call_soon()
+or to the worker with submit().
+
+Long sleeps are cut into pieces of at most MAX_TIMER_SLEEP_SECONDS and the wall
+clock is read again after each one, so a suspend, DST change or clock
+adjustment delays a timer by at most that much.
+
+Standard library only, like reminder_watch.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from reminder_core import APP_NAME, system_clock
+
+MAX_TIMER_SLEEP_SECONDS = 60.0
+STUCK_DEADLINE_RETRY_SECONDS = 1.0 # A deadline job that leaves the deadline in the past is retried this often
+
+logger = logging.getLogger(APP_NAME)
+
+class CoreEngine:
+    """Event loop thread plus a single job worker. Timers may be added before or after start()."""
+    def __init__(self, clock=system_clock, name="ReminderCore", before_job=None, on_stop=None):
+        self.clock = clock
+        self.name = name
+        self.before_job = before_job # Runs on the worker before every job (e.g. to attach a profiler)
+        self.on_stop = on_stop # Runs on the worker once, when the engine stops
+        self.loop = None
+        self._thread = None
+        self._executor = None
+        self._timers = [] # Coroutine factories, started with the loop
+        self._tasks = []
+        self._rearm_events = []
+        self._ready = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- TIMERS ---
+    def every(self, seconds, job, *args):
+        """Run job(*args) every `seconds`, first after one interval."""
+        self._add_timer(lambda: self._every(seconds, job, args))
+
+    def daily_at(self, wall_time, job, *args):
+        """Run job(*args) every day at the local wall time `wall_time` (a datetime.time)."""
+        self._add_timer(lambda: self._daily_at(wall_time, job, args))
+
+    def deadline(self, next_epoch, job, *args):
+        """Run job(*args) whenever the clock reaches next_epoch() (epoch seconds, or None for nothing pending).
+
+        next_epoch is read again after each job and on rearm().
+        """
+        self._add_timer(lambda: self._deadline(next_epoch, job, args))
+
+    def rearm(self):
+        """Re-read every deadline. Safe to call from any thread."""
+        if self.loop is not None and self.running:
+            self.loop.call_soon_threadsafe(self._set_rearm_events)
+
+    def _add_timer(self, factory):
+        self._timers.append(factory)
+        if self.loop is not None and self.running:
+            self.loop.call_soon_threadsafe(self._start_timer, factory)
+
+    def _start_timer(self, factory):
+        self._tasks.append(self.loop.create_task(factory()))
+
+    def _set_rearm_events(self):
+        for event in self._rearm_events:
+            event.set()
+
+    async def _every(self, seconds, job, args):
+        while True:
+            await asyncio.sleep(seconds)
+            await self._run_job(job, args)
+
+    async def _daily_at(self, wall_time, job, args):
+        while True:
+            now = self.clock.now()
+            next_run = datetime.combine(now.date(), wall_time)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            while True:
+                remaining = (next_run - self.clock.now()).total_seconds()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, MAX_TIMER_SLEEP_SECONDS))
+            await self._run_job(job, args)
+
+    async def _deadline(self, next_epoch, job, args):
+        rearm_event = asyncio.Event()
+        self._rearm_events.append(rearm_event)
+        while True:
+            rearm_event.clear()
+            due_epoch = next_epoch()
+            delay = MAX_TIMER_SLEEP_SECONDS if due_epoch is None else due_epoch - self.clock.time()
+            if delay <= 0:
+                await self._run_job(job, args)
+                if next_epoch() != due_epoch:
+                    continue
+                delay = STUCK_DEADLINE_RETRY_SECONDS # The job left the deadline where it was; don't spin on it
+            try:
+                await asyncio.wait_for(rearm_event.wait(), min(delay, MAX_TIMER_SLEEP_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job, args):
+        try:
+            await self.loop.run_in_executor(self._executor, self._call_job, job, args)
+        except asyncio.CancelledError: # An Exception before Python 3.8
+            raise
+        except Exception as e:
+            logger.error("Error in %s job %s: %s", self.name, getattr(job, "__name__", job), e, exc_info=True)
+
+    def _call_job(self, job, args):
+        if self.before_job:
+            self.before_job()
+        return job(*args)
+
+    # --- CROSS-THREAD ENTRY POINTS ---
+    def call_soon(self, callback, *args):
+        """Run callback(*args) on the loop thread. Safe to call from any thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def submit(self, job, *args):
+        """Run job(*args) on the worker, after the jobs already queued. Returns a concurrent.futures.Future."""
+        return self._executor.submit(self._call_job, job, args)
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self.running:
+            return
+        self._ready.clear()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}Worker")
+        self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        for factory in self._timers:
+            self._start_timer(factory)
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*self._tasks, return_exceptions=True))
+            self.loop.close()
+
+    def stop(self, timeout=3):
+        """Stop the timers, let the running job finish and run on_stop. Safe to call more than once."""
+        if not self.running:
+            return True
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if self.on_stop:
+            self._executor.submit(self.on_stop)
+        self._executor.shutdown(wait=True)
+        stopped = not self._thread.is_alive()
+        self._thread = None
+        self.loop = None
+        self._tasks, self._rearm_events = [], []
+        return stopped
@@ -0,0 +1,232 @@
+"""Single-instance lock and local command channel for Personal Reminder.
+
+This module only uses the standard library so that a second launch can hand
+its request to the running instance and exit without importing tkinter,
+Pillow, pystray or tkcalendar.
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+
+LOGGER_NAME = "Personal Reminder" # Same logger as remainder.py (APP_NAME)
+LOCK_FILE_NAME = "app.lock"
+SOCKET_FILE_NAME = "app.sock"
+CONNECT_TIMEOUT_SECONDS = 2.0 # How long a client waits for the running instance to answer
+MAX_UNIX_SOCKET_PATH = 100 # sun_path is 104-108 bytes depending on the platform
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# --- ADVISORY LOCK ---
+class InstanceLock:
+    """OS-level advisory lock on app.lock (fcntl on POSIX, msvcrt on Windows).
+
+    The lock is released by the OS when the process exits, even after a crash,
+    so a stale lock file can never block a new launch.
+    """
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self._handle = None
+
+    def acquire(self):
+        """Try to take the lock without blocking. Returns True if this process now holds it."""
+        handle = open(self.lock_path, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        # Record our PID for diagnostics only; the lock itself is what matters
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._handle = handle
+        return True
+
+    def release(self):
+        if not self._handle: return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        except OSError as e:
+            logger.debug("Error releasing instance lock: %s", e)
+        finally:
+            self._handle.close()
+            self._handle = None
+
+    @property
+    def held(self):
+        return self._handle is not None
+
+# --- COMMAND CHANNEL ---
+def channel_address(app_dir):
+    """Local endpoint for the running instance: a named pipe on Windows, a Unix socket elsewhere."""
+    digest = hashlib.sha1(os.path.abspath(app_dir).encode('utf-8')).hexdigest()[:12]
+    if os.name == 'nt':
+        return r'\\.\pipe\PersonalReminder-' + digest
+    socket_path = os.path.join(app_dir, SOCKET_FILE_NAME)
+    if len(socket_path) > MAX_UNIX_SOCKET_PATH:
+        socket_path = os.path.join(tempfile.gettempdir(), f"personal-reminder-{os.getuid()}-{digest}.sock")
+    return socket_path
+
+def channel_family(address):
+    return 'AF_PIPE' if address.startswith('\\\\.\\pipe\\') else 'AF_UNIX'
+
+def send_command(address, request, timeout=CONNECT_TIMEOUT_SECONDS):
+    """Send one JSON request to the running instance.
+
+    Returns the decoded response, or None when no instance is listening. Once
+    connected, the request may already be applied, so a missing or unreadable
+    answer (none within `timeout` seconds) is an error response rather than
+    None: the caller must not run the request again itself.
+    """
+    try:
+        conn = Client(address, family=channel_family(address))
+    except (OSError, EOFError):
+        return None
+    try:
+        conn.send_bytes(json.dumps(request).encode('utf-8'))
+        if not conn.poll(timeout):
+            return {"ok": False, "error": f"Running instance did not answer within {timeout:g} s; it may still apply the request."}
+        return json.loads(conn.recv_bytes().decode('utf-8'))
+    except (OSError, EOFError, ValueError) as e:
+        return {"ok": False, "error": f"Running instance did not answer ({e or type(e).__name__})."}
+    finally:
+        conn.close()
+
+class CommandServer:
+    """Accepts JSON requests from later launches and dispatches them to registered handlers.
+
+    Requests look like {"command": "show", ...}. A handler receives the request
+    dict and returns a JSON-serializable result; the reply is
+    {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+    Handlers run on the server thread, so GUI work must be posted to Tk.
+    """
+    def __init__(self, address):
+        self.address = address
+        self.handlers = {}
+        self._listener = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def register(self, command, handler):
+        self.handlers[command] = handler
+
+    def start(self):
+        family = channel_family(self.address)
+        if family == 'AF_UNIX' and os.path.exists(self.address):
+            # Left behind by a crashed instance; safe to remove because we hold the instance lock
+            os.remove(self.address)
+        old_umask = os.umask(0o077) if family == 'AF_UNIX' else None # Socket is private to this user
+        try:
+            self._listener = Listener(self.address, family=family)
+        finally:
+            if old_umask is not None: os.umask(old_umask)
+        self._thread = threading.Thread(target=self._serve, name="CommandServer", daemon=True)
+        self._thread.start()
+        logger.info("Command channel listening on %s", self.address)
+
+    def stop(self):
+        self._stopping.set()
+        if self._listener:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+            self._listener = None
+
+    def _serve(self):
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, AttributeError):
+                if self._stopping.is_set(): break
+                continue
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        try:
+            while True:
+                try:
+                    raw_request = conn.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                response = self.dispatch(raw_request)
+                try:
+                    conn.send_bytes(json.dumps(response).encode('utf-8'))
+                except (EOFError, OSError):
+                    logger.warning("Client left before the answer to %r was sent.", raw_request[:200])
+                    break
+        finally:
+            conn.close()
+
+    def dispatch(self, raw_request):
+        try:
+            request = json.loads(raw_request.decode('utf-8'))
+            handler = self.handlers.get(request.get("command"))
+            if handler is None:
+                return {"ok": False, "error": f"Unknown command: {request.get('command')}"}
+            return {"ok": True, "result": handler(request)}
+        except Exception as e:
+            logger.error("Error handling command %r: %s", raw_request[:200], e, exc_info=True)
+            return {"ok": False, "error": str(e)}
+
+# --- SECOND-LAUNCH FORWARDING ---
+def launch_request(argv):
+    """Translate a launch's arguments into a request for the running instance.
+
+    Returns None for launches that must never be forwarded (the daily
+    startup check runs on its own).
+    """
+    startup_mode = _option_value(argv, '--startup-mode')
+    if argv[:1] == ['startup_check'] or startup_mode == 'startup_check_only':
+        return None
+    if _option_value(argv, '--add') is not None:
+        return {"command": "add", "title": _option_value(argv, '--add'), "at": _option_value(argv, '--at')}
+    if startup_mode in ('autostart_with_daily_check', 'minimized_only'):
+        return {"command": "ping"} # A repeated autostart has nothing to hand over
+    return {"command": "show"}
+
+def _option_value(argv, option):
+    for idx, arg in enumerate(argv):
+        if arg == option and idx + 1 < len(argv):
+            return argv[idx + 1]
+        if arg.startswith(option + '='):
+            return arg.split('=', 1)[1]
+    return None
+
+def forward_to_running_instance(app_dir, argv):
+    """Hand this launch to an already running instance.
+
+    Returns the exit code this process should exit with once the running
+    instance has handled the request, or None if this process should start
+    normally (nothing is running, or the launch is never forwarded).
+    """
+    request = launch_request(argv)
+    if request is None:
+        return None
+    response = send_command(channel_address(app_dir), request)
+    if response is None:
+        return None
+    if not response.get("ok"):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+        return 1
+    if request["command"] == "add":
+        print(response.get("result"))
+    return 0
@@ -0,0 +1,355 @@
+"""Occurrence projection: every firing of every reminder over a date range.
+
+The store only holds the next pending occurrence of each recurring series;
+project_agenda() expands them with the same stepping and end-condition rules
+the scheduler applies when an occurrence fires (step_recurrence_date and
+build_next_occurrence in reminder_core). Large inputs are split into chunks
+that are expanded on a ProcessPoolExecutor. Each chunk comes back sorted, and
+heapq.merge streams the chunks out in date order.
+"""
+import bisect
+import heapq
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from datetime import date, datetime, timedelta
+
+from reminder_core import step_recurrence_date
+
+# Occurrences are plain (date "YYYY-MM-DD", time "HH:MM", reminder id, title) tuples: a year of
+# 100k series is millions of them, and namedtuple construction would double the expansion time.
+# Chunks are ordered and merged on (date, time) only.
+DUE_ORDER = itemgetter(0, 1)
+
+PARALLEL_MIN_SERIES = 2000 # Below this, process start-up costs more than the expansion itself
+CHUNKS_PER_WORKER = 4 # Smaller chunks even out series of very different lengths
+
+def series_spec(reminder):
+    """The picklable fields needed to expand one pending reminder, or None if it won't fire."""
+    if reminder.get("notified_individually", False):
+        return None # Already fired; a recurring series continues in its own pending record
+    try:
+        first_date = datetime.strptime(reminder["date"], "%Y-%m-%d").date()
+    except (KeyError, TypeError, ValueError):
+        return None
+    end_type = reminder.get("recurrence_end_type", "never")
+    end_value = reminder.get("recurrence_end_value")
+    remaining, end_date = None, None
+    if reminder.get("recurrence_type") and end_type == "occurrences" and end_value is not None:
+        # A head with count c fires, then successors are created while the count is below the limit
+        remaining = max(0, int(end_value) - (reminder.get("recurrence_current_count") or 0))
+    elif reminder.get("recurrence_type") and end_type == "date" and end_value:
+        try:
+            end_date = datetime.strptime(end_value, "%Y-%m-%d").date()
+        except ValueError:
+            remaining = 0 # The scheduler ends a series with an unreadable end date after this occurrence
+    return (first_date.toordinal(), reminder.get("time") or "", reminder.get("id"), reminder.get("title", "N/A"),
+            reminder.get("recurrence_type"), remaining, end_date.toordinal() if end_date else None)
+
+FIXED_STEP_DAYS = {"daily": 1, "weekly": 7, "biweekly": 14} # Stepped on ordinals without building dates
+
+def series_ordinals(spec, start_ordinal, end_ordinal, today_ordinal):
+    """Date ordinals of one series spec's occurrences within [start, end], oldest first."""
+    first_ordinal, _, _, _, recurrence_type, remaining, end_date_ordinal = spec
+    ordinals = [first_ordinal] if start_ordinal <= first_ordinal <= end_ordinal else []
+    if recurrence_type:
+        # An overdue head fires now, and the scheduler steps on from today rather than from its date
+        current_ordinal = max(first_ordinal, today_ordinal)
+        last_ordinal = min(end_ordinal, end_date_ordinal) if end_date_ordinal is not None else end_ordinal
+        step_days = FIXED_STEP_DAYS.get(recurrence_type)
+        if step_days:
+            if remaining is not None:
+                last_ordinal = min(last_ordinal, current_ordinal + step_days * remaining)
+            first_step = current_ordinal + step_days
+            if first_step < start_ordinal:
+                first_step += -(-(start_ordinal - first_step) // step_days) * step_days
+            ordinals.extend(range(first_step, last_ordinal + 1, step_days))
+        else:
+            while remaining is None or remaining > 0:
+                if recurrence_type == "weekdays":
+                    current_ordinal += 1
+                    while (current_ordinal - 1) % 7 >= 5: # Ordinal 1 (0001-01-01) was a Monday
+                        current_ordinal += 1
+                else:
+                    next_date = step_recurrence_date(date.fromordinal(current_ordinal), recurrence_type)
+                    if next_date is None:
+                        break
+                    current_ordinal = next_date.toordinal()
+                if current_ordinal > last_ordinal:
+                    break
+                if remaining is not None:
+                    remaining -= 1
+                if current_ordinal >= start_ordinal:
+                    ordinals.append(current_ordinal)
+    return ordinals
+
+def expand_chunk(specs, start_ordinal, end_ordinal, today_ordinal):
+    """Expand a chunk of series specs into one list in due order (runs in a worker process).
+
+    Occurrences are bucketed by day, so only each day's (usually few distinct)
+    times need sorting.
+    """
+    by_day = {}
+    for spec in specs:
+        entry = (spec[1], spec[2], spec[3]) # time, reminder id, title
+        for ordinal in series_ordinals(spec, start_ordinal, end_ordinal, today_ordinal):
+            day_entries = by_day.get(ordinal)
+            if day_entries is None:
+                day_entries = by_day[ordinal] = []
+            day_entries.append(entry)
+    occurrences = []
+    for ordinal in sorted(by_day):
+        date_str = date.fromordinal(ordinal).strftime("%Y-%m-%d")
+        day_entries = by_day[ordinal]
+        day_entries.sort(key=itemgetter(0))
+        occurrences.extend([(date_str, time_str, reminder_id, title) for time_str, reminder_id, title in day_entries])
+    return occurrences
+
+def project_agenda(reminders, start_date, end_date, today=None, workers=None, executor=None):
+    """Yield (date, time, reminder id, title) for every firing of the pending reminders
+    within [start_date, end_date], in due order.
+
+    With `workers` > 1 (default: all CPUs) and enough series, chunks are expanded
+    on a ProcessPoolExecutor (or on `executor`, if given). workers=1 expands
+    everything in this process.
+    """
+    today = today or date.today()
+    specs = [spec for spec in map(series_spec, reminders) if spec]
+    bounds = (start_date.toordinal(), end_date.toordinal(), today.toordinal())
+    workers = workers or os.cpu_count() or 1
+    if executor is None and (workers <= 1 or len(specs) < PARALLEL_MIN_SERIES):
+        yield from expand_chunk(specs, *bounds)
+        return
+    chunk_count = max(1, min(len(specs), workers * CHUNKS_PER_WORKER))
+    chunk_size = -(-len(specs) // chunk_count)
+    chunks = [specs[i:i + chunk_size] for i in range(0, len(specs), chunk_size)]
+    own_executor = executor is None
+    # spawn rather than fork: the GUI process has several threads running (Tk, tray, scheduler)
+    executor = executor or ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [executor.submit(expand_chunk, chunk, *bounds) for chunk in chunks]
+        yield from heapq.merge(*(future.result() for future in futures), key=DUE_ORDER)
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def projected_agenda_query(reminders, days, start_date=None, workers=None):
+    """Like reminder_core.agenda_query, but with every projected occurrence of recurring series."""
+    start_date = start_date or date.today()
+    by_day = {}
+    end_date = start_date + timedelta(days=days - 1)
+    for date_str, time_str, reminder_id, title in project_agenda(reminders, start_date, end_date, workers=workers):
+        by_day.setdefault(date_str, []).append({"id": reminder_id, "title": title, "date": date_str, "time": time_str})
+    return [{"date": day, "reminders": day_reminders} for day, day_reminders in by_day.items()]
+
+# --- MONTH COUNT CACHE ---
+def month_bounds(year, month):
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return first, following - timedelta(days=1)
+
+class MonthCountCache:
+    """Per-day reminder counts for calendar months, projected recurrences included.
+
+    Each month is computed once from `load_reminders()` and then served from
+    memory, so paging through months never rescans the store. Mutations call
+    invalidate_for() with the reminders they touched, which drops only the
+    affected months: the reminder's own month, and every later month for a
+    recurring series.
+    """
+    def __init__(self, load_reminders):
+        self.load_reminders = load_reminders
+        self._months = {} # (year, month) -> {"YYYY-MM-DD": count}
+        self._computed_on = None # Projections step on from today, so a new day starts afresh
+        self._generation = 0 # Bumped by every invalidation; a month computed across one isn't cached
+        self._lock = threading.Lock()
+
+    def counts_for_month(self, year, month):
+        with self._lock:
+            if self._computed_on != date.today():
+                self._months.clear()
+                self._computed_on = date.today()
+            counts = self._months.get((year, month))
+            generation = self._generation
+        if counts is None:
+            counts = self._count_month(year, month)
+            with self._lock:
+                if generation == self._generation:
+                    self._months[(year, month)] = counts
+        return counts
+
+    def _count_month(self, year, month):
+        first, last = month_bounds(year, month)
+        first_str, last_str = first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")
+        reminders = self.load_reminders()
+        counts = {}
+        for reminder in reminders:
+            # Fired reminders stay on their day; pending ones are counted through the projection below
+            if reminder.get("notified_individually", False) and first_str <= reminder.get("date", "") <= last_str:
+                counts[reminder["date"]] = counts.get(reminder["date"], 0) + 1
+        for date_str, _, _, _ in project_agenda(reminders, first, last, workers=1):
+            counts[date_str] = counts.get(date_str, 0) + 1
+        return counts
+
+    def invalidate_for(self, reminders):
+        with self._lock:
+            self._generation += 1
+            for reminder in reminders:
+                try:
+                    touched = datetime.strptime(reminder.get("date", ""), "%Y-%m-%d")
+                except (TypeError, ValueError):
+                    continue
+                key = (touched.year, touched.month)
+                if reminder.get("recurrence_type"):
+                    for cached in [k for k in self._months if k >= key]:
+                        del self._months[cached]
+                else:
+                    self._months.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._months.clear()
+
+    def cached_months(self):
+        with self._lock:
+            return sorted(self._months)
+
+# --- SLOT INDEX ---
+SLOT_LOOKAHEAD_DAYS = 30 # Recurring series are projected this far ahead for conflict checks
+MINUTES_PER_DAY = 24 * 60
+
+def slot_minute(date_ordinal, time_str):
+    """Minutes since 0001-01-01 00:00 (wall clock) of a date ordinal and "HH:MM[:SS]", or None."""
+    try:
+        hours, minutes = int(time_str[0:2]), int(time_str[3:5])
+    except (TypeError, ValueError):
+        return None
+    if time_str[2:3] != ":" or not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return date_ordinal * MINUTES_PER_DAY + hours * 60 + minutes
+
+def slot_date_time(minute):
+    """("YYYY-MM-DD", "HH:MM") of a slot_minute()."""
+    day, minute_of_day = divmod(minute, MINUTES_PER_DAY)
+    return date.fromordinal(day).strftime("%Y-%m-%d"), f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+class SlotIndex:
+    """Pending occurrences bucketed by the minute they fire, for conflict checks and the busiest slots.
+
+    One-off reminders are indexed on their date; recurring series on every
+    occurrence from today through `lookahead_days` ahead. Entries are kept in
+    a sorted list, so the reminders at or around a minute are found by
+    bisection in O(log n), and a count per minute is kept alongside. Mutations
+    upsert or discard single reminders. `load`, if given, supplies the initial
+    (effective) reminders on the first lookup, and again on a new day, when
+    the projection window moves. Thread-safe.
+    """
+    def __init__(self, load=None, lookahead_days=SLOT_LOOKAHEAD_DAYS):
+        self.load = load
+        self.lookahead_days = lookahead_days
+        self._order = [] # Sorted (slot minute, reminder id, title)
+        self._entries = {} # reminder id -> [its (slot minute, reminder id, title)]
+        self._counts = {} # slot minute -> occurrences
+        self._built_on = None # The day the window starts; None until loaded
+        self._lock = threading.RLock()
+
+    def rebuild(self, reminders, today=None):
+        today = today or date.today()
+        with self._lock:
+            self._order, self._entries, self._counts = [], {}, {}
+            self._built_on = today
+            for reminder in reminders:
+                self._order.extend(self._add_locked(reminder))
+            self._order.sort()
+
+    def clear(self):
+        """Forget everything; the next lookup loads afresh."""
+        with self._lock:
+            self._order, self._entries, self._counts = [], {}, {}
+            self._built_on = None
+
+    def upsert(self, reminder):
+        with self._lock:
+            if self._built_on is None: return # The first lookup loads the current store
+            self._remove_locked(reminder.get("id"))
+            for entry in self._add_locked(reminder):
+                bisect.insort(self._order, entry)
+
+    def discard(self, reminder_id):
+        with self._lock:
+            self._remove_locked(reminder_id)
+
+    def _current_locked(self):
+        if self._built_on != date.today() and self.load is not None:
+            self.rebuild(self.load())
+
+    def at(self, date_str, time_str, window_minutes=0, exclude_id=None):
+        """[(date, time, reminder id, title)] of the occurrences within window_minutes of date_str time_str."""
+        try:
+            minute = slot_minute(datetime.strptime(date_str, "%Y-%m-%d").toordinal(), time_str)
+        except (TypeError, ValueError):
+            minute = None
+        if minute is None:
+            return []
+        with self._lock:
+            self._current_locked()
+            entries = self._range_locked(minute - window_minutes, minute + window_minutes)
+        return [slot_date_time(entry_minute) + (reminder_id, title)
+                for entry_minute, reminder_id, title in entries if reminder_id != exclude_id]
+
+    def busiest(self, limit=10, min_count=2):
+        """The `limit` minutes with the most occurrences (at least min_count), most first:
+        [{"date", "time", "count", "reminders": [{"id", "title"}]}]."""
+        with self._lock:
+            self._current_locked()
+            top = heapq.nsmallest(limit, ((-count, minute) for minute, count in self._counts.items() if count >= min_count))
+            report = []
+            for negative_count, minute in top:
+                date_str, time_str = slot_date_time(minute)
+                report.append({"date": date_str, "time": time_str, "count": -negative_count,
+                               "reminders": [{"id": reminder_id, "title": title}
+                                             for _, reminder_id, title in self._range_locked(minute, minute)]})
+        return report
+
+    def __len__(self):
+        with self._lock:
+            return len(self._order)
+
+    def _range_locked(self, first_minute, last_minute):
+        lo = bisect.bisect_left(self._order, (first_minute,))
+        hi = bisect.bisect_left(self._order, (last_minute + 1,))
+        return self._order[lo:hi]
+
+    def _add_locked(self, reminder):
+        """Count and record one reminder's occurrences. Returns the entries for the caller to put in _order."""
+        spec = series_spec(reminder)
+        if spec is None or not spec[2]:
+            return []
+        minute_of_day = slot_minute(0, spec[1])
+        if minute_of_day is None:
+            return []
+        today_ordinal = self._built_on.toordinal()
+        if spec[4]:
+            ordinals = series_ordinals(spec, today_ordinal, today_ordinal + self.lookahead_days - 1, today_ordinal)
+        else:
+            ordinals = [spec[0]] if spec[0] >= today_ordinal else []
+        entries = [(ordinal * MINUTES_PER_DAY + minute_of_day, spec[2], spec[3]) for ordinal in ordinals]
+        if entries:
+            self._entries[spec[2]] = entries
+            for minute, _, _ in entries:
+                self._counts[minute] = self._counts.get(minute, 0) + 1
+        return entries
+
+    def _remove_locked(self, reminder_id):
+        for entry in self._entries.pop(reminder_id, ()):
+            position = bisect.bisect_left(self._order, entry)
+            if position < len(self._order) and self._order[position] == entry:
+                del self._order[position]
+            remaining = self._counts[entry[0]] - 1
+            if remaining:
+                self._counts[entry[0]] = remaining
+            else:
+                del self._counts[entry[0]]
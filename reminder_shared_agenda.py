@@ -0,0 +1,250 @@
+"""Memory-mapped agenda snapshot shared with reader processes.
+
+The running app publishes the reminders dated in a rolling window (today and
+the next few days) to reminders.json.agenda, next to the store, in a fixed
+binary layout:
+
+    header   magic, layout version, record size, sequence number, record
+             count, capacity, window start and end dates, publish time, and the
+             (inode, mtime, size) of reminders.json and of its state log as of
+             the publish
+    records  `capacity` slots of RECORD: due epoch, flags (done, snoozed,
+             title truncated), date, time, recurrence type, id and UTF-8 title
+             (cut to TITLE_BYTES)
+
+The record count always fits the slots; the file only grows. Readers map the
+file and decode records straight from the mapping, without parsing JSON. The
+writer follows a seqlock: it makes the sequence number odd, rewrites the
+records and header, then makes it even again. A reader takes the sequence
+number before and after decoding and retries unless both are the same even
+number. A reader also checks the recorded store and state log keys against the
+files on disk. If either changed since the publish (for example, the
+command-line client edited the store while the app wasn't running), the
+snapshot is stale and the reader parses the store as before.
+
+    agenda = read_agenda("reminders.json")
+    if agenda is not None and agenda.usable_for(date.today()):
+        todays = agenda.day(date.today())
+
+Standard library only, like reminder_watch.
+"""
+import logging
+import mmap
+import os
+import struct
+import time
+from datetime import date, timedelta
+
+from reminder_core import APP_NAME, DEFAULT_AGENDA_DAYS, reminder_due_epoch, reminder_sort_key
+from reminder_state import scheduled_wall, state_file_path
+from reminder_watch import stat_key
+
+AGENDA_MAGIC = b"PRAGENDA"
+AGENDA_LAYOUT_VERSION = 1
+TITLE_BYTES = 96
+# magic, layout version, record size, sequence, count, capacity, window start, window end, published at,
+# store (inode, mtime ns, size), state log (inode, mtime ns, size)
+HEADER = struct.Struct("<8sHHQII10s10sqQqqQqq")
+SEQUENCE_OFFSET = 12 # Byte offset of the sequence number in HEADER
+# due epoch, flags, date, time, recurrence type, id, title length, title
+RECORD = struct.Struct(f"<qB10s8s10s36sH{TITLE_BYTES}s")
+FLAG_DONE = 1
+FLAG_SNOOZED = 2
+FLAG_TITLE_TRUNCATED = 4 # Readers that need the whole title fall back to the store
+MIN_CAPACITY = 256
+READ_ATTEMPTS = 100 # Seqlock retries before a reader gives up and parses the store
+
+logger = logging.getLogger(APP_NAME)
+
+def agenda_path(data_path):
+    return f"{data_path}.agenda"
+
+def _text(field):
+    return field.rstrip(b"\0").decode("utf-8", "replace")
+
+def _title_bytes(title):
+    """(UTF-8 title cut to TITLE_BYTES, whether it was cut)."""
+    encoded = str(title or "").encode("utf-8")
+    if len(encoded) <= TITLE_BYTES:
+        return encoded, False
+    return encoded[:TITLE_BYTES].decode("utf-8", "ignore").encode("utf-8"), True # Don't end in half a character
+
+def _key_fields(key):
+    return key if key else (0, 0, 0)
+
+def encode_record(reminder):
+    """One RECORD for an effective reminder (with the runtime state log applied)."""
+    title, truncated = _title_bytes(reminder.get("title"))
+    # A snoozed occurrence is shown at the snooze time but keeps the occurrence it was scheduled as
+    snoozed = reminder.get("occurrence") not in (None, scheduled_wall(reminder))
+    flags = ((FLAG_DONE if reminder.get("notified_individually") else 0) | (FLAG_SNOOZED if snoozed else 0)
+             | (FLAG_TITLE_TRUNCATED if truncated else 0))
+    return RECORD.pack(reminder_due_epoch(reminder) or 0, flags, str(reminder.get("date", "")).encode("ascii", "replace"),
+                       str(reminder.get("time", "")).encode("ascii", "replace"),
+                       str(reminder.get("recurrence_type") or "").encode("ascii", "replace"),
+                       str(reminder.get("id", "")).encode("utf-8")[:36], len(title), title)
+
+# --- WRITING ---
+class AgendaWriter:
+    """Publishes agenda windows into the mapped file. One writer per file (the running app)."""
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self.path = agenda_path(data_path)
+        self._file = None
+        self._map = None
+        self.sequence = 0
+
+    def _open(self, capacity):
+        size = HEADER.size + capacity * RECORD.size
+        if self._map is not None and len(self._map) >= size:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a+b") # Creates it without truncating a mapping readers may hold
+            self._file.seek(0)
+            existing = self._file.read(HEADER.size)
+            if len(existing) == HEADER.size and existing[:8] == AGENDA_MAGIC:
+                self.sequence = HEADER.unpack(existing)[3] & ~1 # Carry on from the last publish
+        current = os.fstat(self._file.fileno()).st_size
+        if current < size:
+            self._file.truncate(size) # Only ever grows, so existing reader mappings stay valid
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), max(size, current))
+
+    def publish(self, reminders, start_date=None, days=DEFAULT_AGENDA_DAYS, source_keys=None):
+        """Write the reminders dated in [start_date, start_date + days), in date and time order. Returns how many.
+
+        source_keys is the (store, state log) stat_key pair the reminders were read at; take it before reading
+        so that a write in between makes the snapshot stale rather than wrong.
+        """
+        start_date = start_date or date.today()
+        first, end = start_date.strftime("%Y-%m-%d"), (start_date + timedelta(days=days)).strftime("%Y-%m-%d")
+        if source_keys is None:
+            source_keys = (stat_key(self.data_path), stat_key(state_file_path(self.data_path)))
+        window = sorted((r for r in reminders if first <= r.get("date", "") < end), key=reminder_sort_key)
+        records = b"".join(encode_record(r) for r in window) # Encoded before the write section, to keep it short
+        capacity = max(MIN_CAPACITY, len(window))
+        if self._map is None or HEADER.size + capacity * RECORD.size > len(self._map):
+            capacity = max(capacity, len(window) * 2) # Room to grow without remapping every publish
+        self._open(capacity)
+        capacity = (len(self._map) - HEADER.size) // RECORD.size
+
+        self.sequence += 1 # Odd: readers retry until the write is done
+        struct.pack_into("<Q", self._map, SEQUENCE_OFFSET, self.sequence)
+        self._map[HEADER.size:HEADER.size + len(records)] = records
+        store_key, state_key = (_key_fields(key) for key in source_keys)
+        self.sequence += 1
+        HEADER.pack_into(self._map, 0, AGENDA_MAGIC, AGENDA_LAYOUT_VERSION, RECORD.size, self.sequence - 1, len(window),
+                         capacity, first.encode("ascii"), end.encode("ascii"), int(time.time()), *store_key, *state_key)
+        struct.pack_into("<Q", self._map, SEQUENCE_OFFSET, self.sequence) # Even: consistent again
+        return len(window)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+
+# --- READING ---
+class AgendaSnapshot:
+    """A consistent read of the shared agenda: summaries like reminder_summary(), plus due_epoch, snoozed
+    and title_truncated."""
+    def __init__(self, reminders, start_date, end_date, published_at):
+        self.reminders = reminders
+        self.start_date = start_date # "YYYY-MM-DD", first day covered
+        self.end_date = end_date # First day not covered
+        self.published_at = published_at
+
+    def usable_for(self, first_day, days=1):
+        """Whether the window covers these days and every title in them is whole."""
+        first, end = first_day.strftime("%Y-%m-%d"), (first_day + timedelta(days=days)).strftime("%Y-%m-%d")
+        return (self.start_date <= first and end <= self.end_date
+                and not any(first <= r["date"] < end and r["title_truncated"] for r in self.reminders))
+
+    def day(self, day):
+        day_str = day.strftime("%Y-%m-%d")
+        return [r for r in self.reminders if r["date"] == day_str]
+
+    def agenda(self, start_date, days):
+        """Pending reminders grouped by day, like reminder_core.agenda_query()."""
+        first, end = start_date.strftime("%Y-%m-%d"), (start_date + timedelta(days=days)).strftime("%Y-%m-%d")
+        by_day = {}
+        for reminder in self.reminders:
+            if first <= reminder["date"] < end and not reminder["notified_individually"]:
+                by_day.setdefault(reminder["date"], []).append(
+                    {key: reminder[key] for key in ("id", "title", "date", "time", "recurrence_type", "notified_individually")})
+        return [{"date": day, "reminders": day_reminders} for day, day_reminders in by_day.items()]
+
+class AgendaReader:
+    """Maps the agenda file read-only and takes consistent snapshots of it. Reusable across reads."""
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self.path = agenda_path(data_path)
+        self._file = None
+        self._map = None
+
+    def _remap(self):
+        self.close()
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            return False
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return True
+
+    def read(self, check_source=True):
+        """An AgendaSnapshot, or None if there is no usable, current snapshot."""
+        try:
+            if self._map is None and not self._remap():
+                return None
+            for _ in range(READ_ATTEMPTS):
+                snapshot = self._try_read(check_source)
+                if snapshot is not False:
+                    return snapshot
+                time.sleep(0) # A publish is in progress
+        except (OSError, ValueError, struct.error) as e:
+            logger.debug("Could not read the shared agenda %s: %s", self.path, e)
+        return None
+
+    def _try_read(self, check_source):
+        """The snapshot, None if unusable, or False to retry."""
+        before = struct.unpack_from("<Q", self._map, SEQUENCE_OFFSET)[0]
+        if before & 1:
+            return False
+        (magic, version, record_size, _, count, capacity, first, end, published_at,
+         *source) = HEADER.unpack_from(self._map, 0)
+        if magic != AGENDA_MAGIC or version != AGENDA_LAYOUT_VERSION or record_size != RECORD.size:
+            return None
+        if HEADER.size + capacity * RECORD.size > len(self._map):
+            return False if self._remap() else None # The writer grew the file
+        reminders = []
+        for offset in range(HEADER.size, HEADER.size + count * RECORD.size, RECORD.size):
+            due_epoch, flags, day, wall, recurrence, reminder_id, title_length, title = RECORD.unpack_from(self._map, offset)
+            reminders.append({"id": _text(reminder_id), "title": title[:title_length].decode("utf-8", "replace"),
+                              "date": _text(day), "time": _text(wall), "recurrence_type": _text(recurrence) or None,
+                              "notified_individually": bool(flags & FLAG_DONE), "snoozed": bool(flags & FLAG_SNOOZED),
+                              "title_truncated": bool(flags & FLAG_TITLE_TRUNCATED), "due_epoch": due_epoch})
+        if struct.unpack_from("<Q", self._map, SEQUENCE_OFFSET)[0] != before:
+            return False
+        if check_source and (tuple(source[:3]) != _key_fields(stat_key(self.data_path))
+                             or tuple(source[3:]) != _key_fields(stat_key(state_file_path(self.data_path)))):
+            return None # The store changed since this was published
+        return AgendaSnapshot(reminders, _text(first), _text(end), published_at)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+
+def read_agenda(data_path, check_source=True):
+    """One-shot read of the shared agenda next to data_path; None if missing, stale or unreadable."""
+    if not os.path.exists(agenda_path(data_path)):
+        return None
+    reader = AgendaReader(data_path)
+    try:
+        return reader.read(check_source)
+    finally:
+        reader.close()
@@ -0,0 +1,122 @@
+"""Fast-forward simulation of the scheduler on virtual time.
+
+    python reminder_simulation.py --reminders 100000 --days 365 [--store reminders.json]
+
+The app checks for due reminders once a second on the real clock, so a year of
+operation takes a year. SchedulerSimulation runs the same scheduling pieces
+(a NextDueIndex over the pending occurrences, the runtime state log and the
+recurrence rules of reminder_core) on a SimulatedClock that jumps straight to
+the next due time, and records every firing.
+
+Definitions and the state log are held in memory (reminder_state's
+MemoryRuntimeState: the same log replay, with no file or lock per firing), so
+a store given with --store is only read. At simulated midnights, as the app
+purges past reminders, the log is compacted once it has grown past
+DEFAULT_COMPACT_ENTRIES entries per reminder. Standard library only, like
+reminder_watch.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from reminder_core import (
+    APP_NAME, RECURRENCE_TYPES, NextDueIndex, SimulatedClock, new_reminder_record, read_reminders_file, to_epoch
+)
+from reminder_state import MemoryRuntimeState
+
+DEFAULT_SIMULATED_DAYS = 365
+DEFAULT_COMPACT_DAYS = 1 # Like the app's purge at midnight
+DEFAULT_COMPACT_ENTRIES = 4 # Log entries per reminder before a midnight compacts it
+
+class SchedulerSimulation:
+    """Runs reminders on a SimulatedClock. Firings are (fired at epoch, reminder id, title, occurrence) tuples.
+
+    `state` defaults to a MemoryRuntimeState; pass a reminder_state.RuntimeState to simulate the log on disk.
+    """
+    def __init__(self, reminders, clock, state=None, compact_days=DEFAULT_COMPACT_DAYS,
+                 compact_entries=DEFAULT_COMPACT_ENTRIES):
+        self.clock = clock
+        self.definitions = {r["id"]: r for r in reminders if r.get("id")}
+        self.state = state if state is not None else MemoryRuntimeState()
+        self.index = NextDueIndex()
+        self.index.rebuild(self.state.apply(list(self.definitions.values())))
+        self.compact_days = compact_days
+        self.compact_threshold = max(1, compact_entries * len(self.definitions))
+        self.firings = []
+        self.ticks = 0
+        self.compactions = 0
+
+    def tick(self):
+        """Fire everything due at the clock's time, as check_and_notify_due_reminders does. Returns how many fired."""
+        now_epoch = int(self.clock.time())
+        due = [self.definitions[reminder_id] for _, reminder_id in self.index.pop_due(now_epoch)
+               if reminder_id in self.definitions]
+        self.ticks += 1
+        fired = 0
+        for occurrence, current in self.state.advance_many(due, today=self.clock.today()):
+            if occurrence is not current:
+                self.firings.append((now_epoch, occurrence["id"], occurrence.get("title"), occurrence["occurrence"]))
+                fired += 1
+            self.index.upsert(current) # The series' next occurrence, if any
+        return fired
+
+    def compact(self):
+        self.state.compact(list(self.definitions.values()), self.clock.today())
+        self.compactions += 1
+
+    def run(self, until):
+        """Advance the clock to `until` (a datetime or epoch seconds), firing on the way. Returns the firings."""
+        until_epoch = to_epoch(until)
+        next_compact = self._next_midnight() if self.compact_days else None
+        while True:
+            head = self.index.peek(1)
+            next_due = head[0]["due_epoch"] if head else None
+            if next_compact is not None and next_compact <= until_epoch and (next_due is None or next_compact < next_due):
+                self.clock.set(max(self.clock.time(), next_compact))
+                if self.state.entry_count >= self.compact_threshold:
+                    self.compact()
+                next_compact = self._next_midnight(self.compact_days)
+                continue
+            if next_due is None or next_due > until_epoch:
+                break
+            self.clock.set(max(self.clock.time(), next_due))
+            self.tick()
+        self.clock.set(max(self.clock.time(), until_epoch))
+        return self.firings
+
+    def _next_midnight(self, days=1):
+        return to_epoch(datetime.combine(self.clock.today() + timedelta(days=days), datetime.min.time()))
+
+def synthetic_reminders(count, start, rng):
+    """`count` reminders spread over the 30 days from `start`, with every recurrence type."""
+    recurrence_types = list(RECURRENCE_TYPES.values())
+    return [new_reminder_record(f"Reminder {number}", (start + timedelta(days=rng.randrange(30))).strftime("%Y-%m-%d"),
+                                f"{rng.randrange(24):02d}:{rng.randrange(60):02d}", rng.choice(recurrence_types))
+            for number in range(count)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="reminder_simulation.py", description=f"{APP_NAME} fast-forward scheduler simulation")
+    parser.add_argument("--store", default=None, help="Simulate this reminders.json instead of generated reminders")
+    parser.add_argument("--reminders", type=int, default=10000, help="How many reminders to generate")
+    parser.add_argument("--days", type=int, default=DEFAULT_SIMULATED_DAYS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = date.today()
+    if args.store:
+        reminders, _ = read_reminders_file(args.store)
+    else:
+        reminders = synthetic_reminders(args.reminders, start, random.Random(args.seed))
+    started = time.perf_counter()
+    simulation = SchedulerSimulation(reminders, SimulatedClock(datetime.combine(start, datetime.min.time())))
+    firings = simulation.run(datetime.combine(start + timedelta(days=args.days), datetime.min.time()))
+    elapsed = time.perf_counter() - started
+    print(f"{len(reminders)} reminders over {args.days} simulated days: {len(firings)} firings in "
+          f"{simulation.ticks} ticks, {simulation.compactions} compactions, {elapsed:.1f} s "
+          f"({len(firings) / max(elapsed, 1e-9):,.0f} firings/s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Warm-start snapshot of the parsed and indexed store.
+
+Parsing, sorting, stamping and indexing reminders.json on every launch makes
+startup time grow with the store. A snapshot keeps the result next to it
+(reminders.json.snapshot) in a versioned binary layout:
+
+    header   magic, format version, marshal version, Python version, source
+             size, source mtime, source SHA-1, section count
+    table    one (name, offset, length) entry per section
+    sections marshal-encoded: "meta", "hot" (the hot window plus active series
+             heads), "cold" (everything else), "due" (next-due index entries,
+             with the runtime state log applied) and "known" (the file
+             watcher's per-record hashes)
+
+A launch reads the whole file in one read, checks it against the source's size
+and mtime (falling back to its hash when only the mtime differs) and the
+state log's inode, mtime and size (recorded in "meta"), and then
+decodes just the sections it needs, so showing the daily summary or restoring
+the index never touches the cold records. A stale snapshot is simply ignored
+and rebuilt by a SnapshotKeeper, normally in the background.
+
+marshal only encodes plain data, and its format is tied to the Python version,
+which the header records.
+"""
+import hashlib
+import json
+import logging
+import marshal
+import os
+import struct
+import sys
+import threading
+from datetime import date, timedelta
+
+from reminder_core import (
+    APP_NAME, HOT_WINDOW_PAST_DAYS, HOT_WINDOW_FUTURE_DAYS, NextDueIndex, is_active_series_head,
+    reminder_sort_key, replacing_file
+)
+from reminder_state import RuntimeState, state_file_path
+from reminder_watch import known_state_for, stat_key
+
+SNAPSHOT_MAGIC = b"PRSNAP\0\0"
+SNAPSHOT_FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sHHBBQq20sH")
+SECTION_ENTRY = struct.Struct("<8sQQ")
+SECTIONS = ("meta", "hot", "cold", "due", "known")
+HOT_MARGIN_DAYS = 7 # The hot section reaches this far past the window, so a snapshot serves a week of launches
+
+logger = logging.getLogger(APP_NAME)
+
+def snapshot_path(data_path):
+    return f"{data_path}.snapshot"
+
+def _sha1(data):
+    return hashlib.sha1(data).digest()
+
+def _encode_header(source_size, source_mtime_ns, source_sha1, section_count):
+    return HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, marshal.version,
+                       sys.version_info[0], sys.version_info[1], source_size, source_mtime_ns, source_sha1, section_count)
+
+# --- BUILDING ---
+def build_snapshot(data_path, today=None):
+    """Parse the store and write its snapshot. Returns the WarmStart it wrote.
+
+    The source is read once; its size, mtime and hash are taken from exactly the
+    bytes that were parsed, so a concurrent write only makes the snapshot stale.
+    """
+    today = today or date.today()
+    state = RuntimeState(state_file_path(data_path))
+    state_key = stat_key(state.path) # Before reading: a line appended meanwhile makes the snapshot stale
+    try:
+        with open(data_path, 'rb') as f:
+            source = f.read()
+            st = os.fstat(f.fileno())
+    except FileNotFoundError:
+        source, st = b"", None
+    reminders = json.loads(source) if source.strip() else []
+    if not isinstance(reminders, list):
+        raise ValueError(f"{data_path} does not contain a list of reminders.")
+    reminders.sort(key=reminder_sort_key)
+    first_str = (today - timedelta(days=HOT_WINDOW_PAST_DAYS)).strftime("%Y-%m-%d")
+    last_str = (today + timedelta(days=HOT_WINDOW_FUTURE_DAYS + HOT_MARGIN_DAYS)).strftime("%Y-%m-%d")
+    hot, cold = [], []
+    for reminder in reminders:
+        in_window = first_str <= str(reminder.get("date", "")) <= last_str
+        (hot if in_window or is_active_series_head(reminder) else cold).append(reminder)
+    index = NextDueIndex()
+    index.rebuild(state.apply(reminders))
+    meta = {"built_on": today.strftime("%Y-%m-%d"), "hot_first": first_str, "hot_last": last_str,
+            "records": len(reminders), "state_key": state_key,
+            "unstamped": sum(1 for r in reminders if r.get("due_wall") != f"{r.get('date')} {r.get('time')}"),
+            "oldest_date": str(reminders[0].get("date", "")) if reminders else None}
+    payloads = {"meta": meta, "hot": hot, "cold": cold, "due": index.entries(), "known": known_state_for(reminders)}
+    sections = [(name, marshal.dumps(payloads[name])) for name in SECTIONS]
+
+    source_key = (st.st_size, st.st_mtime_ns) if st else (0, 0)
+    header = _encode_header(source_key[0], source_key[1], _sha1(source), len(sections))
+    offset = HEADER.size + SECTION_ENTRY.size * len(sections)
+    table = b""
+    for name, payload in sections:
+        table += SECTION_ENTRY.pack(name.encode(), offset, len(payload))
+        offset += len(payload)
+    data = header + table + b"".join(payload for _, payload in sections)
+    path = snapshot_path(data_path)
+    with replacing_file(path, 'wb') as f:
+        f.write(data)
+    logger.debug("Wrote warm-start snapshot of %d reminder(s) (%d hot) to %s.", len(reminders), len(hot), path)
+    return WarmStart(data, (st.st_ino, st.st_mtime_ns, st.st_size) if st else None)
+
+# --- LOADING ---
+class WarmStart:
+    """A validated snapshot. Sections are decoded on first use."""
+    def __init__(self, buffer, source_stat_key):
+        self._buffer = memoryview(buffer)
+        self.source_stat_key = source_stat_key # (inode, mtime, size) as reminder_watch.stat_key reports it
+        count = HEADER.unpack_from(buffer, 0)[-1]
+        self._sections = {}
+        for position in range(count):
+            name, offset, length = SECTION_ENTRY.unpack_from(buffer, HEADER.size + position * SECTION_ENTRY.size)
+            self._sections[name.rstrip(b"\0").decode()] = (offset, length)
+        self._decoded = {}
+
+    def section(self, name):
+        if name not in self._decoded:
+            offset, length = self._sections[name]
+            self._decoded[name] = marshal.loads(self._buffer[offset:offset + length])
+        return self._decoded[name]
+
+    @property
+    def meta(self):
+        return self.section("meta")
+
+    @property
+    def state_key(self):
+        """stat_key() of the runtime state log the "due" section was built with."""
+        return self.meta["state_key"]
+
+    @property
+    def hot(self):
+        """Hot window reminders plus active series heads, in store order."""
+        return self.section("hot")
+
+    def all_reminders(self):
+        """Every reminder, in store order (decodes the cold section too)."""
+        return sorted(self.section("hot") + self.section("cold"), key=reminder_sort_key)
+
+    def todays_reminders(self, today=None, state=None):
+        """Hot reminders on today's date; with a reminder_state.RuntimeState, at their current occurrence."""
+        today_str = (today or date.today()).strftime("%Y-%m-%d")
+        return [r for r in (state.apply(self.hot) if state else self.hot) if r.get("date") == today_str]
+
+    def usable_on(self, today):
+        """The hot section covers the hot window of `today` (within HOT_MARGIN_DAYS of building)."""
+        built_on = date.fromisoformat(self.meta["built_on"])
+        return built_on <= today <= built_on + timedelta(days=HOT_MARGIN_DAYS)
+
+def load_warm_start(data_path, today=None):
+    """The store's snapshot if it is current for the source file, else None.
+
+    The snapshot is read with a single read. A matching size and mtime is
+    trusted; a matching size with a different mtime (a copy, a restore, a
+    touch) is confirmed by hashing the source.
+    """
+    try:
+        with open(snapshot_path(data_path), 'rb') as f:
+            buffer = f.read()
+    except OSError:
+        return None
+    try:
+        magic, version, marshal_version, py_major, py_minor, size, mtime_ns, source_sha1, _ = HEADER.unpack_from(buffer, 0)
+    except struct.error:
+        return None
+    if (magic, version, marshal_version, (py_major, py_minor)) != (SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION,
+                                                                  marshal.version, sys.version_info[:2]):
+        return None
+    source_key = stat_key(data_path)
+    if source_key is None or source_key[2] != size:
+        return None
+    if source_key[1] != mtime_ns:
+        try:
+            with open(data_path, 'rb') as f:
+                if _sha1(f.read()) != source_sha1:
+                    return None
+        except OSError:
+            return None
+    try:
+        warm = WarmStart(buffer, source_key)
+        if not warm.usable_on(today or date.today()) or warm.state_key != stat_key(state_file_path(data_path)):
+            return None
+        return warm
+    except (ValueError, EOFError, TypeError, KeyError, struct.error) as e:
+        logger.warning("Ignoring unreadable warm-start snapshot for %s: %s", data_path, e)
+        return None
+
+# --- KEEPING IT CURRENT ---
+class SnapshotKeeper:
+    """Rebuilds the snapshot when the store changed since it was last built or validated."""
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self.source_stat_key = None # Source state the snapshot on disk matches
+        self.state_key = None # And the state log's
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def note_current(self, warm_start):
+        self.source_stat_key, self.state_key = warm_start.source_stat_key, warm_start.state_key
+
+    def is_stale(self):
+        return (stat_key(self.data_path) != self.source_stat_key or self.source_stat_key is None
+                or stat_key(state_file_path(self.data_path)) != self.state_key)
+
+    def refresh_if_stale(self):
+        """Rebuild now if stale. Returns True if a snapshot was written."""
+        with self._lock:
+            if not self.is_stale():
+                return False
+            try:
+                warm = build_snapshot(self.data_path)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not build the warm-start snapshot for %s: %s", self.data_path, e)
+                return False
+            self.note_current(warm)
+            return True
+
+    def refresh_in_background(self, daemon=True):
+        """refresh_if_stale() on a helper thread. A non-daemon thread finishes even if the process is exiting."""
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self.refresh_if_stale, name="SnapshotRebuild", daemon=daemon)
+        self._thread.start()
+        return self._thread
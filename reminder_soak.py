@@ -0,0 +1,299 @@
+"""Soak test: weeks of scheduler and alert activity on a simulated clock.
+
+    python reminder_soak.py --days 28 [--reminders 150] [--seed 0] [--tk]
+
+The app is meant to sit in the tray for weeks. SoakRun drives the scheduler
+functions of remainder.py on a SimulatedClock against a scratch store:
+- check_and_notify_due_reminders, on the second each reminder is due;
+- delete_past_reminders at every midnight;
+- add_reminders, delete_reminders and snooze_reminders for a simulated user.
+The user adds and removes a few reminders every day and answers each alert
+within half an hour, snoozing some of them. Alerts go to StubNotificationCenter,
+which keeps the app's AlertQueue without creating widgets. With --tk (which
+needs a display) they go through the popup path into the real
+NotificationCenter on a hidden Tk root instead.
+
+After every simulated midnight it samples traced Python memory (tracemalloc),
+live Tk widgets, open file descriptors, threads, the store and state log size
+and the next-due index. After a warm-up, a metric whose peak in the second half
+of the run exceeds its peak in the first half by more than its tolerance is
+reported as unbounded growth, and the run fails.
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import sys
+import threading
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+if __name__ == "__main__" and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYSTRAY_BACKEND", "dummy") # Headless: there is no tray to draw
+
+import remainder
+from reminder_core import (
+    APP_NAME, RECURRENCE_TYPES, SNOOZE_OPTIONS, DuplicateIndex, HotWindowCache, NextDueIndex, SimulatedClock,
+    new_reminder_record, to_epoch
+)
+from reminder_projection import MonthCountCache, SlotIndex
+from reminder_simulation import synthetic_reminders
+from reminder_state import state_file_path
+from reminder_watch import StoreWatcher
+
+DEFAULT_SOAK_DAYS = 28
+DEFAULT_SOAK_REMINDERS = 150
+WARMUP_FRACTION = 0.25 # Samples ignored while caches and the state log fill up
+# metric -> (absolute, relative) growth allowed from the first half of the steady run to the second
+GROWTH_TOLERANCES = {
+    "traced_bytes": (256 * 1024, 0.05),
+    "widgets": (0, 0.0),
+    "open_files": (0, 0.0),
+    "threads": (0, 0.0),
+    "store_bytes": (8 * 1024, 0.25),
+    "index_entries": (10, 0.25),
+}
+SNOOZE_PROBABILITY = 0.3
+MAX_RESPONSE_MINUTES = 30
+ADDED_PER_DAY = 5 # One-off reminders the simulated user adds each day
+SERIES_SWAP_PROBABILITY = 0.3 # Chance per day that the user replaces one recurring reminder with a new one
+
+def scratch_store_globals(data_file):
+    """Fresh instances of remainder's module globals that are bound to a store, for one at data_file.
+
+    SoakRun swaps these in for the run and puts the app's own back afterwards, so nothing
+    built from the scratch store (keys, records, counts, state) outlives it.
+    """
+    return {
+        "DATA_FILE": data_file,
+        "runtime_state": None, # store_state() opens the scratch store's log
+        "duplicate_index": DuplicateIndex(lambda: remainder.load_reminders()),
+        "store_watcher": StoreWatcher(data_file),
+        "resident_store": HotWindowCache(data_file, on_refresh=remainder.record_resident_store_size),
+        "month_counts": MonthCountCache(lambda: remainder.load_effective_reminders(with_history=True)),
+        "next_due_index": NextDueIndex(),
+        "slot_index": SlotIndex(lambda: remainder.load_effective_reminders()),
+        "agenda_publisher": remainder.AgendaPublisher(), # Not started: the real shared agenda is left alone
+        "scheduler_clock": remainder.scheduler_clock,
+    }
+
+# --- NOTIFIERS ---
+class StubNotificationCenter:
+    """Stands in for NotificationCenter: the same alert queue and snooze calls, without widgets."""
+    def __init__(self):
+        self.alerts = remainder.AlertQueue()
+        self.fired = 0
+
+    def __call__(self, title, time_24h, reminder_id=None, due_at=None, occurrence=None):
+        self.alerts.add(title, time_24h, reminder_id, occurrence)
+        self.fired += 1
+
+    def pending_keys(self):
+        return [alert["key"] for alert in self.alerts.head(len(self.alerts))]
+
+    def dismiss(self, key):
+        self.alerts.remove(key)
+
+    def snooze(self, key, minutes):
+        if remainder.snooze_reminders([key], minutes, self.alerts.occurrences()):
+            self.alerts.remove(key)
+
+    def widget_count(self):
+        return None
+
+    def close(self):
+        pass
+
+class TkNotificationCenter:
+    """Alerts through show_individual_reminder_popup_thread_safe into the app's NotificationCenter."""
+    def __init__(self):
+        import tkinter as tk
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.previous_root = remainder.tk_root_window
+        remainder.tk_root_window = self.root
+        remainder.tk_events.attach(self.root)
+        self.fired = 0
+
+    def __call__(self, title, time_24h, reminder_id=None, due_at=None, occurrence=None):
+        remainder.show_individual_reminder_popup_thread_safe(title, time_24h, reminder_id, due_at, occurrence)
+        remainder.tk_events.pump() # We are the Tk thread; run the posted event now
+        self.root.update()
+        self.fired += 1
+
+    def pending_keys(self):
+        center = remainder.notification_center
+        return [alert["key"] for alert in center.alerts.head(len(center.alerts))] if center else []
+
+    def dismiss(self, key):
+        center = remainder.notification_center
+        center.alerts.remove(key)
+        center.render()
+        self.root.update()
+
+    def snooze(self, key, minutes):
+        center = remainder.notification_center
+        if remainder.snooze_reminders([key], minutes, center.alerts.occurrences()):
+            center.alerts.remove(key)
+            center.render()
+        self.root.update()
+
+    def widget_count(self):
+        count, pending = 0, [self.root]
+        while pending:
+            children = pending.pop().winfo_children()
+            count += len(children)
+            pending.extend(children)
+        return count
+
+    def close(self):
+        remainder.tk_events.detach()
+        remainder.notification_center = None
+        remainder.tk_root_window = self.previous_root
+        self.root.destroy()
+
+# --- GROWTH CHECK ---
+def growth_failures(samples, tolerances=GROWTH_TOLERANCES, warmup_fraction=WARMUP_FRACTION):
+    """Metrics that kept growing after the warm-up, as human-readable lines."""
+    steady = samples[int(len(samples) * warmup_fraction):]
+    failures = []
+    for metric, (absolute, relative) in tolerances.items():
+        values = [sample[metric] for sample in steady if sample.get(metric) is not None]
+        if len(values) < 4:
+            continue
+        half = len(values) // 2
+        first_peak, second_peak = max(values[:half]), max(values[half:])
+        allowed = max(absolute, relative * first_peak)
+        if second_peak - first_peak > allowed:
+            failures.append(f"{metric} grew from {first_peak} to {second_peak} (allowed +{allowed:.0f})")
+    return failures
+
+class SoakReport:
+    def __init__(self, days, samples, fired):
+        self.days = days
+        self.samples = samples
+        self.fired = fired
+        self.failures = growth_failures(samples)
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def __str__(self):
+        columns = ["day"] + list(GROWTH_TOLERANCES)
+        lines = [f"Soak over {self.days} simulated days: {self.fired} alerts.",
+                 "  ".join(f"{column:>13}" for column in columns)]
+        for sample in self.samples:
+            lines.append("  ".join(f"{'-' if sample.get(c) is None else sample[c]:>13}" for c in columns))
+        lines += [f"FAIL: {failure}" for failure in self.failures] or ["No unbounded growth."]
+        return "\n".join(lines)
+
+# --- RUN ---
+class SoakRun:
+    def __init__(self, days=DEFAULT_SOAK_DAYS, reminder_count=DEFAULT_SOAK_REMINDERS, seed=0, notifier=None):
+        self.days = days
+        self.reminder_count = reminder_count
+        self.rng = random.Random(seed)
+        self.notifier = notifier or StubNotificationCenter()
+        self.samples = []
+
+    def run(self):
+        """Run the soak in a scratch directory. Returns a SoakReport."""
+        saved_level = remainder.logger.level
+        saved = {}
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            with tempfile.TemporaryDirectory() as work_dir:
+                scratch = scratch_store_globals(os.path.join(work_dir, "reminders.json"))
+                saved = {name: getattr(remainder, name) for name in scratch}
+                for name, value in scratch.items():
+                    setattr(remainder, name, value)
+                remainder.logger.setLevel(logging.WARNING) # A firing logs a line; weeks of them would flood app.log
+                self._simulate()
+        finally:
+            for name, value in saved.items():
+                setattr(remainder, name, value)
+            remainder.logger.setLevel(saved_level)
+            self.notifier.close()
+            if started_tracing:
+                tracemalloc.stop()
+        return SoakReport(self.days, self.samples, self.notifier.fired)
+
+    def _simulate(self):
+        start = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        clock = remainder.scheduler_clock = SimulatedClock(start)
+        remainder.save_reminders(synthetic_reminders(self.reminder_count, start.date(), self.rng))
+        remainder.next_due_index.rebuild(remainder.load_effective_reminders())
+        end_epoch = to_epoch(start + timedelta(days=self.days))
+        next_midnight = to_epoch(start + timedelta(days=1))
+        responses = {} # alert key -> epoch at which the simulated user answers it
+        while True:
+            head = remainder.next_due_index.peek(1)
+            due_epoch = head[0]["due_epoch"] if head else None
+            moments = [m for m in (due_epoch, min(responses.values(), default=None), next_midnight) if m is not None]
+            if min(moments) >= end_epoch:
+                break
+            clock.set(max(clock.time(), min(moments)))
+            now_epoch = int(clock.time())
+            if due_epoch is not None and due_epoch <= now_epoch:
+                remainder.run_if_next_due(clock, self.notifier)
+                for key in self.notifier.pending_keys():
+                    responses.setdefault(key, now_epoch + self.rng.randint(1, MAX_RESPONSE_MINUTES) * 60)
+            for key, answer_epoch in list(responses.items()):
+                if answer_epoch <= now_epoch:
+                    del responses[key]
+                    if self.rng.random() < SNOOZE_PROBABILITY:
+                        self.notifier.snooze(key, self.rng.choice(list(SNOOZE_OPTIONS.values())))
+                    else:
+                        self.notifier.dismiss(key)
+            if next_midnight <= now_epoch:
+                remainder.delete_past_reminders(clock)
+                self._user_edits(clock.now())
+                self._sample(len(self.samples) + 1)
+                next_midnight = to_epoch(datetime.fromtimestamp(next_midnight) + timedelta(days=1))
+
+    def _user_edits(self, now):
+        """A day's worth of additions and removals, so the store turns over instead of only shrinking."""
+        added = [new_reminder_record(f"Errand {now:%m%d}-{n}", (now + timedelta(days=self.rng.randint(0, 6))).strftime("%Y-%m-%d"),
+                                     f"{self.rng.randint(7, 21):02d}:{self.rng.choice(['00', '15', '30', '45'])}")
+                 for n in range(ADDED_PER_DAY)]
+        if self.rng.random() < SERIES_SWAP_PROBABILITY:
+            series = [r for r in remainder.load_reminders() if r.get("recurrence_type")]
+            if series:
+                remainder.delete_reminders([self.rng.choice(series)["id"]])
+                added.append(new_reminder_record(f"Series {now:%m%d}", now.strftime("%Y-%m-%d"), "08:00",
+                                                 self.rng.choice([t for t in RECURRENCE_TYPES.values() if t])))
+        remainder.add_reminders(added)
+
+    def _sample(self, day):
+        gc.collect()
+        sizes = [os.path.getsize(path) for path in (remainder.DATA_FILE, state_file_path(remainder.DATA_FILE))
+                 if os.path.exists(path)]
+        self.samples.append({
+            "day": day,
+            "traced_bytes": tracemalloc.get_traced_memory()[0],
+            "widgets": self.notifier.widget_count(),
+            "open_files": len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None,
+            "threads": threading.active_count(),
+            "store_bytes": sum(sizes),
+            "index_entries": len(remainder.next_due_index),
+        })
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="reminder_soak.py", description=f"{APP_NAME} soak test on a simulated clock")
+    parser.add_argument("--days", type=int, default=DEFAULT_SOAK_DAYS)
+    parser.add_argument("--reminders", type=int, default=DEFAULT_SOAK_REMINDERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tk", action="store_true", help="Show alerts in the real notification window (needs a display)")
+    args = parser.parse_args(argv)
+    notifier = TkNotificationCenter() if args.tk else None
+    report = SoakRun(args.days, args.reminders, args.seed, notifier).run()
+    print(report)
+    return 0 if report.ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
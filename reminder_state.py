@@ -0,0 +1,337 @@
+"""Runtime state of reminder occurrences, kept apart from the reminder definitions.
+
+reminders.json holds what the user wrote: title, date and time, recurrence
+rule. What happens to each occurrence at run time (it fired, it was
+dismissed, it was snoozed until some moment) goes to a small append-only log
+next to it, reminders.state.jsonl, one short JSON line per event:
+
+    {"id": "...", "occ": "2024-03-20 09:00", "op": "fired", "base": "2024-03-01 09:00", "next": "2024-03-21", "count": null}
+    {"id": "...", "occ": "2024-03-21 09:00", "op": "snoozed", "until": 1711011000}
+    {"id": "...", "occ": "2024-03-21 09:00", "op": "fired", "at": "2024-03-21 09:10"}
+
+"occ" is the occurrence's scheduled wall time, so state recorded for a time the
+reminder no longer has (it was edited since) simply stops applying. Fired and
+dismissed entries of a recurring series also move the series cursor: the date
+of its next occurrence ("next", null once the series has ended) and its
+occurrence count, valid while the definition still starts at "base". A snoozed
+occurrence that fired records when ("at"), and is shown done at that time. A firing
+or a snooze therefore appends about a hundred bytes instead of rewriting the
+store, and the definitions only change when the user edits them.
+
+RuntimeState.apply() merges the two into the records the scheduler, the views
+and the clients work with; compact() rewrites the log with just the entries
+that still matter. MemoryRuntimeState keeps the same state with no file
+behind it, for simulations. Standard library only, like reminder_watch.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+from reminder_core import (
+    APP_NAME, StoreLock, build_next_occurrence, local_zone_name, reminder_due_epoch, reminders_in_range, stamp_due,
+    replacing_file
+)
+
+DONE_OPS = ("fired", "dismissed")
+STATE_OPS = DONE_OPS + ("snoozed",)
+CURSOR_FIELDS = ("base", "next", "count") # Set on fired/dismissed entries of a series head
+RUNTIME_FIELDS = ("occurrence",) # Added to records by apply(); never written to the store
+
+logger = logging.getLogger(APP_NAME)
+
+def state_file_path(data_path):
+    """reminders.json -> reminders.state.jsonl"""
+    root, _ = os.path.splitext(data_path)
+    return f"{root}.state.jsonl"
+
+def scheduled_wall(reminder):
+    return f"{reminder.get('date')} {reminder.get('time')}"
+
+def definition_of(reminder):
+    """A record from apply() as a plain reminder to store (its current occurrence becomes its date and time)."""
+    return {key: value for key, value in reminder.items() if key not in RUNTIME_FIELDS}
+
+def effective_in_range(reader, state, start_date=None, end_date=None):
+    """reader.in_range() (a reminder_core.StoreReadCache) with the runtime state applied.
+
+    Reminders with state are placed at their current occurrence, which may fall in
+    the range while their stored date doesn't; those are looked up in the reader's
+    resident records.
+    """
+    records = reader.in_range(start_date, end_date)
+    with_state = state.ids()
+    if with_state:
+        seen = {r.get("id") for r in records}
+        records = records + [r for r in reader.snapshot()[0] if r.get("id") in with_state and r.get("id") not in seen]
+    return reminders_in_range(state.apply(records), start_date, end_date)
+
+class RuntimeState:
+    """The state log of one store, replayed into memory and kept current by reading only what was appended.
+
+    Thread-safe. Several processes may append to the same log; each picks up the
+    others' lines on its next refresh().
+    """
+    def __init__(self, path):
+        self.path = path
+        self._by_id = {} # reminder id -> {"cursor": entry or None, "occurrences": {occ: entry}, "snoozed": {occ: until}}
+        self._read_key = None # (inode, bytes applied so far)
+        self.entry_count = 0 # Lines applied since the log was last rewritten
+        self._lock = threading.RLock()
+
+    # --- READING ---
+    def refresh(self):
+        """Apply lines appended since the last read; re-read everything if the log was replaced."""
+        with self._lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    inode, offset = self._read_key or (None, 0)
+                    if st.st_ino != inode or st.st_size < offset:
+                        self._by_id, self.entry_count, offset = {}, 0, 0
+                    if st.st_size == offset:
+                        self._read_key = (st.st_ino, offset)
+                        return
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                self._by_id, self.entry_count, self._read_key = {}, 0, None
+                return
+            complete = data.rfind(b"\n") + 1 # A line still being appended is read next time
+            for line in data[:complete].splitlines():
+                try:
+                    self._apply_entry(json.loads(line))
+                except (ValueError, AttributeError, TypeError):
+                    logger.debug("Skipping unreadable line in %s: %r", self.path, line[:80])
+            self._read_key = (st.st_ino, offset + complete)
+
+    def _apply_entry(self, entry):
+        reminder_id, op, occurrence = entry.get("id"), entry.get("op"), entry.get("occ")
+        if op == "clear":
+            self._by_id.pop(reminder_id, None)
+        elif op in STATE_OPS and occurrence:
+            state = self._by_id.setdefault(reminder_id, {"cursor": None, "occurrences": {}, "snoozed": {}})
+            state["occurrences"][occurrence] = entry
+            if op == "snoozed":
+                state["snoozed"][occurrence] = int(entry["until"])
+            else:
+                state["snoozed"].pop(occurrence, None)
+                if "next" in entry:
+                    state["cursor"] = entry
+        else:
+            return
+        self.entry_count += 1
+
+    # --- MERGING ---
+    def _resolve(self, reminder):
+        """(record for the occurrence to show, scheduled wall time of the series head)."""
+        effective = dict(reminder)
+        state = self._by_id.get(reminder.get("id"))
+        head = scheduled_wall(reminder)
+        effective["occurrence"] = head
+        if state is None:
+            return effective, head
+        baked = reminder.get("notified_individually", False) # Fired before this log existed, or saved as done
+        cursor = state["cursor"]
+        if cursor and not baked and cursor.get("base") == head:
+            effective["recurrence_current_count"] = cursor.get("count")
+            if cursor.get("next") is None:
+                effective["date"] = cursor["occ"].split(" ", 1)[0] # The series ended with this occurrence
+            else:
+                effective["date"] = cursor["next"]
+            head = effective["occurrence"] = scheduled_wall(effective)
+        head_entry = state["occurrences"].get(head)
+        head_done = baked or bool(head_entry and head_entry["op"] in DONE_OPS)
+        # A snoozed occurrence: the head itself, or (for a series) one that fired before the head
+        snoozed = [(until, occurrence) for occurrence, until in state["snoozed"].items()
+                   if occurrence == head or (reminder.get("recurrence_type") and occurrence < head)]
+        if snoozed:
+            until, occurrence = min(snoozed)
+            head_epoch = None if head_done or occurrence == head else reminder_due_epoch(effective)
+            if head_epoch is None or until < head_epoch:
+                moment = datetime.fromtimestamp(until)
+                effective.update(date=moment.strftime("%Y-%m-%d"), time=moment.strftime("%H:%M:%S" if moment.second else "%H:%M"),
+                                 notified_individually=False, occurrence=occurrence, due_tz=local_zone_name(),
+                                 due_epoch=until)
+                effective["due_wall"] = scheduled_wall(effective)
+                return effective, head
+        if head_done:
+            effective["notified_individually"] = True
+            if not baked and "at" in head_entry:
+                # Fired or dismissed while snoozed: it stays where it went off, not at its past scheduled time
+                effective["date"], effective["time"] = head_entry["at"].split(" ", 1)
+                effective["due_tz"] = local_zone_name()
+        return stamp_due(effective), head
+
+    def effective(self, reminder):
+        """The reminder as its runtime state has it now: a new dict with the current occurrence's
+        date, time, count and notified flag, plus "occurrence" (its scheduled wall time)."""
+        with self._lock:
+            return self._resolve(reminder)[0]
+
+    def apply(self, reminders, with_history=False):
+        """effective() for a list of stored reminders, after picking up new log lines.
+
+        with_history=True also yields an extra done record for every logged firing of
+        a series other than the one shown, so per-day counts keep earlier occurrences.
+        """
+        with self._lock:
+            self.refresh()
+            merged = []
+            for reminder in reminders:
+                effective = self._resolve(reminder)[0]
+                merged.append(effective)
+                state = self._by_id.get(reminder.get("id")) if with_history else None
+                if state and reminder.get("recurrence_type"):
+                    for occurrence, entry in state["occurrences"].items():
+                        if entry["op"] in DONE_OPS and occurrence != effective["occurrence"] and occurrence not in state["snoozed"]:
+                            date_str, time_str = entry.get("at", occurrence).split(" ", 1)
+                            merged.append(dict(effective, date=date_str, time=time_str, occurrence=occurrence,
+                                               notified_individually=True))
+            return merged
+
+    def ids(self):
+        with self._lock:
+            self.refresh()
+            return set(self._by_id)
+
+    # --- WRITING ---
+    def _append(self, *entries):
+        data = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries).encode('utf-8')
+        with self._log_lock():
+            with open(self.path, 'ab') as f:
+                st = os.fstat(f.fileno())
+                in_sync = self._read_key == (st.st_ino, st.st_size)
+                f.write(data)
+        if in_sync:
+            # Nobody else appended since our last read: apply our own lines without reading them back
+            for entry in entries:
+                self._apply_entry(entry)
+            self._read_key = (st.st_ino, st.st_size + len(data))
+        else:
+            self.refresh()
+        return len(data)
+
+    def advance(self, reminder, op="fired", today=None):
+        """Record that the occurrence shown for `reminder` fired (op="fired") or was skipped ("dismissed").
+
+        A recurring series moves on to its next occurrence, computed from the
+        occurrence's scheduled date even if it was snoozed. Returns (the occurrence
+        as it was, the reminder as it is now); both are the same done record if
+        nothing was pending. `today` is passed on to build_next_occurrence.
+        """
+        return self.advance_many([reminder], op, today)[0]
+
+    def advance_many(self, reminders, op="fired", today=None):
+        """advance() for several different reminders, written to the log in one append."""
+        with self._lock:
+            self.refresh()
+            entries, seen = [], set()
+            for reminder in reminders:
+                current, head = self._resolve(reminder)
+                if current.get("notified_individually", False) or reminder.get("id") in seen:
+                    continue
+                seen.add(reminder.get("id"))
+                entry = {"id": reminder.get("id"), "occ": current["occurrence"], "op": op}
+                if scheduled_wall(current) != current["occurrence"]:
+                    entry["at"] = scheduled_wall(current) # It was snoozed
+                if reminder.get("recurrence_type") is not None and current["occurrence"] == head:
+                    date_str, time_str = head.split(" ", 1)
+                    scheduled = dict(current, date=date_str, time=time_str)
+                    next_occurrence = build_next_occurrence(scheduled, today) # Also counts this occurrence
+                    entry.update(base=scheduled_wall(reminder), next=next_occurrence["date"] if next_occurrence else None,
+                                 count=scheduled.get("recurrence_current_count"))
+                entries.append((current, entry))
+            if entries:
+                self._append(*(entry for _, entry in entries))
+            occurrences = {entry["id"]: current for current, entry in entries}
+            results = []
+            for reminder in reminders:
+                current = self._resolve(reminder)[0]
+                results.append((occurrences.get(reminder.get("id"), current), current))
+            return results
+
+    def snooze(self, reminder, until_epoch, occurrence=None):
+        """Re-arm an occurrence (default: the one shown) at until_epoch. Returns the reminder as it is now."""
+        with self._lock:
+            self.refresh()
+            occurrence = occurrence or self._resolve(reminder)[0]["occurrence"]
+            self._append({"id": reminder.get("id"), "occ": occurrence, "op": "snoozed", "until": int(until_epoch)})
+            return self._resolve(reminder)[0]
+
+    def clear(self, reminder_ids):
+        """Forget all state of these reminders (they were edited or deleted)."""
+        with self._lock:
+            self.refresh()
+            for reminder_id in reminder_ids:
+                if reminder_id in self._by_id:
+                    self._append({"id": reminder_id, "op": "clear"})
+
+    def compact(self, reminders, today=None):
+        """Rewrite the log with only the entries that still affect `reminders` (the whole store).
+
+        Kept: each series cursor, the state of each shown occurrence, pending
+        snoozes and today's or later done occurrences. Returns how many entries
+        were dropped.
+        """
+        today_str = (today or date.today()).strftime("%Y-%m-%d")
+        with self._lock, self._log_lock():
+            self.refresh()
+            kept = []
+            for reminder in reminders:
+                state = self._by_id.get(reminder.get("id"))
+                if state is None:
+                    continue
+                shown, head = self._resolve(reminder)
+                if state["cursor"]:
+                    kept.append(state["cursor"]) # Replayed first; a later entry for the same occurrence overrides it
+                for occurrence, entry in state["occurrences"].items():
+                    if entry is not state["cursor"] and (occurrence in (shown["occurrence"], head)
+                            or occurrence in state["snoozed"] or occurrence[:10] >= today_str):
+                        # Only the cursor entry may move the series when replayed
+                        kept.append({key: value for key, value in entry.items() if key not in CURSOR_FIELDS})
+            dropped = self.entry_count - len(kept)
+            if dropped <= 0:
+                return 0
+            self._rewrite(kept)
+            logger.debug("Compacted %s: kept %d state entries, dropped %d.", self.path, len(kept), dropped)
+            return dropped
+
+    def _log_lock(self):
+        return StoreLock(self.path)
+
+    def _rewrite(self, kept):
+        """Replace the log with `kept` (called under _log_lock)."""
+        with replacing_file(self.path, 'wb') as f:
+            f.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in kept).encode('utf-8'))
+            f.flush()
+            st = os.fstat(f.fileno())
+        # Replay what was written rather than reading it back
+        self._replay(kept)
+        self._read_key = (st.st_ino, st.st_size)
+
+    def _replay(self, entries):
+        self._by_id, self.entry_count = {}, 0
+        for entry in entries:
+            self._apply_entry(entry)
+
+class MemoryRuntimeState(RuntimeState):
+    """A RuntimeState with no log file, for simulations: entries are applied as they are
+    recorded, with no file or lock, and compact() only drops them from memory."""
+    def __init__(self):
+        super().__init__(None)
+
+    def refresh(self):
+        pass # Nothing else can append
+
+    def _append(self, *entries):
+        for entry in entries:
+            self._apply_entry(entry)
+
+    def _log_lock(self):
+        return contextlib.nullcontext()
+
+    def _rewrite(self, kept):
+        self._replay(kept)
@@ -0,0 +1,202 @@
+"""Detect edits to reminders.json made by other processes and report them per record.
+
+A FileWatcher notices that the file changed: inotify on Linux, or polling
+its inode, mtime and size everywhere else. A StoreWatcher then re-reads the
+file and compares a content hash per reminder id with the last known state,
+so the app only has to apply the records that actually changed. The app
+reports its own saves through adopt(); those never show up as external
+changes.
+
+Standard library only, like reminder_ipc.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+from reminder_core import APP_NAME, read_reminders_file, reminder_summary
+
+POLL_INTERVAL_SECONDS = 2.0
+DEBOUNCE_SECONDS = 0.2 # Editors and sync clients often write a file in several steps
+
+# inotify(7) flags
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+INOTIFY_EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, name length
+
+logger = logging.getLogger(APP_NAME)
+
+def record_hash(reminder):
+    """Stable content hash of one reminder (key order doesn't matter)."""
+    return hashlib.sha1(json.dumps(reminder, sort_keys=True).encode("utf-8")).hexdigest()
+
+def known_state_for(reminders):
+    """id -> (content hash, reminder_summary) for a list of reminders, as a StoreWatcher keeps it."""
+    return {r["id"]: (record_hash(r), reminder_summary(r)) for r in reminders if r.get("id")}
+
+class StoreDiff:
+    """Records added, changed and removed since the last known state of the store."""
+    def __init__(self, added, changed, removed):
+        self.added = added # [reminder]
+        self.changed = changed # [(previous summary, current reminder)]
+        self.removed = removed # [previous summary]
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self):
+        return f"StoreDiff(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})"
+
+def stat_key(path):
+    """(inode, mtime, size) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+class StoreWatcher:
+    """Keeps id -> (hash, summary) for the store and turns a re-read into a StoreDiff.
+
+    Only reminder_summary() fields of the previous state are kept, so the watcher
+    doesn't hold a second copy of the whole store; the previous records in a
+    StoreDiff are those summaries.
+    """
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self._known = {}
+        self._stat_key = None
+        self._lock = threading.Lock()
+
+    def adopt(self, reminders, key=None):
+        """Record `reminders` as the store's contents (this process just saved or loaded them).
+
+        Returns what changed since the last known state.
+        """
+        key = key if key is not None else stat_key(self.data_path)
+        current = {r["id"]: (record_hash(r), r) for r in reminders if r.get("id")}
+        with self._lock:
+            known = self._known_locked()
+            self._known = {reminder_id: (h, reminder_summary(r)) for reminder_id, (h, r) in current.items()}
+            self._stat_key = key
+        added = [r for reminder_id, (_, r) in current.items() if reminder_id not in known]
+        changed = [(known[reminder_id][1], r) for reminder_id, (h, r) in current.items()
+                   if reminder_id in known and known[reminder_id][0] != h]
+        removed = [summary for reminder_id, (_, summary) in known.items() if reminder_id not in current]
+        return StoreDiff(added, changed, removed)
+
+    def restore(self, known, key):
+        """Adopt a known state saved earlier (see known_state_for) instead of hashing every record.
+
+        `known` may be a callable returning it, to defer decoding until the first diff.
+        """
+        with self._lock:
+            self._known, self._stat_key = known, key
+
+    def _known_locked(self):
+        if callable(self._known):
+            self._known = dict(self._known())
+        return self._known
+
+    def changed_on_disk(self):
+        """True if the file was written since it was last adopted (cheap: one stat)."""
+        with self._lock:
+            return stat_key(self.data_path) != self._stat_key
+
+    def check(self):
+        """Re-read the file and return what changed since it was last adopted."""
+        key = stat_key(self.data_path) # Before reading: a write racing the read shows up next time
+        reminders, _ = read_reminders_file(self.data_path)
+        return self.adopt(reminders, key)
+
+# --- CHANGE NOTIFICATION ---
+class FileWatcher:
+    """Calls on_change() from a background thread whenever the watched file may have changed."""
+    def __init__(self, file_path, on_change, poll_interval=POLL_INTERVAL_SECONDS, use_inotify=True):
+        self.file_path = os.path.abspath(file_path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        inotify_fd = self._open_inotify() if self.use_inotify else None
+        self.backend = "inotify" if inotify_fd is not None else "polling"
+        target = (lambda: self._watch_inotify(inotify_fd)) if inotify_fd is not None else self._watch_polling
+        self._thread = threading.Thread(target=target, name="FileWatcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s for external changes (%s).", self.file_path, self.backend)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            logger.error("Error handling a change to %s: %s", self.file_path, e, exc_info=True)
+
+    def _watch_polling(self):
+        last_key = stat_key(self.file_path)
+        while not self._stop.wait(self.poll_interval):
+            key = stat_key(self.file_path)
+            if key != last_key:
+                last_key = key
+                self._notify()
+
+    def _open_inotify(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd < 0:
+                return None
+            # Watch the directory: saves replace the file, which would orphan a watch on the file itself
+            mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+            if libc.inotify_add_watch(fd, os.path.dirname(self.file_path).encode(), mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError) as e:
+            logger.debug("inotify unavailable, falling back to polling: %s", e)
+            return None
+
+    def _watch_inotify(self, fd):
+        file_name = os.path.basename(self.file_path).encode()
+        try:
+            while not self._stop.is_set():
+                if not self._read_inotify_batch(fd, file_name, timeout=1.0):
+                    continue
+                # Let a burst of writes settle, then report once
+                while self._read_inotify_batch(fd, file_name, timeout=DEBOUNCE_SECONDS, match_any=True):
+                    pass
+                self._notify()
+        finally:
+            os.close(fd)
+
+    def _read_inotify_batch(self, fd, file_name, timeout, match_any=False):
+        """Read pending events; True if any concerned the watched file (or any event, with match_any)."""
+        readable, _, _ = select.select([fd], [], [], timeout)
+        if not readable:
+            return False
+        buffer = os.read(fd, 64 * 1024)
+        offset, matched = 0, False
+        while offset + INOTIFY_EVENT_HEADER.size <= len(buffer):
+            _, _, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            matched = matched or match_any or name == file_name
+        return matched
@@ -11,7 +11,7 @@ if errorlevel 1 (
 
 REM Install required packages
 echo Installing required packages...
-pip install tkcalendar pillow schedule pystray
+pip install tkcalendar pillow pystray
 
 REM Run the autostart installation script
 echo Installing autostart...
@@ -0,0 +1,33 @@
+"""
+Shared fixture for tests that run remainder against a throwaway reminders store.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def use_scratch_store(test_case, data_file):
+    """Point remainder's store-bound globals at data_file until test_case has finished.
+
+    Swaps the same set as reminder_soak's runs (DATA_FILE, runtime state, indexes,
+    caches, watcher, publisher, clock), so no test leaks records into another.
+    Returns the remainder module. Imported here rather than at the top so test
+    modules that only need it for a few cases don't pull in the GUI stack.
+    """
+    import remainder
+    import reminder_soak
+    for name, value in reminder_soak.scratch_store_globals(data_file).items():
+        test_case.addCleanup(setattr, remainder, name, getattr(remainder, name))
+        setattr(remainder, name, value)
+    return remainder
+
+class ScratchStoreTestCase(unittest.TestCase):
+    """Each test starts with an empty store at self.data_file in the temporary self.test_dir."""
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.test_dir.cleanup)
+        self.data_file = os.path.join(self.test_dir.name, 'test_reminders.json')
+        use_scratch_store(self, self.data_file)
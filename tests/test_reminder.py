@@ -1,13 +1,19 @@
 import unittest
-from datetime import date, datetime, time
+from datetime import date, datetime, time, timedelta
 import json
 import os
+import subprocess
 import sys
 import tempfile
+import threading
+from unittest import mock
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import remainder
+import reminder_core
+from tests.scratch_store import ScratchStoreTestCase
 from remainder import (
     load_reminders,
     save_reminders,
@@ -15,19 +21,7 @@ from remainder import (
     delete_past_reminders
 )
 
-class TestReminderFunctions(unittest.TestCase):
-    def setUp(self):
-        # Create a temporary directory for test files
-        self.test_dir = tempfile.TemporaryDirectory()
-        self.original_data_file = os.environ.get('DATA_FILE')
-        os.environ['DATA_FILE'] = os.path.join(self.test_dir.name, 'test_reminders.json')
-
-    def tearDown(self):
-        # Clean up the temporary directory
-        self.test_dir.cleanup()
-        if self.original_data_file:
-            os.environ['DATA_FILE'] = self.original_data_file
-
+class TestReminderFunctions(ScratchStoreTestCase):
     def test_load_save_reminders(self):
         # Test data
         test_reminders = [
@@ -82,9 +76,9 @@ class TestReminderFunctions(unittest.TestCase):
         # Create test data with past and future reminders
         today = date.today()
         yesterday = (datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - 
-                    datetime.timedelta(days=1)).date()
+                    timedelta(days=1)).date()
         tomorrow = (datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + 
-                   datetime.timedelta(days=1)).date()
+                   timedelta(days=1)).date()
 
         test_reminders = [
             {
@@ -127,5 +121,512 @@ class TestReminderFunctions(unittest.TestCase):
                 today
             )
 
+class TestStoreWrites(ScratchStoreTestCase):
+    WRITER = """
+import sys
+from reminder_core import StoreLock, new_reminder_record, read_reminders_file, write_reminders_file
+for n in range(40):
+    with StoreLock(sys.argv[1]):
+        reminders, _ = read_reminders_file(sys.argv[1])
+        reminders.append(new_reminder_record(f"{sys.argv[2]} {n}", "2030-01-01", "09:00"))
+        write_reminders_file(sys.argv[1], reminders)
+"""
+
+    def test_concurrent_writers_keep_every_write(self):
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        writers = [subprocess.Popen([sys.executable, "-c", self.WRITER, remainder.DATA_FILE, name], cwd=repo_dir,
+                                    stderr=subprocess.PIPE, text=True) for name in ("first", "second")]
+        for writer in writers:
+            _, err = writer.communicate(timeout=60)
+            self.assertEqual(writer.returncode, 0, err)
+        self.assertEqual(len(load_reminders()), 80)
+        self.assertEqual(sorted(os.listdir(self.test_dir.name)), ["test_reminders.json", "test_reminders.json.lock"])
+
+    def test_app_writes_reenter_a_held_store_lock(self):
+        with reminder_core.StoreLock(remainder.DATA_FILE):
+            remainder.add_reminders([reminder_core.new_reminder_record("Inside", "2030-01-01", "09:00")])
+            remainder.delete_past_reminders()
+        blocked = threading.Event()
+        def add_from_another_thread():
+            remainder.add_reminders([reminder_core.new_reminder_record("Waited", "2030-01-02", "09:00")])
+            blocked.set()
+        with reminder_core.StoreLock(remainder.DATA_FILE):
+            thread = threading.Thread(target=add_from_another_thread)
+            thread.start()
+            self.assertFalse(blocked.wait(0.2)) # Other threads wait for the holder
+        thread.join()
+        self.assertEqual([r["title"] for r in load_reminders()], ["Inside", "Waited"])
+
+class TestStoreReadCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, 'reminders.json')
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_read_cache_matches_full_scan(self):
+        records = [reminder_core.new_reminder_record(f"R{i}", f"2030-0{1 + i % 3}-1{i % 10}", "08:00") for i in range(30)]
+        reminder_core.write_reminders_file(self.data_path, records)
+        cache = reminder_core.StoreReadCache(self.data_path)
+        for bounds in [(None, None), ("2030-02-01", "2030-02-28"), ("2030-01-15", None), (None, "2030-01-12")]:
+            self.assertEqual(cache.in_range(*bounds), reminder_core.reminders_in_range(records, *bounds))
+        reminder_core.write_reminders_file(self.data_path, records[:5])
+        self.assertEqual(len(cache.in_range()), 5) # Replaced file is picked up
+
+    def test_hot_window_keeps_only_hot_records_resident(self):
+        day = lambda offset: (date.today() + timedelta(days=offset)).strftime("%Y-%m-%d")
+        records = {offset: reminder_core.new_reminder_record(f"D{offset}", day(offset), "08:00")
+                   for offset in (-30, -1, 0, 10, 60)}
+        head = reminder_core.new_reminder_record("Overdue weekly head", day(-5), "08:00", "weekly")
+        fired = reminder_core.new_reminder_record("Fired weekly", day(-12), "08:00", "weekly")
+        fired["notified_individually"] = True
+        everything = list(records.values()) + [head, fired]
+        reminder_core.write_reminders_file(self.data_path, everything)
+        sizes = []
+        cache = reminder_core.HotWindowCache(self.data_path, on_refresh=lambda count, size: sizes.append((count, size)))
+        self.assertEqual(sorted(r["title"] for r in cache.snapshot()[0]),
+                         sorted(["D-1", "D0", "D10", "Overdue weekly head"]))
+        self.assertEqual(sizes, [(4, cache.resident_bytes)])
+        # Inside the window: served from memory. Outside: paged in from disk, nothing kept
+        self.assertEqual([r["title"] for r in cache.in_range(day(0), day(10))], ["D0", "D10"])
+        self.assertEqual(cache.pages_read, 0)
+        for bounds in [(None, None), (day(-40), day(0)), (day(5), day(90))]:
+            self.assertEqual(cache.in_range(*bounds), reminder_core.reminders_in_range(everything, *bounds))
+        self.assertEqual(cache.pages_read, 3)
+        self.assertEqual(cache.resident_count(), 4)
+        # A budget narrows the window ahead until the resident records fit
+        budgeted = reminder_core.HotWindowCache(self.data_path, budget_bytes=cache.resident_bytes - 1)
+        self.assertNotIn("D10", [r["title"] for r in budgeted.snapshot()[0]])
+        self.assertLess(budgeted.resident_bytes, cache.resident_bytes)
+
+class TestSchedulerTick(ScratchStoreTestCase):
+    def test_tick_summary_counts(self):
+        past = datetime.now() - timedelta(hours=1)
+        future = datetime.now() + timedelta(days=2)
+        save_reminders([
+            {"id": "due", "title": "Due", "date": past.strftime("%Y-%m-%d"), "time": past.strftime("%H:%M"),
+             "notified_individually": False, "recurrence_type": "daily", "recurrence_end_type": "never"},
+            {"id": "later", "title": "Later", "date": future.strftime("%Y-%m-%d"), "time": "10:00",
+             "notified_individually": False, "recurrence_type": None},
+            {"id": "done", "title": "Done", "date": past.strftime("%Y-%m-%d"), "time": "00:00",
+             "notified_individually": True, "recurrence_type": None},
+            {"id": "bad", "title": "Bad", "date": "not-a-date", "time": "10:00",
+             "notified_individually": False, "recurrence_type": None}
+        ])
+        with self.assertLogs(reminder_core.APP_NAME, "WARNING"):
+            stats = remainder.check_and_notify_due_reminders()
+        self.assertEqual(stats["scanned"], 4)
+        self.assertEqual(stats["fired"], 1)
+        self.assertEqual(stats["already_notified"], 1)
+        self.assertEqual(stats["invalid"], 1)
+        self.assertEqual(stats["occurrences_created"], 1)
+        # The definitions are untouched; the series moved on in the state log
+        self.assertEqual(len(load_reminders()), 4)
+        self.assertFalse(next(r for r in load_reminders() if r["id"] == "due")["notified_individually"])
+        current = {r["id"]: r for r in remainder.load_effective_reminders()}["due"]
+        self.assertEqual(current["date"], (max(past.date(), date.today()) + timedelta(days=1)).strftime("%Y-%m-%d"))
+        with self.assertNoLogs(reminder_core.APP_NAME, "INFO"): # The bad record is only reported once
+            self.assertEqual(remainder.check_and_notify_due_reminders()["fired"], 0)
+        self.assertEqual(remainder.metrics.gauges["invalid_reminders"], 1)
+
+    def test_scheduler_runs_on_an_injected_clock(self):
+        save_reminders([reminder_core.new_reminder_record("Rent", "2031-01-31", "09:00", "monthly"),
+                        reminder_core.new_reminder_record("Dentist", "2031-02-10", "19:30")])
+        clock = reminder_core.SimulatedClock(datetime(2031, 1, 31, 8, 59, 59))
+        self.assertEqual(remainder.check_and_notify_due_reminders(clock)["fired"], 0)
+        clock.advance(1)
+        self.assertEqual(remainder.check_and_notify_due_reminders(clock)["fired"], 1)
+        clock.set(datetime(2031, 2, 10, 12, 0))
+        upcoming, prefix = remainder.get_upcoming_todays_reminders(clock)
+        self.assertEqual(([r["title"] for r in upcoming], prefix), (["Dentist"], "Today's"))
+        clock.set(datetime(2031, 2, 10, 18, 0)) # Evening: the startup popup looks at tomorrow
+        self.assertEqual(remainder.get_upcoming_todays_reminders(clock)[1], "Tomorrow's")
+
+        clock.set(datetime(2031, 2, 28, 9, 0))
+        self.assertEqual(remainder.check_and_notify_due_reminders(clock)["fired"], 2)
+        rent = {r["title"]: r for r in remainder.load_effective_reminders()}["Rent"]
+        self.assertEqual(rent["date"], "2031-03-28")
+        clock.set(datetime(2031, 3, 1))
+        delete_past_reminders(clock)
+        self.assertEqual([r["title"] for r in load_reminders()], ["Rent"])
+
+    def test_alerts_go_out_after_the_store_lock_is_released(self):
+        save_reminders([reminder_core.new_reminder_record("Rent", "2031-01-31", "09:00", "monthly")])
+        lock_taken = []
+        def notify(*alert):
+            # A Tk handler saving an edit must be able to take the lock while the alert is being posted
+            def take_lock():
+                lock_taken.append(remainder.store_write_lock.acquire(timeout=1))
+                if lock_taken[-1]: remainder.store_write_lock.release()
+            taker = threading.Thread(target=take_lock)
+            taker.start()
+            taker.join()
+        clock = reminder_core.SimulatedClock(datetime(2031, 1, 31, 9, 0))
+        self.assertEqual(remainder.check_and_notify_due_reminders(clock, notify)["fired"], 1)
+        self.assertEqual(lock_taken, [True])
+
+    def test_undelivered_alerts_wait_for_the_window(self):
+        remainder.pending_alerts.clear()
+        self.addCleanup(remainder.pending_alerts.clear)
+        with mock.patch.object(remainder, "actual_show_individual_popups") as show:
+            with self.assertLogs(reminder_core.APP_NAME, "WARNING"): # No window attached yet
+                remainder.show_individual_reminder_popup_thread_safe("Rent", "09:00", "rent")
+            self.assertEqual(len(remainder.pending_alerts), 1)
+            loop = AfterLoop()
+            remainder.tk_events.attach(loop, poll_ms=0)
+            self.addCleanup(remainder.tk_events.detach)
+            remainder.show_individual_reminder_popup_thread_safe("Gym", "07:30", "gym")
+            loop.run(0.05)
+        show.assert_called_once()
+        self.assertEqual([alert[0] for alert in show.call_args[0][0]], ["Rent", "Gym"])
+        self.assertEqual(len(remainder.pending_alerts), 0)
+
+    def test_logging_goes_through_queue(self):
+        from logging.handlers import QueueHandler
+        self.assertFalse(remainder.logger.handlers) # Nothing is set up on import
+        with tempfile.TemporaryDirectory() as log_dir:
+            log_file = os.path.join(log_dir, "app.log")
+            self.assertIs(remainder.setup_logging("INFO", log_file), remainder.logger)
+            try:
+                self.assertTrue(any(isinstance(h, QueueHandler) for h in remainder.logger.handlers))
+                remainder.log_info("Queued %s", "record")
+            finally:
+                remainder.stop_logging()
+                remainder.logger.handlers.clear()
+                remainder.logger.setLevel(0)
+                remainder.logger.propagate = True
+            with open(log_file, encoding="utf-8") as f:
+                self.assertIn("Queued record", f.read())
+        self.assertEqual(remainder.resolve_log_level("debug"), 10)
+        self.assertEqual(remainder.resolve_log_level("nonsense"), 20)
+
+class TestNotificationQueue(ScratchStoreTestCase):
+    def test_alert_queue_collapses_duplicates_and_keeps_order(self):
+        alerts = remainder.AlertQueue()
+        self.assertTrue(alerts.add("First", "09:00", "1"))
+        self.assertTrue(alerts.add("Second", "09:00", "2"))
+        self.assertFalse(alerts.add("First again", "09:00", "1"))
+        self.assertTrue(alerts.add("No id", "09:00"))
+        self.assertEqual(len(alerts), 3)
+        self.assertEqual([a["title"] for a in alerts.head(2)], ["First", "Second"])
+        self.assertEqual(alerts.snoozable_ids(), ["1", "2"])
+        alerts.remove("1")
+        self.assertEqual(alerts.head(1)[0]["title"], "Second")
+        self.assertEqual(len(alerts.clear()), 2)
+        self.assertEqual(len(alerts), 0)
+
+    def test_snooze_reminders_batches_one_save(self):
+        save_reminders([
+            {"id": str(i), "title": f"R{i}", "date": "2024-03-20", "time": "09:00", "notified_individually": True}
+            for i in range(5)
+        ])
+        saves_before = remainder.metrics.counters.get("store_saves", 0)
+        self.assertEqual(remainder.snooze_reminders(["1", "3", "missing"], 10), 2)
+        self.assertEqual(remainder.metrics.counters["store_saves"], saves_before) # Only the state log is written
+        self.assertTrue(all(r["date"] == "2024-03-20" for r in load_reminders()))
+        snoozed = {r["id"]: r for r in remainder.load_effective_reminders()}
+        self.assertFalse(snoozed["1"]["notified_individually"])
+        self.assertTrue(snoozed["2"]["notified_individually"])
+        self.assertFalse(remainder.snooze_reminder("missing", 5))
+
+class TestNextDueIndex(ScratchStoreTestCase):
+    def test_index_orders_and_updates_incrementally(self):
+        index = remainder.NextDueIndex()
+        index.rebuild([
+            {"id": "b", "title": "B", "date": "2030-01-02", "time": "09:00"},
+            {"id": "a", "title": "A", "date": "2030-01-01", "time": "09:00"},
+            {"id": "done", "title": "Done", "date": "2029-01-01", "time": "09:00", "notified_individually": True},
+            {"id": "bad", "title": "Bad", "date": "??", "time": "09:00"}
+        ])
+        self.assertEqual([e["id"] for e in index.peek(5)], ["a", "b"])
+        index.upsert({"id": "b", "title": "B", "date": "2029-12-31", "time": "08:00"})
+        self.assertEqual([e["id"] for e in index.peek(5)], ["b", "a"])
+        index.discard("b")
+        index.discard("missing")
+        self.assertEqual([e["id"] for e in index.peek(5)], ["a"])
+        self.assertEqual(len(index), 1)
+
+    def test_format_countdown(self):
+        self.assertEqual(remainder.format_countdown(-5), "now")
+        self.assertEqual(remainder.format_countdown(30), "in <1m")
+        self.assertEqual(remainder.format_countdown(12 * 60), "in 12m")
+        self.assertEqual(remainder.format_countdown(2 * 3600 + 5 * 60), "in 2h 05m")
+        self.assertEqual(remainder.format_countdown(2 * 86400 + 3 * 3600), "in 2d 3h")
+
+    def test_dismiss_advances_recurring_series(self):
+        save_reminders([{"id": "r", "title": "Daily", "date": "2030-01-01", "time": "09:00",
+                         "notified_individually": False, "recurrence_type": "daily",
+                         "recurrence_end_type": "never", "recurrence_current_count": None}])
+        remainder.next_due_index.rebuild(load_reminders())
+        self.assertTrue(remainder.dismiss_reminder("r"))
+        upcoming = remainder.next_due_index.peek(5)
+        self.assertEqual(len(upcoming), 1)
+        self.assertEqual(upcoming[0]["id"], "r") # Same series, next occurrence
+        self.assertEqual(upcoming[0]["due"], datetime(2030, 1, 2, 9, 0))
+        self.assertEqual(load_reminders()[0]["date"], "2030-01-01")
+
+    def test_mutations_invalidate_only_touched_month_counts(self):
+        remainder.add_reminders([remainder.new_reminder_record("March", "2031-03-05", "10:00")])
+        for month in (3, 4):
+            remainder.month_counts.counts_for_month(2031, month)
+        remainder.add_reminders([remainder.new_reminder_record("April", "2031-04-02", "10:00")])
+        self.assertEqual(remainder.month_counts.cached_months(), [(2031, 3)])
+        self.assertEqual(remainder.month_counts.counts_for_month(2031, 4), {"2031-04-02": 1})
+
+class TestSlotConflicts(ScratchStoreTestCase):
+    def test_mutations_keep_conflicts_current(self):
+        day = (date.today() + timedelta(days=2)).strftime("%Y-%m-%d")
+        pills = reminder_core.new_reminder_record("Pills", day, "21:00", "daily")
+        remainder.add_reminders([pills])
+        self.assertEqual(len(remainder.slot_index.at(day, "21:00")), 1) # Loaded on first lookup
+        call = reminder_core.new_reminder_record("Call Sam", day, "21:00")
+        remainder.add_reminders([call])
+        self.assertEqual([title for *_, title in remainder.slot_index.at(day, "21:00", exclude_id=call["id"])], ["Pills"])
+        remainder.delete_reminders([pills["id"]])
+        self.assertEqual([title for *_, title in remainder.slot_index.at(day, "21:00")], ["Call Sam"])
+
+    def test_form_slot_reads_twelve_hour_time(self):
+        class Field:
+            def __init__(self, value): self.value = value
+            def get(self): return self.value
+            get_date = get
+        form = type("Form", (), {})()
+        form.cal, form.hour_spinbox, form.minute_spinbox, form.ampm_var = (
+            Field("2031-03-05"), Field("12"), Field("05"), Field("AM"))
+        self.assertEqual(remainder.form_due_slot(form), ("2031-03-05", "00:05"))
+        form.minute_spinbox = Field("")
+        self.assertIsNone(remainder.form_due_slot(form))
+
+class TestParseWhen(unittest.TestCase):
+    def test_parse_when_formats(self):
+        now = datetime(2024, 3, 20, 10, 0)
+        self.assertEqual(remainder.parse_when("2024-03-21 08:15", now), ("2024-03-21", "08:15"))
+        self.assertEqual(remainder.parse_when("2024-03-21T08:15", now), ("2024-03-21", "08:15"))
+        self.assertEqual(remainder.parse_when("2024-03-21", now), ("2024-03-21", "09:00"))
+        self.assertEqual(remainder.parse_when("11:30", now), ("2024-03-20", "11:30"))
+        self.assertEqual(remainder.parse_when("09:30", now), ("2024-03-21", "09:30"))
+        self.assertEqual(remainder.parse_when("+90m", now), ("2024-03-20", "11:30"))
+        self.assertEqual(remainder.parse_when("+1d", now), ("2024-03-21", "10:00"))
+        self.assertEqual(remainder.parse_when("+90s", now), ("2024-03-20", "10:01:30"))
+        self.assertEqual(remainder.parse_when("2024-03-21 08:15:05", now), ("2024-03-21", "08:15:05"))
+        self.assertEqual(remainder.parse_when("10:00:30", now), ("2024-03-20", "10:00:30"))
+        for bad in ("", None, "tomorrow", "+5x", "25:00"):
+            with self.subTest(bad=bad):
+                with self.assertRaises(ValueError):
+                    remainder.parse_when(bad, now)
+
+class TestDueStamps(ScratchStoreTestCase):
+    def test_wall_time_in_zone_to_epoch_across_dst(self):
+        # 09:00 in New York is 14:00 UTC in winter and 13:00 UTC in summer
+        self.assertEqual(reminder_core.wall_to_epoch("2030-01-15", "09:00", "America/New_York"),
+                         int(datetime(2030, 1, 15, 14, 0, tzinfo=reminder_core.ZoneInfo("UTC")).timestamp()))
+        monthly = remainder.new_reminder_record("Rent", "2030-02-10", "09:00:30", "monthly")
+        monthly.update(due_tz="America/New_York", due_wall=None)
+        reminder_core.stamp_due(monthly)
+        following = reminder_core.build_next_occurrence(monthly) # Crosses the March DST change
+        self.assertEqual(following["due_epoch"] - monthly["due_epoch"], 28 * 86400 - 3600)
+        self.assertEqual((following["time"], following["due_tz"]), ("09:00:30", "America/New_York"))
+
+    def test_legacy_records_are_migrated_and_edits_restamped(self):
+        legacy = [{"id": "1", "title": "Old", "date": "2030-01-01", "time": "09:00", "notified_individually": False}]
+        with open(remainder.DATA_FILE, 'w') as f:
+            json.dump(legacy, f)
+        reminders = load_reminders()
+        self.assertEqual(remainder.reminder_due_epoch(reminders[0]), int(datetime(2030, 1, 1, 9, 0).timestamp()))
+        self.assertEqual(remainder.stamp_due_times(reminders), 1)
+        self.assertEqual(remainder.stamp_due_times(reminders), 0)
+        save_reminders(reminders)
+        stored = load_reminders()[0]
+        self.assertEqual(stored["due_wall"], "2030-01-01 09:00")
+        stored["time"] = "09:00:45" # Edited without restamping: the stale stamp is never used
+        self.assertEqual(remainder.reminder_due_epoch(stored), stored["due_epoch"] + 45)
+        self.assertEqual(reminder_core.reminder_due_datetime(stored), datetime(2030, 1, 1, 9, 0, 45))
+
+    def test_windows_zone_names_map_to_iana(self):
+        self.assertFalse([name for name in reminder_core.WINDOWS_ZONE_NAMES.values() if reminder_core.zone_for(name) is None])
+        reminder_core.local_zone_name.cache_clear()
+        self.addCleanup(reminder_core.local_zone_name.cache_clear)
+        with mock.patch.dict(os.environ, {"TZ": ""}), mock.patch.object(reminder_core.sys, "platform", "win32"):
+            with mock.patch.object(reminder_core, "windows_zone_key", return_value="W. Europe Standard Time"):
+                self.assertEqual(reminder_core.local_zone_name(), "Europe/Berlin")
+            reminder_core.local_zone_name.cache_clear()
+            with mock.patch.object(reminder_core, "windows_zone_key", return_value=None), \
+                    mock.patch.object(reminder_core.time, "tzname", ("Tokyo Standard Time", "Tokyo Daylight Time")):
+                self.assertEqual(reminder_core.local_zone_name(), "Asia/Tokyo") # No registry: the standard name
+
+    def test_store_is_in_due_order_across_zones(self):
+        tokyo = dict(remainder.new_reminder_record("Tokyo call", "2030-01-02", "08:00"), due_tz="Asia/Tokyo", due_wall=None)
+        new_york = dict(remainder.new_reminder_record("New York call", "2030-01-01", "20:00"), due_tz="America/New_York", due_wall=None)
+        reminder_core.write_reminders_file(remainder.DATA_FILE, [new_york, tokyo])
+        self.assertEqual([r["title"] for r in load_reminders()], ["Tokyo call", "New York call"]) # 23:00 and 01:00 UTC
+        cache = reminder_core.StoreReadCache(remainder.DATA_FILE)
+        self.assertEqual([r["title"] for r in cache.in_range("2030-01-02", "2030-01-02")], ["Tokyo call"])
+        self.assertEqual([r["title"] for r in cache.in_range("2030-01-01", "2030-01-01")], ["New York call"])
+
+    def test_index_and_tick_compare_seconds(self):
+        now = datetime.now().replace(microsecond=0)
+        due = remainder.new_reminder_record("Soon", *remainder.parse_when("+30s", now))
+        index = remainder.NextDueIndex()
+        index.rebuild([due])
+        self.assertEqual(index.pop_due(now + timedelta(seconds=29)), [])
+        self.assertEqual(index.pop_due(now + timedelta(seconds=30)), [(due["due_epoch"], due["id"])])
+
+class TestMetrics(ScratchStoreTestCase):
+    def test_histogram_buckets_and_percentiles(self):
+        histogram = remainder.Histogram((1, 10, 100))
+        for value in (0.5, 5, 5, 50, 500):
+            histogram.record(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 5)
+        self.assertEqual(snapshot["buckets"], {"le_1": 1, "le_10": 2, "le_100": 1, "le_inf": 1})
+        self.assertEqual(snapshot["p50"], 10)
+        self.assertEqual(snapshot["max"], 500)
+
+    def test_store_bytes_are_counted(self):
+        registry = remainder.MetricsRegistry()
+        original_metrics = remainder.metrics
+        remainder.metrics = registry
+        try:
+            save_reminders([{"id": "1", "title": "Bytes", "date": "2024-03-20", "time": "10:00"}])
+            load_reminders()
+        finally:
+            remainder.metrics = original_metrics
+        file_size = os.path.getsize(remainder.DATA_FILE)
+        self.assertEqual(registry.counters["store_bytes_written"], file_size)
+        self.assertEqual(registry.counters["store_bytes_read"], file_size)
+
+    def test_export_json_snapshot(self):
+        registry = remainder.MetricsRegistry()
+        registry.observe("tick_duration_ms", 3)
+        registry.adjust_gauge("tk_queue_depth", 2)
+        registry.adjust_gauge("tk_queue_depth", -2)
+        export_path = os.path.join(self.test_dir.name, 'metrics.json')
+        self.assertEqual(registry.export_json(export_path), export_path)
+        with open(export_path) as f:
+            exported = json.load(f)
+        self.assertEqual(exported["histograms"]["tick_duration_ms"]["count"], 1)
+        self.assertEqual(exported["gauges"]["tk_queue_depth"], 0)
+        self.assertEqual(exported["gauges"]["tk_queue_depth_max"], 2)
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_data_file_path = remainder.data_file_path
+        remainder.data_file_path = lambda filename: os.path.join(self.test_dir.name, filename)
+
+    def tearDown(self):
+        remainder.data_file_path = self.original_data_file_path
+        self.test_dir.cleanup()
+
+    def test_session_writes_thread_and_allocation_reports(self):
+        session = remainder.ProfilingSession()
+        self.assertTrue(session.start())
+        session.sync_thread("scheduler")
+        sorted(str(i) for i in range(1000))
+        self.assertTrue(session.stop())
+        session.sync_thread("scheduler") # Detaches and dumps once the session is inactive
+        written = sorted(os.listdir(self.test_dir.name))
+        stamp = session.session_stamp
+        self.assertEqual(written, [f"profile_{stamp}_scheduler.prof",
+                                   f"profile_{stamp}_scheduler.txt",
+                                   f"profile_{stamp}_tracemalloc.txt"])
+        self.assertFalse(session.stop())
+
+class AfterLoop:
+    """Runs root.after callbacks on the calling thread, standing in for the Tk main loop."""
+    def __init__(self):
+        self.pending = []
+
+    def after(self, delay_ms, callback):
+        self.pending.append((remainder.py_time.perf_counter() + delay_ms / 1000.0, callback))
+
+    def run(self, seconds):
+        end = remainder.py_time.perf_counter() + seconds
+        while self.pending and remainder.py_time.perf_counter() < end:
+            self.pending.sort(key=lambda entry: entry[0])
+            due, callback = self.pending.pop(0)
+            remainder.py_time.sleep(max(0.0, due - remainder.py_time.perf_counter()))
+            callback()
+
+def slow_filter_handler():
+    remainder.py_time.sleep(0.4) # Blocks the loop like a handler doing disk I/O
+
+class TestTkEventChannel(unittest.TestCase):
+    def setUp(self):
+        self.loop = AfterLoop()
+        self.channel = remainder.TkEventChannel(capacity=3, put_timeout=0.05)
+
+    def test_burst_costs_one_pass_and_refreshes_coalesce(self):
+        self.assertFalse(self.channel.post(print)) # Nothing attached yet
+        self.channel.attach(self.loop, poll_ms=0)
+        delivered = []
+        self.channel.post(delivered.append, "popup 1")
+        self.channel.post(delivered.append, "list v1", coalesce="refresh")
+        self.channel.post(delivered.append, "popup 2")
+        self.channel.post(delivered.append, "list v2", coalesce="refresh")
+        self.assertEqual(len(self.loop.pending), 1) # One wake-up for the whole burst
+        self.loop.run(0.05)
+        self.assertEqual(delivered, ["popup 1", "list v2", "popup 2"])
+        self.channel.post(delivered.append, "list v3", coalesce="refresh") # Not queued any more, so it runs again
+        self.loop.run(0.05)
+        self.assertEqual(delivered[-1], "list v3")
+
+    def test_full_channel_makes_other_threads_wait(self):
+        self.channel.attach(self.loop, poll_ms=60000) # Polling mode; we pump by hand
+        for n in range(3):
+            self.assertTrue(self.channel.post(str, n))
+        results = []
+        producer = threading.Thread(target=lambda: results.append(self.channel.post(str, "late")))
+        producer.start()
+        producer.join()
+        self.assertEqual(results, [False]) # Timed out waiting for room
+        self.channel.put_timeout = 5
+        producer = threading.Thread(target=lambda: results.append(self.channel.post(len, "waits")))
+        producer.start()
+        remainder.py_time.sleep(0.01)
+        self.assertEqual(self.channel.pump(), 3)
+        producer.join()
+        self.assertEqual(results, [False, True])
+        for n in range(3): # The Tk thread (which attached) is never held back, even over capacity
+            self.assertTrue(self.channel.post(str, n))
+        self.assertEqual(self.channel.pump(), 4)
+
+class TestTkWatchdog(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_data_file_path = remainder.data_file_path
+        remainder.data_file_path = lambda filename: os.path.join(self.test_dir.name, filename)
+
+    def tearDown(self):
+        remainder.data_file_path = self.original_data_file_path
+        self.test_dir.cleanup()
+
+    def test_stall_is_attributed_to_the_blocking_handler(self):
+        loop = AfterLoop()
+        watchdog = remainder.TkWatchdog(heartbeat_ms=20, threshold_seconds=0.1, report_size=2)
+        watchdog.start(loop)
+        try:
+            loop.run(0.2)
+            self.assertEqual(len(watchdog.stalls), 0)
+            loop.after(0, slow_filter_handler)
+            loop.run(0.6) # The heartbeat after the handler reports the stall
+        finally:
+            watchdog.stop()
+        self.assertEqual(len(watchdog.stalls), 1)
+        stall = watchdog.stalls[0]
+        self.assertEqual(stall["function"], "slow_filter_handler")
+        self.assertGreaterEqual(stall["seconds"], 0.3)
+        self.assertIn("slow_filter_handler", watchdog.report_text())
+        report_path = watchdog.write_report()
+        self.assertEqual(os.path.dirname(report_path), self.test_dir.name)
+
+    def test_offending_frame_skips_library_frames(self):
+        stack = remainder.traceback.StackSummary.from_list([
+            (remainder.__file__, 10, "apply_filters", "save_reminders()"),
+            (json.__file__, 20, "dump", "fp.write(chunk)")
+        ])
+        self.assertEqual(remainder.offending_frame(stack).name, "apply_filters")
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
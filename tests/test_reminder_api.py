@@ -0,0 +1,160 @@
+import unittest
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_api
+import reminder_core
+from tests.scratch_store import use_scratch_store
+
+class ApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, 'reminders.json')
+        self.server = reminder_api.ReminderApiServer(self.make_store(), port=0)
+        self.server.start()
+        self.conn = http.client.HTTPConnection(reminder_api.API_HOST, self.server.port, timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.stop()
+        self.test_dir.cleanup()
+
+    def make_store(self):
+        return reminder_api.FileReminderStore(self.data_path)
+
+    def request(self, method, path, body=None, headers=None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        self.conn.request(method, path, body=payload, headers={"Content-Type": "application/json"} if headers is None else headers)
+        response = self.conn.getresponse()
+        result = response.status, json.loads(response.read().decode('utf-8'))
+        if response.will_close:
+            self.conn.close() # Reconnects on the next request
+        return result
+
+class TestReminderApi(ApiTestCase):
+    def test_create_query_snooze_delete(self):
+        status, created = self.request("POST", "/reminders", {"title": "Stand-up", "at": "2030-01-02 09:15",
+                                                               "repeat": "daily"})
+        self.assertEqual(status, 201)
+        self.assertEqual((created["date"], created["time"], created["recurrence_type"]), ("2030-01-02", "09:15", "daily"))
+        self.request("POST", "/reminders", {"title": "Later", "date": "2030-02-10", "time": "18:00"})
+
+        status, found = self.request("GET", "/reminders?from=2030-01-01&to=2030-01-31")
+        self.assertEqual([r["title"] for r in found], ["Stand-up"])
+        self.assertEqual(len(self.request("GET", "/reminders")[1]), 2)
+
+        status, snoozed = self.request("POST", f"/reminders/{created['id']}/snooze", {"minutes": 5})
+        self.assertEqual(status, 200)
+        self.assertFalse(snoozed["notified_individually"])
+        self.assertLess(snoozed["date"], "2030-01-02")
+
+        self.assertEqual(self.request("DELETE", f"/reminders/{created['id']}")[0], 200)
+        self.assertEqual(self.request("DELETE", f"/reminders/{created['id']}")[0], 404)
+        reminders, _ = reminder_core.read_reminders_file(self.data_path)
+        self.assertEqual([r["title"] for r in reminders], ["Later"])
+
+    def test_batch_is_one_write(self):
+        writes = []
+        original_write = reminder_api.write_reminders_file
+        def counting_write(path, reminders):
+            writes.append(len(reminders))
+            return original_write(path, reminders)
+        reminder_api.write_reminders_file = counting_write
+        try:
+            batch = [{"title": f"Item {i}", "at": "2030-05-01 10:00"} for i in range(50)]
+            status, created = self.request("POST", "/reminders/batch", {"reminders": batch})
+        finally:
+            reminder_api.write_reminders_file = original_write
+        self.assertEqual(status, 201)
+        self.assertEqual(len(created), 50)
+        self.assertEqual(writes, [50])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.request("POST", "/reminders", {"title": "", "at": "+1h"})[0], 400)
+        self.assertEqual(self.request("POST", "/reminders", {"title": "x", "at": "soon"})[0], 400)
+        status, body = self.request("POST", "/reminders/batch", {"reminders": [{"title": "ok", "at": "+1h"}, {"title": "bad"}]})
+        self.assertEqual(status, 400)
+        self.assertIn("Reminder 1", body["error"])
+        self.assertEqual(self.request("GET", "/reminders")[1], []) # Nothing from the rejected batch was written
+        self.assertEqual(self.request("GET", "/reminders?from=March")[0], 400)
+        self.assertEqual(self.request("POST", "/reminders/missing/snooze", {"minutes": 5})[0], 404)
+        self.assertEqual(self.request("GET", "/nowhere")[0], 404)
+
+    def test_requests_a_web_page_could_make_are_rejected(self):
+        body = {"title": "Planted", "at": "2030-01-02 09:15"}
+        # A cross-site form post: text/plain needs no CORS preflight
+        self.assertEqual(self.request("POST", "/reminders", body, {"Content-Type": "text/plain"})[0], 415)
+        self.assertEqual(self.request("POST", "/reminders/x/snooze", None, {})[0], 415)
+        self.assertEqual(self.request("POST", "/reminders", body, {"Content-Type": "application/json",
+                                                                    "Origin": "http://evil.example"})[0], 403)
+        # DNS rebinding: the page's own host name arrives in Host
+        self.assertEqual(self.request("GET", "/reminders", None, {"Host": f"evil.example:{self.server.port}"})[0], 403)
+        self.assertEqual(self.request("GET", "/events", None, {"Host": "evil.example"})[0], 403)
+        self.assertEqual(self.request("GET", "/reminders")[1], [])
+        status, _ = self.request("POST", "/reminders", body, {"Content-Type": "application/json; charset=utf-8",
+                                                              "Host": f"localhost:{self.server.port}",
+                                                              "Origin": f"http://localhost:{self.server.port}"})
+        self.assertEqual(status, 201)
+
+    def test_store_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            reminder_api.ReminderStore()
+
+    def test_firing_event_stream(self):
+        events = []
+        connected = threading.Event()
+        def listen():
+            conn = http.client.HTTPConnection(reminder_api.API_HOST, self.server.port, timeout=5)
+            conn.request("GET", "/events")
+            response = conn.getresponse()
+            self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+            response.fp.readline() # ": connected"
+            response.fp.readline()
+            connected.set()
+            events.append(response.fp.readline().decode().strip())
+            events.append(response.fp.readline().decode().strip())
+            conn.close()
+        listener = threading.Thread(target=listen)
+        listener.start()
+        self.assertTrue(connected.wait(5))
+        while len(self.server.events) == 0:
+            time.sleep(0.01)
+        self.server.publish_firing({"id": "r1", "title": "Tea", "date": "2030-01-01", "time": "16:00"})
+        listener.join(5)
+        self.assertEqual(events[0], "event: firing")
+        self.assertEqual(json.loads(events[1][len("data: "):])["title"], "Tea")
+
+    def test_many_queries_on_one_connection(self):
+        batch = [{"title": f"Load {i}", "at": f"2030-06-{1 + i % 28:02d} 08:00"} for i in range(1000)]
+        self.assertEqual(self.request("POST", "/reminders/batch", {"reminders": batch})[0], 201)
+        for i in range(2000):
+            day = 1 + i % 28
+            status, found = self.request("GET", f"/reminders?from=2030-06-{day:02d}&to=2030-06-{day:02d}")
+            self.assertEqual(status, 200)
+            self.assertEqual(len(found), 36 if day <= 20 else 35)
+
+class TestAppReminderStore(ApiTestCase):
+    """The API against the GUI app's own store, index and tray hooks."""
+    def make_store(self):
+        self.remainder = use_scratch_store(self, self.data_path)
+        return self.remainder.AppReminderStore()
+
+    def test_batch_updates_store_and_index(self):
+        batch = [{"title": "A", "at": "2030-01-01 08:00"}, {"title": "B", "at": "2030-01-01 07:00"}]
+        status, created = self.request("POST", "/reminders/batch", {"reminders": batch})
+        self.assertEqual(status, 201)
+        self.assertEqual(len(self.remainder.load_reminders()), 2)
+        self.assertEqual(self.remainder.next_due_index.peek()[0]["title"], "B")
+        self.assertEqual(self.request("DELETE", f"/reminders/{created[1]['id']}")[0], 200)
+        self.assertEqual(self.remainder.next_due_index.peek()[0]["title"], "A")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import contextlib
+import io
+import json
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_cli
+import reminder_core
+import reminder_ipc
+import reminder_projection
+
+class TestCoreQueries(unittest.TestCase):
+    def setUp(self):
+        self.today = date(2024, 3, 20)
+        self.reminders = [
+            reminder_core.new_reminder_record("Later", "2024-03-22", "08:00"),
+            reminder_core.new_reminder_record("Today", "2024-03-20", "09:30", "weekly"),
+            reminder_core.new_reminder_record("Past", "2024-03-01", "10:00"),
+        ]
+
+    def test_list_query(self):
+        today_only = reminder_core.list_query(self.reminders, "Today", today=self.today)
+        self.assertEqual([r["title"] for r in today_only], ["Today"])
+        self.assertEqual(today_only[0]["recurrence_type"], "weekly")
+        with self.assertRaises(ValueError):
+            reminder_core.list_query(self.reminders, "Someday")
+
+    def test_agenda_query_groups_by_day(self):
+        days = reminder_core.agenda_query(self.reminders, 7, start_date=self.today)
+        self.assertEqual([d["date"] for d in days], ["2024-03-20", "2024-03-22"])
+        self.assertEqual(days[1]["reminders"][0]["title"], "Later")
+
+    def test_resolve_reminder_id(self):
+        target = self.reminders[0]
+        self.assertIs(reminder_core.resolve_reminder_id(self.reminders, target["id"]), target)
+        self.assertIs(reminder_core.resolve_reminder_id(self.reminders, target["id"][:12]), target)
+        with self.assertRaises(ValueError):
+            reminder_core.resolve_reminder_id(self.reminders, "zzz")
+        with self.assertRaises(ValueError):
+            reminder_core.resolve_reminder_id(self.reminders, "")
+
+class TestCommandLineClient(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, 'reminders.json')
+        patches = [mock.patch.object(reminder_cli, 'app_dir', return_value=self.test_dir.name),
+                   mock.patch.object(reminder_cli, 'data_file_path', return_value=self.data_path)]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_cli(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            exit_code = reminder_cli.main(list(argv))
+        return exit_code, out.getvalue(), err.getvalue()
+
+    def test_local_fallback_round_trip(self):
+        tomorrow = (date.today() + timedelta(days=1)).strftime("%Y-%m-%d")
+        exit_code, out, _ = self.run_cli("add", "Water plants", "--at", f"{tomorrow} 07:15", "--repeat", "daily")
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Water plants", out)
+
+        exit_code, out, _ = self.run_cli("list", "--json")
+        listed = json.loads(out)
+        self.assertEqual(len(listed), 1)
+        self.assertEqual(listed[0]["recurrence_type"], "daily")
+
+        exit_code, out, _ = self.run_cli("agenda", "--days", "3")
+        self.assertIn(tomorrow, out)
+
+        exit_code, out, _ = self.run_cli("dismiss", listed[0]["id"][:8])
+        self.assertEqual(exit_code, 0)
+        day_after = (date.today() + timedelta(days=2)).strftime("%Y-%m-%d")
+        self.assertIn(f"next on {day_after}", out)
+        reminders, _ = reminder_core.read_reminders_file(self.data_path)
+        self.assertEqual(len(reminders), 1) # The series moved on in the state log, not in the store
+        self.assertEqual(reminders[0]["date"], tomorrow)
+        self.assertEqual(json.loads(self.run_cli("list", "--json")[1])[0]["date"], day_after)
+
+        exit_code, out, _ = self.run_cli("snooze", reminders[0]["id"], "--minutes", "5")
+        self.assertEqual(exit_code, 0)
+        self.assertIn("snoozed until", out)
+        self.assertEqual(reminder_core.read_reminders_file(self.data_path)[0], reminders)
+
+    def test_busiest_slots(self):
+        tomorrow = (date.today() + timedelta(days=1)).strftime("%Y-%m-%d")
+        for title in ("Pills", "Standup"):
+            self.run_cli("add", title, "--at", f"{tomorrow} 09:00", "--repeat", "daily")
+        self.run_cli("add", "Lunch", "--at", f"{tomorrow} 12:30")
+        exit_code, out, _ = self.run_cli("slots", "--top", "1", "--json")
+        self.assertEqual(exit_code, 0)
+        slots = json.loads(out)
+        self.assertEqual([(s["date"], s["time"], s["count"]) for s in slots], [(tomorrow, "09:00", 2)])
+        self.assertIn("2 reminders: ", self.run_cli("slots")[1])
+
+    def test_errors_exit_non_zero(self):
+        exit_code, _, err = self.run_cli("snooze", "missing")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("No reminder", err)
+        self.assertEqual(self.run_cli("add", "Bad", "--at", "not a time")[0], 1)
+
+    def test_requests_go_to_running_instance(self):
+        server = reminder_ipc.CommandServer(reminder_ipc.channel_address(self.test_dir.name))
+        server.register("list", lambda request: [{"id": "abc", "title": request["view"], "date": "2024-03-20",
+                                                  "time": "09:00", "recurrence_type": None}])
+        server.start()
+        self.addCleanup(server.stop)
+        exit_code, out, _ = self.run_cli("list", "--today")
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Today", out)
+        self.assertFalse(os.path.exists(self.data_path)) # The store was not touched directly
+
+    def test_slow_running_instance_is_not_bypassed(self):
+        server = reminder_ipc.CommandServer(reminder_ipc.channel_address(self.test_dir.name))
+        release = threading.Event()
+        server.register("add", lambda request: release.wait(5))
+        server.start()
+        self.addCleanup(server.stop)
+        self.addCleanup(release.set)
+        with mock.patch.object(reminder_ipc.send_command, "__defaults__", (0.05,)): # Answer timeout
+            exit_code, _, err = self.run_cli("add", "Water plants", "--at", "+30m")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("did not answer", err)
+        self.assertFalse(os.path.exists(self.data_path)) # Not added a second time locally
+
+    def test_metrics_need_running_instance(self):
+        exit_code, _, err = self.run_cli("metrics")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("not running", err)
+
+        server = reminder_ipc.CommandServer(reminder_ipc.channel_address(self.test_dir.name))
+        server.register("metrics", lambda request: {"counters": {"reminders_fired": 3}})
+        server.start()
+        self.addCleanup(server.stop)
+        exit_code, out, _ = self.run_cli("metrics")
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(json.loads(out)["counters"]["reminders_fired"], 3)
+
+    def test_client_does_not_import_gui_stack(self):
+        code = "import sys, reminder_cli; print(any(m in sys.modules for m in ('tkinter', 'PIL', 'pystray')))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), "False")
+
+class TestProjectionWorkers(unittest.TestCase):
+    RUN_FOUR_WORKERS = ("import os, runpy, sys; os.cpu_count = lambda: 4; sys.argv = ['remainder.py'] + sys.argv[1:]; "
+                        "runpy.run_path('remainder.py', run_name='__main__')")
+
+    def test_expanded_agenda_workers_skip_gui_stack(self):
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as app_dir: # A copy, so the store and app.log live next to its script
+            for module in glob.glob(os.path.join(repo_dir, "*.py")):
+                shutil.copy(module, app_dir)
+            today, series_count = date.today().strftime("%Y-%m-%d"), reminder_projection.PARALLEL_MIN_SERIES
+            reminder_core.write_reminders_file(os.path.join(app_dir, "reminders.json"), [
+                reminder_core.new_reminder_record(f"Series {n}", today, "23:59", "daily")
+                for n in range(series_count)])
+            result = subprocess.run([sys.executable, "-c", self.RUN_FOUR_WORKERS, "agenda", "--days", "2", "--expand", "--json"],
+                                    cwd=app_dir, capture_output=True, text=True, env=dict(os.environ, PYTHONPROFILEIMPORTTIME="1"))
+            self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+            self.assertEqual(sum(len(day["reminders"]) for day in json.loads(result.stdout)), 2 * series_count)
+            imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+            self.assertIn("reminder_projection", imported)
+            self.assertFalse(imported & {"tkinter", "PIL", "pystray", "tkcalendar"})
+            self.assertFalse(os.path.exists(os.path.join(app_dir, "app.log")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_daemon
+
+class TestReminderDaemon(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.now = datetime(2030, 1, 10, 12, 0)
+        self.fired = []
+        self.profiles = {}
+        for name, reminders in {
+            "alice": [reminder_core.new_reminder_record("Alice standup", "2030-01-10", "11:30", "daily"),
+                      reminder_core.new_reminder_record("Alice later", "2030-01-10", "15:00")],
+            "bob": [reminder_core.new_reminder_record("Bob lunch", "2030-01-10", "11:45"),
+                    reminder_core.new_reminder_record("Bob done", "2030-01-09", "08:00")],
+        }.items():
+            directory = os.path.join(self.test_dir.name, name)
+            os.mkdir(directory)
+            if name == "bob":
+                reminders[1]["notified_individually"] = True
+            reminder_core.write_reminders_file(os.path.join(directory, "reminders.json"), reminders)
+            self.profiles[name] = directory
+        self.daemon = reminder_daemon.ReminderDaemon(
+            reminder_daemon.discover_profiles(profiles_root=self.test_dir.name),
+            sink_factory=lambda profile: lambda name, reminder, due: self.fired.append((name, reminder["title"], due)),
+            workers=2)
+
+    def tearDown(self):
+        self.daemon.pool.shutdown()
+        self.test_dir.cleanup()
+
+    def read(self, name):
+        return reminder_core.read_reminders_file(os.path.join(self.profiles[name], "reminders.json"))[0]
+
+    def test_one_index_across_profiles(self):
+        self.assertEqual(self.daemon.rescan(), 3) # Pending reminders only
+        head = self.daemon.index.peek(3)
+        self.assertEqual([entry["id"][0] for entry in head], ["alice", "bob", "alice"])
+
+    def test_tick_fires_into_each_profile_and_persists(self):
+        self.daemon.rescan()
+        self.assertEqual(self.daemon.tick(self.now), 2)
+        self.assertEqual(sorted((name, title) for name, title, _ in self.fired),
+                         [("alice", "Alice standup"), ("bob", "Bob lunch")])
+        # Firings go to each profile's state log; reminders.json is left as the user wrote it
+        alice = self.read("alice")
+        self.assertFalse(any(r["notified_individually"] for r in alice))
+        alice_state = self.daemon.profiles["alice"].state
+        self.assertEqual([r["date"] for r in alice_state.apply(alice) if r["title"] == "Alice standup"], ["2030-01-11"])
+        bob = self.read("bob")
+        self.assertTrue(all(r["notified_individually"] for r in self.daemon.profiles["bob"].state.apply(bob)))
+        # The new occurrence is scheduled; nothing else is due yet
+        self.assertEqual(self.daemon.tick(self.now), 0)
+        self.assertEqual(self.daemon.index.peek(2)[1]["id"][0], "alice")
+        self.assertEqual(self.daemon.rescan(), 0) # Our own writes don't trigger a reload
+
+    def test_rescan_picks_up_external_edits(self):
+        self.daemon.rescan()
+        bob_path = os.path.join(self.profiles["bob"], "reminders.json")
+        reminders = self.read("bob")
+        next(r for r in reminders if r["title"] == "Bob lunch")["time"] = "18:00" # Rescheduled by the user's own app
+        reminder_core.write_reminders_file(bob_path, reminders)
+        self.daemon.rescan()
+        self.daemon.tick(self.now)
+        self.assertEqual([title for _, title, _ in self.fired], ["Alice standup"])
+
+    def test_default_sink_writes_profile_jsonl(self):
+        profile = reminder_daemon.Profile(self.profiles["alice"])
+        sink = reminder_daemon.default_sink_factory(profile)
+        sink("alice", {"id": "r1", "title": "Tea"}, self.now)
+        with open(os.path.join(self.profiles["alice"], "notifications.jsonl")) as f:
+            self.assertEqual(json.loads(f.readline())["title"], "Tea")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import remainder
+import reminder_core
+import reminder_dedup
+from reminder_core import DuplicateIndex, add_deduplicated, duplicate_key, new_reminder_record
+from tests.scratch_store import ScratchStoreTestCase
+
+class TestDuplicateIndex(unittest.TestCase):
+    def test_key_normalizes_title_and_time(self):
+        base = {"title": "Pay  rent", "date": "2030-01-01", "time": "09:05", "recurrence_type": "monthly"}
+        self.assertEqual(duplicate_key(base), duplicate_key(dict(base, title=" pay rent ", time="9:05")))
+        self.assertNotEqual(duplicate_key(base), duplicate_key(dict(base, recurrence_type=None)))
+        self.assertNotEqual(duplicate_key(base), duplicate_key(dict(base, date="2030-01-02")))
+
+    def test_index_follows_edits_and_deletes(self):
+        first = new_reminder_record("Standup", "2030-01-01", "10:00")
+        index = DuplicateIndex()
+        index.rebuild([first])
+        copy = new_reminder_record("standup", "2030-01-01", "10:00")
+        self.assertEqual(index.find(copy), first["id"])
+        self.assertIsNone(index.find(first)) # Not a duplicate of itself
+        index.upsert(dict(first, time="11:00"))
+        self.assertIsNone(index.find(copy))
+        index.upsert(copy)
+        index.discard(copy["id"])
+        self.assertEqual(len(index), 1)
+
+    def test_copies_sharing_an_id_or_without_one_are_found(self):
+        first = new_reminder_record("Standup", "2030-01-01", "10:00")
+        anonymous = {key: value for key, value in first.items() if key != "id"}
+        index = DuplicateIndex()
+        index.rebuild([first])
+        self.assertIsNone(index.find(first))
+        self.assertEqual(index.find(dict(first), new=True), first["id"]) # Re-imported with its id
+        index.rebuild([first, dict(first)])
+        self.assertEqual(index.find(first), first["id"]) # The other copy
+        index.rebuild([anonymous])
+        self.assertEqual(index.find(first), "")
+        self.assertEqual(len(index), 1)
+        stored = [anonymous]
+        _, _, duplicates = add_deduplicated(stored, [dict(first)], index, "skip")
+        self.assertEqual((len(stored), len(duplicates)), (1, 1))
+
+    def test_policies(self):
+        stored = new_reminder_record("Dentist", "2030-01-01", "15:00", "yearly")
+        again = new_reminder_record("Dentist", "2030-01-01", "15:00", "yearly", "occurrences", 3)
+        for policy, expected_count in (("warn", 2), ("skip", 1), ("merge", 1)):
+            reminders = [dict(stored)]
+            index = DuplicateIndex()
+            index.rebuild(reminders)
+            result, changed, duplicates = add_deduplicated(reminders, [again, dict(again, id="batch-copy")], index, policy)
+            self.assertEqual(len(reminders), expected_count + (policy == "warn"), policy)
+            self.assertEqual(len(duplicates), 2, policy)
+            if policy != "warn":
+                self.assertEqual([r["id"] for r in result], [stored["id"]] * 2)
+        self.assertEqual(reminders[0]["recurrence_end_value"], 3) # Merged settings, kept identity
+        self.assertEqual(reminders[0]["created_at"], stored["created_at"])
+        with self.assertRaises(ValueError):
+            add_deduplicated([], [again], DuplicateIndex(), "ignore")
+
+class TestDedupPass(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, "reminders.json")
+        self.reminders = [new_reminder_record(f"Task {n % 4}", "2030-01-0%d" % (1 + n % 2), "09:00") for n in range(12)]
+        self.reminders[0]["title"] = "Café ☕"
+        reminder_core.write_reminders_file(self.data_path, self.reminders)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_streaming_read_matches_json_load(self):
+        with open(self.data_path) as f:
+            expected = json.load(f)
+        for chunk_size in (1, 7, 4096):
+            self.assertEqual(list(reminder_core.iter_reminders_file(self.data_path, chunk_size)), expected)
+        for content in ("", "  [ ] "):
+            with open(self.data_path, "w") as f:
+                f.write(content)
+            self.assertEqual(list(reminder_core.iter_reminders_file(self.data_path)), [])
+        for content in ('{"id": "1"}', '[{"id": "1"} {"id": "2"}]', '[{"id": '):
+            with open(self.data_path, "w") as f:
+                f.write(content)
+            with self.assertRaises(ValueError):
+                list(reminder_core.iter_reminders_file(self.data_path, 2))
+
+    def test_warn_lists_and_skip_removes(self):
+        before = os.path.getmtime(self.data_path), os.path.getsize(self.data_path)
+        report = reminder_dedup.deduplicate_store(self.data_path)
+        self.assertEqual((report.scanned, report.duplicates, report.removed), (12, 7, 0))
+        self.assertEqual((os.path.getmtime(self.data_path), os.path.getsize(self.data_path)), before)
+
+        report = reminder_dedup.deduplicate_store(self.data_path, "skip")
+        self.assertEqual(report.removed, 7)
+        remaining, _ = reminder_core.read_reminders_file(self.data_path)
+        self.assertEqual(len(remaining), 5) # "Café ☕" plus one per task
+        with open(self.data_path) as f:
+            written = f.read()
+        reminder_core.write_reminders_file(self.data_path, remaining)
+        with open(self.data_path) as f:
+            self.assertEqual(written, f.read()) # Same layout as a normal save
+
+    def test_skip_removes_copies_sharing_an_id_or_without_one(self):
+        same_id = new_reminder_record("Renew passport", "2030-03-01", "09:00")
+        no_id = {key: value for key, value in new_reminder_record("Call bank", "2030-03-02", "10:00").items() if key != "id"}
+        reminder_core.write_reminders_file(self.data_path, [same_id, dict(same_id), no_id, dict(no_id)])
+        report = reminder_dedup.deduplicate_store(self.data_path, "skip")
+        remaining, _ = reminder_core.read_reminders_file(self.data_path)
+        self.assertEqual([r["title"] for r in remaining], ["Renew passport", "Call bank"])
+        self.assertEqual((report.scanned, report.removed), (4, 2))
+        self.assertIn("Removed 2 duplicate(s) of 4", str(report))
+
+    def test_merge_keeps_the_first(self):
+        first = self.reminders[1]
+        for reminder in self.reminders[5::4]: # The later copies of first
+            reminder["recurrence_end_type"] = "date"
+            reminder["recurrence_end_value"] = "2031-01-01"
+        reminder_core.write_reminders_file(self.data_path, self.reminders)
+        reminder_dedup.deduplicate_store(self.data_path, "merge")
+        merged = next(r for r in reminder_core.read_reminders_file(self.data_path)[0] if r["id"] == first["id"])
+        self.assertEqual(merged["recurrence_end_value"], "2031-01-01")
+
+class TestAddReminders(ScratchStoreTestCase):
+    def test_skip_sees_saved_and_deleted_reminders(self):
+        original = new_reminder_record("Water plants", "2030-05-01", "08:00")
+        remainder.add_reminders([original], "skip")
+        copy = new_reminder_record("Water plants", "2030-05-01", "08:00")
+        self.assertEqual(remainder.add_reminders([copy], "skip"), [original])
+        self.assertEqual(len(remainder.load_reminders()), 1)
+
+        remainder.delete_reminders([original["id"]])
+        self.assertFalse(remainder.is_duplicate(copy))
+        with self.assertLogs(reminder_core.APP_NAME, "WARNING"):
+            remainder.add_reminders([copy, dict(copy, id="second")], "warn")
+        self.assertEqual(len(remainder.load_reminders()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+from datetime import timedelta
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_difftest
+
+class LateByOneSecondEngine(reminder_difftest.StateLogEngine):
+    """A candidate with an off-by-one due check."""
+    def tick(self, now_epoch, today):
+        return super().tick(now_epoch - 1, today)
+
+def month_end_skipping_step(current_date, recurrence_type, step=reminder_core.step_recurrence_date):
+    """A shared recurrence helper with a bug: monthly series jump from a month end to the 1st."""
+    next_date = step(current_date, recurrence_type)
+    if recurrence_type == "monthly" and (current_date + timedelta(days=1)).day == 1:
+        next_date += timedelta(days=1)
+    return next_date
+
+class TestDifferentialHarness(unittest.TestCase):
+    def test_state_log_matches_legacy_scheduler(self):
+        divergence = reminder_difftest.find_divergence(30)
+        self.assertIsNone(divergence, str(divergence))
+
+    def test_scenarios_cover_every_rule_and_awkward_date(self):
+        recurrence, end_types, dates = set(), set(), set()
+        for seed in range(20):
+            reminders, steps, _ = reminder_difftest.random_scenario(seed)
+            recurrence.update(r["recurrence_type"] for r in reminders)
+            end_types.update(r["recurrence_end_type"] for r in reminders)
+            dates.update(r["date"][5:] for r in reminders)
+        self.assertEqual(recurrence, set(reminder_core.RECURRENCE_TYPES.values()))
+        self.assertEqual(end_types, set(reminder_core.END_CONDITION_TYPES.values()))
+        self.assertTrue({"02-29", "01-31", "12-31"} <= dates)
+
+    def test_reports_first_divergence_of_a_faulty_candidate(self):
+        divergence = reminder_difftest.find_divergence(10, candidate=LateByOneSecondEngine)
+        self.assertIsNotNone(divergence)
+        self.assertEqual((divergence.step[0], divergence.aspect), ("advance_to_due", "fired"))
+        self.assertIn("only in legacy", str(divergence))
+        # The same seed replays to the same step
+        reminders, steps, start_epoch = reminder_difftest.random_scenario(divergence.seed)
+        replayed = reminder_difftest.run_scenario(reminders, steps, start_epoch, LateByOneSecondEngine)
+        self.assertEqual(replayed.step_index, divergence.step_index)
+
+    def test_bug_in_shared_helper_is_a_divergence(self):
+        # The legacy scheduler is vendored, so breaking reminder_core only changes the candidate
+        with mock.patch.object(reminder_core, "step_recurrence_date", month_end_skipping_step):
+            divergence = reminder_difftest.find_divergence(30)
+        self.assertIsNotNone(divergence)
+
+    def test_series_snoozes_are_run_and_allowed(self):
+        snoozed_series = 0
+        for seed in range(20):
+            reminders, steps, _ = reminder_difftest.random_scenario(seed)
+            recurring = {r["series"] for r in reminders if r["recurrence_type"]}
+            snoozed_series += sum(1 for step in steps if step[0] == "snooze" and step[1] in recurring)
+        self.assertGreater(snoozed_series, 0)
+        allowed = []
+        self.assertIsNone(reminder_difftest.find_divergence(30, allowed=allowed))
+        self.assertTrue(allowed)
+        for difference in allowed:
+            reminders, _, _ = reminder_difftest.random_scenario(difference.seed)
+            titles = {o[1] for o in difference.expected + difference.actual if o[0] in
+                      reminder_difftest.differing_series(difference.expected, difference.actual)}
+            self.assertTrue(titles)
+            self.assertTrue(titles <= {r["title"] for r in reminders if r["recurrence_type"]}, str(difference))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_engine
+
+class TestCoreEngine(unittest.TestCase):
+    def setUp(self):
+        self.stopped = threading.Event()
+        self.engine = reminder_engine.CoreEngine(on_stop=self.stopped.set)
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_deadline_sleeps_until_due_and_rearms(self):
+        due = {"epoch": None}
+        reads, fired = [], []
+        def next_epoch():
+            reads.append(1)
+            return due["epoch"]
+        def fire():
+            fired.append((time.time(), threading.current_thread().name))
+            due["epoch"] = None
+        self.engine.deadline(next_epoch, fire)
+        self.engine.start()
+        time.sleep(0.3)
+        self.assertEqual(len(reads), 1) # Nothing pending: no polling
+
+        due_at = due["epoch"] = time.time() + 0.2
+        self.engine.rearm()
+        deadline = time.time() + 2
+        while not fired and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(fired), 1)
+        self.assertGreaterEqual(fired[0][0], due_at)
+        self.assertTrue(fired[0][1].startswith("ReminderCoreWorker")) # Jobs run off the loop thread
+        self.assertLessEqual(len(reads), 5)
+
+    def test_failing_job_keeps_its_timer_and_stop_runs_on_stop(self):
+        runs = []
+        def flaky():
+            runs.append(1)
+            if len(runs) == 1:
+                raise ValueError("disk full")
+        self.engine.every(0.05, flaky)
+        with self.assertLogs(reminder_core.APP_NAME, "ERROR"):
+            self.engine.start()
+            time.sleep(0.3)
+        self.assertGreaterEqual(len(runs), 2)
+        self.assertTrue(self.engine.stop())
+        self.assertTrue(self.stopped.is_set())
+        self.assertFalse(self.engine.running)
+
+    def test_stuck_deadline_is_retried_not_spun(self):
+        calls = []
+        self.engine.deadline(lambda: 0, lambda: calls.append(1)) # Always overdue, never cleared
+        self.engine.start()
+        time.sleep(0.5)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
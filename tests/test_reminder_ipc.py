@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_ipc
+
+class TestInstanceLock(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.lock_path = os.path.join(self.test_dir.name, 'app.lock')
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_second_lock_fails_until_released(self):
+        first = reminder_ipc.InstanceLock(self.lock_path)
+        second = reminder_ipc.InstanceLock(self.lock_path)
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        with open(self.lock_path) as f:
+            self.assertEqual(f.read(), str(os.getpid()))
+        first.release()
+        self.assertTrue(second.acquire())
+        second.release()
+
+class TestCommandChannel(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.address = reminder_ipc.channel_address(self.test_dir.name)
+        self.server = reminder_ipc.CommandServer(self.address)
+        self.server.register("echo", lambda request: request.get("value"))
+        self.server.register("fail", lambda request: 1 / 0)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.test_dir.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(reminder_ipc.send_command(self.address, {"command": "echo", "value": [1, "a"]}),
+                         {"ok": True, "result": [1, "a"]})
+
+    def test_errors_are_reported(self):
+        self.assertFalse(reminder_ipc.send_command(self.address, {"command": "fail"})["ok"])
+        response = reminder_ipc.send_command(self.address, {"command": "nope"})
+        self.assertEqual(response["error"], "Unknown command: nope")
+
+    def test_late_answer_is_an_error_not_a_miss(self):
+        self.server.register("slow", lambda request: time.sleep(0.5))
+        response = reminder_ipc.send_command(self.address, {"command": "slow"}, timeout=0.05)
+        self.assertEqual(response["ok"], False) # Not None: the caller must not run it again
+        self.assertIn("did not answer", response["error"])
+
+    def test_no_listener_returns_none(self):
+        other_dir = os.path.join(self.test_dir.name, 'other')
+        os.mkdir(other_dir)
+        self.assertIsNone(reminder_ipc.send_command(reminder_ipc.channel_address(other_dir), {"command": "echo"}))
+        self.assertIsNone(reminder_ipc.forward_to_running_instance(other_dir, []))
+
+class TestLaunchRequest(unittest.TestCase):
+    def test_launch_requests(self):
+        self.assertEqual(reminder_ipc.launch_request([]), {"command": "show"})
+        self.assertEqual(reminder_ipc.launch_request(['--show']), {"command": "show"})
+        self.assertEqual(reminder_ipc.launch_request(['--add', 'Call', '--at', '+30m']),
+                         {"command": "add", "title": "Call", "at": "+30m"})
+        self.assertEqual(reminder_ipc.launch_request(['--add=Call', '--at=09:00']),
+                         {"command": "add", "title": "Call", "at": "09:00"})
+        self.assertEqual(reminder_ipc.launch_request(['--startup-mode', 'minimized_only']), {"command": "ping"})
+        self.assertIsNone(reminder_ipc.launch_request(['--startup-mode', 'startup_check_only']))
+        self.assertIsNone(reminder_ipc.launch_request(['startup_check']))
+
+if __name__ == '__main__':
+    unittest.main()
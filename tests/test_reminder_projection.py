@@ -0,0 +1,127 @@
+import unittest
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_projection
+
+def fire_series(reminder, end_date):
+    """What the scheduler would fire: follow build_next_occurrence until past end_date."""
+    fired = []
+    while reminder and reminder["date"] <= end_date:
+        fired.append((reminder["date"], reminder["time"], reminder["title"]))
+        reminder = reminder_core.build_next_occurrence(dict(reminder)) if reminder.get("recurrence_type") else None
+    return fired
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        # Future dates, so the scheduler's "not before today" clamp never applies
+        self.start, self.end = date(2031, 1, 1), date(2031, 12, 31)
+        self.reminders = [reminder_core.new_reminder_record("Once", "2031-03-05", "10:00")]
+        for recurrence_type in ("daily", "weekdays", "weekly", "biweekly", "monthly", "yearly"):
+            self.reminders.append(reminder_core.new_reminder_record(recurrence_type, "2031-01-31", "08:00", recurrence_type))
+        self.reminders.append(reminder_core.new_reminder_record("Five times", "2031-02-01", "09:00", "weekly", "occurrences", 5))
+        self.reminders.append(reminder_core.new_reminder_record("Until May", "2031-02-01", "07:30", "monthly", "date", "2031-05-01"))
+        done = reminder_core.new_reminder_record("Fired", "2031-01-02", "09:00")
+        done["notified_individually"] = True
+        self.reminders.append(done)
+
+    def expected(self, reminders):
+        fired = []
+        for reminder in reminders:
+            if not reminder["notified_individually"]:
+                fired.extend(fire_series(reminder, self.end.strftime("%Y-%m-%d")))
+        return sorted(fired)
+
+    def test_matches_scheduler_for_every_recurrence_and_end_condition(self):
+        projected = list(reminder_projection.project_agenda(self.reminders, self.start, self.end, workers=1))
+        self.assertEqual(sorted((d, t, title) for d, t, _, title in projected), self.expected(self.reminders))
+        self.assertEqual(projected, sorted(projected, key=reminder_projection.DUE_ORDER))
+        self.assertEqual(len([o for o in projected if o[3] == "Five times"]), 6) # The head plus five successors
+        self.assertEqual([o[0] for o in projected if o[3] == "Until May"], ["2031-02-01", "2031-03-01", "2031-04-01", "2031-05-01"])
+
+    def test_range_is_clipped(self):
+        projected = list(reminder_projection.project_agenda(self.reminders, date(2031, 3, 1), date(2031, 3, 7), workers=1))
+        self.assertTrue(all("2031-03-01" <= o[0] <= "2031-03-07" for o in projected))
+        self.assertIn(("2031-03-05", "10:00"), [(o[0], o[1]) for o in projected])
+        self.assertEqual(len([o for o in projected if o[3] == "daily"]), 7)
+
+    def test_process_pool_merges_in_date_order(self):
+        reminders = self.reminders * 30
+        serial = list(reminder_projection.project_agenda(reminders, self.start, self.end, workers=1))
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parallel = list(reminder_projection.project_agenda(reminders, self.start, self.end, workers=2, executor=executor))
+        self.assertEqual(sorted(parallel), sorted(serial))
+        self.assertEqual(parallel, sorted(parallel, key=reminder_projection.DUE_ORDER))
+
+    def test_projected_agenda_query(self):
+        days = reminder_projection.projected_agenda_query(self.reminders, 3, start_date=date(2031, 2, 1))
+        self.assertEqual([d["date"] for d in days], ["2031-02-01", "2031-02-02", "2031-02-03"])
+        self.assertIn("Five times", [r["title"] for r in days[0]["reminders"]])
+
+class TestMonthCountCache(unittest.TestCase):
+    def setUp(self):
+        self.reminders = [reminder_core.new_reminder_record("Once", "2031-03-05", "10:00"),
+                          reminder_core.new_reminder_record("Also once", "2031-03-05", "11:00"),
+                          reminder_core.new_reminder_record("Weekly", "2031-03-10", "08:00", "weekly")]
+        fired = reminder_core.new_reminder_record("Fired", "2031-03-01", "08:00")
+        fired["notified_individually"] = True
+        self.reminders.append(fired)
+        self.loads = 0
+        def load():
+            self.loads += 1
+            return self.reminders
+        self.cache = reminder_projection.MonthCountCache(load)
+
+    def test_counts_include_projected_and_fired(self):
+        march = self.cache.counts_for_month(2031, 3)
+        self.assertEqual(march, {"2031-03-01": 1, "2031-03-05": 2, "2031-03-10": 1, "2031-03-17": 1,
+                                 "2031-03-24": 1, "2031-03-31": 1})
+        self.assertEqual(self.cache.counts_for_month(2031, 4)["2031-04-07"], 1)
+
+    def test_paging_is_cached_and_invalidation_is_per_month(self):
+        for month in (3, 4, 5, 3, 4, 5):
+            self.cache.counts_for_month(2031, month)
+        self.assertEqual(self.loads, 3)
+        self.cache.invalidate_for([{"date": "2031-04-20", "recurrence_type": None}])
+        self.assertEqual(self.cache.cached_months(), [(2031, 3), (2031, 5)])
+        self.cache.invalidate_for([{"date": "2031-03-10", "recurrence_type": "weekly"}])
+        self.assertEqual(self.cache.cached_months(), []) # A series touches its month and every later one
+
+class TestSlotIndex(unittest.TestCase):
+    def setUp(self):
+        self.today = date(2031, 3, 3) # A Monday
+        self.daily = reminder_core.new_reminder_record("Pills", "2031-03-03", "09:00", "daily")
+        self.weekdays = reminder_core.new_reminder_record("Standup", "2031-03-03", "09:00", "weekdays")
+        self.once = reminder_core.new_reminder_record("Dentist", "2031-03-05", "09:00")
+        fired = reminder_core.new_reminder_record("Fired", "2031-03-05", "09:00")
+        fired["notified_individually"] = True
+        self.index = reminder_projection.SlotIndex(lookahead_days=14)
+        self.index.rebuild([self.daily, self.weekdays, self.once, fired], today=self.today)
+
+    def test_conflicts_include_projected_occurrences(self):
+        self.assertEqual(sorted(title for *_, title in self.index.at("2031-03-05", "09:00")), ["Dentist", "Pills", "Standup"])
+        self.assertEqual([title for *_, title in self.index.at("2031-03-08", "09:00")], ["Pills"]) # Saturday
+        self.assertEqual(self.index.at("2031-03-05", "09:05"), [])
+        self.assertEqual(len(self.index.at("2031-03-05", "09:05", window_minutes=5)), 3)
+        self.assertEqual(len(self.index.at("2031-03-05", "09:00", exclude_id=self.once["id"])), 2)
+        self.assertEqual(self.index.at("2031-03-20", "09:00"), []) # Past the lookahead
+        self.assertEqual(self.index.at("2031-03-05", "bad"), [])
+
+    def test_busiest_and_incremental_updates(self):
+        busiest = self.index.busiest(2)
+        self.assertEqual([(slot["date"], slot["count"]) for slot in busiest], [("2031-03-05", 3), ("2031-03-03", 2)])
+        self.index.upsert(dict(self.once, time="10:00"))
+        self.index.discard(self.weekdays["id"])
+        self.assertEqual(self.index.busiest(), []) # Nothing shares a minute any more
+        self.assertEqual(len(self.index), 14 + 1)
+        self.index.upsert(dict(self.daily, notified_individually=True))
+        self.assertEqual(len(self.index), 1)
+
+if __name__ == '__main__':
+    unittest.main()
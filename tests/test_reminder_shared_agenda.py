@@ -0,0 +1,112 @@
+import unittest
+import os
+import struct
+import sys
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_shared_agenda
+from reminder_core import agenda_query, new_reminder_record, to_epoch, write_reminders_file
+from reminder_state import RuntimeState, state_file_path
+
+class TestSharedAgenda(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, "reminders.json")
+        self.today = date.today()
+        self.writer = reminder_shared_agenda.AgendaWriter(self.data_path)
+
+    def tearDown(self):
+        self.writer.close()
+        self.test_dir.cleanup()
+
+    def day(self, offset):
+        return (self.today + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+    def store(self, reminders):
+        write_reminders_file(self.data_path, reminders)
+        return reminders
+
+    def test_roundtrip_matches_agenda_query_with_flags(self):
+        done = new_reminder_record("Call the bank", self.day(0), "09:00")
+        done["notified_individually"] = True
+        reminders = self.store([new_reminder_record("Früh aufstehen ☀", self.day(0), "07:30", "daily"), done,
+                                new_reminder_record("Dentist", self.day(2), "15:00"),
+                                new_reminder_record("Too far out", self.day(30), "10:00")])
+        self.assertEqual(self.writer.publish(reminders), 3)
+
+        snapshot = reminder_shared_agenda.read_agenda(self.data_path)
+        self.assertTrue(snapshot.usable_for(self.today, 7))
+        self.assertFalse(snapshot.usable_for(self.today, 30))
+        self.assertEqual([r["title"] for r in snapshot.day(self.today)], ["Früh aufstehen ☀", "Call the bank"])
+        self.assertTrue(snapshot.day(self.today)[1]["notified_individually"])
+        self.assertEqual(snapshot.agenda(self.today, 7), agenda_query(reminders, 7))
+
+    def test_long_titles_are_flagged_and_snoozes_marked(self):
+        reminder = new_reminder_record("x" * 200, self.day(1), "08:00")
+        self.store([reminder])
+        RuntimeState(state_file_path(self.data_path)).snooze(reminder, to_epoch(datetime.strptime(f"{self.day(1)} 08:10", "%Y-%m-%d %H:%M")))
+        effective = RuntimeState(state_file_path(self.data_path)).apply([reminder])
+        self.writer.publish(effective)
+
+        record = reminder_shared_agenda.read_agenda(self.data_path).reminders[0]
+        self.assertTrue(record["snoozed"])
+        self.assertTrue(record["title_truncated"])
+        self.assertEqual(record["time"], "08:10")
+        snapshot = reminder_shared_agenda.read_agenda(self.data_path)
+        self.assertTrue(snapshot.usable_for(self.today)) # Today is whole
+        self.assertFalse(snapshot.usable_for(self.today, 2))
+
+    def test_store_change_makes_it_stale_until_republished(self):
+        reminders = self.store([new_reminder_record("Standup", self.day(0), "10:00")])
+        self.writer.publish(reminders)
+        reminders = self.store(reminders + [new_reminder_record("Lunch with Sam", self.day(0), "12:30")])
+        self.assertIsNone(reminder_shared_agenda.read_agenda(self.data_path))
+        self.assertEqual(len(reminder_shared_agenda.read_agenda(self.data_path, check_source=False).reminders), 1)
+
+        self.writer.publish(reminders)
+        self.assertEqual(len(reminder_shared_agenda.read_agenda(self.data_path).reminders), 2)
+
+    def test_reader_never_sees_a_torn_write_and_follows_growth(self):
+        small = [new_reminder_record(f"Small {n}", self.day(0), "09:00") for n in range(3)]
+        large = [new_reminder_record(f"Large {n}", self.day(1), f"{n % 24:02d}:00")
+                 for n in range(reminder_shared_agenda.MIN_CAPACITY + 50)]
+        self.writer.publish(small, source_keys=((0, 0, 0), (0, 0, 0)))
+        reader = reminder_shared_agenda.AgendaReader(self.data_path)
+        self.addCleanup(reader.close)
+        self.assertEqual(len(reader.read(check_source=False).reminders), 3)
+
+        stop = threading.Event()
+        def publish_alternately():
+            n = 0
+            while not stop.is_set():
+                self.writer.publish(small if n % 2 else large)
+                n += 1
+        writer_thread = threading.Thread(target=publish_alternately)
+        writer_thread.start()
+        try:
+            for _ in range(300):
+                snapshot = reader.read(check_source=False)
+                if snapshot is None:
+                    continue
+                prefixes = {r["title"].split()[0] for r in snapshot.reminders}
+                self.assertEqual(len(prefixes), 1, "mixed records from two publishes")
+                self.assertIn(len(snapshot.reminders), (len(small), len(large)))
+        finally:
+            stop.set()
+            writer_thread.join()
+        self.writer.publish(large)
+        self.assertEqual(len(reader.read(check_source=False).reminders), len(large)) # Remapped past MIN_CAPACITY
+
+    def test_write_in_progress_is_not_read(self):
+        reminders = self.store([new_reminder_record("Standup", self.day(0), "10:00")])
+        self.writer.publish(reminders)
+        struct.pack_into("<Q", self.writer._map, reminder_shared_agenda.SEQUENCE_OFFSET, self.writer.sequence + 1)
+        self.assertIsNone(reminder_shared_agenda.read_agenda(self.data_path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_simulation
+import reminder_state
+
+class TestSimulatedClock(unittest.TestCase):
+    def test_waiting_moves_virtual_time_only(self):
+        clock = reminder_core.SimulatedClock(datetime(2028, 2, 28, 23, 59, 30))
+        stop_event = threading.Event()
+        self.assertFalse(clock.wait(60, stop_event))
+        self.assertEqual(clock.now(), datetime(2028, 2, 29, 0, 0, 30))
+        stop_event.set()
+        self.assertTrue(clock.wait(3600 * 24, stop_event))
+        self.assertEqual(clock.today().isoformat(), "2028-03-01")
+
+class TestSchedulerSimulation(unittest.TestCase):
+    def simulate(self, reminders, start, until, **kwargs):
+        simulation = reminder_simulation.SchedulerSimulation(reminders, reminder_core.SimulatedClock(start), **kwargs)
+        return simulation, simulation.run(until)
+
+    def test_records_every_firing_over_simulated_months(self):
+        reminders = [reminder_core.new_reminder_record("Rent", "2028-01-31", "09:00", "monthly"),
+                     reminder_core.new_reminder_record("Gym", "2028-01-03", "07:30:15", "weekdays", "occurrences", 3),
+                     reminder_core.new_reminder_record("Trip", "2028-02-29", "23:59")]
+        simulation, firings = self.simulate(reminders, datetime(2028, 1, 1), datetime(2028, 5, 1))
+        occurrences = [(title, occurrence) for _, _, title, occurrence in firings]
+        self.assertEqual([o for t, o in occurrences if t == "Rent"],
+                         ["2028-01-31 09:00", "2028-02-29 09:00", "2028-03-29 09:00", "2028-04-29 09:00"])
+        self.assertEqual([o for t, o in occurrences if t == "Gym"],
+                         ["2028-01-03 07:30:15", "2028-01-04 07:30:15", "2028-01-05 07:30:15", "2028-01-06 07:30:15"])
+        self.assertIn(("Trip", "2028-02-29 23:59"), occurrences)
+        # Each firing happens on the due second, and the clock ends where it was asked to
+        self.assertEqual(firings[0][0], reminder_core.to_epoch(datetime(2028, 1, 3, 7, 30, 15)))
+        self.assertEqual(simulation.clock.now(), datetime(2028, 5, 1))
+
+    def test_compacts_only_past_the_threshold(self):
+        reminders = [reminder_core.new_reminder_record(f"Daily {n}", "2028-01-01", f"{n:02d}:00", "daily") for n in range(5)]
+        start, until = datetime(2028, 1, 1), datetime(2028, 3, 1)
+        _, uncompacted = self.simulate(reminders, start, until, compact_days=0)
+        simulation, firings = self.simulate(reminders, start, until, compact_entries=3)
+        self.assertEqual(firings, uncompacted)
+        # Five firings a day against a threshold of fifteen entries: not every midnight, but every few
+        self.assertGreater(simulation.compactions, 10)
+        self.assertLess(simulation.compactions, 40)
+        self.assertLess(simulation.state.entry_count, 15 + 5)
+
+    def test_state_on_disk_fires_the_same(self):
+        reminders = [reminder_core.new_reminder_record("Rent", "2028-01-31", "09:00", "monthly"),
+                     reminder_core.new_reminder_record("Gym", "2028-01-03", "07:30", "weekdays", "occurrences", 30)]
+        start, until = datetime(2028, 1, 1), datetime(2028, 4, 1)
+        _, in_memory = self.simulate(reminders, start, until)
+        with tempfile.TemporaryDirectory() as work_dir:
+            state = reminder_state.RuntimeState(reminder_state.state_file_path(os.path.join(work_dir, "reminders.json")))
+            _, on_disk = self.simulate(reminders, start, until, state=state)
+            self.assertTrue(os.path.exists(state.path))
+        self.assertEqual(on_disk, in_memory)
+
+    def test_overdue_reminders_fire_at_start(self):
+        reminders = [reminder_core.new_reminder_record("Late", "2028-01-01", "08:00", "daily")]
+        _, firings = self.simulate(reminders, datetime(2028, 1, 3, 12, 0), datetime(2028, 1, 5))
+        self.assertEqual([occurrence for _, _, _, occurrence in firings],
+                         ["2028-01-01 08:00", "2028-01-04 08:00"])
+
+if __name__ == '__main__':
+    unittest.main()
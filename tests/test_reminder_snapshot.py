@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_snapshot
+import reminder_watch
+
+def day(offset):
+    return (date.today() + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+class TestWarmStartSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, "reminders.json")
+        self.reminders = [reminder_core.new_reminder_record(f"D{offset}", day(offset), "08:00") for offset in (-90, 0, 3, 200)]
+        self.reminders.append(reminder_core.new_reminder_record("Weekly", day(-20), "07:00", "weekly"))
+        reminder_core.write_reminders_file(self.data_path, self.reminders)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_round_trip_restores_parsed_and_indexed_state(self):
+        reminder_snapshot.build_snapshot(self.data_path)
+        warm = reminder_snapshot.load_warm_start(self.data_path)
+        self.assertIsNotNone(warm)
+        self.assertEqual(warm.all_reminders(), reminder_core.read_reminders_file(self.data_path)[0])
+        self.assertEqual(sorted(r["title"] for r in warm.hot), ["D0", "D3", "Weekly"])
+        self.assertEqual([r["title"] for r in warm.todays_reminders()], ["D0"])
+        self.assertEqual((warm.meta["records"], warm.meta["unstamped"], warm.meta["oldest_date"]), (5, 0, day(-90)))
+
+        index, expected = reminder_core.NextDueIndex(), reminder_core.NextDueIndex()
+        index.restore(warm.section("due"))
+        expected.rebuild(self.reminders)
+        self.assertEqual(index.peek(10), expected.peek(10))
+        watcher = reminder_watch.StoreWatcher(self.data_path)
+        watcher.restore(lambda: warm.section("known"), warm.source_stat_key)
+        self.assertFalse(watcher.changed_on_disk())
+        self.assertFalse(watcher.check())
+
+    def test_stale_or_foreign_snapshots_are_ignored(self):
+        reminder_snapshot.build_snapshot(self.data_path)
+        # Same bytes, new mtime (a copy or a restore): confirmed by the hash
+        os.utime(self.data_path, ns=(1, 1))
+        self.assertIsNotNone(reminder_snapshot.load_warm_start(self.data_path))
+        # Different content
+        reminder_core.write_reminders_file(self.data_path, self.reminders[:2])
+        self.assertIsNone(reminder_snapshot.load_warm_start(self.data_path))
+        # Too old for today's hot window, wrong version, or garbage
+        reminder_snapshot.build_snapshot(self.data_path, today=date.today() - timedelta(days=30))
+        self.assertIsNone(reminder_snapshot.load_warm_start(self.data_path))
+        reminder_snapshot.build_snapshot(self.data_path)
+        path = reminder_snapshot.snapshot_path(self.data_path)
+        with open(path, 'r+b') as f:
+            f.seek(8)
+            f.write(b"\xff\xff")
+        self.assertIsNone(reminder_snapshot.load_warm_start(self.data_path))
+        with open(path, 'wb') as f:
+            f.write(b"junk")
+        self.assertIsNone(reminder_snapshot.load_warm_start(self.data_path))
+
+    def test_keeper_rebuilds_only_when_stale(self):
+        keeper = reminder_snapshot.SnapshotKeeper(self.data_path)
+        self.assertTrue(keeper.refresh_if_stale())
+        self.assertFalse(keeper.refresh_if_stale())
+        reminder_core.write_reminders_file(self.data_path, self.reminders[:1])
+        keeper.refresh_in_background().join(5)
+        self.assertEqual(reminder_snapshot.load_warm_start(self.data_path).meta["records"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import remainder
+import reminder_soak
+
+class LeakyNotificationCenter(reminder_soak.StubNotificationCenter):
+    """Keeps a 'widget' for every alert it was ever shown, like a popup that is hidden but never destroyed."""
+    def __init__(self):
+        super().__init__()
+        self.retained = []
+
+    def __call__(self, title, time_24h, reminder_id=None, due_at=None, occurrence=None):
+        super().__call__(title, time_24h, reminder_id, due_at, occurrence)
+        self.retained.append(title)
+
+    def widget_count(self):
+        return len(self.retained)
+
+class TestGrowthCheck(unittest.TestCase):
+    def test_steady_growth_fails_and_noise_passes(self):
+        leaking = [{"widgets": day, "store_bytes": 50000} for day in range(20)]
+        self.assertEqual([f.split()[0] for f in reminder_soak.growth_failures(leaking)], ["widgets"])
+        noisy = [{"widgets": 12 + day % 3, "store_bytes": 50000 + (day * 7919) % 3000} for day in range(20)]
+        self.assertEqual(reminder_soak.growth_failures(noisy), [])
+
+class TestSoakRun(unittest.TestCase):
+    def test_short_soak_is_flat_and_restores_the_app(self):
+        names = list(reminder_soak.scratch_store_globals(remainder.DATA_FILE))
+        before = {name: getattr(remainder, name) for name in names}
+        duplicate_keys, watched = dict(remainder.duplicate_index._keys), dict(remainder.store_watcher._known)
+        report = reminder_soak.SoakRun(days=10, reminder_count=40, seed=3).run()
+        self.assertTrue(report.ok, str(report))
+        self.assertEqual(len(report.samples), 9) # One per simulated midnight before the end
+        self.assertGreater(report.fired, 0)
+        for name in names:
+            self.assertIs(getattr(remainder, name), before[name], name)
+        # Nothing from the scratch store was left in the app's indexes
+        self.assertEqual(remainder.duplicate_index._keys, duplicate_keys)
+        self.assertEqual(len(remainder.next_due_index), 0)
+        self.assertEqual(remainder.store_watcher._known, watched)
+
+    def test_leaking_notifier_is_caught(self):
+        report = reminder_soak.SoakRun(days=10, reminder_count=40, seed=3, notifier=LeakyNotificationCenter()).run()
+        self.assertFalse(report.ok)
+        self.assertIn("widgets", "\n".join(report.failures))
+
+    @unittest.skipUnless(os.environ.get("DISPLAY"), "needs a display for Tk")
+    def test_notification_window_does_not_accumulate_widgets(self):
+        report = reminder_soak.SoakRun(days=6, reminder_count=30, seed=3,
+                                       notifier=reminder_soak.TkNotificationCenter()).run()
+        self.assertTrue(report.ok, str(report))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_state
+
+class TestRuntimeState(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.test_dir.name, "reminders.json")
+        self.state = reminder_state.RuntimeState(reminder_state.state_file_path(self.data_path))
+        self.daily = reminder_core.new_reminder_record("Standup", "2030-01-10", "09:00", "daily")
+        self.once = reminder_core.new_reminder_record("Dentist", "2030-01-10", "14:00")
+        reminder_core.write_reminders_file(self.data_path, [self.daily, self.once])
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_firing_moves_series_without_touching_store(self):
+        occurrence, current = self.state.advance(self.daily)
+        self.assertEqual((occurrence["date"], current["date"]), ("2030-01-10", "2030-01-11"))
+        self.assertFalse(current["notified_individually"])
+        _, done = self.state.advance(self.once)
+        self.assertTrue(done["notified_individually"])
+        self.assertEqual(reminder_core.read_reminders_file(self.data_path)[0], [self.daily, self.once])
+
+        # Snoozing the occurrence that fired re-arms it; the series keeps its place
+        until = int(datetime(2030, 1, 10, 9, 10).timestamp())
+        snoozed = self.state.snooze(self.daily, until, occurrence="2030-01-10 09:00")
+        self.assertEqual((snoozed["date"], snoozed["time"], snoozed["occurrence"]), ("2030-01-10", "09:10", "2030-01-10 09:00"))
+        self.assertFalse(snoozed["notified_individually"])
+        _, current = self.state.advance(self.daily)
+        self.assertEqual(current["date"], "2030-01-11")
+        self.assertEqual(current["occurrence"], "2030-01-11 09:00")
+
+    def test_snoozed_one_off_stays_where_it_fired(self):
+        self.state.advance(self.once)
+        until = int(datetime(2030, 1, 12, 8, 30).timestamp())
+        self.state.snooze(self.once, until, occurrence="2030-01-10 14:00")
+        occurrence, current = self.state.advance(self.once)
+        self.assertEqual((occurrence["date"], occurrence["time"]), ("2030-01-12", "08:30"))
+        self.assertEqual((current["date"], current["time"], current["notified_individually"]), ("2030-01-12", "08:30", True))
+        self.assertEqual(current["due_epoch"], until)
+
+    def test_refresh_picks_up_other_writers(self):
+        other = reminder_state.RuntimeState(self.state.path)
+        self.assertEqual(other.apply([self.once])[0]["notified_individually"], False)
+        self.state.advance(self.once, "dismissed")
+        self.assertTrue(other.apply([self.once])[0]["notified_individually"])
+        # A half-written line is left for the next read
+        with open(self.state.path, 'a', encoding='utf-8') as f:
+            f.write('{"id": "x", "occ"')
+        self.assertEqual(other.ids(), {self.once["id"]})
+
+    def test_edit_clears_state_and_compaction_keeps_effect(self):
+        for _ in range(3):
+            self.state.advance(self.daily)
+        self.state.advance(self.daily, "dismissed")
+        self.state.advance(self.daily)
+        expected = self.state.apply([self.daily, self.once])
+        dropped = self.state.compact([self.daily, self.once], today=date(2030, 1, 12)) # Keeps two done entries that were cursors too
+        self.assertGreater(dropped, 0)
+        self.assertEqual(reminder_state.RuntimeState(self.state.path).apply([self.daily, self.once]), expected)
+        self.assertEqual(expected[0]["date"], (date(2030, 1, 10) + timedelta(days=5)).strftime("%Y-%m-%d"))
+
+        self.state.clear([self.daily["id"]])
+        self.assertEqual(self.state.effective(self.daily)["date"], "2030-01-10")
+
+    def test_memory_state_matches_log_without_a_file(self):
+        memory = reminder_state.MemoryRuntimeState()
+        until = int(datetime(2030, 1, 10, 9, 10).timestamp())
+        for state in (self.state, memory):
+            for _ in range(3):
+                state.advance(self.daily)
+            state.snooze(self.daily, until, occurrence="2030-01-12 09:00")
+            state.advance(self.once, "dismissed")
+            state.compact([self.daily, self.once], today=date(2030, 1, 12))
+        self.assertEqual(memory.apply([self.daily, self.once]), self.state.apply([self.daily, self.once]))
+        self.assertEqual(memory.entry_count, self.state.entry_count)
+        # Only the file-backed state wrote anything
+        self.assertEqual(sorted(os.listdir(self.test_dir.name)),
+                         ["reminders.json", "reminders.state.jsonl", "reminders.state.jsonl.lock"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reminder_core
+import reminder_watch
+from tests.scratch_store import use_scratch_store
+
+class TestStoreWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "reminders.json")
+        self.reminders = [reminder_core.new_reminder_record(title, "2031-03-05", "10:00") for title in ("A", "B", "C")]
+        reminder_core.write_reminders_file(self.path, self.reminders)
+        self.watcher = reminder_watch.StoreWatcher(self.path)
+        self.watcher.adopt(self.reminders)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_per_record_diff_by_id(self):
+        edited = [dict(r) for r in self.reminders]
+        edited[0]["time"] = "11:00"
+        del edited[1]
+        edited.append(reminder_core.new_reminder_record("D", "2031-03-06", "09:00"))
+        reminder_core.write_reminders_file(self.path, edited)
+        self.assertTrue(self.watcher.changed_on_disk())
+        changes = self.watcher.check()
+        self.assertEqual([r["title"] for r in changes.added], ["D"])
+        self.assertEqual([(old["time"], new["time"]) for old, new in changes.changed], [("10:00", "11:00")])
+        self.assertEqual([r["title"] for r in changes.removed], ["B"])
+        self.assertFalse(self.watcher.check()) # Adopted; nothing new
+        self.assertFalse(self.watcher.changed_on_disk())
+
+    def test_own_saves_and_key_order_are_not_changes(self):
+        reordered = [dict(reversed(list(r.items()))) for r in reversed(self.reminders)]
+        reminder_core.write_reminders_file(self.path, reordered)
+        self.assertFalse(self.watcher.adopt(reordered))
+        self.assertFalse(self.watcher.check())
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "reminders.json")
+        reminder_core.write_reminders_file(self.path, [])
+        self.changed = threading.Event()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def assert_detects_replace(self, use_inotify):
+        watcher = reminder_watch.FileWatcher(self.path, self.changed.set, poll_interval=0.05, use_inotify=use_inotify)
+        watcher.start()
+        try:
+            # Unrelated files in the same directory are ignored
+            with open(os.path.join(self.test_dir.name, "app_config.json"), "w") as f:
+                f.write("{}")
+            self.assertFalse(self.changed.wait(0.3))
+            reminder_core.write_reminders_file(self.path, [reminder_core.new_reminder_record("A", "2031-03-05", "10:00")])
+            self.assertTrue(self.changed.wait(5))
+        finally:
+            watcher.stop()
+        return watcher.backend
+
+    def test_polling_fallback(self):
+        self.assertEqual(self.assert_detects_replace(use_inotify=False), "polling")
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify(self):
+        self.assertIn(self.assert_detects_replace(use_inotify=True), ("inotify", "polling"))
+
+class TestAppAppliesExternalChanges(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.test_dir.cleanup)
+        self.app = remainder = use_scratch_store(self, os.path.join(self.test_dir.name, "reminders.json"))
+        self.kept = reminder_core.new_reminder_record("Kept", "2031-03-05", "10:00")
+        remainder.save_reminders([self.kept])
+        remainder.next_due_index.rebuild([self.kept])
+        remainder.month_counts.counts_for_month(2031, 3)
+
+    def write_externally(self, reminders):
+        reminder_core.write_reminders_file(self.app.DATA_FILE, reminders)
+
+    def test_watcher_callback_applies_only_changed_records(self):
+        added = reminder_core.new_reminder_record("Added elsewhere", "2031-03-01", "08:00")
+        self.write_externally([self.kept, added])
+        self.app.check_store_for_external_changes()
+        self.assertEqual([entry["title"] for entry in self.app.next_due_index.peek(2)], ["Added elsewhere", "Kept"])
+        self.assertEqual(self.app.month_counts.cached_months(), [])
+        self.app.check_store_for_external_changes() # A second event for the same write changes nothing
+        self.assertEqual(len(self.app.next_due_index), 2)
+
+    def test_own_save_picks_up_unseen_external_changes(self):
+        moved = dict(self.kept, date="2031-01-01")
+        self.write_externally([moved]) # The watcher hasn't run yet
+        self.app.save_reminders(self.app.load_reminders())
+        self.assertEqual(self.app.next_due_index.peek(1)[0]["due"].date().isoformat(), "2031-01-01")
+
+if __name__ == '__main__':
+    unittest.main()